@@ -0,0 +1,82 @@
+"""
+Ajuste de stock en lote.
+
+Aplica una lista de `{id, delta}` sobre una tabla de inventario en una sola
+transacción:
+- Bloquea todas las filas involucradas con un único SELECT ... FOR UPDATE,
+  ordenado por la clave para que dos lotes concurrentes tomen los locks en el
+  mismo orden (sin deadlocks).
+- Valida todo antes de escribir: si falta alguna fila o algún ajuste deja
+  stock negativo no se modifica nada.
+- Escribe todos los cambios (y el resumen de stock) y hace un único commit.
+"""
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from cache import cache
+from models import InventarioPV
+from resumen_stock import CambiosResumen
+from schemas import AjusteLoteItem
+
+# Cantidad máxima de ítems aceptada por lote
+MAX_ITEMS_LOTE = 5000
+
+
+def ajustar_en_lote(db: Session, columna_clave, items: List[AjusteLoteItem]) -> List[dict]:
+    """
+    `columna_clave` es la columna por la que se identifican las filas
+    (p. ej. `InventarioPV.id_inventario` o `InventarioLibro.libro_id`).
+    Devuelve un resultado por ítem, en el orden recibido.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="El lote está vacío")
+    if len(items) > MAX_ITEMS_LOTE:
+        raise HTTPException(status_code=400, detail=f"El lote supera {MAX_ITEMS_LOTE} ítems")
+
+    modelo = columna_clave.class_
+    clave = columna_clave.key
+    ids = sorted({item.id for item in items})
+
+    filas = db.scalars(
+        select(modelo).where(columna_clave.in_(ids)).order_by(columna_clave).with_for_update()
+    ).all()
+    por_id = {getattr(fila, clave): fila for fila in filas}
+
+    faltantes = [i for i in ids if i not in por_id]
+    if faltantes:
+        db.rollback()
+        raise HTTPException(status_code=404, detail={"mensaje": "Inventario no encontrado", "ids": faltantes})
+
+    # Simular los ajustes en orden antes de tocar las filas
+    stock = {i: (fila.stock or 0) for i, fila in por_id.items()}
+    resultados, negativos = [], []
+    for item in items:
+        anterior = stock[item.id]
+        nuevo = anterior + item.delta
+        if nuevo < 0:
+            negativos.append({"id": item.id, "stock": anterior, "delta": item.delta})
+        stock[item.id] = nuevo
+        resultados.append({"id": item.id, "stock_anterior": anterior, "stock": nuevo})
+
+    if negativos:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail={"mensaje": "El ajuste dejaría stock negativo", "items": negativos}
+        )
+
+    # Un UPDATE del resumen por libro / punto de venta, no uno por ítem
+    cambios = CambiosResumen()
+    for i, fila in por_id.items():
+        if modelo is InventarioPV:
+            cambios.pv(fila.id_libro, fila.id_punto_venta, fila.stock or 0, stock[i], fila.stock_minimo)
+        else:
+            cambios.global_(fila.libro_id, fila.stock or 0, stock[i], fila.stock_minimo)
+        fila.stock = stock[i]
+    cambios.aplicar(db)
+    db.commit()
+    cache.invalidar("stock")
+    return resultados
@@ -0,0 +1,228 @@
+"""
+Motor de alertas de stock bajo.
+
+Cubre tres orígenes:
+- "almacen": inventario central (`inventario_libros.stock_minimo`),
+- "punto_venta": inventario por punto de venta (`inventario_pv.stock_minimo`),
+- "materia_prima": materias primas (`materias_primas.stock_minimo`).
+
+Cada tabla tiene una columna generada `bajo_minimo` (stock < stock_minimo)
+con índice, así las consultas de alertas leen solo las filas en alerta.
+
+Además publica un feed de cruces de umbral: los endpoints registran con
+`registrar_cruce` las filas que entran o salen de alerta y el evento se
+publica recién cuando la transacción hace commit (un rollback lo descarta).
+`GET /alertas/eventos` atiende el feed con long-poll. El bus vive en memoria
+del proceso: con varios workers cada uno publica solo sus propios cambios.
+"""
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import InventarioLibro, InventarioPV, Libro, MateriaPrima, PuntoVenta
+
+ORIGENES = ("almacen", "punto_venta", "materia_prima")
+
+# Eventos que conserva el bus para clientes que se reconectan
+CAPACIDAD_EVENTOS = 1000
+
+
+def bajo_minimo(stock: Optional[int], stock_minimo: Optional[int]) -> bool:
+    return stock_minimo is not None and (stock or 0) < stock_minimo
+
+
+# ============================================================
+# CONSULTAS (predicados indexados)
+# ============================================================
+def consulta_almacen():
+    return (
+        select(
+            InventarioLibro.id_inventario.label("id"),
+            InventarioLibro.libro_id,
+            Libro.nombre,
+            InventarioLibro.stock,
+            InventarioLibro.stock_minimo,
+        )
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .where(InventarioLibro.bajo_minimo == True)
+        .order_by(Libro.nombre)
+    )
+
+
+def consulta_puntos_venta(punto_venta_id: Optional[int] = None):
+    stmt = (
+        select(
+            InventarioPV.id_inventario.label("id"),
+            InventarioPV.id_libro.label("libro_id"),
+            Libro.nombre,
+            InventarioPV.id_punto_venta.label("punto_venta_id"),
+            PuntoVenta.nombre.label("punto_venta"),
+            InventarioPV.stock,
+            InventarioPV.stock_minimo,
+        )
+        .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+        .join(PuntoVenta, PuntoVenta.id_punto_venta == InventarioPV.id_punto_venta)
+        .where(InventarioPV.bajo_minimo == True)
+        .order_by(Libro.nombre, PuntoVenta.nombre)
+    )
+    if punto_venta_id is not None:
+        stmt = stmt.where(InventarioPV.id_punto_venta == punto_venta_id)
+    return stmt
+
+
+def consulta_materias_primas():
+    return (
+        select(
+            MateriaPrima.id_mp.label("id"),
+            MateriaPrima.nombre,
+            MateriaPrima.stock_actual.label("stock"),
+            MateriaPrima.stock_minimo,
+        )
+        .where(MateriaPrima.bajo_minimo == True)
+        .order_by(MateriaPrima.nombre)
+    )
+
+
+def alertas(db: Session, origenes: Iterable[str] = ORIGENES, punto_venta_id: Optional[int] = None) -> list[dict]:
+    """
+    Filas en alerta de los orígenes pedidos. Filtrar por punto de venta deja
+    solo el origen "punto_venta".
+    """
+    consultas = {
+        "almacen": consulta_almacen,
+        "punto_venta": lambda: consulta_puntos_venta(punto_venta_id),
+        "materia_prima": consulta_materias_primas,
+    }
+    if punto_venta_id is not None:
+        origenes = [o for o in origenes if o == "punto_venta"]
+
+    resultado = []
+    for origen in ORIGENES:
+        if origen in origenes:
+            resultado.extend({"origen": origen, **f._mapping} for f in db.execute(consultas[origen]()))
+    return resultado
+
+
+# ============================================================
+# BUS DE EVENTOS
+# ============================================================
+class BusEventos:
+    """
+    Buffer circular de eventos numerados más esperas asíncronas. Se publica
+    desde hilos (endpoints síncronos) y se espera desde el event loop.
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD_EVENTOS):
+        self._lock = threading.Lock()
+        self._eventos: deque = deque(maxlen=capacidad)
+        self._ultimo = 0
+        self._esperas: set = set()
+
+    @property
+    def ultimo(self) -> int:
+        with self._lock:
+            return self._ultimo
+
+    def publicar(self, eventos: list[dict]) -> None:
+        if not eventos:
+            return
+        with self._lock:
+            for datos in eventos:
+                self._ultimo += 1
+                self._eventos.append({"seq": self._ultimo, **datos})
+            esperas, self._esperas = self._esperas, set()
+        for loop, futuro in esperas:
+            loop.call_soon_threadsafe(_resolver, futuro)
+
+    def _desde(self, seq: int) -> tuple[list[dict], bool]:
+        # Sin lock: lo toma quien llama
+        reiniciar = seq > self._ultimo or (bool(self._eventos) and seq < self._eventos[0]["seq"] - 1)
+        return [e for e in self._eventos if e["seq"] > seq], reiniciar
+
+    def desde(self, seq: int) -> tuple[list[dict], bool, int]:
+        """(eventos posteriores a `seq`, hay que recargar todo, último seq)"""
+        with self._lock:
+            eventos, reiniciar = self._desde(seq)
+            return eventos, reiniciar, self._ultimo
+
+    async def esperar(
+        self, seq: int, timeout: float, filtro: Optional[Callable[[dict], bool]] = None
+    ) -> tuple[list[dict], bool, int]:
+        """
+        Como `desde`, pero si no hay eventos espera hasta `timeout` segundos.
+        Con `filtro` solo cuentan los eventos que lo cumplen: los demás no
+        cortan la espera (el último seq devuelto sí los incluye).
+        """
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + timeout
+        while True:
+            futuro = loop.create_future()
+            with self._lock:
+                eventos, reiniciar = self._desde(seq)
+                if filtro is not None:
+                    eventos = [e for e in eventos if filtro(e)]
+                restante = limite - loop.time()
+                if eventos or reiniciar or restante <= 0:
+                    return eventos, reiniciar, self._ultimo
+                self._esperas.add((loop, futuro))
+            try:
+                await asyncio.wait_for(futuro, restante)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._esperas.discard((loop, futuro))
+
+
+def _resolver(futuro: asyncio.Future) -> None:
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+bus = BusEventos()
+
+
+# ============================================================
+# REGISTRO DE CRUCES (se publican al hacer commit)
+# ============================================================
+_PENDIENTES = "alertas_stock_pendientes"
+
+
+def registrar_cruce(
+    db: Session,
+    origen: str,
+    bajo_antes: bool,
+    bajo_despues: bool,
+    stock: Optional[int],
+    stock_minimo: Optional[int],
+    **ids,
+) -> None:
+    """
+    Anota un cambio de estado de alerta (`ids`: p. ej. libro_id,
+    punto_venta_id o id_mp). No hace nada si el estado no cambió.
+    """
+    if bajo_antes == bajo_despues:
+        return
+    db.info.setdefault(_PENDIENTES, []).append({
+        "origen": origen,
+        **ids,
+        "stock": stock,
+        "stock_minimo": stock_minimo,
+        "bajo_minimo": bajo_despues,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_pendientes(session: Session) -> None:
+    bus.publicar(session.info.pop(_PENDIENTES, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session: Session) -> None:
+    session.info.pop(_PENDIENTES, None)
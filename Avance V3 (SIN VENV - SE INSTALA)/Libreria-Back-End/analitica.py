@@ -0,0 +1,410 @@
+"""
+Analítica de movimientos: rollups por hora y por día.
+
+Las tablas de movimientos (`movimientos_libros`, `movimientos_pv`,
+`movimientos_mp`) crecen sin límite; las consultas de reportes leen en cambio
+`rollup_movimientos`, con una fila por (granularidad, inicio del período,
+origen, tipo, libro, materia prima, punto de venta, usuario). Su tamaño
+depende de la cantidad de combinaciones activas por período, no del
+historial crudo.
+
+Compactación: un hilo en segundo plano (cada ROLLUP_INTERVALO segundos) o
+`python -m analitica compactar` recorre cada tabla de movimientos por id
+desde su marca (`rollup_marcas`), agrega lotes de ROLLUP_LOTE filas con
+GROUP BY y suma el resultado al rollup en la misma transacción que avanza la
+marca. La marca se toma con FOR UPDATE, así dos workers no compactan el mismo
+lote. Solo se compactan filas insertadas hace más de ROLLUP_RETRASO segundos
+según `creado_en`, que asigna la BD: un id bajo de una transacción todavía
+abierta no queda salteado mientras esa transacción dure menos que el retraso.
+`fecha_movimiento` no sirve de corte porque la puede enviar el cliente; un
+movimiento con fecha pasada llega con un id nuevo y se suma a su período
+(ya compactado) en el rollup. Las fechas futuras se rechazan al crear.
+
+Los movimientos no se modifican ni borran después de creados; si se corrige
+historia a mano, `python -m analitica reconstruir` rehace el rollup.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from models import (
+    InventarioLibro, InventarioPV, Libro, MateriaPrima, MovimientoLibro, MovimientoMP, MovimientoPV, PuntoVenta,
+    RollupMarca, RollupMovimiento, Usuario,
+)
+from soporte_sqlite import inicio_de
+
+ROLLUP_INTERVALO = float(os.getenv("ROLLUP_INTERVALO", "60"))
+ROLLUP_LOTE = int(os.getenv("ROLLUP_LOTE", "50000"))
+ROLLUP_RETRASO = float(os.getenv("ROLLUP_RETRASO", "30"))
+
+GRANULARIDADES = ("hora", "dia")
+DIMENSIONES = ("libro_id", "mp_id", "punto_venta_id", "usuario_id")
+CLAVE = ("granularidad", "inicio", "origen", "tipo", *DIMENSIONES)
+
+# Máximo de puntos de una serie (p. ej. 31 días por hora, ~3 años por día)
+MAX_PUNTOS = {"hora": 24 * 31, "dia": 366 * 3}
+
+# Filas por consulta al buscar las claves existentes del rollup
+CLAVES_POR_CONSULTA = 500
+
+
+# ============================================================
+# FUENTES
+# ============================================================
+class Fuente:
+    """Tabla de movimientos y cómo se obtiene cada dimensión del rollup."""
+
+    def __init__(self, nombre: str, origen: str, modelo, id_columna, columnas: dict, join=None):
+        self.nombre = nombre
+        self.origen = origen
+        self.modelo = modelo
+        self.id_columna = id_columna
+        self.columnas = columnas
+        self.join = join
+
+    def agregados(self, granularidad: str, desde_id: int, hasta_id: int):
+        """GROUP BY de los movimientos con id en (desde_id, hasta_id]."""
+        inicio = inicio_de(self.modelo.fecha_movimiento, granularidad)
+        # Dimensiones que la fuente no tiene (o NULL, p. ej. sin usuario) valen 0
+        dimensiones = [func.coalesce(self.columnas[d], 0) if d in self.columnas else literal(0) for d in DIMENSIONES]
+        stmt = select(
+            inicio.label("inicio"),
+            self.modelo.tipo.label("tipo"),
+            *(columna.label(d) for columna, d in zip(dimensiones, DIMENSIONES)),
+            func.count().label("movimientos"),
+            func.coalesce(func.sum(self.modelo.cantidad), 0).label("unidades"),
+        ).select_from(self.modelo)
+        if self.join is not None:
+            stmt = stmt.join(*self.join)
+        return (
+            stmt.where(self.id_columna > desde_id, self.id_columna <= hasta_id)
+            .group_by(inicio, self.modelo.tipo, *(self.columnas[d] for d in DIMENSIONES if d in self.columnas))
+        )
+
+
+FUENTES = [
+    Fuente(
+        "movimientos_libros", "almacen", MovimientoLibro, MovimientoLibro.id_mov_libro,
+        {"libro_id": InventarioLibro.libro_id, "usuario_id": MovimientoLibro.usuario_id},
+        join=(InventarioLibro, InventarioLibro.id_inventario == MovimientoLibro.inventario_id),
+    ),
+    Fuente(
+        "movimientos_pv", "punto_venta", MovimientoPV, MovimientoPV.id_mov_pv,
+        {
+            "libro_id": InventarioPV.id_libro,
+            "punto_venta_id": InventarioPV.id_punto_venta,
+            "usuario_id": MovimientoPV.usuario_id,
+        },
+        join=(InventarioPV, InventarioPV.id_inventario == MovimientoPV.inventario_pv_id),
+    ),
+    Fuente(
+        "movimientos_mp", "materia_prima", MovimientoMP, MovimientoMP.id_mov_mp,
+        {"mp_id": MovimientoMP.mp_id, "usuario_id": MovimientoMP.usuario_id},
+    ),
+]
+
+
+# ============================================================
+# COMPACTACIÓN
+# ============================================================
+def _valor(tipo) -> str:
+    return getattr(tipo, "value", tipo)
+
+
+def _inicio(valor) -> datetime:
+    return valor if isinstance(valor, datetime) else datetime.fromisoformat(str(valor))
+
+
+def _marca(db: Session, fuente: Fuente) -> RollupMarca:
+    marca = db.scalars(select(RollupMarca).where(RollupMarca.fuente == fuente.nombre).with_for_update()).first()
+    if marca is None:
+        # Las marcas se crean en la migración; esto cubre bases armadas a mano
+        db.execute(insert(RollupMarca).values(fuente=fuente.nombre, ultimo_id=0))
+        marca = db.scalars(select(RollupMarca).where(RollupMarca.fuente == fuente.nombre).with_for_update()).one()
+    return marca
+
+
+def _hasta(db: Session, fuente: Fuente, desde_id: int, limite: datetime) -> tuple[int, bool]:
+    """
+    Último id del próximo lote y si el lote llega al final de lo compactable.
+    El lote se corta antes de la primera fila insertada después de `limite`
+    (sin `creado_en`, de antes de la migración v0008, cuenta como vieja).
+    """
+    filas = db.execute(
+        select(fuente.id_columna, fuente.modelo.creado_en)
+        .where(fuente.id_columna > desde_id)
+        .order_by(fuente.id_columna)
+        .limit(ROLLUP_LOTE)
+    ).all()
+    hasta = desde_id
+    for id_fila, creado_en in filas:
+        if creado_en is not None and creado_en > limite:
+            return hasta, True
+        hasta = id_fila
+    return hasta, len(filas) < ROLLUP_LOTE
+
+
+def _sumar_al_rollup(db: Session, fuente: Fuente, filas: list[dict]) -> None:
+    """Suma los agregados del lote: UPDATE de las claves existentes e INSERT del resto."""
+    deltas: dict[tuple, list[int]] = {}
+    for fila in filas:
+        clave = tuple(fila[c] for c in CLAVE)
+        acumulado = deltas.setdefault(clave, [0, 0])
+        acumulado[0] += fila["movimientos"]
+        acumulado[1] += fila["unidades"]
+
+    columnas_clave = [getattr(RollupMovimiento, c) for c in CLAVE]
+    claves = list(deltas)
+    actualizar = []
+    for i in range(0, len(claves), CLAVES_POR_CONSULTA):
+        existentes = db.execute(
+            select(RollupMovimiento.id_rollup, RollupMovimiento.movimientos, RollupMovimiento.unidades,
+                   *columnas_clave)
+            .where(tuple_(*columnas_clave).in_(claves[i:i + CLAVES_POR_CONSULTA]))
+        ).all()
+        for fila in existentes:
+            movimientos, unidades = deltas.pop(tuple(getattr(fila, c) for c in CLAVE))
+            actualizar.append({
+                "id_rollup": fila.id_rollup,
+                "movimientos": fila.movimientos + movimientos,
+                "unidades": fila.unidades + unidades,
+            })
+
+    if actualizar:
+        db.execute(update(RollupMovimiento), actualizar)
+    if deltas:
+        db.execute(insert(RollupMovimiento), [
+            dict(zip(CLAVE, clave), movimientos=movimientos, unidades=unidades)
+            for clave, (movimientos, unidades) in deltas.items()
+        ])
+
+
+def compactar_lote(db: Session, fuente: Fuente, ahora: Optional[datetime] = None) -> tuple[int, bool]:
+    """Compacta un lote de `fuente` y hace commit. Devuelve (filas compactadas, al día)."""
+    limite = (ahora or datetime.now()) - timedelta(seconds=ROLLUP_RETRASO)
+    marca = _marca(db, fuente)
+    desde = marca.ultimo_id
+    hasta, al_dia = _hasta(db, fuente, desde, limite)
+
+    if hasta > desde:
+        filas = []
+        for granularidad in GRANULARIDADES:
+            for fila in db.execute(fuente.agregados(granularidad, desde, hasta)):
+                filas.append({
+                    "granularidad": granularidad,
+                    "inicio": _inicio(fila.inicio),
+                    "origen": fuente.origen,
+                    "tipo": _valor(fila.tipo),
+                    **{d: getattr(fila, d) for d in DIMENSIONES},
+                    "movimientos": fila.movimientos,
+                    "unidades": fila.unidades,
+                })
+        _sumar_al_rollup(db, fuente, filas)
+        compactadas = sum(f["movimientos"] for f in filas if f["granularidad"] == GRANULARIDADES[0])
+        marca.ultimo_id = hasta
+    else:
+        compactadas = 0
+    if al_dia:
+        marca.al_dia_en = limite
+    db.commit()
+    return compactadas, al_dia
+
+
+def compactar(db: Session, max_lotes: Optional[int] = None) -> int:
+    """Compacta todas las fuentes hasta ponerlas al día (o `max_lotes` por fuente)."""
+    total = 0
+    for fuente in FUENTES:
+        lotes = 0
+        while max_lotes is None or lotes < max_lotes:
+            compactadas, al_dia = compactar_lote(db, fuente)
+            total += compactadas
+            lotes += 1
+            if al_dia:
+                break
+    return total
+
+
+def reconstruir(db: Session) -> int:
+    db.execute(delete(RollupMovimiento))
+    db.execute(update(RollupMarca).values(ultimo_id=0, al_dia_en=None))
+    db.commit()
+    return compactar(db)
+
+
+# ============================================================
+# COMPACTADOR EN SEGUNDO PLANO
+# ============================================================
+class Compactador:
+    def __init__(self, intervalo: float = ROLLUP_INTERVALO):
+        self.intervalo = intervalo
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self.intervalo <= 0 or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._correr, name="compactador-rollups", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+
+    def _correr(self) -> None:
+        from database import SessionLocal
+
+        while not self._detener.is_set():
+            db = SessionLocal()
+            try:
+                # Pocos lotes por vuelta: una historia grande se pone al día de a poco
+                compactar(db, max_lotes=10)
+            except Exception as exc:  # el hilo no debe morir por un error transitorio de la BD
+                print(f"✖ Compactación de rollups falló: {exc}", file=sys.stderr)
+            finally:
+                db.close()
+            self._detener.wait(self.intervalo)
+
+
+compactador = Compactador()
+
+
+# ============================================================
+# CONSULTAS
+# ============================================================
+def datos_hasta(db: Session) -> Optional[datetime]:
+    """Fecha hasta la que todas las fuentes están compactadas (None si alguna nunca lo estuvo)."""
+    marcas = db.scalars(select(RollupMarca.al_dia_en)).all()
+    if len(marcas) < len(FUENTES) or any(m is None for m in marcas):
+        return None
+    return min(marcas)
+
+
+def _filtros(stmt, origen, tipo, libro_id, mp_id, punto_venta_id, usuario_id):
+    for columna, valor in (
+        (RollupMovimiento.origen, origen),
+        (RollupMovimiento.tipo, tipo),
+        (RollupMovimiento.libro_id, libro_id),
+        (RollupMovimiento.mp_id, mp_id),
+        (RollupMovimiento.punto_venta_id, punto_venta_id),
+        (RollupMovimiento.usuario_id, usuario_id),
+    ):
+        if valor is not None:
+            stmt = stmt.where(columna == valor)
+    return stmt
+
+
+def consulta_serie(
+    granularidad: str,
+    desde: datetime,
+    hasta: datetime,
+    origen: Optional[str] = None,
+    tipo: Optional[str] = None,
+    libro_id: Optional[int] = None,
+    mp_id: Optional[int] = None,
+    punto_venta_id: Optional[int] = None,
+    usuario_id: Optional[int] = None,
+):
+    stmt = (
+        select(
+            RollupMovimiento.inicio,
+            func.sum(RollupMovimiento.movimientos).label("movimientos"),
+            func.sum(RollupMovimiento.unidades).label("unidades"),
+        )
+        .where(
+            RollupMovimiento.granularidad == granularidad,
+            RollupMovimiento.inicio >= desde,
+            RollupMovimiento.inicio < hasta,
+        )
+        .group_by(RollupMovimiento.inicio)
+        .order_by(RollupMovimiento.inicio)
+    )
+    return _filtros(stmt, origen, tipo, libro_id, mp_id, punto_venta_id, usuario_id)
+
+
+def serie(db: Session, granularidad: str, desde: datetime, hasta: datetime, **filtros) -> list[dict]:
+    """Movimientos y unidades por período en [desde, hasta); los períodos sin datos no aparecen."""
+    return [
+        {"inicio": f.inicio, "movimientos": int(f.movimientos), "unidades": int(f.unidades)}
+        for f in db.execute(consulta_serie(granularidad, desde, hasta, **filtros))
+    ]
+
+
+# dimensión -> (columna del rollup, columna de id y de nombre de la entidad)
+DIMENSIONES_TOP = {
+    "libro": (RollupMovimiento.libro_id, Libro.id_libro, Libro.nombre),
+    "punto_venta": (RollupMovimiento.punto_venta_id, PuntoVenta.id_punto_venta, PuntoVenta.nombre),
+    "usuario": (RollupMovimiento.usuario_id, Usuario.id_usuario, Usuario.nombre),
+    "materia_prima": (RollupMovimiento.mp_id, MateriaPrima.id_mp, MateriaPrima.nombre),
+}
+
+
+def top(
+    db: Session,
+    dimension: str,
+    desde: datetime,
+    hasta: datetime,
+    limite: int = 10,
+    origen: Optional[str] = None,
+    tipo: Optional[str] = "venta",
+    punto_venta_id: Optional[int] = None,
+) -> list[dict]:
+    """Los `limite` valores de `dimension` con más unidades en [desde, hasta) (rollup diario)."""
+    columna, id_entidad, nombre = DIMENSIONES_TOP[dimension]
+    unidades = func.sum(RollupMovimiento.unidades)
+    agregados = (
+        select(
+            columna.label("id"),
+            func.sum(RollupMovimiento.movimientos).label("movimientos"),
+            unidades.label("unidades"),
+        )
+        .where(
+            RollupMovimiento.granularidad == "dia",
+            RollupMovimiento.inicio >= desde,
+            RollupMovimiento.inicio < hasta,
+            columna != 0,
+        )
+        .group_by(columna)
+        .order_by(unidades.desc(), columna)
+        .limit(limite)
+    )
+    agregados = _filtros(agregados, origen, tipo, None, None, punto_venta_id, None).subquery()
+    filas = db.execute(
+        select(agregados, nombre.label("nombre"))
+        .outerjoin(id_entidad.class_, id_entidad == agregados.c.id)
+        .order_by(agregados.c.unidades.desc(), agregados.c.id)
+    ).all()
+    return [
+        {"id": f.id, "nombre": f.nombre, "movimientos": int(f.movimientos), "unidades": int(f.unidades)}
+        for f in filas
+    ]
+
+
+def main() -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accion", choices=["compactar", "reconstruir", "estado"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.accion == "estado":
+            for marca in db.scalars(select(RollupMarca).order_by(RollupMarca.fuente)):
+                print(f"{marca.fuente:<20} último id {marca.ultimo_id:>12}  al día en {marca.al_dia_en}")
+            return
+        inicio = time.perf_counter()
+        filas = compactar(db) if args.accion == "compactar" else reconstruir(db)
+        print(f"{filas} movimientos compactados en {time.perf_counter() - inicio:.1f} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
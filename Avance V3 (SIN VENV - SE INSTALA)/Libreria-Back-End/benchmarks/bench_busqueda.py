@@ -0,0 +1,94 @@
+"""
+Benchmark del índice de búsqueda (busqueda.py).
+
+Genera N libros sintéticos en memoria y mide la carga del índice y la
+latencia de `buscar()`. El vocabulario se arma con sílabas (con y sin tildes)
+y las palabras se eligen con frecuencia de Zipf, como en texto real: unas
+pocas muy comunes y una cola larga de raras. Las consultas cubren palabras
+frecuentes, medias y raras, prefijos, subcadenas, tildes y varios términos.
+No usa la BD. Termina con código 1 si el p95 supera el objetivo.
+
+Uso (desde Libreria-Back-End):
+    python -m benchmarks.bench_busqueda --libros 100000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from busqueda import IndiceBusqueda
+from models import Libro
+
+SILABAS = "ma pe ri so tu la ne ci do ga bo lu ra te mi fa no si ca de pa ro sa ta ná lé rí có tú ña".split()
+VACIAS = "de la el los las y en del un una con por para".split()
+CATEGORIAS = ["Educación", "Novela", "Ciencia", "Infantil", "Historia", "Arte", "Técnico", "Poesía"]
+
+
+def vocabulario(n: int, azar: random.Random) -> list[str]:
+    palabras = set()
+    while len(palabras) < n:
+        palabras.add("".join(azar.choices(SILABAS, k=azar.randint(2, 4))))
+    return sorted(palabras)
+
+
+def libros_sinteticos(n: int, semilla: int = 7) -> tuple[list[tuple], list[str]]:
+    """(filas, vocabulario ordenado de la palabra más frecuente a la más rara)"""
+    azar = random.Random(semilla)
+    palabras = vocabulario(20_000, azar)
+    azar.shuffle(palabras)
+    pesos = [1 / (rango + 1) for rango in range(len(palabras))]
+    filas = []
+    for i in range(1, n + 1):
+        nombre = " ".join(azar.choices(palabras, pesos, k=azar.randint(2, 5))).capitalize()
+        texto = azar.choices(palabras, pesos, k=azar.randint(15, 40)) + azar.choices(VACIAS, k=10)
+        azar.shuffle(texto)
+        filas.append((i, nombre, azar.choice(CATEGORIAS), " ".join(texto)))
+    return filas, palabras
+
+
+def consultas(palabras: list[str]) -> list[str]:
+    frecuente, media, rara = palabras[0], palabras[200], palabras[5000]
+    return [
+        frecuente, media, rara,
+        frecuente[:2], media[:3], rara[:4],
+        media[1:4],
+        media.replace("a", "á"), media.upper(),
+        f"{frecuente} {media}", f"{media} de {rara[:3]}", f"{palabras[1]} {palabras[2]} {palabras[3]}",
+        "novela", "zzz",
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--libros", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--objetivo-ms", type=float, default=10.0, help="p95 máximo aceptado por consulta")
+    args = parser.parse_args()
+
+    indice = IndiceBusqueda(Libro, "id_libro", [("nombre", 4), ("categoria", 2), ("descripcion", 1)])
+    filas, palabras = libros_sinteticos(args.libros)
+    inicio = time.perf_counter()
+    indice.cargar_filas(filas)
+    print(f"carga de {args.libros} libros: {time.perf_counter() - inicio:.2f} s  {indice.estadisticas()}")
+
+    print(f"{'consulta':<24} {'resultados':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    peor = 0.0
+    for consulta in consultas(palabras):
+        tiempos = []
+        for _ in range(args.repeticiones):
+            t0 = time.perf_counter()
+            resultado = indice.buscar(consulta, 20)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        p95 = statistics.quantiles(tiempos, n=20)[-1]
+        peor = max(peor, p95)
+        total = len(indice.coincidencias(consulta))
+        print(f"{consulta:<24} {total:>10} {statistics.median(tiempos):>8.2f} {p95:>8.2f}")
+
+    if peor > args.objetivo_ms:
+        print(f"p95 máximo {peor:.2f} ms supera el objetivo de {args.objetivo_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark de carga HTTP: compara el modo síncrono y el asíncrono (DB_ASYNC).
+
+Con `--comparar` levanta dos veces la API con uvicorn (DB_ASYNC=false y
+DB_ASYNC=true), genera la misma carga contra cada una y muestra throughput
+(peticiones/s) y latencias p50/p99. Con `--url` solo carga un servidor ya
+levantado.
+
+Uso (desde Libreria-Back-End, con el .env apuntando a una base con datos):
+    python -m benchmarks.bench_carga --comparar --concurrencia 200 --duracion 20
+    python -m benchmarks.bench_carga --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+RUTAS_POR_DEFECTO = [
+    "/libros/?limit=50",
+    "/inventario-pv/?limit=50",
+    "/movimientos/?limit=50",
+]
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, max(0, int(round(p / 100 * len(valores))) - 1))
+    return valores[indice]
+
+
+async def generar_carga(url: str, rutas: list[str], concurrencia: int, duracion: float) -> dict:
+    latencias: list[float] = []
+    errores = 0
+    limite = time.perf_counter() + duracion
+
+    async def cliente(n: int, http: httpx.AsyncClient) -> None:
+        nonlocal errores
+        i = n
+        while time.perf_counter() < limite:
+            ruta = rutas[i % len(rutas)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                r = await http.get(ruta)
+                if r.status_code >= 400:
+                    errores += 1
+            except httpx.HTTPError:
+                errores += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as http:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(n, http) for n in range(concurrencia)))
+        total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "rps": len(latencias) / total,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+
+def levantar_servidor(puerto: int, modo_async: bool) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if modo_async else "false")
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{puerto}/", timeout=1)
+            return proceso
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def imprimir(nombre: str, r: dict) -> None:
+    print(f"{nombre:<8} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+          f"{r['peticiones']:>11} {r['errores']:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--comparar", action="store_true")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--concurrencia", type=int, default=100)
+    parser.add_argument("--duracion", type=float, default=15)
+    parser.add_argument("--rutas", nargs="+", default=RUTAS_POR_DEFECTO)
+    args = parser.parse_args()
+
+    print(f"{'modo':<8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peticiones':>11} {'errores':>8}")
+    if args.url:
+        imprimir("url", asyncio.run(generar_carga(args.url, args.rutas, args.concurrencia, args.duracion)))
+        return
+    if not args.comparar:
+        parser.error("usar --url o --comparar")
+
+    for modo_async in (False, True):
+        proceso = levantar_servidor(args.puerto, modo_async)
+        try:
+            url = f"http://127.0.0.1:{args.puerto}"
+            resultado = asyncio.run(generar_carga(url, args.rutas, args.concurrencia, args.duracion))
+        finally:
+            proceso.terminate()
+            proceso.wait()
+        imprimir("async" if modo_async else "sync", resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de GET /inventario-pv/ y GET /inventario-pv/por-pv/{id}.
+
+Verifica que el número de sentencias SQL por petición no dependa de la
+cantidad de filas de inventario (sin lazy loads por fila) y mide la latencia.
+Termina con código 1 si el número de sentencias varía entre tamaños (lo
+mismo verifica tests/test_inventario_pv.py en cada corrida de pytest).
+
+Uso (desde Libreria-Back-End, apuntando el .env a una base de pruebas):
+    python -m benchmarks.bench_inventario_pv --tamanos 10 1000 5000
+"""
+import argparse
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from benchmarks.bench_listar_libros import PREFIJO, ContadorSQL, limpiar, sembrar
+import migraciones
+from database import SessionLocal
+from main import app
+from models import PuntoVenta
+from paginacion import LIMITE_MAXIMO
+
+
+def _id_punto_venta_bench() -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(PuntoVenta.id_punto_venta).where(PuntoVenta.nombre == f"{PREFIJO}pv"))
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    migraciones.aplicar()
+    client = TestClient(app)
+    sentencias_vistas = set()
+    print(f"{'filas':>8} {'ruta':<40} {'sentencias':>11} {'ms/petición':>12}")
+    try:
+        for n in args.tamanos:
+            limpiar()
+            sembrar(n)
+            rutas = {
+                "listar": f"/inventario-pv/?limit={LIMITE_MAXIMO}",
+                "por-pv": f"/inventario-pv/por-pv/{_id_punto_venta_bench()}?limit={LIMITE_MAXIMO}",
+            }
+            for etiqueta, ruta in rutas.items():
+                with ContadorSQL() as contador:
+                    client.get(ruta)
+                sentencias_vistas.add((etiqueta, contador.total))
+
+                inicio = time.perf_counter()
+                for _ in range(args.repeticiones):
+                    client.get(ruta)
+                ms = (time.perf_counter() - inicio) / args.repeticiones * 1000
+                print(f"{n:>8} {ruta:<40} {contador.total:>11} {ms:>12.1f}")
+    finally:
+        limpiar()
+
+    # Cada ruta debe haber usado siempre la misma cantidad de sentencias
+    if len(sentencias_vistas) != len({etiqueta for etiqueta, _ in sentencias_vistas}):
+        print("ERROR: la cantidad de sentencias crece con el tamaño del inventario")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de GET /libros/.
+
+Siembra N libros (con su inventario global y una fila de inventario por punto
+de venta) y mide, para cada tamaño, cuántas sentencias SQL ejecuta el listado y
+cuánto tarda. Con la consulta agrupada el número de sentencias debe mantenerse
+constante aunque crezca el catálogo. Se pide la página más grande que acepta
+la API (LIMITE_MAXIMO).
+
+Uso (desde Libreria-Back-End, apuntando el .env a una base de pruebas):
+    python -m benchmarks.bench_listar_libros --tamanos 100 1000 5000
+
+Los datos sembrados se eliminan al terminar.
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+import migraciones
+from cache import cache
+from database import SessionLocal, engine
+from main import app
+from models import Libro, InventarioLibro, InventarioPV, Papel, PuntoVenta, ResumenStockLibro, ResumenStockPV
+from paginacion import LIMITE_MAXIMO
+
+PREFIJO = "bench-libro-"
+PAGINAS_BENCH = 99991
+RUTA = f"/libros/?limit={LIMITE_MAXIMO}"
+
+
+class ContadorSQL:
+    """Cuenta las sentencias que pasan por el engine mientras está activo."""
+
+    def __init__(self):
+        self.total = 0
+
+    def _contar(self, *args, **kwargs):
+        self.total += 1
+
+    def __enter__(self):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._contar)
+
+
+def sembrar(n: int) -> None:
+    db = SessionLocal()
+    try:
+        if not db.get(Papel, PAGINAS_BENCH):
+            db.add(Papel(paginas=PAGINAS_BENCH, nombre="bench", stock_paginas=0))
+        pv = PuntoVenta(nombre=f"{PREFIJO}pv", ubicacion="bench", tipo="tienda")
+        db.add(pv)
+        db.flush()
+
+        db.execute(insert(Libro), [
+            {"nombre": f"{PREFIJO}{i}", "precio": 1000 + i, "paginas_por_libro": PAGINAS_BENCH}
+            for i in range(n)
+        ])
+        ids = db.scalars(select(Libro.id_libro).where(Libro.nombre.like(f"{PREFIJO}%"))).all()
+        db.execute(insert(InventarioLibro), [{"libro_id": i, "stock": 10} for i in ids])
+        db.execute(insert(InventarioPV), [
+            {"id_libro": i, "id_punto_venta": pv.id_punto_venta, "stock": 5, "stock_minimo": 1}
+            for i in ids
+        ])
+        db.execute(insert(ResumenStockLibro), [
+            {"libro_id": i, "stock_global": 10, "stock_pv": 5, "filas_bajo_minimo": 0} for i in ids
+        ])
+        db.add(ResumenStockPV(punto_venta_id=pv.id_punto_venta, stock=5 * len(ids), filas_bajo_minimo=0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def limpiar() -> None:
+    db = SessionLocal()
+    try:
+        ids = select(Libro.id_libro).where(Libro.nombre.like(f"{PREFIJO}%")).scalar_subquery()
+        pv_ids = select(PuntoVenta.id_punto_venta).where(PuntoVenta.nombre.like(f"{PREFIJO}%")).scalar_subquery()
+        db.query(InventarioLibro).filter(InventarioLibro.libro_id.in_(ids)).delete(synchronize_session=False)
+        db.query(InventarioPV).filter(InventarioPV.id_libro.in_(ids)).delete(synchronize_session=False)
+        db.query(ResumenStockLibro).filter(ResumenStockLibro.libro_id.in_(ids)).delete(synchronize_session=False)
+        db.query(ResumenStockPV).filter(ResumenStockPV.punto_venta_id.in_(pv_ids)).delete(synchronize_session=False)
+        db.query(Libro).filter(Libro.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(PuntoVenta).filter(PuntoVenta.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(Papel).filter(Papel.paginas == PAGINAS_BENCH).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def medir(client: TestClient, repeticiones: int) -> tuple[int, float]:
+    # Se mide la consulta, no el caché de lectura: se invalida antes de cada petición
+    cache.invalidar("libros")
+    with ContadorSQL() as contador:
+        client.get(RUTA)
+    sentencias = contador.total
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        cache.invalidar("libros")
+        client.get(RUTA)
+    return sentencias, (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    migraciones.aplicar()
+    client = TestClient(app)
+    print(f"{'libros':>8} {'sentencias':>11} {'ms/petición':>12}")
+    try:
+        for n in args.tamanos:
+            limpiar()
+            sembrar(n)
+            sentencias, ms = medir(client, args.repeticiones)
+            print(f"{n:>8} {sentencias:>11} {ms:>12.1f}")
+    finally:
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
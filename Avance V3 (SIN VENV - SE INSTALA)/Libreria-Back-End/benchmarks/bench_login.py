@@ -0,0 +1,154 @@
+"""
+Benchmark de POST /usuarios/login ante una ráfaga (cambio de turno).
+
+Crea USUARIOS usuarios de prueba (una parte con la contraseña en texto plano,
+como las bases anteriores al hash) y lanza todos los logins a la vez contra
+la app en el mismo proceso. Mientras tanto consulta GET / cada 10 ms para
+medir si el event loop sigue respondiendo. La ráfaga se repite una segunda
+vez, ya con todas las contraseñas re-hasheadas por el primer login.
+
+Informa logins/s, latencias p50/p99, respuestas 503 (pool de hash saturado) y
+la latencia de GET / durante la ráfaga. Termina con código 1 si algún login
+falla por otro motivo o si queda alguna contraseña sin hashear.
+
+Uso (desde Libreria-Back-End, apuntando el .env a una base de pruebas):
+    python -m benchmarks.bench_login --usuarios 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Todos los logins salen de la misma IP: sin este ajuste los frenaría el limitador
+os.environ.setdefault("LOGIN_INTENTOS_IP", "1000000")
+
+import httpx
+from sqlalchemy import delete, select
+
+import migraciones
+from contrasenas import en_pool_y_esperar, estado_pool, hashear, necesita_rehash
+from database import SessionLocal
+from main import app
+from models import Usuario
+
+PREFIJO = "bench-login-"
+CONTRASENA = "cambio-de-turno"
+
+
+def preparar(cantidad: int, texto_plano: float) -> list[str]:
+    emails = [f"{PREFIJO}{i}@libreria-bench.com" for i in range(cantidad)]
+    hasheadas = int(cantidad * (1 - texto_plano))
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Usuario(
+                nombre=f"{PREFIJO}{i}",
+                email=email,
+                contrasena=en_pool_y_esperar(hashear, CONTRASENA) if i < hasheadas else CONTRASENA,
+                rol="vendedor",
+            )
+            for i, email in enumerate(emails)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return emails
+
+
+def sin_hashear() -> int:
+    db = SessionLocal()
+    try:
+        guardadas = db.scalars(select(Usuario.contrasena).where(Usuario.email.like(f"{PREFIJO}%"))).all()
+        return sum(necesita_rehash(c) for c in guardadas)
+    finally:
+        db.close()
+
+
+def limpiar() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(Usuario).where(Usuario.email.like(f"{PREFIJO}%")))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def rafaga(emails: list[str]) -> dict:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as http:
+        terminado = asyncio.Event()
+        pings: list[float] = []
+
+        async def ping() -> None:
+            while not terminado.is_set():
+                inicio = time.perf_counter()
+                await http.get("/")
+                pings.append((time.perf_counter() - inicio) * 1000)
+                await asyncio.sleep(0.01)
+
+        async def login(email: str) -> tuple[int, float]:
+            inicio = time.perf_counter()
+            r = await http.post("/usuarios/login", json={"email": email, "contrasena": CONTRASENA})
+            return r.status_code, (time.perf_counter() - inicio) * 1000
+
+        tarea_ping = asyncio.create_task(ping())
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(login(e) for e in emails))
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        await tarea_ping
+
+    latencias = sorted(ms for codigo, ms in resultados if codigo == 200)
+    codigos: dict[int, int] = {}
+    for codigo, _ in resultados:
+        codigos[codigo] = codigos.get(codigo, 0) + 1
+    return {
+        "duracion": duracion,
+        "ok": len(latencias),
+        "codigos": codigos,
+        "p50": statistics.median(latencias) if latencias else 0.0,
+        "p99": latencias[int(len(latencias) * 0.99) - 1] if latencias else 0.0,
+        "ping_p99": sorted(pings)[int(len(pings) * 0.99) - 1] if pings else 0.0,
+        "ping_max": max(pings, default=0.0),
+    }
+
+
+def mostrar(nombre: str, r: dict) -> None:
+    print(
+        f"{nombre:<22} {r['ok'] / r['duracion']:>9.1f} logins/s  p50 {r['p50']:>7.1f} ms  "
+        f"p99 {r['p99']:>7.1f} ms  GET / p99 {r['ping_p99']:>6.1f} ms (máx {r['ping_max']:.1f})  "
+        f"códigos {r['codigos']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--texto-plano", type=float, default=0.5, help="fracción de contraseñas sin hashear")
+    args = parser.parse_args()
+
+    migraciones.aplicar()
+    limpiar()
+    try:
+        emails = preparar(args.usuarios, args.texto_plano)
+        print(f"pool de hash: {estado_pool()}")
+        primera = asyncio.run(rafaga(emails))
+        mostrar("1ª ráfaga (re-hash)", primera)
+        segunda = asyncio.run(rafaga(emails))
+        mostrar("2ª ráfaga", segunda)
+        pendientes = sin_hashear()
+    finally:
+        limpiar()
+
+    inesperados = {
+        codigo for r in (primera, segunda) for codigo in r["codigos"] if codigo not in (200, 503)
+    }
+    if inesperados or pendientes:
+        print(f"códigos inesperados: {sorted(inesperados)}; contraseñas sin hashear: {pendientes}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
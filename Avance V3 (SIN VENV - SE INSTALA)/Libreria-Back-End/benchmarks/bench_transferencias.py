@@ -0,0 +1,241 @@
+"""
+Prueba de contención de POST /transferencias y /transferencias/lote.
+
+Crea TIENDAS puntos de venta y LIBROS libros con stock en el almacén y en cada
+punto de venta (salvo el último punto de venta, que arranca sin filas: se
+crean con la primera transferencia que llega). HILOS hilos lanzan
+transferencias al azar entre los mismos puntos de venta y el almacén, sueltas
+y en lotes, incluidas las cruzadas (A → B y B → A a la vez). Al final verifica:
+- por libro, almacén + puntos de venta == stock inicial (nada se crea ni se pierde),
+- ningún stock negativo,
+- movimientos apareados: una salida y una entrada por ítem transferido, con
+  las mismas cantidades,
+- el resumen de stock coincide con el inventario.
+
+Informa throughput (transferencias/s e ítems/s), latencia p50/p99, reintentos
+por contención y respuestas 503. Termina con código 1 si algo no cierra.
+
+Uso (desde Libreria-Back-End, apuntando el .env a una base de pruebas):
+    python -m benchmarks.bench_transferencias --tiendas 8 --libros 4 --hilos 32
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import migraciones
+import transferencias
+from database import SessionLocal
+from main import app
+from models import (
+    InventarioLibro, InventarioPV, Libro, MovimientoLibro, MovimientoPV, Papel, PuntoVenta, ResumenStockLibro,
+    ResumenStockPV,
+)
+
+PREFIJO = "bench-transf-"
+PAGINAS_BENCH = 99993
+
+
+def preparar(tiendas: int, libros: int, stock: int, almacen: int) -> tuple[list[int], list[int]]:
+    db = SessionLocal()
+    try:
+        if not db.get(Papel, PAGINAS_BENCH):
+            db.add(Papel(paginas=PAGINAS_BENCH, nombre="bench", stock_paginas=0))
+        filas_libros = [
+            Libro(nombre=f"{PREFIJO}libro-{i}", precio=1000, paginas_por_libro=PAGINAS_BENCH) for i in range(libros)
+        ]
+        filas_pv = [PuntoVenta(nombre=f"{PREFIJO}pv-{i}", ubicacion="bench", tipo="metro") for i in range(tiendas)]
+        db.add_all(filas_libros + filas_pv)
+        db.flush()
+        libro_ids = [l.id_libro for l in filas_libros]
+        pv_ids = [p.id_punto_venta for p in filas_pv]
+        con_filas = pv_ids[:-1]
+
+        for libro_id in libro_ids:
+            db.add(InventarioLibro(libro_id=libro_id, stock=almacen))
+            db.add(ResumenStockLibro(
+                libro_id=libro_id, stock_global=almacen, stock_pv=stock * len(con_filas), filas_bajo_minimo=0
+            ))
+            db.add_all(InventarioPV(id_libro=libro_id, id_punto_venta=pv_id, stock=stock) for pv_id in con_filas)
+        db.add_all(
+            ResumenStockPV(punto_venta_id=pv_id, stock=stock * libros if pv_id in con_filas else 0, filas_bajo_minimo=0)
+            for pv_id in pv_ids
+        )
+        db.commit()
+        return libro_ids, pv_ids
+    finally:
+        db.close()
+
+
+def limpiar() -> None:
+    db = SessionLocal()
+    try:
+        libro_ids = select(Libro.id_libro).where(Libro.nombre.like(f"{PREFIJO}%"))
+        pv_ids = select(PuntoVenta.id_punto_venta).where(PuntoVenta.nombre.like(f"{PREFIJO}%"))
+        inv_pv = select(InventarioPV.id_inventario).where(InventarioPV.id_libro.in_(libro_ids))
+        inv_almacen = select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id.in_(libro_ids))
+        db.query(MovimientoPV).filter(MovimientoPV.inventario_pv_id.in_(inv_pv)).delete(synchronize_session=False)
+        db.query(MovimientoLibro).filter(MovimientoLibro.inventario_id.in_(inv_almacen)).delete(synchronize_session=False)
+        db.query(InventarioPV).filter(InventarioPV.id_libro.in_(libro_ids)).delete(synchronize_session=False)
+        db.query(InventarioLibro).filter(InventarioLibro.libro_id.in_(libro_ids)).delete(synchronize_session=False)
+        db.query(ResumenStockLibro).filter(ResumenStockLibro.libro_id.in_(libro_ids)).delete(synchronize_session=False)
+        db.query(ResumenStockPV).filter(ResumenStockPV.punto_venta_id.in_(pv_ids)).delete(synchronize_session=False)
+        db.query(Libro).filter(Libro.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(PuntoVenta).filter(PuntoVenta.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(Papel).filter(Papel.paginas == PAGINAS_BENCH).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def trabajador(args, libro_ids: list[int], pv_ids: list[int], semilla: int) -> tuple[Counter, int, list[float]]:
+    """Lanza `args.transferencias` peticiones. Devuelve (códigos, ítems aplicados, latencias)."""
+    azar = random.Random(semilla)
+    client = TestClient(app)
+    codigos, items_ok, latencias = Counter(), 0, []
+
+    def lugar():
+        return None if azar.random() < args.prob_almacen else azar.choice(pv_ids)
+
+    for _ in range(args.transferencias):
+        items = []
+        for _ in range(azar.randint(1, args.lote_max)):
+            desde = lugar()
+            hacia = lugar()
+            while hacia == desde:
+                hacia = lugar()
+            items.append({"libro_id": azar.choice(libro_ids), "cantidad": azar.randint(1, 5),
+                          "desde_punto_venta_id": desde, "hacia_punto_venta_id": hacia})
+
+        inicio = time.perf_counter()
+        if len(items) == 1:
+            r = client.post("/transferencias", json=items[0])
+        else:
+            r = client.post("/transferencias/lote", json={"items": items})
+        latencias.append(time.perf_counter() - inicio)
+
+        codigos[r.status_code] += 1
+        if r.status_code == 201:
+            items_ok += len(items)
+        elif r.status_code not in (400, 503):
+            raise RuntimeError(f"Respuesta inesperada {r.status_code}: {r.text}")
+    return codigos, items_ok, latencias
+
+
+def verificar(libro_ids: list[int], pv_ids: list[int], esperado: int, items_ok: int) -> list[str]:
+    errores = []
+    db = SessionLocal()
+    try:
+        almacen = dict(db.execute(
+            select(InventarioLibro.libro_id, InventarioLibro.stock).where(InventarioLibro.libro_id.in_(libro_ids))
+        ).all())
+        en_pv = dict(db.execute(
+            select(InventarioPV.id_libro, func.sum(InventarioPV.stock))
+            .where(InventarioPV.id_libro.in_(libro_ids)).group_by(InventarioPV.id_libro)
+        ).all())
+        for libro_id in libro_ids:
+            total = almacen[libro_id] + int(en_pv.get(libro_id) or 0)
+            if total != esperado:
+                errores.append(f"libro {libro_id}: stock total {total} != {esperado}")
+
+        minimo = min(
+            db.scalar(select(func.min(InventarioLibro.stock)).where(InventarioLibro.libro_id.in_(libro_ids))),
+            db.scalar(select(func.min(InventarioPV.stock)).where(InventarioPV.id_libro.in_(libro_ids))),
+        )
+        if minimo < 0:
+            errores.append(f"stock negativo: {minimo}")
+
+        movimientos = Counter()
+        for modelo, columna, inventarios in (
+            (MovimientoPV, MovimientoPV.inventario_pv_id,
+             select(InventarioPV.id_inventario).where(InventarioPV.id_libro.in_(libro_ids))),
+            (MovimientoLibro, MovimientoLibro.inventario_id,
+             select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id.in_(libro_ids))),
+        ):
+            for tipo, filas, unidades in db.execute(
+                select(modelo.tipo, func.count(), func.sum(modelo.cantidad))
+                .where(columna.in_(inventarios)).group_by(modelo.tipo)
+            ):
+                movimientos[(tipo.value, "filas")] += filas
+                movimientos[(tipo.value, "unidades")] += int(unidades)
+        if not movimientos[("salida", "filas")] == movimientos[("entrada", "filas")] == items_ok:
+            errores.append(f"movimientos sin aparear: {dict(movimientos)} para {items_ok} ítems")
+        if movimientos[("salida", "unidades")] != movimientos[("entrada", "unidades")]:
+            errores.append(f"unidades de salida y entrada distintas: {dict(movimientos)}")
+
+        resumen_libros = dict(db.execute(
+            select(ResumenStockLibro.libro_id, ResumenStockLibro.stock_global + ResumenStockLibro.stock_pv)
+            .where(ResumenStockLibro.libro_id.in_(libro_ids))
+        ).all())
+        if any(resumen_libros.get(i) != esperado for i in libro_ids):
+            errores.append(f"resumen por libro inconsistente: {resumen_libros}")
+        resumen_pv = dict(db.execute(
+            select(ResumenStockPV.punto_venta_id, ResumenStockPV.stock).where(ResumenStockPV.punto_venta_id.in_(pv_ids))
+        ).all())
+        real_pv = dict(db.execute(
+            select(InventarioPV.id_punto_venta, func.sum(InventarioPV.stock))
+            .where(InventarioPV.id_punto_venta.in_(pv_ids)).group_by(InventarioPV.id_punto_venta)
+        ).all())
+        if any(resumen_pv.get(p) != int(real_pv.get(p) or 0) for p in pv_ids):
+            errores.append(f"resumen por punto de venta inconsistente: {resumen_pv} != {real_pv}")
+    finally:
+        db.close()
+    return errores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiendas", type=int, default=8)
+    parser.add_argument("--libros", type=int, default=4)
+    parser.add_argument("--stock", type=int, default=50, help="Stock inicial por libro en cada punto de venta")
+    parser.add_argument("--almacen", type=int, default=200, help="Stock inicial por libro en el almacén")
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--transferencias", type=int, default=50, help="Peticiones por hilo")
+    parser.add_argument("--lote-max", type=int, default=4, help="Ítems máximos por petición (1 = sueltas)")
+    parser.add_argument("--prob-almacen", type=float, default=0.2, help="Probabilidad de que un extremo sea el almacén")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    if args.tiendas < 2:
+        parser.error("--tiendas debe ser al menos 2")
+
+    migraciones.aplicar()
+    limpiar()
+    libro_ids, pv_ids = preparar(args.tiendas, args.libros, args.stock, args.almacen)
+    esperado = args.almacen + args.stock * (args.tiendas - 1)
+    reintentos_antes = transferencias.reintentos
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+            resultados = list(pool.map(
+                lambda i: trabajador(args, libro_ids, pv_ids, args.semilla * 1000 + i), range(args.hilos)
+            ))
+        duracion = time.perf_counter() - inicio
+
+        codigos = sum((c for c, _, _ in resultados), Counter())
+        items_ok = sum(n for _, n, _ in resultados)
+        latencias = sorted(l for _, _, ls in resultados for l in ls)
+        errores = verificar(libro_ids, pv_ids, esperado, items_ok)
+    finally:
+        limpiar()
+
+    p99 = latencias[int(len(latencias) * 0.99) - 1] if len(latencias) >= 100 else latencias[-1]
+    print(f"hilos={args.hilos} tiendas={args.tiendas} libros={args.libros} lote_max={args.lote_max}")
+    print(f"respuestas={dict(sorted(codigos.items()))} items_transferidos={items_ok} "
+          f"reintentos={transferencias.reintentos - reintentos_antes}")
+    print(f"throughput={codigos[201] / duracion:.1f} transferencias/s ({items_ok / duracion:.1f} ítems/s) "
+          f"p50={statistics.median(latencias) * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+
+    if errores:
+        for error in errores:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
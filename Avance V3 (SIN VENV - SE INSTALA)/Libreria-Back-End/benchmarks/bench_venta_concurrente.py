@@ -0,0 +1,131 @@
+"""
+Prueba de concurrencia de POST /inventario-pv/{id}/vender.
+
+Crea una fila de inventario con STOCK unidades y lanza VENDEDORES hilos que
+venden de a una unidad hasta recibir "Stock insuficiente". Al final verifica:
+- ventas exitosas == stock inicial (nadie vendió de más ni de menos),
+- stock final == 0,
+- un movimiento de venta registrado por cada venta exitosa.
+
+Informa el throughput (ventas/s) y la latencia p50/p99 bajo contención.
+Termina con código 1 si detecta sobreventa o movimientos faltantes.
+
+Uso (desde Libreria-Back-End, apuntando el .env a una base de pruebas):
+    python -m benchmarks.bench_venta_concurrente --stock 500 --vendedores 32
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import migraciones
+from database import SessionLocal
+from main import app
+from models import InventarioPV, Libro, MovimientoPV, Papel, PuntoVenta, ResumenStockLibro, ResumenStockPV
+
+PREFIJO = "bench-venta-"
+PAGINAS_BENCH = 99992
+
+
+def preparar(stock: int) -> int:
+    db = SessionLocal()
+    try:
+        if not db.get(Papel, PAGINAS_BENCH):
+            db.add(Papel(paginas=PAGINAS_BENCH, nombre="bench", stock_paginas=0))
+        libro = Libro(nombre=f"{PREFIJO}libro", precio=1000, paginas_por_libro=PAGINAS_BENCH)
+        pv = PuntoVenta(nombre=f"{PREFIJO}pv", ubicacion="bench", tipo="metro")
+        db.add_all([libro, pv])
+        db.flush()
+        inv = InventarioPV(id_libro=libro.id_libro, id_punto_venta=pv.id_punto_venta, stock=stock, stock_minimo=0)
+        db.add(inv)
+        db.commit()
+        return inv.id_inventario
+    finally:
+        db.close()
+
+
+def limpiar() -> None:
+    db = SessionLocal()
+    try:
+        inv_ids = (
+            select(InventarioPV.id_inventario)
+            .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+            .where(Libro.nombre.like(f"{PREFIJO}%"))
+        )
+        libro_ids = select(Libro.id_libro).where(Libro.nombre.like(f"{PREFIJO}%"))
+        db.query(MovimientoPV).filter(MovimientoPV.inventario_pv_id.in_(inv_ids)).delete(synchronize_session=False)
+        pv_ids = select(PuntoVenta.id_punto_venta).where(PuntoVenta.nombre.like(f"{PREFIJO}%"))
+        db.query(InventarioPV).filter(InventarioPV.id_libro.in_(libro_ids)).delete(synchronize_session=False)
+        # El resumen de stock se crea al vender sobre filas sembradas fuera de la API
+        db.query(ResumenStockLibro).filter(ResumenStockLibro.libro_id.in_(libro_ids)).delete(synchronize_session=False)
+        db.query(ResumenStockPV).filter(ResumenStockPV.punto_venta_id.in_(pv_ids)).delete(synchronize_session=False)
+        db.query(Libro).filter(Libro.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(PuntoVenta).filter(PuntoVenta.nombre.like(f"{PREFIJO}%")).delete(synchronize_session=False)
+        db.query(Papel).filter(Papel.paginas == PAGINAS_BENCH).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def vendedor(inv_id: int) -> tuple[int, list[float]]:
+    """Vende de a una unidad hasta agotar el stock. Devuelve (ventas, latencias)."""
+    client = TestClient(app)
+    ventas, latencias = 0, []
+    while True:
+        inicio = time.perf_counter()
+        r = client.post(f"/inventario-pv/{inv_id}/vender", json={"cantidad": 1})
+        latencias.append(time.perf_counter() - inicio)
+        if r.status_code == 200:
+            ventas += 1
+        elif r.status_code == 400:
+            return ventas, latencias
+        else:
+            raise RuntimeError(f"Respuesta inesperada {r.status_code}: {r.text}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--vendedores", type=int, default=32)
+    args = parser.parse_args()
+
+    migraciones.aplicar()
+    limpiar()
+    inv_id = preparar(args.stock)
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.vendedores) as pool:
+            resultados = list(pool.map(vendedor, [inv_id] * args.vendedores))
+        duracion = time.perf_counter() - inicio
+
+        ventas = sum(v for v, _ in resultados)
+        latencias = sorted(l for _, ls in resultados for l in ls)
+
+        db = SessionLocal()
+        try:
+            stock_final = db.get(InventarioPV, inv_id).stock
+            movimientos = db.scalar(
+                select(func.count()).select_from(MovimientoPV).where(MovimientoPV.inventario_pv_id == inv_id)
+            )
+        finally:
+            db.close()
+    finally:
+        limpiar()
+
+    p99 = latencias[int(len(latencias) * 0.99) - 1] if len(latencias) >= 100 else latencias[-1]
+    print(f"vendedores={args.vendedores} stock_inicial={args.stock}")
+    print(f"ventas={ventas} stock_final={stock_final} movimientos={movimientos}")
+    print(f"throughput={ventas / duracion:.1f} ventas/s "
+          f"p50={statistics.median(latencias) * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+
+    if ventas != args.stock or stock_final != 0 or movimientos != ventas:
+        print("ERROR: sobreventa o movimientos inconsistentes")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Datos sintéticos para la suite de benchmarks (benchmarks/suite.py).
+
+Siembra libros, puntos de venta, inventario por punto de venta, vendedores y
+movimientos de inventario con INSERT masivos por lotes, y escribe los
+resúmenes de stock ya calculados. Todo lo sembrado lleva el prefijo PREFIJO
+(y el papel PAGINAS_BENCH), así `limpiar()` lo quita sin tocar el resto de la
+base. La misma semilla produce los mismos datos.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import delete, func, insert, select
+
+from contrasenas import hashear
+from database import SessionLocal
+from models import (
+    InventarioLibro, InventarioPV, Libro, MovimientoLibro, MovimientoPV, Papel, PuntoVenta, ResumenStockLibro,
+    ResumenStockPV, TipoMovimiento, Usuario,
+)
+
+PREFIJO = "bench-suite-"
+PAGINAS_BENCH = 99990
+CONTRASENA = "bench-suite"
+DOMINIO = "libreria-bench.com"
+
+# Filas por INSERT masivo (y por commit)
+FILAS_POR_LOTE = 10_000
+
+# Stock de cada fila de inventario_pv: alto para que el escenario de venta no
+# agote filas durante la medición
+STOCK_PV = 1_000_000
+
+SILABAS = "ma pe ri so tu la ne ci do ga bo lu ra te mi fa no si ca de pa ro sa ta".split()
+CATEGORIAS = ["Educación", "Novela", "Ciencia", "Infantil", "Historia", "Arte", "Técnico", "Poesía"]
+TIPOS_MOVIMIENTO = [TipoMovimiento.venta, TipoMovimiento.entrada, TipoMovimiento.salida, TipoMovimiento.ajuste]
+PESOS_MOVIMIENTO = [70, 15, 10, 5]
+
+
+def vocabulario(azar: random.Random, cantidad: int = 2_000) -> list[str]:
+    palabras = set()
+    while len(palabras) < cantidad:
+        palabras.add("".join(azar.choices(SILABAS, k=azar.randint(2, 4))))
+    return sorted(palabras)
+
+
+def _en_lotes(db, modelo, filas: Iterable[dict]) -> int:
+    total, lote = 0, []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= FILAS_POR_LOTE:
+            db.execute(insert(modelo), lote)
+            db.commit()
+            total += len(lote)
+            lote = []
+    if lote:
+        db.execute(insert(modelo), lote)
+        db.commit()
+        total += len(lote)
+    return total
+
+
+# ============================================================
+# CONSULTAS DE LO SEMBRADO
+# ============================================================
+def _ids_libros():
+    return select(Libro.id_libro).where(Libro.nombre.like(f"{PREFIJO}%"))
+
+
+def _ids_puntos_venta():
+    return select(PuntoVenta.id_punto_venta).where(PuntoVenta.nombre.like(f"{PREFIJO}%"))
+
+
+def conjunto() -> dict:
+    """Ids y valores de lo sembrado que usan los escenarios."""
+    db = SessionLocal()
+    try:
+        libros = db.scalars(_ids_libros().order_by(Libro.id_libro)).all()
+        if not libros:
+            raise SystemExit("No hay datos sembrados: correr `python -m benchmarks.suite sembrar` antes")
+        inventario_pv = db.execute(
+            select(InventarioPV.id_inventario, InventarioPV.id_punto_venta)
+            .where(InventarioPV.id_libro.in_(_ids_libros()))
+        ).all()
+        por_pv: dict[int, list[int]] = {}
+        for fila in inventario_pv:
+            por_pv.setdefault(fila.id_punto_venta, []).append(fila.id_inventario)
+        vendedores = db.execute(
+            select(Usuario.email, Usuario.punto_venta_id).where(Usuario.email.like(f"{PREFIJO}%"))
+        ).all()
+        nombres = db.scalars(select(Libro.nombre).where(Libro.nombre.like(f"{PREFIJO}%")).limit(2_000)).all()
+        return {
+            "libros": list(libros),
+            "puntos_venta": sorted(por_pv),
+            "inventario_pv": por_pv,
+            # (email, punto de venta) de cada vendedor sembrado
+            "vendedores": [(v.email, v.punto_venta_id) for v in vendedores],
+            "palabras": sorted({p for n in nombres for p in n.removeprefix(PREFIJO).split()}),
+        }
+    finally:
+        db.close()
+
+
+def tamano() -> dict:
+    """Cantidad de filas sembradas por tabla (se guarda con los resultados)."""
+    db = SessionLocal()
+    try:
+        inventarios = select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id.in_(_ids_libros()))
+        return {
+            "libros": db.scalar(select(func.count()).select_from(_ids_libros().subquery())),
+            "puntos_venta": db.scalar(select(func.count()).select_from(_ids_puntos_venta().subquery())),
+            "inventario_pv": db.scalar(
+                select(func.count()).select_from(InventarioPV).where(InventarioPV.id_libro.in_(_ids_libros()))
+            ),
+            "movimientos": db.scalar(
+                select(func.count()).select_from(MovimientoLibro).where(MovimientoLibro.inventario_id.in_(inventarios))
+            ),
+            "usuarios": db.scalar(select(func.count()).select_from(Usuario).where(Usuario.email.like(f"{PREFIJO}%"))),
+        }
+    finally:
+        db.close()
+
+
+# ============================================================
+# SIEMBRA
+# ============================================================
+def sembrar(
+    libros: int = 10_000,
+    puntos_venta: int = 20,
+    por_punto_venta: int = 2_000,
+    movimientos: int = 1_000_000,
+    usuarios: int = 50,
+    semilla: int = 7,
+    progreso: Callable[[str], None] = print,
+) -> dict:
+    azar = random.Random(semilla)
+    palabras = vocabulario(azar)
+    db = SessionLocal()
+    try:
+        if db.scalar(select(func.count()).select_from(_ids_libros().subquery())):
+            raise SystemExit("Ya hay datos sembrados: correr `python -m benchmarks.suite limpiar` antes")
+        if db.get(Papel, PAGINAS_BENCH) is None:
+            db.add(Papel(paginas=PAGINAS_BENCH, nombre=f"{PREFIJO}papel", stock_paginas=0))
+            db.commit()
+
+        # ---------------- libros e inventario global ----------------
+        _en_lotes(db, Libro, (
+            {
+                "nombre": PREFIJO + " ".join(azar.sample(palabras, azar.randint(2, 4))),
+                "categoria": azar.choice(CATEGORIAS),
+                "descripcion": " ".join(azar.choices(palabras, k=azar.randint(10, 30))),
+                "precio": azar.randint(5, 300) * 100,
+                "paginas_por_libro": PAGINAS_BENCH,
+            }
+            for _ in range(libros)
+        ))
+        ids_libro = db.scalars(_ids_libros().order_by(Libro.id_libro)).all()
+        stock_global = {i: azar.randint(0, 500) for i in ids_libro}
+        _en_lotes(db, InventarioLibro, ({"libro_id": i, "stock": s} for i, s in stock_global.items()))
+        progreso(f"libros: {len(ids_libro)}")
+
+        # ---------------- puntos de venta e inventario por punto ----------------
+        _en_lotes(db, PuntoVenta, (
+            {"nombre": f"{PREFIJO}pv-{n}", "ubicacion": "benchmark", "tipo": azar.choice(["metro", "online"])}
+            for n in range(puntos_venta)
+        ))
+        ids_pv = db.scalars(_ids_puntos_venta().order_by(PuntoVenta.id_punto_venta)).all()
+        stock_pv = dict.fromkeys(ids_libro, 0)
+
+        def filas_pv() -> Iterator[dict]:
+            for pv in ids_pv:
+                for libro in azar.sample(ids_libro, min(por_punto_venta, len(ids_libro))):
+                    stock_pv[libro] += STOCK_PV
+                    yield {"id_libro": libro, "id_punto_venta": pv, "stock": STOCK_PV}
+
+        filas = _en_lotes(db, InventarioPV, filas_pv())
+        progreso(f"puntos de venta: {len(ids_pv)}, inventario por punto de venta: {filas}")
+
+        # Resúmenes ya calculados (como los deja resumen_stock.reconstruir)
+        _en_lotes(db, ResumenStockLibro, (
+            {"libro_id": i, "stock_global": stock_global[i], "stock_pv": stock_pv[i], "filas_bajo_minimo": 0}
+            for i in ids_libro
+        ))
+        por_pv = min(por_punto_venta, len(ids_libro)) * STOCK_PV
+        _en_lotes(db, ResumenStockPV, (
+            {"punto_venta_id": pv, "stock": por_pv, "filas_bajo_minimo": 0} for pv in ids_pv
+        ))
+
+        # ---------------- vendedores ----------------
+        # Un único hash (lleva su propia sal) alcanza para todos
+        contrasena = hashear(CONTRASENA)
+        _en_lotes(db, Usuario, (
+            {
+                "nombre": f"{PREFIJO}vendedor-{n}",
+                "email": f"{PREFIJO}{n}@{DOMINIO}",
+                "contrasena": contrasena,
+                "rol": "vendedor",
+                "punto_venta_id": ids_pv[n % len(ids_pv)] if ids_pv else None,
+            }
+            for n in range(usuarios)
+        ))
+        progreso(f"usuarios: {usuarios}")
+
+        # ---------------- movimientos ----------------
+        ids_inventario = db.scalars(
+            select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id.in_(_ids_libros()))
+        ).all()
+        ahora = datetime.now().replace(microsecond=0)
+
+        def filas_movimientos() -> Iterator[dict]:
+            for n in range(movimientos):
+                if n and n % 100_000 == 0:
+                    progreso(f"movimientos: {n}")
+                yield {
+                    "inventario_id": azar.choice(ids_inventario),
+                    "tipo": azar.choices(TIPOS_MOVIMIENTO, PESOS_MOVIMIENTO)[0],
+                    "cantidad": azar.randint(1, 20),
+                    "fecha_movimiento": ahora - timedelta(seconds=azar.randint(0, 365 * 86400)),
+                }
+
+        total_movimientos = _en_lotes(db, MovimientoLibro, filas_movimientos())
+        progreso(f"movimientos: {total_movimientos}")
+    finally:
+        db.close()
+    return tamano()
+
+
+def limpiar() -> None:
+    db = SessionLocal()
+    try:
+        inventarios = select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id.in_(_ids_libros()))
+        inventarios_pv = select(InventarioPV.id_inventario).where(InventarioPV.id_libro.in_(_ids_libros()))
+        usuarios = select(Usuario.id_usuario).where(Usuario.email.like(f"{PREFIJO}%"))
+        for sentencia in (
+            delete(MovimientoLibro).where(MovimientoLibro.inventario_id.in_(inventarios)),
+            delete(MovimientoPV).where(MovimientoPV.inventario_pv_id.in_(inventarios_pv)),
+            # Ventas del escenario de venta hechas con token de un vendedor sembrado
+            delete(MovimientoPV).where(MovimientoPV.usuario_id.in_(usuarios)),
+            delete(InventarioPV).where(InventarioPV.id_libro.in_(_ids_libros())),
+            delete(ResumenStockLibro).where(ResumenStockLibro.libro_id.in_(_ids_libros())),
+            delete(ResumenStockPV).where(ResumenStockPV.punto_venta_id.in_(_ids_puntos_venta())),
+            delete(InventarioLibro).where(InventarioLibro.libro_id.in_(_ids_libros())),
+            delete(Usuario).where(Usuario.email.like(f"{PREFIJO}%")),
+            delete(Libro).where(Libro.nombre.like(f"{PREFIJO}%")),
+            delete(PuntoVenta).where(PuntoVenta.nombre.like(f"{PREFIJO}%")),
+            delete(Papel).where(Papel.paginas == PAGINAS_BENCH),
+        ):
+            db.execute(sentencia)
+        db.commit()
+    finally:
+        db.close()
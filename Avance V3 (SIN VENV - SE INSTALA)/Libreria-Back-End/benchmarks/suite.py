@@ -0,0 +1,357 @@
+"""
+Suite de benchmarks reproducible de la API.
+
+Siembra un conjunto de datos sintético del tamaño pedido (libros, puntos de
+venta, inventario por punto de venta, vendedores y millones de movimientos) y
+carga los routers reales con una serie de escenarios. Por escenario informa
+throughput, latencias p50/p90/p99, errores y sentencias SQL por petición
+(leídas de la cabecera Server-Timing), y guarda todo en JSON junto con el
+commit, la configuración y el tamaño de los datos para comparar corridas.
+
+Modos de carga:
+- por defecto, la app en el mismo proceso vía httpx.ASGITransport (sin red);
+- `--workers N` levanta uvicorn con N workers y reparte los clientes en
+  `--procesos P` procesos generadores de carga;
+- `--url` carga un servidor ya levantado (con los límites de login altos).
+
+Uso (desde Libreria-Back-End, con el .env apuntando a una base de pruebas):
+    python -m benchmarks.suite sembrar --libros 100000 --movimientos 5000000
+    python -m benchmarks.suite correr --concurrencia 50 --duracion 20
+    python -m benchmarks.suite correr --workers 4 --procesos 4 --escenarios libros_listar login
+    python -m benchmarks.suite comparar benchmarks/resultados/a.json benchmarks/resultados/b.json
+    python -m benchmarks.suite limpiar
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import secrets
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+# El generador de carga sale de una sola IP y repite emails: sin esto el
+# limitador de login cortaría el escenario (también vale para el uvicorn hijo)
+os.environ.setdefault("LOGIN_INTENTOS_IP", "1000000000")
+os.environ.setdefault("LOGIN_INTENTOS_EMAIL", "1000000000")
+
+import httpx
+
+from benchmarks import datos_sinteticos
+from benchmarks.bench_carga import percentil
+
+RESULTADOS = Path(__file__).parent / "resultados"
+SENTENCIAS = re.compile(r'desc="(\d+) sentencias"')
+
+
+# ============================================================
+# ESCENARIOS
+# ============================================================
+class Escenario:
+    """`peticion(azar, contexto)` devuelve (método, ruta, cuerpo JSON o None)."""
+
+    def __init__(self, nombre: str, peticion: Callable[[random.Random, dict], tuple]):
+        self.nombre = nombre
+        self.peticion = peticion
+
+
+def _busqueda(azar: random.Random, c: dict) -> str:
+    return " ".join(azar.sample(c["palabras"], 1 if azar.random() < 0.7 else 2))
+
+
+ESCENARIOS = {e.nombre: e for e in [
+    Escenario("libros_listar", lambda azar, c: ("GET", "/libros/?limit=50", None)),
+    Escenario("libros_detalle", lambda azar, c: ("GET", f"/libros/{azar.choice(c['libros'])}", None)),
+    Escenario("libros_buscar", lambda azar, c: ("GET", f"/libros/buscar?q={_busqueda(azar, c)}", None)),
+    Escenario("inventario_listar", lambda azar, c: ("GET", "/inventario/?limit=50", None)),
+    Escenario("inventario_pv_por_pv", lambda azar, c: ("GET", f"/inventario-pv/por-pv/{c['pv']}?limit=50", None)),
+    Escenario("inventario_pv_vender", lambda azar, c: (
+        "POST", f"/inventario-pv/{azar.choice(c['inventario_pv'][c['pv']])}/vender", {"cantidad": 1}
+    )),
+    Escenario("movimientos_listar", lambda azar, c: ("GET", "/movimientos/?limit=100", None)),
+    Escenario("movimientos_por_tipo", lambda azar, c: (
+        "GET", f"/movimientos/?tipo={azar.choice(['entrada', 'salida', 'ajuste'])}&limit=100", None
+    )),
+    Escenario("login", lambda azar, c: (
+        "POST", "/usuarios/login",
+        {"email": azar.choice(c["vendedores"])[0], "contrasena": datos_sinteticos.CONTRASENA},
+    )),
+]}
+
+
+# ============================================================
+# GENERADOR DE CARGA
+# ============================================================
+async def _iniciar_sesion(http: httpx.AsyncClient, datos: dict, n: int) -> dict:
+    """Contexto del generador: un vendedor sembrado con su token y su punto de venta."""
+    email, pv = datos["vendedores"][n % len(datos["vendedores"])]
+    r = await http.post("/usuarios/login", json={"email": email, "contrasena": datos_sinteticos.CONTRASENA})
+    r.raise_for_status()
+    http.headers["Authorization"] = f"Bearer {r.json()['token']}"
+    return dict(datos, pv=pv)
+
+
+async def medir(
+    http: httpx.AsyncClient, escenario: Escenario, contexto: dict,
+    concurrencia: int, calentamiento: float, duracion: float, semilla: int,
+) -> dict:
+    """Corre el escenario; solo se registra lo que termina después del calentamiento."""
+    crudo = {"latencias": [], "sentencias": [], "errores": 0, "codigos": {}}
+    desde = time.perf_counter() + calentamiento
+    hasta = desde + duracion
+
+    async def cliente(n: int) -> None:
+        azar = random.Random(semilla * 1000 + n)
+        while (inicio := time.perf_counter()) < hasta:
+            metodo, ruta, cuerpo = escenario.peticion(azar, contexto)
+            try:
+                r = await http.request(metodo, ruta, json=cuerpo)
+                codigo, timing = r.status_code, r.headers.get("server-timing", "")
+            except httpx.HTTPError:
+                codigo, timing = 0, ""
+            fin = time.perf_counter()
+            if fin < desde or fin > hasta:
+                continue
+            crudo["latencias"].append(fin - inicio)
+            crudo["codigos"][codigo] = crudo["codigos"].get(codigo, 0) + 1
+            if codigo == 0 or codigo >= 400:
+                crudo["errores"] += 1
+            if m := SENTENCIAS.search(timing):
+                crudo["sentencias"].append(int(m.group(1)))
+
+    await asyncio.gather(*(cliente(n) for n in range(concurrencia)))
+    return crudo
+
+
+def resumir(crudos: list[dict], duracion: float) -> dict:
+    latencias = sorted(l for c in crudos for l in c["latencias"])
+    sentencias = [s for c in crudos for s in c["sentencias"]]
+    codigos: dict[str, int] = {}
+    for c in crudos:
+        for codigo, veces in c["codigos"].items():
+            codigos[str(codigo)] = codigos.get(str(codigo), 0) + veces
+    return {
+        "peticiones": len(latencias),
+        "errores": sum(c["errores"] for c in crudos),
+        "codigos": codigos,
+        "rps": round(len(latencias) / duracion, 2),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p90_ms": round(percentil(latencias, 90) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+        "max_ms": round(latencias[-1] * 1000, 2) if latencias else 0.0,
+        "sql_por_peticion": round(sum(sentencias) / len(sentencias), 2) if sentencias else None,
+    }
+
+
+async def _correr_en_url(url: str, escenarios: list[str], datos: dict, n: int, config: dict) -> dict:
+    limites = httpx.Limits(max_connections=config["concurrencia"], max_keepalive_connections=config["concurrencia"])
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as http:
+        contexto = await _iniciar_sesion(http, datos, n)
+        return {
+            nombre: await medir(http, ESCENARIOS[nombre], contexto, config["concurrencia"],
+                                config["calentamiento"], config["duracion"], config["semilla"] + n)
+            for nombre in escenarios
+        }
+
+
+def _proceso_generador(argumentos: tuple) -> dict:
+    """Punto de entrada de cada proceso de `--procesos`."""
+    return asyncio.run(_correr_en_url(*argumentos))
+
+
+def correr_en_procesos(url: str, escenarios: list[str], datos: dict, procesos: int, config: dict) -> dict:
+    # Cada proceso corre los escenarios en el mismo orden y con la misma
+    # duración, así las ventanas de medición coinciden
+    por_proceso = dict(config, concurrencia=max(1, config["concurrencia"] // procesos))
+    with multiprocessing.get_context("spawn").Pool(procesos) as pool:
+        crudos = pool.map(_proceso_generador, [(url, escenarios, datos, n, por_proceso) for n in range(procesos)])
+    return {nombre: resumir([c[nombre] for c in crudos], config["duracion"]) for nombre in escenarios}
+
+
+async def correr_en_proceso(escenarios: list[str], datos: dict, config: dict) -> dict:
+    import database
+    import migraciones
+    from main import app
+
+    migraciones.aplicar()
+    transporte = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as http:
+            contexto = await _iniciar_sesion(http, datos, 0)
+            return {
+                nombre: resumir([await medir(http, ESCENARIOS[nombre], contexto, config["concurrencia"],
+                                             config["calentamiento"], config["duracion"], config["semilla"])],
+                                config["duracion"])
+                for nombre in escenarios
+            }
+    finally:
+        # ASGITransport no corre el shutdown de la app, que cierra las conexiones
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+
+
+def levantar_servidor(puerto: int, workers: int) -> subprocess.Popen:
+    # Un token emitido por un worker tiene que valer en los demás
+    env = dict(os.environ, SESION_SECRETO=os.getenv("SESION_SECRETO") or secrets.token_hex(32))
+    proceso = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+        "--workers", str(workers), "--log-level", "warning",
+    ], env=env)
+    for _ in range(150):
+        try:
+            httpx.get(f"http://127.0.0.1:{puerto}/", timeout=1)
+            return proceso
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+# ============================================================
+# RESULTADOS
+# ============================================================
+def _git(*argumentos: str) -> str:
+    try:
+        return subprocess.run(["git", *argumentos], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def guardar(resultado: dict, salida: Optional[str]) -> Path:
+    if salida:
+        ruta = Path(salida)
+    else:
+        RESULTADOS.mkdir(exist_ok=True)
+        ruta = RESULTADOS / f"suite-{datetime.now():%Y%m%d-%H%M%S}-{resultado['commit'][:8] or 'sin-git'}.json"
+    ruta.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    return ruta
+
+
+def imprimir(escenarios: dict) -> None:
+    print(f"{'escenario':<22} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'máx ms':>8} "
+          f"{'sql/pet':>8} {'errores':>8}")
+    for nombre, r in escenarios.items():
+        sql = "-" if r["sql_por_peticion"] is None else f"{r['sql_por_peticion']:.1f}"
+        print(f"{nombre:<22} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['max_ms']:>8.1f} {sql:>8} {r['errores']:>8}")
+
+
+def comparar(ruta_a: str, ruta_b: str) -> None:
+    a, b = (json.loads(Path(r).read_text(encoding="utf-8")) for r in (ruta_a, ruta_b))
+    print(f"A: {a['commit'][:8]}{' (sucio)' if a['sucio'] else ''} {a['fecha']}  datos {a['datos']}")
+    print(f"B: {b['commit'][:8]}{' (sucio)' if b['sucio'] else ''} {b['fecha']}  datos {b['datos']}")
+    if a["datos"] != b["datos"] or a["config"]["modo"] != b["config"]["modo"]:
+        print("aviso: las corridas usan datos o modo de carga distintos")
+
+    def cambio(x: float, y: float) -> str:
+        return f"{(y - x) / x * 100:+7.1f}%" if x else "      -"
+
+    def sql(r: dict) -> str:
+        return "-" if r["sql_por_peticion"] is None else f"{r['sql_por_peticion']:.1f}"
+
+    print(f"{'escenario':<22} {'req/s A':>9} {'req/s B':>9} {'Δ':>8} {'p99 A':>8} {'p99 B':>8} {'Δ':>8} "
+          f"{'sql A':>6} {'sql B':>6}")
+    for nombre in [n for n in a["escenarios"] if n in b["escenarios"]]:
+        ra, rb = a["escenarios"][nombre], b["escenarios"][nombre]
+        print(f"{nombre:<22} {ra['rps']:>9.1f} {rb['rps']:>9.1f} {cambio(ra['rps'], rb['rps']):>8} "
+              f"{ra['p99_ms']:>8.1f} {rb['p99_ms']:>8.1f} {cambio(ra['p99_ms'], rb['p99_ms']):>8} "
+              f"{sql(ra):>6} {sql(rb):>6}")
+
+
+# ============================================================
+# LÍNEA DE COMANDOS
+# ============================================================
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p = comandos.add_parser("sembrar", help="cargar el conjunto de datos sintético")
+    p.add_argument("--libros", type=int, default=10_000)
+    p.add_argument("--puntos-venta", type=int, default=20)
+    p.add_argument("--por-punto-venta", type=int, default=2_000, help="libros distintos en cada punto de venta")
+    p.add_argument("--movimientos", type=int, default=1_000_000)
+    p.add_argument("--usuarios", type=int, default=50)
+    p.add_argument("--semilla", type=int, default=7)
+
+    p = comandos.add_parser("correr", help="cargar la API y guardar los resultados")
+    p.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    p.add_argument("--concurrencia", type=int, default=50)
+    p.add_argument("--calentamiento", type=float, default=3)
+    p.add_argument("--duracion", type=float, default=15, help="segundos medidos por escenario")
+    p.add_argument("--semilla", type=int, default=7)
+    p.add_argument("--url", default=None, help="servidor ya levantado")
+    p.add_argument("--workers", type=int, default=0, help="levantar uvicorn con N workers")
+    p.add_argument("--procesos", type=int, default=1, help="procesos generadores de carga (con --url o --workers)")
+    p.add_argument("--puerto", type=int, default=8766)
+    p.add_argument("--salida", default=None, help="archivo JSON (por defecto en benchmarks/resultados/)")
+
+    p = comandos.add_parser("comparar", help="comparar dos resultados JSON")
+    p.add_argument("a")
+    p.add_argument("b")
+
+    comandos.add_parser("limpiar", help="borrar los datos sembrados")
+    args = parser.parse_args()
+
+    if args.comando == "sembrar":
+        inicio = time.perf_counter()
+        tamano = datos_sinteticos.sembrar(
+            args.libros, args.puntos_venta, args.por_punto_venta, args.movimientos, args.usuarios, args.semilla,
+            progreso=lambda texto: print(texto, file=sys.stderr),
+        )
+        print(f"sembrado en {time.perf_counter() - inicio:.1f} s: {tamano}")
+        return
+    if args.comando == "limpiar":
+        datos_sinteticos.limpiar()
+        return
+    if args.comando == "comparar":
+        comparar(args.a, args.b)
+        return
+
+    if args.url and args.workers:
+        parser.error("usar --url o --workers, no ambos")
+    if args.procesos > 1 and not (args.url or args.workers):
+        parser.error("--procesos requiere --url o --workers")
+
+    datos = datos_sinteticos.conjunto()
+    config = {
+        "modo": "url" if args.url else f"uvicorn-{args.workers}" if args.workers else "asgi",
+        "concurrencia": args.concurrencia,
+        "calentamiento": args.calentamiento,
+        "duracion": args.duracion,
+        "semilla": args.semilla,
+        "procesos": args.procesos,
+        "db_async": os.getenv("DB_ASYNC", "false"),
+    }
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "HEAD"),
+        "sucio": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "config": config,
+        "datos": datos_sinteticos.tamano(),
+    }
+
+    if args.url:
+        resultado["escenarios"] = correr_en_procesos(args.url, args.escenarios, datos, args.procesos, config)
+    elif args.workers:
+        proceso = levantar_servidor(args.puerto, args.workers)
+        try:
+            url = f"http://127.0.0.1:{args.puerto}"
+            resultado["escenarios"] = correr_en_procesos(url, args.escenarios, datos, args.procesos, config)
+        finally:
+            proceso.terminate()
+            proceso.wait()
+    else:
+        resultado["escenarios"] = asyncio.run(correr_en_proceso(args.escenarios, datos, config))
+
+    imprimir(resultado["escenarios"])
+    print(f"resultados en {guardar(resultado, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+Índice de búsqueda en memoria para libros y usuarios.
+
+`ilike('%q%')` obliga a recorrer la tabla completa. En su lugar cada proceso
+mantiene un índice invertido por palabra:
+
+- El texto se normaliza sin tildes ni mayúsculas ("Pedagogía" ~ "pedagogia").
+- Cada palabra de la consulta debe coincidir con alguna palabra del
+  documento: exacta si tiene 1 letra, por prefijo si tiene 2 y como subcadena
+  si tiene 3 o más (vía trigramas sobre el vocabulario, que es mucho más chico
+  que la tabla). Artículos y preposiciones ("de", "la", ...) no se indexan.
+- El puntaje suma, por palabra buscada, el peso del campo donde aparece
+  (p. ej. nombre > categoría > descripción) multiplicado por el tipo de
+  coincidencia (exacta > prefijo > subcadena).
+
+El índice se carga desde la BD en la primera búsqueda y se mantiene con los
+eventos del ORM: los INSERT / UPDATE / DELETE de `Libro` y `Usuario` se
+aplican al hacer commit (un rollback los descarta). Las escrituras que no
+pasan por el ORM deben llamar a `invalidar()`. Como con el caché en memoria,
+con varios workers cada proceso ve solo sus propias escrituras; para acotar
+el desfase el índice se recarga en segundo plano cada BUSQUEDA_MAX_EDAD
+segundos.
+"""
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Callable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import Libro, Usuario
+from paginacion import ParametrosPagina, decodificar_cursor
+
+BUSQUEDA_MAX_EDAD = float(os.getenv("BUSQUEDA_MAX_EDAD", "600"))
+
+# Multiplicadores por tipo de coincidencia de una palabra
+EXACTA, PREFIJO, SUBCADENA = 3, 2, 1
+
+# Máximo de combinaciones de niveles que se recorren en orden para un top-k;
+# por encima se calcula el resultado completo
+MAX_COMBINACIONES = 512
+
+# Palabras demasiado frecuentes para distinguir documentos
+PALABRAS_VACIAS = frozenset(
+    "a al con de del el en la las lo los o para por se su un una y".split()
+)
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas, sin tildes y con cualquier otro símbolo como espacio."""
+    if not texto:
+        return ""
+    # NFKD separa la tilde de la letra ("á" -> "a" + "´") y el encode la descarta
+    texto = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode()
+    return _NO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def palabras(texto: Optional[str]) -> list[str]:
+    return normalizar(texto).split()
+
+
+def terminos_de_consulta(consulta: str) -> list[str]:
+    """Términos a buscar, sin repetidos. La última palabra se conserva aunque
+    sea vacía: puede ser el comienzo de otra ("de" -> "desierto")."""
+    todas = palabras(consulta)
+    terminos = [p for p in todas[:-1] if p not in PALABRAS_VACIAS] + todas[-1:]
+    return list(dict.fromkeys(terminos))
+
+
+def _trigramas(palabra: str) -> set[str]:
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+# ============================================================
+# ÍNDICE
+# ============================================================
+class _Datos:
+    """Estructuras del índice; se reemplazan completas en cada recarga."""
+
+    def __init__(self):
+        # id -> {palabra: peso}, para poder quitar el documento
+        self.docs: dict[int, dict[str, int]] = {}
+        # palabra -> {peso: ids}; agrupar por peso permite puntuar con
+        # operaciones de conjuntos en vez de recorrer documento por documento
+        self.postings: dict[str, dict[int, set[int]]] = {}
+        self.por_trigrama: dict[str, set[str]] = defaultdict(set)
+        self._vocabulario: Optional[list[str]] = None
+
+    def poner(self, id_: int, doc: dict[str, int]) -> None:
+        self.docs[id_] = doc
+        for p, peso in doc.items():
+            por_peso = self.postings.get(p)
+            if por_peso is None:
+                por_peso = self.postings[p] = {}
+                for t in _trigramas(p):
+                    self.por_trigrama[t].add(p)
+                self._vocabulario = None
+            ids = por_peso.get(peso)
+            if ids is None:
+                ids = por_peso[peso] = set()
+            ids.add(id_)
+
+    def quitar(self, id_: int) -> None:
+        for p, peso in self.docs.pop(id_, {}).items():
+            por_peso = self.postings[p]
+            por_peso[peso].discard(id_)
+            if not por_peso[peso]:
+                del por_peso[peso]
+            if not por_peso:
+                del self.postings[p]
+                for t in _trigramas(p):
+                    self.por_trigrama[t].discard(p)
+                self._vocabulario = None
+
+    def vocabulario(self) -> list[str]:
+        """Palabras ordenadas (para buscar por prefijo); se rehace tras cambios."""
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self.postings)
+        return self._vocabulario
+
+    def palabras_que_coinciden(self, termino: str) -> list[tuple[str, int]]:
+        """(palabra del vocabulario, multiplicador) para un término buscado."""
+        if len(termino) == 1:
+            return [(termino, EXACTA)] if termino in self.postings else []
+        if len(termino) == 2:
+            vocabulario = self.vocabulario()
+            i = bisect.bisect_left(vocabulario, termino)
+            candidatas = []
+            while i < len(vocabulario) and vocabulario[i].startswith(termino):
+                candidatas.append(vocabulario[i])
+                i += 1
+        else:
+            conjuntos = sorted((self.por_trigrama.get(t, set()) for t in _trigramas(termino)), key=len)
+            candidatas = [p for p in conjuntos[0].intersection(*conjuntos[1:]) if termino in p]
+
+        # Las palabras más cortas (más parecidas al término) primero
+        return [
+            (p, EXACTA if p == termino else PREFIJO if p.startswith(termino) else SUBCADENA)
+            for p in sorted(candidatas, key=lambda p: (len(p), p))
+        ]
+
+    def grupos(self, termino: str) -> dict[int, list[set[int]]]:
+        """{puntaje: conjuntos de ids} de un término, sin unirlos todavía (son
+        los conjuntos del índice: no deben modificarse ni salir del lock)."""
+        grupos = defaultdict(list)
+        for p, factor in self.palabras_que_coinciden(termino):
+            for peso, ids in self.postings[p].items():
+                grupos[peso * factor].append(ids)
+        return grupos
+
+    def por_puntaje(self, terminos: list[str]) -> list[tuple[int, set[int]]]:
+        """(puntaje total, ids) de todos los documentos que tienen todos los términos."""
+        por_termino = [self.grupos(t) for t in terminos]
+        if not all(por_termino):
+            return []
+        return _todos_los_niveles(por_termino)
+
+    def mejores(self, terminos: list[str], limite: int) -> list[tuple[int, int]]:
+        """Los `limite` mejores (id, puntaje)."""
+        por_termino = [self.grupos(t) for t in terminos]
+        if not all(por_termino):
+            return []
+        if len(por_termino) == 1:
+            return _mejores_de_un_termino(por_termino[0], limite)
+
+        if _combinaciones(por_termino) <= MAX_COMBINACIONES:
+            niveles = _primeros_niveles(por_termino, limite)
+        else:
+            niveles = _todos_los_niveles(por_termino)
+        resultado = []
+        for puntaje, ids in niveles:
+            faltan = limite - len(resultado)
+            if faltan <= 0:
+                break
+            resultado.extend((id_, puntaje) for id_ in heapq.nsmallest(faltan, ids))
+        return resultado
+
+
+def _mejores_de_un_termino(grupos: dict[int, list[set[int]]], limite: int) -> list[tuple[int, int]]:
+    """
+    Un solo término: se recorren los conjuntos por puntaje y, dentro de cada
+    puntaje, por palabra (la más corta primero), tomando los ids menores de
+    cada uno hasta juntar `limite`. No hace falta unir conjuntos completos.
+    """
+    resultado: list[tuple[int, int]] = []
+    vistos: set[int] = set()
+    for puntaje in sorted(grupos, reverse=True):
+        for ids in grupos[puntaje]:
+            faltan = limite - len(resultado)
+            # Se piden de más por los que ya salieron en un conjunto anterior
+            nuevos = [i for i in heapq.nsmallest(faltan + len(vistos), ids) if i not in vistos][:faltan]
+            resultado.extend((id_, puntaje) for id_ in nuevos)
+            vistos.update(nuevos)
+            if len(resultado) >= limite:
+                return resultado
+    return resultado
+
+
+def _combinaciones(por_termino: list[dict]) -> int:
+    total = 1
+    for grupos in por_termino:
+        total *= len(grupos)
+    return total
+
+
+def _primeros_niveles(por_termino: list[dict], limite: int) -> list[tuple[int, set[int]]]:
+    """
+    Recorre las combinaciones de niveles (un puntaje por término) de mayor a
+    menor suma. Un documento aparece por primera vez en la combinación de sus
+    mejores niveles, así que su puntaje es la suma de esa combinación. Se
+    detiene al completar una suma con `limite` documentos juntados: los
+    niveles bajos (p. ej. coincidencias solo en la descripción), que son los
+    conjuntos más grandes, casi nunca llegan a unirse.
+    """
+    uniones = [{} for _ in por_termino]
+
+    def union(i: int, puntaje: int) -> set[int]:
+        if puntaje not in uniones[i]:
+            conjuntos = por_termino[i][puntaje]
+            uniones[i][puntaje] = conjuntos[0] if len(conjuntos) == 1 else set().union(*conjuntos)
+        return uniones[i][puntaje]
+
+    niveles = defaultdict(set)
+    vistos: set[int] = set()
+    suma_anterior = None
+    for combinacion in sorted(itertools.product(*por_termino), key=sum, reverse=True):
+        suma = sum(combinacion)
+        if suma != suma_anterior and len(vistos) >= limite:
+            break
+        suma_anterior = suma
+        conjuntos = sorted((union(i, p) for i, p in enumerate(combinacion)), key=len)
+        # intersection() siempre devuelve un conjunto nuevo: el índice no se modifica
+        ids = conjuntos[0].intersection(*conjuntos[1:]) - vistos
+        if ids:
+            niveles[suma] |= ids
+            vistos |= ids
+    return sorted(niveles.items(), key=lambda x: -x[0])
+
+
+def _todos_los_niveles(por_termino: list[dict]) -> list[tuple[int, set[int]]]:
+    """Resultado completo: se parte del término más selectivo y se filtra con el resto."""
+    por_termino = sorted(
+        por_termino, key=lambda g: sum(len(ids) for conjuntos in g.values() for ids in conjuntos)
+    )
+    if len(por_termino) == 1:
+        return _mejor_nivel(por_termino[0])
+
+    candidatos = set().union(*(ids for conjuntos in por_termino[0].values() for ids in conjuntos))
+    for grupos in por_termino[1:]:
+        candidatos = set().union(*(ids & candidatos for conjuntos in grupos.values() for ids in conjuntos))
+        if not candidatos:
+            return []
+
+    combinado = {0: candidatos}
+    for grupos in por_termino:
+        siguiente = defaultdict(set)
+        for puntaje_a, ids_a in combinado.items():
+            for puntaje_b, ids_b in _mejor_nivel(grupos, dentro=candidatos):
+                comunes = ids_a & ids_b
+                if comunes:
+                    siguiente[puntaje_a + puntaje_b] |= comunes
+        combinado = siguiente
+    return sorted(combinado.items(), key=lambda x: -x[0])
+
+
+def _mejor_nivel(grupos: dict[int, list[set[int]]], dentro: Optional[set[int]] = None) -> list[tuple[int, set[int]]]:
+    """(puntaje, ids) de mayor a menor, con cada id solo en su mejor puntaje."""
+    niveles, vistos = [], set()
+    for puntaje in sorted(grupos, reverse=True):
+        conjuntos = grupos[puntaje] if dentro is None else [ids & dentro for ids in grupos[puntaje]]
+        ids = set().union(*conjuntos) - vistos
+        if ids:
+            niveles.append((puntaje, ids))
+            vistos |= ids
+    return niveles
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido de un modelo. `campos` es una lista de (atributo, peso).
+    Los métodos públicos son seguros entre hilos.
+    """
+
+    def __init__(self, modelo, clave: str, campos: list[tuple[str, int]], max_edad: float = BUSQUEDA_MAX_EDAD):
+        self.modelo = modelo
+        self.clave = clave
+        self.campos = campos
+        self.max_edad = max_edad
+        self._lock = threading.Lock()
+        self._carga = threading.Lock()
+        self._datos = _Datos()
+        self._cargado_en: Optional[float] = None
+        self._recargando = False
+        # Cambios confirmados mientras se lee la tabla; se reaplican al final
+        self._durante_carga: Optional[list] = None
+
+    # ---------------- carga ----------------
+    def _documento(self, valores) -> dict[str, int]:
+        """{palabra: peso del campo más importante donde aparece}"""
+        doc: dict[str, int] = {}
+        for (_, peso), texto in zip(self.campos, valores):
+            for p in palabras(texto):
+                if peso > doc.get(p, 0) and p not in PALABRAS_VACIAS:
+                    doc[p] = peso
+        return doc
+
+    def cargar(self, db: Session) -> None:
+        """Reconstruye el índice completo desde la BD."""
+        with self._lock:
+            self._durante_carga = []
+        columnas = [getattr(self.modelo, c) for c in [self.clave] + [c for c, _ in self.campos]]
+        self.cargar_filas(db.execute(select(*columnas)).all())
+
+    def cargar_filas(self, filas) -> None:
+        """Reconstruye el índice desde filas (id, campo1, campo2, ...)."""
+        datos = _Datos()
+        for fila in filas:
+            datos.poner(fila[0], self._documento(fila[1:]))
+        datos.vocabulario()
+        with self._lock:
+            for id_, valores in self._durante_carga or []:
+                datos.quitar(id_)
+                if valores is not None:
+                    datos.poner(id_, self._documento(valores))
+            self._datos = datos
+            self._cargado_en = time.monotonic()
+            self._durante_carga = None
+
+    def asegurar(self, db: Session) -> None:
+        """Carga el índice si hace falta y programa la recarga si está viejo."""
+        if self._cargado_en is None:
+            with self._carga:
+                if self._cargado_en is None:
+                    self.cargar(db)
+            return
+        with self._lock:
+            if self._recargando or time.monotonic() - self._cargado_en <= self.max_edad:
+                return
+            self._recargando = True
+        threading.Thread(target=self._cargar_en_segundo_plano, daemon=True).start()
+
+    def precargar(self) -> None:
+        """Carga el índice en segundo plano (p. ej. al iniciar la API)."""
+        with self._lock:
+            if self._recargando:
+                return
+            self._recargando = True
+        threading.Thread(target=self._cargar_en_segundo_plano, daemon=True).start()
+
+    def _cargar_en_segundo_plano(self) -> None:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            with self._carga:
+                self.cargar(db)
+        finally:
+            db.close()
+            with self._lock:
+                self._recargando = False
+
+    def invalidar(self) -> None:
+        """Fuerza la recarga completa en la próxima búsqueda."""
+        with self._lock:
+            self._cargado_en = None
+
+    def aplicar(self, cambios: list[tuple[int, Optional[tuple]]]) -> None:
+        """Aplica (id, valores de los campos) o (id, None) para borrados."""
+        with self._lock:
+            if self._durante_carga is not None:
+                self._durante_carga.extend(cambios)
+            if self._cargado_en is None:
+                return
+            for id_, valores in cambios:
+                self._datos.quitar(id_)
+                if valores is not None:
+                    self._datos.poner(id_, self._documento(valores))
+
+    # ---------------- búsqueda ----------------
+    def coincidencias(self, consulta: str) -> set[int]:
+        """Ids de todos los documentos que coinciden con la consulta."""
+        terminos = terminos_de_consulta(consulta)
+        if not terminos:
+            return set()
+        # Los conjuntos del índice se leen bajo el lock; los resultados son copias
+        with self._lock:
+            return set().union(*(ids for _, ids in self._datos.por_puntaje(terminos)))
+
+    def buscar(self, consulta: str, limite: int = 20) -> list[tuple[int, int]]:
+        """
+        Los `limite` mejores (id, puntaje). A igual puntaje gana la palabra
+        más parecida al término (con un solo término) y después el id menor.
+        """
+        terminos = terminos_de_consulta(consulta)
+        if not terminos:
+            return []
+        with self._lock:
+            return self._datos.mejores(terminos, limite)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "documentos": len(self._datos.docs),
+                "palabras": len(self._datos.postings),
+                "edad_s": None if self._cargado_en is None else round(time.monotonic() - self._cargado_en, 1),
+            }
+
+
+indice_libros = IndiceBusqueda(Libro, "id_libro", [("nombre", 4), ("categoria", 2), ("descripcion", 1)])
+indice_usuarios = IndiceBusqueda(Usuario, "id_usuario", [("nombre", 2), ("email", 2)])
+
+_INDICES = {Libro: indice_libros, Usuario: indice_usuarios}
+
+
+# ============================================================
+# SINCRONIZACIÓN CON EL ORM (se aplica al hacer commit)
+# ============================================================
+_PENDIENTES = "busqueda_pendientes"
+
+
+def _registrar(indice: IndiceBusqueda, borrado: bool) -> Callable:
+    def escuchar(mapper, connection, objetivo) -> None:
+        id_ = getattr(objetivo, indice.clave)
+        valores = None if borrado else tuple(getattr(objetivo, c) for c, _ in indice.campos)
+        sesion = Session.object_session(objetivo)
+        if sesion is not None:
+            sesion.info.setdefault(_PENDIENTES, []).append((indice, id_, valores))
+    return escuchar
+
+
+for _modelo, _indice in _INDICES.items():
+    event.listen(_modelo, "after_insert", _registrar(_indice, borrado=False))
+    event.listen(_modelo, "after_update", _registrar(_indice, borrado=False))
+    event.listen(_modelo, "after_delete", _registrar(_indice, borrado=True))
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_pendientes(session: Session) -> None:
+    por_indice = defaultdict(list)
+    for indice, id_, valores in session.info.pop(_PENDIENTES, []):
+        por_indice[indice].append((id_, valores))
+    for indice, cambios in por_indice.items():
+        indice.aplicar(cambios)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session: Session) -> None:
+    session.info.pop(_PENDIENTES, None)
+
+
+# ============================================================
+# PAGINACIÓN SOBRE LOS RESULTADOS
+# ============================================================
+def ids_de_pagina(ids: set[int], columna, pagina: ParametrosPagina) -> list[int]:
+    """
+    Recorta un conjunto de ids (coincidencias del índice) a la página pedida,
+    así el `IN (...)` de la consulta lleva solo `limit + 1` valores. El
+    resultado se pasa igual por `paginar`, que vuelve a aplicar cursor y
+    límite sobre las mismas filas.
+    """
+    ordenados = sorted(ids, reverse=pagina.descendente)
+    if pagina.after:
+        (ultimo,) = decodificar_cursor(pagina.after, [columna])
+        ordenados = [i for i in ordenados if (i < ultimo if pagina.descendente else i > ultimo)]
+    return ordenados[:pagina.limit + 1]
@@ -0,0 +1,244 @@
+"""
+Caché de lectura (read-through) para entidades que cambian poco: puntos de
+venta, papel y listados de libros.
+
+- Cada entrada vive como máximo CACHE_TTL segundos y el backend en memoria
+  descarta las menos usadas al superar CACHE_MAX_ENTRADAS (LRU).
+- La invalidación es por "espacio" (p. ej. "puntos_venta"): cada espacio tiene
+  un número de versión que forma parte de la clave, así `invalidar()` deja
+  inalcanzables todas sus entradas de una vez sin recorrer el caché.
+- Los endpoints de escritura llaman a `cache.invalidar(...)` después del commit.
+- El backend es intercambiable (`configurar_backend`): con varios workers se
+  puede usar uno compartido (p. ej. Redis) implementando `BackendCache`.
+
+Los valores guardados se comparten entre peticiones: no deben modificarse.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from fastapi import Response
+
+from paginacion import CABECERA_CURSOR, ParametrosPagina
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "1024"))
+
+# Marca de "no está en caché" (None es un valor cacheable)
+FALTA = object()
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+class BackendCache:
+    """Interfaz mínima que debe cumplir un backend de caché."""
+
+    # True si los contadores se comparten entre procesos (p. ej. Redis)
+    compartido = False
+
+    def leer(self, clave: Hashable) -> Any:
+        """Devuelve el valor o `FALTA` si no existe / expiró."""
+        raise NotImplementedError
+
+    def escribir(self, clave: Hashable, valor: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def incrementar(self, clave: Hashable) -> int:
+        """Incrementa un contador (sin expiración) y devuelve el nuevo valor."""
+        raise NotImplementedError
+
+
+class BackendMemoria(BackendCache):
+    """TTL + LRU en memoria del proceso, seguro entre hilos."""
+
+    def __init__(self, max_entradas: int = CACHE_MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._datos: OrderedDict = OrderedDict()
+        self._contadores: dict = {}
+        self._lock = threading.Lock()
+
+    def leer(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return FALTA
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return FALTA
+            self._datos.move_to_end(clave)
+            return valor
+
+    def escribir(self, clave, valor, ttl):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def incrementar(self, clave):
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + 1
+            return self._contadores[clave]
+
+    def version(self, clave) -> int:
+        with self._lock:
+            return self._contadores.get(clave, 0)
+
+
+# ============================================================
+# CACHÉ
+# ============================================================
+class Cache:
+    """Caché por espacios con contadores de aciertos/fallos."""
+
+    def __init__(self, backend: BackendCache):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._aciertos: dict[str, int] = {}
+        self._fallos: dict[str, int] = {}
+        self._inicio = time.time()
+        self._modificado: dict[str, float] = {}
+
+    def _version(self, espacio: str) -> int:
+        # Los backends compartidos pueden no tener lectura directa del contador
+        leer_version = getattr(self.backend, "version", None)
+        if leer_version:
+            return leer_version(("version", espacio))
+        version = self.backend.leer(("version", espacio))
+        return 0 if version is FALTA else version
+
+    def version(self, espacio: str) -> int:
+        return self._version(espacio)
+
+    def ultima_modificacion(self, espacio: str) -> float:
+        """Epoch de la última invalidación del espacio en este proceso."""
+        with self._lock:
+            return self._modificado.get(espacio, self._inicio)
+
+    def obtener_o_cargar(
+        self,
+        espacio: str,
+        clave: Hashable,
+        cargar: Callable[[], Any],
+        depende_de: Iterable[str] = (),
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Devuelve el valor cacheado para (`espacio`, `clave`) o lo calcula con
+        `cargar()` y lo guarda. La entrada queda invalidada cuando cambia la
+        versión de `espacio` o de cualquiera de `depende_de`.
+        """
+        clave_completa = self._clave_completa(espacio, clave, depende_de)
+        valor = self._leer(espacio, clave_completa)
+        if valor is not FALTA:
+            return valor
+
+        valor = cargar()
+        self.backend.escribir(clave_completa, valor, CACHE_TTL if ttl is None else ttl)
+        return valor
+
+    async def obtener_o_cargar_async(
+        self,
+        espacio: str,
+        clave: Hashable,
+        cargar: Callable[[], Awaitable[Any]],
+        depende_de: Iterable[str] = (),
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Igual que `obtener_o_cargar`, con un `cargar` asíncrono."""
+        clave_completa = self._clave_completa(espacio, clave, depende_de)
+        valor = self._leer(espacio, clave_completa)
+        if valor is not FALTA:
+            return valor
+
+        valor = await cargar()
+        self.backend.escribir(clave_completa, valor, CACHE_TTL if ttl is None else ttl)
+        return valor
+
+    def _clave_completa(self, espacio: str, clave: Hashable, depende_de: Iterable[str]) -> tuple:
+        versiones = tuple(self._version(e) for e in (espacio, *depende_de))
+        return (espacio, versiones, clave)
+
+    def _leer(self, espacio: str, clave_completa: tuple) -> Any:
+        valor = self.backend.leer(clave_completa)
+        with self._lock:
+            contadores = self._fallos if valor is FALTA else self._aciertos
+            contadores[espacio] = contadores.get(espacio, 0) + 1
+        return valor
+
+    def invalidar(self, *espacios: str) -> None:
+        ahora = time.time()
+        for espacio in espacios:
+            self.backend.incrementar(("version", espacio))
+            with self._lock:
+                self._modificado[espacio] = ahora
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            espacios = sorted(set(self._aciertos) | set(self._fallos))
+            return {
+                e: {"aciertos": self._aciertos.get(e, 0), "fallos": self._fallos.get(e, 0)}
+                for e in espacios
+            }
+
+
+cache = Cache(BackendMemoria())
+
+
+def configurar_backend(backend: BackendCache) -> None:
+    """Reemplaza el backend (p. ej. por uno compartido entre workers)."""
+    cache.backend = backend
+
+
+# ============================================================
+# LISTADOS PAGINADOS
+# ============================================================
+def pagina_cacheada(
+    espacio: str,
+    clave: Hashable,
+    pagina: ParametrosPagina,
+    response: Response,
+    cargar: Callable[[Response], list],
+    depende_de: Iterable[str] = (),
+) -> list:
+    """
+    Cachea una página de un listado junto con su cursor siguiente.
+    `cargar(respuesta)` debe paginar sobre `respuesta` y devolver la lista.
+    """
+    def _cargar():
+        temporal = Response()
+        items = cargar(temporal)
+        return items, temporal.headers.get(CABECERA_CURSOR)
+
+    items, cursor = cache.obtener_o_cargar(
+        espacio, (clave, pagina.after, pagina.limit, pagina.descendente), _cargar, depende_de
+    )
+    if cursor:
+        response.headers[CABECERA_CURSOR] = cursor
+    return items
+
+
+async def pagina_cacheada_async(
+    espacio: str,
+    clave: Hashable,
+    pagina: ParametrosPagina,
+    response: Response,
+    cargar: Callable[[Response], Awaitable[list]],
+    depende_de: Iterable[str] = (),
+) -> list:
+    """Igual que `pagina_cacheada`, con un `cargar` asíncrono."""
+    async def _cargar():
+        temporal = Response()
+        items = await cargar(temporal)
+        return items, temporal.headers.get(CABECERA_CURSOR)
+
+    items, cursor = await cache.obtener_o_cargar_async(
+        espacio, (clave, pagina.after, pagina.limit, pagina.descendente), _cargar, depende_de
+    )
+    if cursor:
+        response.headers[CABECERA_CURSOR] = cursor
+    return items
@@ -0,0 +1,32 @@
+"""
+Catálogo de papel en caché: diccionario páginas -> nombre.
+
+Es una tabla chica (un tipo de papel por cantidad de páginas), así que se
+carga completa con una consulta de solo columnas y se sirve desde `cache`
+hasta que expira o se invalida el espacio "papel". Lo usan la validación de
+libros nuevos y la importación en lote.
+
+Los nombres de libros y puntos de venta no se cachean por tabla completa: las
+respuestas de inventario los traen unidos en la misma consulta de la página.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from cache import cache
+from models import Papel
+
+
+def catalogo_papel(db: Session) -> dict[int, str]:
+    """paginas -> nombre del papel"""
+    def cargar():
+        filas = db.execute(select(Papel.paginas, Papel.nombre)).all()
+        return {f.paginas: f.nombre for f in filas}
+    return cache.obtener_o_cargar("papel", "catalogo", cargar)
+
+
+def papel_existe(db: Session, paginas: int) -> bool:
+    # Ante un fallo se recarga una vez (el papel pudo cargarse por SQL)
+    if paginas in catalogo_papel(db):
+        return True
+    cache.invalidar("papel")
+    return paginas in catalogo_papel(db)
@@ -0,0 +1,114 @@
+"""
+GET condicionales (ETag / Last-Modified) para listados y detalles.
+
+El ETag se deriva de la versión de los espacios del caché (`cache.py`) de los
+que depende la ruta, más la ruta y sus parámetros: saber si algo cambió no
+requiere consultar la tabla. Si el cliente envía un `If-None-Match` (o un
+`If-Modified-Since`) vigente se responde 304 antes de ejecutar el endpoint,
+sin ir a la BD ni serializar.
+
+En las rutas cuyo resultado depende de la sesión (`por_sesion=True`, p. ej.
+inventario por punto de venta) la dependencia usa `sesion_actual`: el token se
+valida antes de comparar el ETag, así un token vencido o faltante (con
+AUTH_OBLIGATORIA) da 401 y no 304, y el rol y el alcance de la sesión entran
+en el ETag, así un admin y un vendedor no comparten la misma copia.
+
+Las respuestas llevan `Cache-Control: no-cache`, así el navegador guarda la
+respuesta y revalida solo en cada `fetch` (el panel de admin no cambia).
+
+Con el backend en memoria los contadores son por proceso: el ETag incluye un
+identificador del proceso y una época de CACHE_TTL segundos, de modo que con
+varios workers un ETag viejo no se revalida por más tiempo del que dura una
+entrada del caché.
+"""
+import hashlib
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, Request, Response
+
+from cache import CACHE_TTL, cache
+from sesiones import Sesion, alcance_punto_venta, sesion_actual
+
+INSTANCIA = uuid.uuid4().hex[:8]
+
+
+class NoModificado(Exception):
+    """Se lanza desde la dependencia para cortar la petición con un 304."""
+
+    def __init__(self, cabeceras: dict):
+        self.cabeceras = cabeceras
+
+
+def respuesta_no_modificado(request: Request, exc: NoModificado) -> Response:
+    return Response(status_code=304, headers=exc.cabeceras)
+
+
+def _fecha_http(valor: Optional[str]) -> Optional[float]:
+    if not valor:
+        return None
+    try:
+        return parsedate_to_datetime(valor).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    # Comparación débil: se ignora el prefijo W/. "*" no se atiende porque
+    # exigiría consultar si el recurso existe.
+    etiquetas = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+    return etag.removeprefix("W/") in etiquetas
+
+
+def condicional(*espacios: str, por_sesion: bool = False):
+    """
+    Dependencia para GETs: agrega ETag y Last-Modified a la respuesta y
+    responde 304 si la copia del cliente sigue vigente. Con `por_sesion` el
+    ETag es por rol y punto de venta de la sesión.
+
+    Uso: `@router.get("/", dependencies=[Depends(condicional("usuarios"))])`
+    """
+    def comprobar(request: Request, response: Response, alcance: str) -> None:
+        versiones = ",".join(f"{e}={cache.version(e)}" for e in espacios)
+        modificado = max(cache.ultima_modificacion(e) for e in espacios)
+        sello = ""
+        if not getattr(cache.backend, "compartido", False):
+            epoca = int(time.time() // CACHE_TTL)
+            sello = f"{INSTANCIA}:{epoca}"
+            modificado = max(modificado, epoca * CACHE_TTL)
+
+        base = f"{request.url.path}?{request.url.query}|{versiones}|{sello}|{alcance}"
+        etag = f'W/"{hashlib.sha1(base.encode()).hexdigest()[:20]}"'
+        cabeceras = {
+            "ETag": etag,
+            "Last-Modified": formatdate(modificado, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if por_sesion:
+            cabeceras["Vary"] = "Authorization"
+
+        # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if _coincide(if_none_match, etag):
+                raise NoModificado(cabeceras)
+        else:
+            desde = _fecha_http(request.headers.get("if-modified-since"))
+            if desde is not None and int(modificado) <= desde:
+                raise NoModificado(cabeceras)
+
+        response.headers.update(cabeceras)
+
+    def dependencia(request: Request, response: Response) -> None:
+        comprobar(request, response, "")
+
+    def dependencia_por_sesion(
+        request: Request, response: Response, sesion: Optional[Sesion] = Depends(sesion_actual)
+    ) -> None:
+        # sesion_actual ya validó el token (o respondió 401) antes de llegar aquí
+        rol = sesion.rol if sesion is not None else ""
+        comprobar(request, response, f"{rol}:{alcance_punto_venta(sesion)}")
+
+    return dependencia_por_sesion if por_sesion else dependencia
@@ -0,0 +1,155 @@
+"""
+Hash de contraseñas con scrypt (`hashlib`, sin dependencias nuevas).
+
+- Se guarda como `scrypt$n$r$p$sal$hash` (sal y hash en base64), en la misma
+  columna `usuarios.contrasena`.
+- Las contraseñas en texto plano de versiones anteriores se siguen aceptando;
+  `necesita_rehash()` las marca (igual que a los hashes con parámetros viejos)
+  y el login las reemplaza por el hash en el primer ingreso correcto.
+- Un hash `scrypt$...` mal formado (parámetros no numéricos, base64 roto) no
+  coincide con ninguna contraseña: se registra en el log y el login responde
+  credenciales inválidas en vez de un 500.
+- Cada cálculo cuesta decenas de ms de CPU y 16 MB de memoria. Se ejecutan en
+  un pool de hilos propio de CONTRASENA_HILOS (scrypt libera el GIL), aparte
+  del threadpool de FastAPI, con a lo sumo CONTRASENA_MAX_PENDIENTES cálculos
+  esperando: por encima se lanza `PoolSaturado` y la API responde 503.
+"""
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+# Costo de scrypt: memoria = 128 * N * R bytes
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+
+CONTRASENA_HILOS = int(os.getenv("CONTRASENA_HILOS", str(os.cpu_count() or 2)))
+CONTRASENA_MAX_PENDIENTES = int(os.getenv("CONTRASENA_MAX_PENDIENTES", "1000"))
+
+ESQUEMA = "scrypt"
+LARGO_HASH = 32
+
+log = logging.getLogger("libreria.contrasenas")
+
+
+# ============================================================
+# HASH
+# ============================================================
+def _scrypt(contrasena: str, sal: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        contrasena.encode(), salt=sal, n=n, r=r, p=p, maxmem=2 * 128 * n * r * p, dklen=LARGO_HASH
+    )
+
+
+def _b64(datos: bytes) -> str:
+    return base64.b64encode(datos).decode()
+
+
+def hashear(contrasena: str) -> str:
+    sal = secrets.token_bytes(16)
+    hash_ = _scrypt(contrasena, sal, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{ESQUEMA}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(sal)}${_b64(hash_)}"
+
+
+def _partes(guardada: str):
+    partes = guardada.split("$")
+    if len(partes) != 6 or partes[0] != ESQUEMA:
+        return None
+    return partes
+
+
+def verificar(contrasena: str, guardada: str) -> bool:
+    partes = _partes(guardada)
+    if partes is None:
+        # Texto plano, anterior al hash
+        return hmac.compare_digest(contrasena.encode(), guardada.encode())
+    _, n, r, p, sal, hash_ = partes
+    try:
+        calculado = _scrypt(contrasena, base64.b64decode(sal, validate=True), int(n), int(r), int(p))
+        esperado = base64.b64decode(hash_, validate=True)
+    except (ValueError, OverflowError, binascii.Error) as e:
+        log.warning("Hash de contraseña mal formado (%s: %s)", type(e).__name__, e)
+        return False
+    return hmac.compare_digest(calculado, esperado)
+
+
+def necesita_rehash(guardada: str) -> bool:
+    partes = _partes(guardada)
+    return partes is None or partes[1:4] != [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+
+
+@functools.lru_cache(maxsize=1)
+def _hash_ficticio() -> str:
+    return hashear(secrets.token_hex(16))
+
+
+def verificar_sin_usuario(contrasena: str) -> bool:
+    """
+    Hace el mismo trabajo que `verificar` para un email inexistente, así el
+    tiempo de respuesta no revela qué emails están registrados.
+    """
+    verificar(contrasena, _hash_ficticio())
+    return False
+
+
+# ============================================================
+# POOL ACOTADO
+# ============================================================
+class PoolSaturado(Exception):
+    """Hay CONTRASENA_MAX_PENDIENTES cálculos esperando."""
+
+
+_ejecutor = ThreadPoolExecutor(max_workers=CONTRASENA_HILOS, thread_name_prefix="contrasenas")
+_lock = threading.Lock()
+_pendientes = 0
+
+
+def _liberar(_futuro: Future) -> None:
+    global _pendientes
+    with _lock:
+        _pendientes -= 1
+
+
+def _enviar(funcion: Callable, *args) -> Future:
+    global _pendientes
+    with _lock:
+        if _pendientes >= CONTRASENA_MAX_PENDIENTES:
+            raise PoolSaturado()
+        _pendientes += 1
+    futuro = _ejecutor.submit(funcion, *args)
+    futuro.add_done_callback(_liberar)
+    return futuro
+
+
+async def en_pool(funcion: Callable, *args):
+    """Ejecuta `funcion` en el pool sin bloquear el event loop."""
+    return await asyncio.wrap_future(_enviar(funcion, *args))
+
+
+def en_pool_y_esperar(funcion: Callable, *args):
+    """Igual que `en_pool`, para rutas síncronas."""
+    return _enviar(funcion, *args).result()
+
+
+def estado_pool() -> dict:
+    return {"hilos": CONTRASENA_HILOS, "pendientes": _pendientes, "max_pendientes": CONTRASENA_MAX_PENDIENTES}
+
+
+async def respuesta_pool_saturado(request: Request, exc: PoolSaturado) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Demasiados inicios de sesión simultáneos, reintentá en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
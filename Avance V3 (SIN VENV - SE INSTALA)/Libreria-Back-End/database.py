@@ -3,62 +3,162 @@ Módulo de configuración de la base de datos.
 
 Se encarga de:
 - Cargar las variables de entorno desde un archivo .env.
+- Elegir el backend (DB_BACKEND): MySQL (por defecto) o SQLite en un archivo
+  (DB_SQLITE_RUTA) o en memoria (":memory:"), ver `soporte_sqlite`.
 - Validar que las variables necesarias estén presentes.
-- Construir la URL de conexión a MySQL.
-- Crear el `engine` de SQLAlchemy.
+- Construir la URL de conexión.
+- Crear el `engine` de SQLAlchemy con un pool configurable desde el .env
+  (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+  DB_POOL_PRE_PING, DB_ISOLATION_LEVEL) y medido por `metricas_pool`.
 - Exponer `SessionLocal` para crear sesiones a la BD.
 - Exponer `Base` para declarar los modelos ORM.
+- Opcionalmente (DB_ASYNC=true) crear un `AsyncEngine` y `AsyncSessionLocal`
+  para los routers asíncronos.
 
 Este módulo está pensado para ser importado desde el resto de la aplicación, por ejemplo:
     from database import SessionLocal, Base
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from dotenv import load_dotenv, find_dotenv
-from typing import Generator 
+from typing import AsyncGenerator, Generator
 import os
 from pathlib import Path
-from typing import Generator
+from metricas_pool import AsyncAdaptedQueuePoolMedido, QueuePoolMedido
+import soporte_sqlite
 
 # Cargar .env
 env_path = find_dotenv(usecwd=True) or str(Path(__file__).parent / ".env")
 load_dotenv(dotenv_path=env_path)
 
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None or not valor.strip():
+        return defecto
+    return valor.strip().lower() in ("1", "true", "si", "sí", "yes")
+
+
+def _env_int(nombre: str, defecto: int) -> int:
+    valor = os.getenv(nombre)
+    if valor is None or not valor.strip():
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise RuntimeError(f"La variable {nombre} debe ser un entero (recibido: {valor!r})")
+
+
+# "mysql" o "sqlite"
+DB_BACKEND = (os.getenv("DB_BACKEND") or "mysql").strip().lower()
+DB_SQLITE_RUTA = os.getenv("DB_SQLITE_RUTA") or "libreria.db"
+
 DB_HOST = os.getenv("DB_HOST")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT", "3306")
 
+# Modo asíncrono: los routers "calientes" usan AsyncSession sobre aiomysql
+# (aiosqlite con SQLite)
+DB_ASYNC = _env_bool("DB_ASYNC", False)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER") or ("aiosqlite" if DB_BACKEND == "sqlite" else "aiomysql")
+
+# Pool de conexiones (por worker: el total contra MySQL es
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) y debe quedar bajo max_connections)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 280)
+# Pre-ping: un round-trip extra por checkout a cambio de descartar conexiones
+# muertas. Con DB_POOL_RECYCLE menor que wait_timeout de MySQL puede apagarse.
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Nivel de aislamiento opcional, p. ej. "READ COMMITTED" o "REPEATABLE READ"
+DB_ISOLATION_LEVEL = os.getenv("DB_ISOLATION_LEVEL") or None
+
+# Aplicar las migraciones pendientes al iniciar la API. En despliegues con
+# varios workers puede apagarse y correr `python -m migraciones aplicar` antes.
+DB_MIGRAR_AL_INICIAR = _env_bool("DB_MIGRAR_AL_INICIAR", True)
+
 # Validación de variables
+if DB_BACKEND not in ("mysql", "sqlite"):
+    raise RuntimeError(f"DB_BACKEND debe ser mysql o sqlite (recibido: {DB_BACKEND!r})")
+if DB_BACKEND == "sqlite" and DB_ASYNC and DB_SQLITE_RUTA == soporte_sqlite.MEMORIA:
+    # El engine asíncrono abriría otra base en memoria, vacía
+    raise RuntimeError("DB_ASYNC con SQLite requiere una base en archivo (DB_SQLITE_RUTA)")
 missing = [k for k, v in {
     "DB_HOST": DB_HOST, "DB_USER": DB_USER, "DB_PASSWORD": DB_PASSWORD,
     "DB_NAME": DB_NAME, "DB_PORT": DB_PORT
-}.items() if not v]
+}.items() if not v] if DB_BACKEND == "mysql" else []
 if missing:
     raise RuntimeError(f"Variables .env faltantes: {', '.join(missing)}. "
                        f"Revisá tu archivo .env en: {env_path}")
 
 # Cadena de conexión 
-DATABASE_URL = (
-    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    "?auth_plugin=mysql_native_password"
+if DB_BACKEND == "sqlite":
+    DATABASE_URL = soporte_sqlite.url(DB_SQLITE_RUTA)
+else:
+    DATABASE_URL = (
+        f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        "?auth_plugin=mysql_native_password"
+    )
+
+# Opciones de pool comunes al engine síncrono y al asíncrono
+opciones_pool = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
 )
+if DB_ISOLATION_LEVEL:
+    opciones_pool["isolation_level"] = DB_ISOLATION_LEVEL
+if DB_BACKEND == "sqlite":
+    opciones_pool = soporte_sqlite.opciones_engine(DB_SQLITE_RUTA, DB_POOL_TIMEOUT, opciones_pool)
 
 # Crea engine y sesión
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,           
-    pool_recycle=280            
+    poolclass=QueuePoolMedido,
+    **opciones_pool
 )
+if DB_BACKEND == "sqlite":
+    soporte_sqlite.preparar(engine, DB_SQLITE_RUTA)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine asíncrono (solo si está habilitado, así no se exige el driver async)
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    if DB_BACKEND == "sqlite":
+        ASYNC_DATABASE_URL = soporte_sqlite.url(DB_SQLITE_RUTA, DB_ASYNC_DRIVER)
+    else:
+        ASYNC_DATABASE_URL = (
+            f"mysql+{DB_ASYNC_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePoolMedido,
+        **opciones_pool
+    )
+    if DB_BACKEND == "sqlite":
+        soporte_sqlite.preparar(async_engine.sync_engine, DB_SQLITE_RUTA)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
 # Dependencia de FastAPI para obtener sesión de DB
 def get_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependencia de FastAPI para obtener sesión asíncrona (modo DB_ASYNC)
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,97 @@
+"""
+Exportación en streaming (NDJSON / CSV) de tablas grandes.
+
+Las filas se leen por lotes de FILAS_POR_LOTE con paginación keyset (una
+consulta `WHERE (orden) > (última fila) ORDER BY orden LIMIT n` por lote) y se
+escriben en un `StreamingResponse`, así la memoria del worker no depende de la
+cantidad de filas exportadas. No se usa `yield_per`: mysql-connector no tiene
+cursores del lado del servidor y traería el resultado entero al primer lote.
+Todos los lotes se leen en la misma transacción (misma foto en MySQL).
+
+El generador abre su propia sesión: la respuesta se sigue enviando después de
+que FastAPI cierra la sesión de la dependencia `get_db`.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from database import SessionLocal
+from paginacion import condicion_keyset
+
+# Filas que se traen de la BD (y se escriben) por lote
+FILAS_POR_LOTE = 1000
+
+TIPOS_CONTENIDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _valor(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _lotes(stmt: Select, orden: Sequence) -> Iterator[Sequence]:
+    claves = [c.key for c in orden]
+    db = SessionLocal()
+    try:
+        ultima = None
+        while True:
+            consulta = stmt if ultima is None else stmt.where(condicion_keyset(orden, ultima, False))
+            lote = db.execute(consulta.order_by(*orden).limit(FILAS_POR_LOTE)).all()
+            if lote:
+                yield lote
+            if len(lote) < FILAS_POR_LOTE:
+                return
+            ultima = [getattr(lote[-1], c) for c in claves]
+    finally:
+        db.close()
+
+
+def _generar_ndjson(stmt: Select, orden: Sequence, columnas: Sequence[str]) -> Iterator[bytes]:
+    for lote in _lotes(stmt, orden):
+        yield "".join(
+            json.dumps({c: _valor(v) for c, v in zip(columnas, fila)}, ensure_ascii=False) + "\n"
+            for fila in lote
+        ).encode()
+
+
+def _generar_csv(stmt: Select, orden: Sequence, columnas: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for lote in _lotes(stmt, orden):
+        escritor.writerows([_valor(v) for v in fila] for fila in lote)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Sin filas: al menos se envía la cabecera
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def respuesta_exportacion(stmt: Select, orden: Sequence, formato: str, nombre_archivo: str) -> StreamingResponse:
+    """
+    Devuelve un `StreamingResponse` con el resultado de `stmt` en `formato`
+    ("ndjson" o "csv"). Las columnas de salida son las del SELECT.
+
+    `orden`: columnas por las que se recorre (ascendente), la última única
+    (normalmente la PK). Deben estar en el SELECT; `stmt` va sin ORDER BY.
+    """
+    columnas = [c.key for c in stmt.selected_columns]
+    generador = _generar_csv if formato == "csv" else _generar_ndjson
+    return StreamingResponse(
+        generador(stmt, orden, columnas),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}.{formato}"'},
+    )
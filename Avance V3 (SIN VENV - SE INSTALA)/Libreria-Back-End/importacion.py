@@ -0,0 +1,262 @@
+"""
+Importación de libros en lote (CSV / NDJSON).
+
+El archivo se lee línea a línea y se procesa en lotes de `FILAS_POR_LOTE`, así
+la memoria no depende del tamaño del catálogo:
+- Cada fila se valida con `LibroCreate` y su `paginas_por_libro` se compara
+  con el catálogo de papel, leído una sola vez al comenzar.
+- Las filas válidas de un lote se escriben con INSERT masivos en `libros`
+  (con RETURNING; en MySQL, que no lo tiene, fila por fila para leer cada
+  id), `inventario_libros` y `resumen_stock_libros`, y el lote se confirma con
+  su propio commit. Si la BD rechaza un lote, solo ese lote se revierte.
+- Las filas inválidas se informan con su número de línea y el error, sin
+  abortar la carga.
+
+Columnas (cabecera del CSV o claves de cada objeto NDJSON): nombre, categoria,
+descripcion, precio, paginas_por_libro y cantidad_libros (stock inicial).
+La importación no imprime tiradas: una fila con `imprimir` verdadero se
+informa como error (para eso está POST /libros/).
+
+Uso (desde Libreria-Back-End):
+    python -m importacion catalogo.csv
+    python -m importacion catalogo.ndjson --formato ndjson
+"""
+import argparse
+import codecs
+import csv
+import json
+import sys
+import time
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional
+
+import anyio.from_thread
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from busqueda import indice_libros
+from cache import cache
+from catalogos import catalogo_papel
+from database import SessionLocal
+from models import InventarioLibro, Libro, ResumenStockLibro
+from schemas import LibroCreate
+
+# Filas que se validan, insertan y confirman juntas
+FILAS_POR_LOTE = 1000
+
+# Errores que se devuelven en el resumen (el conteo incluye todos)
+MAX_ERRORES_INFORMADOS = 1000
+
+FORMATOS = ("csv", "ndjson")
+
+
+# ============================================================
+# LECTURA
+# ============================================================
+def lineas_de_bytes(trozos: Iterable[bytes]) -> Iterator[str]:
+    """Convierte trozos de bytes UTF-8 (p. ej. el cuerpo de un request) en líneas."""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    resto = ""
+    for trozo in trozos:
+        lineas = (resto + decodificador.decode(trozo)).split("\n")
+        resto = lineas.pop()
+        for linea in lineas:
+            yield linea + "\n"
+    resto += decodificador.decode(b"", final=True)
+    if resto:
+        yield resto
+
+
+def iterar_desde_hilo(trozos: AsyncIterator[bytes]) -> Iterator[bytes]:
+    """
+    Recorre un iterador asíncrono (p. ej. `request.stream()`) desde un hilo
+    del threadpool, pidiendo cada trozo al event loop.
+    """
+    iterador = trozos.__aiter__()
+    while True:
+        try:
+            yield anyio.from_thread.run(iterador.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+def _registros(lineas: Iterable[str], formato: str) -> Iterator[tuple[int, object]]:
+    """(número de línea, dict de la fila o mensaje de error de formato)"""
+    if formato == "csv":
+        lector = csv.DictReader(lineas)
+        for registro in lector:
+            # Celdas vacías: el campo toma su valor por defecto
+            yield lector.line_num, {
+                clave.strip(): valor.strip()
+                for clave, valor in registro.items()
+                if clave and isinstance(valor, str) and valor.strip()
+            }
+        return
+
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as e:
+            yield numero, f"JSON inválido: {e}"
+            continue
+        yield numero, registro if isinstance(registro, dict) else "Se esperaba un objeto JSON"
+
+
+def _mensaje(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'fila'}: {e['msg']}" for e in error.errors()
+    )
+
+
+# ============================================================
+# ESCRITURA
+# ============================================================
+def fila_libro(libro: LibroCreate) -> dict:
+    """Columnas de `libros` de la fila (sin los campos que no son del libro)."""
+    return libro.model_dump(exclude={"cantidad_libros", "imprimir"})
+
+
+def _insertar_libros(db: Session, filas: list[dict]) -> list[int]:
+    """INSERT masivo en `libros`; devuelve los ids en el orden de `filas`."""
+    if db.get_bind().dialect.insert_returning:
+        return list(db.scalars(
+            insert(Libro).returning(Libro.id_libro, sort_by_parameter_order=True), filas
+        ))
+    # MySQL no tiene RETURNING y los ids de un INSERT de varias filas no son
+    # necesariamente consecutivos (innodb_autoinc_lock_mode=2 con otras
+    # inserciones a la vez): el ORM inserta fila por fila y lee cada id
+    libros = [Libro(**fila) for fila in filas]
+    db.add_all(libros)
+    db.flush()
+    return [libro.id_libro for libro in libros]
+
+
+def _insertar_lote(db: Session, lote: list[LibroCreate]) -> list[int]:
+    ids = _insertar_libros(db, [fila_libro(libro) for libro in lote])
+    db.execute(insert(InventarioLibro), [
+        {"libro_id": id_libro, "stock": libro.cantidad_libros} for id_libro, libro in zip(ids, lote)
+    ])
+    db.execute(insert(ResumenStockLibro), [
+        {"libro_id": id_libro, "stock_global": libro.cantidad_libros, "stock_pv": 0, "filas_bajo_minimo": 0}
+        for id_libro, libro in zip(ids, lote)
+    ])
+    db.commit()
+    return ids
+
+
+# ============================================================
+# IMPORTACIÓN
+# ============================================================
+def importar(
+    lineas: Iterable[str],
+    formato: str = "csv",
+    progreso: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Importa los libros de `lineas` y devuelve un resumen con las filas leídas,
+    importadas y con error, la velocidad (filas por segundo) y los errores
+    `{linea, error}`. `progreso` se llama con el resumen parcial tras cada lote.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato!r}")
+
+    inicio = time.perf_counter()
+    resumen = {"filas": 0, "importadas": 0, "con_error": 0, "errores": []}
+
+    def error(linea: int, mensaje: str) -> None:
+        resumen["con_error"] += 1
+        if len(resumen["errores"]) < MAX_ERRORES_INFORMADOS:
+            resumen["errores"].append({"linea": linea, "error": mensaje})
+
+    def actualizar_tiempos() -> dict:
+        segundos = time.perf_counter() - inicio
+        resumen["segundos"] = round(segundos, 3)
+        resumen["filas_por_segundo"] = round(resumen["filas"] / segundos, 1) if segundos else 0.0
+        return resumen
+
+    db = SessionLocal()
+    try:
+        papeles = set(catalogo_papel(db))
+
+        def guardar(lote: list[tuple[int, LibroCreate]]) -> None:
+            try:
+                ids = _insertar_lote(db, [libro for _, libro in lote])
+            except SQLAlchemyError as e:
+                db.rollback()
+                for linea, _ in lote:
+                    error(linea, f"Error de la base de datos en el lote: {e.__class__.__name__}")
+                return
+            resumen["importadas"] += len(ids)
+            # Los INSERT masivos no pasan por los eventos del ORM (en MySQL sí:
+            # aplicar dos veces el mismo libro es inocuo)
+            indice_libros.aplicar([
+                (id_libro, (libro.nombre, libro.categoria, libro.descripcion))
+                for id_libro, (_, libro) in zip(ids, lote)
+            ])
+
+        lote: list[tuple[int, LibroCreate]] = []
+        for linea, registro in _registros(lineas, formato):
+            resumen["filas"] += 1
+            if isinstance(registro, str):
+                error(linea, registro)
+                continue
+            try:
+                libro = LibroCreate.model_validate(registro)
+            except ValidationError as e:
+                error(linea, _mensaje(e))
+                continue
+            if libro.imprimir:
+                error(linea, "imprimir: la importación no imprime tiradas")
+                continue
+            if libro.paginas_por_libro not in papeles:
+                error(linea, "Papel no existe")
+                continue
+
+            lote.append((linea, libro))
+            if len(lote) >= FILAS_POR_LOTE:
+                guardar(lote)
+                lote = []
+                if progreso:
+                    progreso(actualizar_tiempos())
+        if lote:
+            guardar(lote)
+    finally:
+        db.close()
+        if resumen["importadas"]:
+            cache.invalidar("libros", "stock")
+
+    return actualizar_tiempos()
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=FORMATOS, help="por defecto, según la extensión del archivo")
+    args = parser.parse_args()
+
+    formato = args.formato or ("ndjson" if args.archivo.endswith((".ndjson", ".jsonl")) else "csv")
+
+    def mostrar(parcial: dict) -> None:
+        print(
+            f"{parcial['filas']} filas, {parcial['importadas']} importadas, "
+            f"{parcial['con_error']} con error ({parcial['filas_por_segundo']} filas/s)",
+            file=sys.stderr,
+        )
+
+    with open(args.archivo, encoding="utf-8-sig", newline="") as f:
+        resumen = importar(f, formato, progreso=mostrar)
+
+    mostrar(resumen)
+    for e in resumen["errores"]:
+        print(f"línea {e['linea']}: {e['error']}")
+    sys.exit(1 if resumen["con_error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Instrumentación por petición.
+
+Un middleware ASGI mide cada petición y acumula, por ruta (la plantilla, p. ej.
+`/libros/{libro_id}`):
+- histograma de latencia y conteo por código de estado,
+- histograma de sentencias SQL por petición y tiempo total en SQL (eventos
+  `before_cursor_execute` / `after_cursor_execute` de los engines),
+- bytes de respuesta y tiempo de espera por una conexión del pool.
+
+`GET /metrics` expone los acumulados en formato de texto de Prometheus, junto
+con el estado de los pools. Cada respuesta lleva `Server-Timing` (visible en
+las herramientas de desarrollo del navegador) y las peticiones que superan
+LENTA_MS se registran en el logger "libreria.lentas" con las sentencias que
+más tiempo tomaron; una misma sentencia repetida muchas veces (un loop de
+consultas por fila) aparece con su cantidad.
+
+Los acumulados son por proceso: con varios workers, Prometheus los suma.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+import database
+import metricas_pool
+
+LENTA_MS = float(os.getenv("LENTA_MS", "500"))
+
+# Límites superiores de los buckets de los histogramas
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+# Sentencias distintas que se guardan por petición para el log de lentas
+MAX_SENTENCIAS_DISTINTAS = 200
+
+# Ruta para las peticiones que no coinciden con ninguna (evita una serie por URL)
+SIN_RUTA = "sin_ruta"
+
+log_lentas = logging.getLogger("libreria.lentas")
+
+
+# ============================================================
+# MEDICIÓN DE UNA PETICIÓN
+# ============================================================
+class Medicion:
+    """Lo que ocurrió durante una petición; lo comparten sus hilos y corrutinas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sentencias = 0
+        self.segundos_sql = 0.0
+        self.espera_pool = 0.0
+        # texto SQL -> [veces, segundos]
+        self.por_sentencia: dict[str, list] = {}
+
+    def registrar_sql(self, sql: str, segundos: float) -> None:
+        with self._lock:
+            self.sentencias += 1
+            self.segundos_sql += segundos
+            acumulado = self.por_sentencia.get(sql)
+            if acumulado is None:
+                if len(self.por_sentencia) >= MAX_SENTENCIAS_DISTINTAS:
+                    return
+                acumulado = self.por_sentencia[sql] = [0, 0.0]
+            acumulado[0] += 1
+            acumulado[1] += segundos
+
+    def registrar_espera_pool(self, segundos: float) -> None:
+        with self._lock:
+            self.espera_pool += segundos
+
+    def mas_costosas(self, cantidad: int = 5) -> list[tuple[str, int, float]]:
+        with self._lock:
+            orden = sorted(self.por_sentencia.items(), key=lambda par: par[1][1], reverse=True)
+            return [(sql, veces, segundos) for sql, (veces, segundos) in orden[:cantidad]]
+
+
+# Las dependencias y endpoints síncronos corren en el threadpool con una copia
+# del contexto: ven la misma `Medicion`
+medicion_actual: contextvars.ContextVar[Optional[Medicion]] = contextvars.ContextVar(
+    "medicion_actual", default=None
+)
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("instrumentacion_inicio", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("instrumentacion_inicio")
+    if not inicios:
+        return
+    segundos = time.perf_counter() - inicios.pop()
+    medicion = medicion_actual.get()
+    if medicion is not None:
+        medicion.registrar_sql(statement, segundos)
+
+
+def _al_fallar(contexto) -> None:
+    # Sentencia con error: no hay after_cursor_execute que descarte su inicio
+    if contexto.connection is not None:
+        inicios = contexto.connection.info.get("instrumentacion_inicio")
+        if inicios:
+            inicios.pop()
+
+
+def _al_esperar_pool(segundos: float) -> None:
+    medicion = medicion_actual.get()
+    if medicion is not None:
+        medicion.registrar_espera_pool(segundos)
+
+
+# ============================================================
+# ACUMULADOS
+# ============================================================
+class Histograma:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.cantidades = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        indice = next((i for i, limite in enumerate(self.buckets) if valor <= limite), len(self.buckets))
+        self.cantidades[indice] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre: str, etiquetas: str) -> list[str]:
+        acumulado, lineas = 0, []
+        for limite, cantidad in zip([*map(str, self.buckets), "+Inf"], self.cantidades):
+            acumulado += cantidad
+            lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f"{nombre}_sum{{{etiquetas}}} {self.suma:.6f}")
+        lineas.append(f"{nombre}_count{{{etiquetas}}} {self.total}")
+        return lineas
+
+
+class MetricasRutas:
+    """Acumulados por (método, ruta); seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones: dict[tuple, int] = defaultdict(int)
+        self.duracion: dict[tuple, Histograma] = {}
+        self.sentencias: dict[tuple, Histograma] = {}
+        self.segundos_sql: dict[tuple, float] = defaultdict(float)
+        self.espera_pool: dict[tuple, float] = defaultdict(float)
+        self.bytes: dict[tuple, int] = defaultdict(int)
+
+    def registrar(self, metodo: str, ruta: str, estado: int, segundos: float, tamano: int, medicion: Medicion) -> None:
+        clave = (metodo, ruta)
+        with self._lock:
+            self.peticiones[(metodo, ruta, estado)] += 1
+            if clave not in self.duracion:
+                self.duracion[clave] = Histograma(BUCKETS_DURACION)
+                self.sentencias[clave] = Histograma(BUCKETS_SENTENCIAS)
+            self.duracion[clave].observar(segundos)
+            self.sentencias[clave].observar(medicion.sentencias)
+            self.segundos_sql[clave] += medicion.segundos_sql
+            self.espera_pool[clave] += medicion.espera_pool
+            self.bytes[clave] += tamano
+
+    def texto(self) -> str:
+        lineas = []
+
+        def encabezado(nombre: str, tipo: str, ayuda: str) -> None:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+
+        with self._lock:
+            encabezado("libreria_http_peticiones_total", "counter", "Peticiones atendidas")
+            for (metodo, ruta, estado), cantidad in sorted(self.peticiones.items()):
+                lineas.append(
+                    f'libreria_http_peticiones_total{{metodo="{metodo}",ruta="{ruta}",estado="{estado}"}} {cantidad}'
+                )
+            encabezado("libreria_http_duracion_segundos", "histogram", "Latencia de las peticiones")
+            for (metodo, ruta), histograma in sorted(self.duracion.items()):
+                lineas += histograma.lineas("libreria_http_duracion_segundos", f'metodo="{metodo}",ruta="{ruta}"')
+            encabezado("libreria_sql_sentencias", "histogram", "Sentencias SQL por petición")
+            for (metodo, ruta), histograma in sorted(self.sentencias.items()):
+                lineas += histograma.lineas("libreria_sql_sentencias", f'metodo="{metodo}",ruta="{ruta}"')
+            for nombre, valores, ayuda in (
+                ("libreria_sql_segundos_total", self.segundos_sql, "Tiempo en SQL"),
+                ("libreria_pool_espera_segundos_total", self.espera_pool, "Espera por una conexión del pool"),
+                ("libreria_http_respuesta_bytes_total", self.bytes, "Bytes de respuesta"),
+            ):
+                encabezado(nombre, "counter", ayuda)
+                for (metodo, ruta), valor in sorted(valores.items()):
+                    lineas.append(f'{nombre}{{metodo="{metodo}",ruta="{ruta}"}} {valor:g}')
+        return "\n".join(lineas) + "\n"
+
+
+metricas = MetricasRutas()
+
+
+def _texto_pools() -> str:
+    engines = [("sync", database.engine)]
+    if database.async_engine is not None:
+        engines.append(("async", database.async_engine.sync_engine))
+    lineas = []
+    for tipo, engine in engines:
+        try:
+            estado = metricas_pool.estado_pool(engine.pool)
+        except (AttributeError, TypeError):
+            # Pools sin tamaño fijo (p. ej. los de SQLite) no exponen estos datos
+            continue
+        for clave in ("prestadas", "disponibles", "overflow", "checkouts", "timeouts", "espera_total_s"):
+            if clave in estado:
+                lineas.append(f'libreria_pool_{clave}{{engine="{tipo}"}} {estado[clave]}')
+    return "\n".join(lineas) + ("\n" if lineas else "")
+
+
+def exportar_metricas() -> PlainTextResponse:
+    return PlainTextResponse(metricas.texto() + _texto_pools(), media_type="text/plain; version=0.0.4")
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+class MiddlewareInstrumentacion:
+    """Middleware ASGI (no envuelve el cuerpo: sirve también para streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        estado, tamano = 500, 0
+
+        async def enviar(mensaje):
+            nonlocal estado, tamano
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                mensaje.setdefault("headers", []).append((b"server-timing", _server_timing(inicio, medicion)))
+            elif mensaje["type"] == "http.response.body":
+                tamano += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            medicion_actual.reset(token)
+            segundos = time.perf_counter() - inicio
+            ruta = getattr(scope.get("route"), "path", SIN_RUTA)
+            metricas.registrar(scope["method"], ruta, estado, segundos, tamano, medicion)
+            if segundos * 1000 >= LENTA_MS:
+                _registrar_lenta(scope, estado, segundos, medicion)
+
+
+def _server_timing(inicio: float, medicion: Medicion) -> bytes:
+    total = (time.perf_counter() - inicio) * 1000
+    return (
+        f'app;dur={total:.1f}, sql;dur={medicion.segundos_sql * 1000:.1f};desc="{medicion.sentencias} sentencias", '
+        f"pool;dur={medicion.espera_pool * 1000:.1f}"
+    ).encode()
+
+
+def _registrar_lenta(scope, estado: int, segundos: float, medicion: Medicion) -> None:
+    detalle = "".join(
+        f"\n  {veces}x {total * 1000:.1f} ms  {' '.join(sql.split())[:500]}"
+        for sql, veces, total in medicion.mas_costosas()
+    )
+    log_lentas.warning(
+        "%s %s -> %s en %.0f ms (%d sentencias, %.0f ms en SQL, %.0f ms esperando el pool)%s",
+        scope["method"], scope["path"], estado, segundos * 1000, medicion.sentencias,
+        medicion.segundos_sql * 1000, medicion.espera_pool * 1000, detalle,
+    )
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+def _escuchar(engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+        event.listen(engine, "handle_error", _al_fallar)
+
+
+def instrumentar(app: FastAPI) -> None:
+    """Registra el middleware, los eventos de los engines y GET /metrics."""
+    _escuchar(database.engine)
+    if database.async_engine is not None:
+        _escuchar(database.async_engine.sync_engine)
+    if _al_esperar_pool not in metricas_pool.observadores_espera:
+        metricas_pool.observadores_espera.append(_al_esperar_pool)
+    app.add_middleware(MiddlewareInstrumentacion)
+    app.add_api_route("/metrics", exportar_metricas, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,48 @@
+"""
+Limitador de intentos en memoria (token bucket).
+
+Cada clave (p. ej. un email o una IP) tiene un balde de `capacidad` fichas que
+se rellena a razón de `por_segundo`. Cada intento consume una ficha y, sin
+fichas, `consumir()` devuelve los segundos que faltan para la próxima. Se
+guardan a lo sumo `max_claves` baldes: al superarlo se descartan los usados
+hace más tiempo (un balde descartado vuelve lleno, como uno nuevo).
+
+El estado es por proceso: con varios workers cada uno limita por separado.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LimitadorTokens:
+    def __init__(self, capacidad: float, por_segundo: float, max_claves: int = 10_000):
+        self.capacidad = capacidad
+        self.por_segundo = por_segundo
+        self.max_claves = max_claves
+        self._lock = threading.Lock()
+        # clave -> (fichas, momento de la última actualización)
+        self._baldes: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def consumir(self, clave: str) -> float:
+        """0 si el intento se permite; si no, segundos hasta tener una ficha."""
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, antes = self._baldes.pop(clave, (self.capacidad, ahora))
+            fichas = min(self.capacidad, fichas + (ahora - antes) * self.por_segundo)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / self.por_segundo
+            self._baldes[clave] = (fichas, ahora)
+            if len(self._baldes) > self.max_claves:
+                self._baldes.popitem(last=False)
+            return espera
+
+    def reiniciar(self, clave: Optional[str] = None) -> None:
+        with self._lock:
+            if clave is None:
+                self._baldes.clear()
+            else:
+                self._baldes.pop(clave, None)
@@ -3,7 +3,8 @@ Punto de entrada principal de la API de librería.
 
 Este módulo:
 - Inicializa la aplicación FastAPI.
-- Crea las tablas en la base de datos (si no existen).
+- Aplica las migraciones pendientes del esquema al iniciar (ver migraciones/).
+- Mide cada petición (latencia, SQL, pool) y expone GET /metrics (ver instrumentacion.py).
 - Registra los routers de:
     - libros
     - inventario
@@ -13,14 +14,49 @@ Este módulo:
 """
 from fastapi import FastAPI, Depends
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine, Base
-from routers import libros, inventario, movimientos, usuarios, puntos_venta, inventario_pv, materias_primas
+import database
+from database import SessionLocal, DB_ASYNC, DB_MIGRAR_AL_INICIAR
+from routers import libros, inventario, movimientos, usuarios, puntos_venta, inventario_pv, materias_primas, admin, alertas, panel, analitica, reposicion, produccion, transferencias
 from fastapi.middleware.cors import CORSMiddleware
 from models import Usuario
+from condicional import NoModificado, respuesta_no_modificado
+from contrasenas import PoolSaturado, hashear, respuesta_pool_saturado
+import migraciones
+from busqueda import indice_libros, indice_usuarios
+from analitica import compactador
+from instrumentacion import instrumentar
 
 app = FastAPI(title="API Librería")
 
 
+# ============================================================
+# MIGRACIONES (antes que cualquier otro evento de inicio)
+# ============================================================
+@app.on_event("startup")
+def migrar_esquema():
+    if not DB_MIGRAR_AL_INICIAR:
+        return
+    for nombre in migraciones.aplicar():
+        print(f"✔ Migración aplicada: {nombre}")
+
+
+# ============================================================
+# ÍNDICE DE BÚSQUEDA (se carga en segundo plano, ver busqueda.py)
+# ============================================================
+@app.on_event("startup")
+def precargar_busqueda():
+    indice_libros.precargar()
+    indice_usuarios.precargar()
+
+
+# ============================================================
+# ROLLUPS DE MOVIMIENTOS (compactación en segundo plano, ver analitica.py)
+# ============================================================
+@app.on_event("startup")
+def iniciar_compactador():
+    compactador.iniciar()
+
+
 # ============================================================
 # USUARIO ADMIN AUTOMÁTICO
 # ============================================================
@@ -34,7 +70,7 @@ def crear_usuario_admin():
             admin = Usuario(
                 nombre="Administrador",
                 email="admin@admin.com",
-                contrasena="admin",
+                contrasena=hashear("admin"),
                 rol="admin",
                 punto_venta_id=None
             )
@@ -47,6 +83,18 @@ def crear_usuario_admin():
         db.close()
 
 
+# ============================================================
+# CIERRE DE CONEXIONES
+# ============================================================
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    compactador.detener()
+    # Los hilos de aiosqlite no terminan mientras queden conexiones abiertas.
+    # El engine síncrono no se cierra: con SQLite en memoria se perdería la base.
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
+
 # ============================================================
 # CONFIGURACIÓN CORS CORRECTA
 # ============================================================
@@ -64,18 +112,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],       # Permite GET, POST, PUT, DELETE
     allow_headers=["*"],       # Permite Content-Type, Authorization, etc.
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],  # Legibles desde JS
 )
 
+# Métricas por petición: se agrega después de CORS para quedar por fuera y
+# medir también las respuestas que genera ese middleware
+instrumentar(app)
 
-# ============================================================
-# CREAR TABLAS
-# ============================================================
-Base.metadata.create_all(bind=engine)
+# 304 Not Modified lanzado por la dependencia `condicional` (ver condicional.py)
+app.add_exception_handler(NoModificado, respuesta_no_modificado)
+
+# 503 cuando el pool de hash de contraseñas está saturado (ver contrasenas.py)
+app.add_exception_handler(PoolSaturado, respuesta_pool_saturado)
 
 
 # ============================================================
 # REGISTRO DE ROUTERS
 # ============================================================
+# En modo asíncrono las rutas calientes se registran primero: ante dos rutas
+# iguales FastAPI atiende con la primera, y el resto cae en los routers síncronos.
+if DB_ASYNC:
+    from routers import libros_async, inventario_pv_async, movimientos_async
+    app.include_router(libros_async.router)
+    app.include_router(inventario_pv_async.router)
+    app.include_router(movimientos_async.router)
+
 app.include_router(libros.router)
 app.include_router(inventario.router)
 app.include_router(movimientos.router)
@@ -83,6 +144,13 @@ app.include_router(usuarios.router)
 app.include_router(puntos_venta.router)
 app.include_router(inventario_pv.router)
 app.include_router(materias_primas.router)
+app.include_router(alertas.router)
+app.include_router(admin.router)
+app.include_router(panel.router)
+app.include_router(analitica.router)
+app.include_router(reposicion.router)
+app.include_router(produccion.router)
+app.include_router(transferencias.router)
 
 
 # ============================================================
@@ -0,0 +1,107 @@
+"""
+Métricas del pool de conexiones.
+
+`QueuePoolMedido` (y su variante async) se usan como `poolclass` del engine y
+miden cuánto espera cada checkout por una conexión libre. Con eso y el estado
+en vivo del pool (conexiones prestadas, overflow) se puede dimensionar
+DB_POOL_SIZE / DB_MAX_OVERFLOW por worker contra `max_connections` de MySQL.
+"""
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Límites superiores (en segundos) de los buckets del histograma de espera
+BUCKETS_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Funciones que reciben la espera de cada checkout (p. ej. para atribuirla a
+# la petición en curso, ver instrumentacion.py)
+observadores_espera: list = []
+
+
+class EstadisticasPool:
+    """Contadores acumulados de checkouts; seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.buckets = [0] * (len(BUCKETS_ESPERA) + 1)
+
+    def registrar(self, segundos: float, timeout: bool = False) -> None:
+        indice = next((i for i, limite in enumerate(BUCKETS_ESPERA) if segundos <= limite), len(BUCKETS_ESPERA))
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            self.buckets[indice] += 1
+
+    def resumen(self) -> dict:
+        with self._lock:
+            # Histograma acumulado, al estilo Prometheus (le = "menor o igual")
+            acumulado, histograma = 0, {}
+            for limite, cantidad in zip([*map(str, BUCKETS_ESPERA), "+Inf"], self.buckets):
+                acumulado += cantidad
+                histograma[limite] = acumulado
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_s": round(self.espera_total, 6),
+                "espera_maxima_s": round(self.espera_maxima, 6),
+                "histograma_espera_s": histograma,
+            }
+
+
+class _MedicionMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estadisticas = EstadisticasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.estadisticas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        espera = time.perf_counter() - inicio
+        self.estadisticas.registrar(espera)
+        for observador in observadores_espera:
+            observador(espera)
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() crea un pool nuevo: se conservan los contadores
+        nuevo = super().recreate()
+        nuevo.estadisticas = self.estadisticas
+        return nuevo
+
+
+class QueuePoolMedido(_MedicionMixin, QueuePool):
+    pass
+
+
+class AsyncAdaptedQueuePoolMedido(_MedicionMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def estado_pool(pool) -> dict:
+    """Estado en vivo del pool más las estadísticas acumuladas."""
+    estado = {
+        "tamano": pool.size(),
+        "prestadas": pool.checkedout(),
+        "disponibles": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_s": pool.timeout(),
+    }
+    estadisticas = getattr(pool, "estadisticas", None)
+    if estadisticas:
+        estado.update(estadisticas.resumen())
+    return estado
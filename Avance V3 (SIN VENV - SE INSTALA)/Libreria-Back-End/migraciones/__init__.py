@@ -0,0 +1,152 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es un módulo `vNNNN_descripcion.py` de este paquete con una
+función `subir(conn)`. Las versiones aplicadas se registran en la tabla
+`schema_migraciones` y `aplicar()` ejecuta solo las pendientes, en orden.
+
+- En MySQL el DDL hace commit implícito: por eso cada migración es
+  idempotente (revisa si la columna / índice ya existe antes de crearlo) y
+  puede re-ejecutarse sin problemas si falló a mitad de camino.
+- Con varios workers levantando a la vez, un GET_LOCK de MySQL asegura que
+  solo uno migre; el resto espera y encuentra todo aplicado.
+
+Uso (desde Libreria-Back-End):
+    python -m migraciones            # muestra el estado
+    python -m migraciones aplicar
+    python -m migraciones.planes     # verifica los planes de las consultas calientes
+"""
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from soporte_sqlite import ahora
+
+NOMBRE_BLOQUEO = "libreria_migraciones"
+ESPERA_BLOQUEO_S = 120
+
+_metadata = MetaData()
+tabla_versiones = Table(
+    "schema_migraciones",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("nombre", String(150), nullable=False),
+    Column("aplicada_en", DateTime, nullable=False, server_default=ahora()),
+)
+
+_PATRON = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+# ============================================================
+# DESCUBRIMIENTO Y EJECUCIÓN
+# ============================================================
+def migraciones_disponibles() -> list[tuple[int, str]]:
+    """(version, nombre del módulo) de cada migración del paquete, en orden."""
+    encontradas = []
+    for modulo in pkgutil.iter_modules(__path__):
+        coincidencia = _PATRON.match(modulo.name)
+        if coincidencia:
+            encontradas.append((int(coincidencia.group(1)), modulo.name))
+    return sorted(encontradas)
+
+
+def _versiones_aplicadas(conn: Connection) -> set[int]:
+    tabla_versiones.create(conn, checkfirst=True)
+    return set(conn.scalars(select(tabla_versiones.c.version)))
+
+
+@contextmanager
+def _bloqueo(conn: Connection):
+    if conn.dialect.name != "mysql":
+        yield
+        return
+    if not conn.scalar(text("SELECT GET_LOCK(:nombre, :espera)"), {"nombre": NOMBRE_BLOQUEO, "espera": ESPERA_BLOQUEO_S}):
+        raise RuntimeError("Otro proceso está aplicando migraciones y no terminó a tiempo")
+    try:
+        yield
+    finally:
+        conn.scalar(text("SELECT RELEASE_LOCK(:nombre)"), {"nombre": NOMBRE_BLOQUEO})
+
+
+def estado(engine: Optional[Engine] = None) -> list[dict]:
+    engine = engine or _engine_por_defecto()
+    with engine.connect() as conn:
+        aplicadas = _versiones_aplicadas(conn)
+        conn.commit()
+    return [
+        {"version": version, "nombre": nombre, "aplicada": version in aplicadas}
+        for version, nombre in migraciones_disponibles()
+    ]
+
+
+def aplicar(engine: Optional[Engine] = None) -> list[str]:
+    """Aplica las migraciones pendientes y devuelve los nombres aplicados."""
+    engine = engine or _engine_por_defecto()
+    aplicadas_ahora = []
+    with engine.connect() as conn:
+        with _bloqueo(conn):
+            aplicadas = _versiones_aplicadas(conn)
+            conn.commit()
+            for version, nombre in migraciones_disponibles():
+                if version in aplicadas:
+                    continue
+                modulo = importlib.import_module(f"{__name__}.{nombre}")
+                try:
+                    modulo.subir(conn)
+                    conn.execute(tabla_versiones.insert().values(version=version, nombre=nombre))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                aplicadas_ahora.append(nombre)
+    return aplicadas_ahora
+
+
+def _engine_por_defecto() -> Engine:
+    import database
+    return database.engine
+
+
+# ============================================================
+# UTILIDADES PARA LAS MIGRACIONES
+# ============================================================
+def columnas(conn: Connection, tabla: str) -> set[str]:
+    return {c["name"] for c in inspect(conn).get_columns(tabla)}
+
+
+def hay_indice(conn: Connection, tabla: str, cols: list[str], unico: bool = False) -> bool:
+    """True si algún índice (o clave única) de `tabla` empieza con `cols`."""
+    inspector = inspect(conn)
+    candidatos = [(i["column_names"], bool(i.get("unique"))) for i in inspector.get_indexes(tabla)]
+    candidatos += [(u["column_names"], True) for u in inspector.get_unique_constraints(tabla)]
+    for columnas_indice, es_unico in candidatos:
+        if unico and (not es_unico or list(columnas_indice) != list(cols)):
+            continue
+        if list(columnas_indice[:len(cols)]) == list(cols):
+            return True
+    return False
+
+
+def crear_indice(conn: Connection, tabla: str, nombre: str, cols: list[str], unico: bool = False) -> None:
+    if hay_indice(conn, tabla, cols, unico):
+        return
+    if unico:
+        duplicados = conn.scalar(text(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {tabla} GROUP BY {', '.join(cols)} HAVING COUNT(*) > 1) d"
+        ))
+        if duplicados:
+            raise RuntimeError(
+                f"No se puede crear el índice único {nombre}: {tabla}({', '.join(cols)}) tiene "
+                f"{duplicados} valor(es) repetido(s). Consolidar esas filas y volver a migrar."
+            )
+    conn.execute(text(f"CREATE {'UNIQUE ' if unico else ''}INDEX {nombre} ON {tabla} ({', '.join(cols)})"))
+
+
+def agregar_columna(conn: Connection, tabla: str, nombre: str, definicion: str) -> None:
+    if nombre not in columnas(conn, tabla):
+        conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {definicion}"))
@@ -0,0 +1,21 @@
+import argparse
+
+from migraciones import __doc__ as descripcion, aplicar, estado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=descripcion, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accion", nargs="?", default="estado", choices=["estado", "aplicar"])
+    args = parser.parse_args()
+
+    if args.accion == "aplicar":
+        aplicadas = aplicar()
+        print("\n".join(f"Aplicada {nombre}" for nombre in aplicadas) or "Sin migraciones pendientes")
+        return
+
+    for m in estado():
+        print(f"{m['version']:04d}  {'aplicada ' if m['aplicada'] else 'PENDIENTE'}  {m['nombre']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Verificación de planes de las consultas calientes.
+
+Para cada consulta revisa que exista el índice que la sirve y ejecuta EXPLAIN
+(MySQL) o EXPLAIN QUERY PLAN (SQLite) para confirmar que el motor lo usa y,
+en los listados ordenados, que no ordena en memoria (filesort).
+
+- Falta el índice: error.
+- El índice existe pero el plan no lo usa: error si la tabla tiene al menos
+  FILAS_MINIMAS filas; con menos es normal que MySQL prefiera recorrerla
+  completa, y solo se advierte.
+
+Uso (desde Libreria-Back-End):
+    python -m migraciones.planes      # código 1 si alguna consulta falla
+"""
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select, table
+from sqlalchemy.engine import Connection
+
+from alertas_stock import consulta_materias_primas, consulta_puntos_venta
+from analitica import consulta_serie
+from migraciones import hay_indice
+from models import InventarioLibro, InventarioPV, Libro, MovimientoLibro, MovimientoPV, TipoMovimiento
+
+FILAS_MINIMAS = 1000
+
+
+@dataclass
+class Consulta:
+    nombre: str
+    sentencia: object
+    tabla: str
+    columnas: list
+    ordenada: bool = False
+
+
+def consultas_calientes() -> list[Consulta]:
+    recientes = (
+        select(MovimientoLibro)
+        .order_by(MovimientoLibro.fecha_movimiento.desc(), MovimientoLibro.id_mov_libro.desc())
+        .limit(101)
+    )
+    return [
+        Consulta(
+            "venta: fila de inventario_pv por (libro, punto de venta)",
+            select(InventarioPV).where(InventarioPV.id_libro == 1, InventarioPV.id_punto_venta == 1),
+            "inventario_pv", ["id_libro", "id_punto_venta"],
+        ),
+        Consulta(
+            "stock global de un libro",
+            select(InventarioLibro).where(InventarioLibro.libro_id == 1),
+            "inventario_libros", ["libro_id"],
+        ),
+        Consulta(
+            "movimientos recientes",
+            recientes,
+            "movimientos_libros", ["fecha_movimiento"], ordenada=True,
+        ),
+        Consulta(
+            "movimientos recientes por tipo",
+            recientes.where(MovimientoLibro.tipo == TipoMovimiento.venta),
+            "movimientos_libros", ["tipo", "fecha_movimiento"], ordenada=True,
+        ),
+        Consulta(
+            "panel: movimientos recientes de puntos de venta",
+            select(func.count()).select_from(MovimientoPV).where(MovimientoPV.fecha_movimiento >= datetime(2000, 1, 1)),
+            "movimientos_pv", ["fecha_movimiento"],
+        ),
+        Consulta(
+            "libro por nombre",
+            select(Libro).where(Libro.nombre == "x"),
+            "libros", ["nombre"],
+        ),
+        Consulta(
+            "alertas de stock bajo de un punto de venta",
+            consulta_puntos_venta(1),
+            "inventario_pv", ["bajo_minimo"],
+        ),
+        Consulta(
+            "alertas de materias primas",
+            consulta_materias_primas(),
+            "materias_primas", ["bajo_minimo"],
+        ),
+        Consulta(
+            "analítica: serie diaria de ventas",
+            consulta_serie("dia", datetime(2000, 1, 1), datetime(2000, 2, 1), origen="punto_venta", tipo="venta"),
+            "rollup_movimientos", ["granularidad", "origen", "tipo", "inicio"],
+        ),
+    ]
+
+
+# ============================================================
+# LECTURA DEL PLAN
+# ============================================================
+def _explicar(conn: Connection, sentencia) -> tuple[list, set, bool]:
+    """(plan completo, tablas que se leen con índice, hay orden en memoria)"""
+    sql = str(sentencia.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+    if conn.dialect.name == "sqlite":
+        detalles = [f[3] for f in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+        con_indice = {
+            d.split()[1] for d in detalles
+            if d.startswith(("SEARCH ", "SCAN ")) and " USING " in d
+        }
+        return detalles, con_indice, any("TEMP B-TREE FOR ORDER BY" in d for d in detalles)
+
+    filas = [dict(f._mapping) for f in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+    con_indice = {f["table"] for f in filas if f.get("key")}
+    return filas, con_indice, any("filesort" in (f.get("Extra") or "") for f in filas)
+
+
+def verificar(conn: Connection) -> tuple[list[str], list[str]]:
+    """Devuelve (errores, advertencias)."""
+    errores, advertencias = [], []
+    for c in consultas_calientes():
+        if not hay_indice(conn, c.tabla, c.columnas):
+            errores.append(f"{c.nombre}: falta un índice en {c.tabla}({', '.join(c.columnas)})")
+            continue
+
+        plan, con_indice, ordena_en_memoria = _explicar(conn, c.sentencia)
+        problemas = []
+        if c.tabla not in con_indice:
+            problemas.append(f"no usa índice en {c.tabla}")
+        if c.ordenada and ordena_en_memoria:
+            problemas.append("ordena en memoria")
+        if not problemas:
+            continue
+
+        filas = conn.scalar(select(func.count()).select_from(table(c.tabla)))
+        mensaje = f"{c.nombre}: {', '.join(problemas)} ({filas} filas)\n    plan: {plan}"
+        (errores if filas >= FILAS_MINIMAS else advertencias).append(mensaje)
+    return errores, advertencias
+
+
+def main() -> None:
+    import database
+
+    with database.engine.connect() as conn:
+        errores, advertencias = verificar(conn)
+
+    for a in advertencias:
+        print(f"AVISO  {a}")
+    for e in errores:
+        print(f"ERROR  {e}")
+    total = len(consultas_calientes())
+    print(f"{total - len(errores)}/{total} consultas con plan correcto")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Esquema base: crea las tablas que falten según `models.py` (lo que antes hacía
+`Base.metadata.create_all` al importar `main`). Las tablas existentes no se
+tocan; sus columnas e índices nuevos llegan en las migraciones siguientes.
+
+Si las tablas de resumen de stock se crean sobre una base con datos, se
+pueblan desde el inventario.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401  (registra las tablas en Base.metadata)
+from database import Base
+from resumen_stock import poblar
+
+TABLAS_RESUMEN = {"resumen_stock_libros", "resumen_stock_pv"}
+
+
+def subir(conn) -> None:
+    existentes = set(inspect(conn).get_table_names())
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+    if TABLAS_RESUMEN - existentes:
+        with Session(bind=conn) as db:
+            poblar(db)
+            db.flush()
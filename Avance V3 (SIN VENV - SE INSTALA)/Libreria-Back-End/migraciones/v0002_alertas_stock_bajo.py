@@ -0,0 +1,31 @@
+"""
+Columnas de las alertas de stock bajo (`alertas_stock.py`) en bases creadas
+antes de ellas: `inventario_libros.stock_minimo` y las columnas generadas
+`bajo_minimo` con su índice.
+"""
+from migraciones import agregar_columna, crear_indice
+
+
+def _generada(conn, expresion: str) -> str:
+    # SQLite solo permite agregar columnas generadas VIRTUAL con ALTER TABLE
+    tipo = "VIRTUAL" if conn.dialect.name == "sqlite" else "STORED"
+    return f"BOOLEAN GENERATED ALWAYS AS ({expresion}) {tipo}"
+
+
+def subir(conn) -> None:
+    agregar_columna(conn, "inventario_libros", "stock_minimo", "INT NULL")
+    agregar_columna(conn, "inventario_pv", "stock_minimo", "INT NULL")
+
+    agregar_columna(
+        conn, "inventario_libros", "bajo_minimo",
+        _generada(conn, "stock_minimo IS NOT NULL AND stock < stock_minimo"),
+    )
+    agregar_columna(
+        conn, "inventario_pv", "bajo_minimo",
+        _generada(conn, "stock_minimo IS NOT NULL AND COALESCE(stock, 0) < stock_minimo"),
+    )
+    agregar_columna(conn, "materias_primas", "bajo_minimo", _generada(conn, "stock_actual < stock_minimo"))
+
+    crear_indice(conn, "inventario_libros", "ix_inventario_libros_bajo_minimo", ["bajo_minimo"])
+    crear_indice(conn, "inventario_pv", "ix_inventario_pv_bajo_minimo", ["bajo_minimo", "id_punto_venta"])
+    crear_indice(conn, "materias_primas", "ix_materias_primas_bajo_minimo", ["bajo_minimo"])
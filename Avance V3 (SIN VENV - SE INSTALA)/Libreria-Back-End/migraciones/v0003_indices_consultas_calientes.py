@@ -0,0 +1,25 @@
+"""
+Índices y restricciones de las consultas más frecuentes:
+
+- `libros(nombre)`: orden del catálogo y búsqueda por prefijo.
+- `inventario_pv(id_libro, id_punto_venta)` único: cada venta busca la fila
+  por ese par y el endpoint de crear depende de que no se repita.
+- `inventario_libros(libro_id)` único: un solo registro de stock por libro.
+- `movimientos_libros(fecha_movimiento)` y `(tipo, fecha_movimiento)`: el
+  listado pagina por (fecha_movimiento, id) del más reciente al más antiguo,
+  con y sin filtro de tipo, sin ordenar en memoria.
+
+Los índices únicos verifican antes que no haya filas repetidas y, si las hay,
+la migración falla con un mensaje indicando la tabla a consolidar.
+"""
+from migraciones import crear_indice
+
+
+def subir(conn) -> None:
+    crear_indice(conn, "libros", "ix_libros_nombre", ["nombre"])
+    crear_indice(conn, "inventario_pv", "uk_libro_pv", ["id_libro", "id_punto_venta"], unico=True)
+    crear_indice(conn, "inventario_libros", "uk_inventario_libros_libro", ["libro_id"], unico=True)
+    crear_indice(conn, "movimientos_libros", "ix_movimientos_libros_fecha", ["fecha_movimiento"])
+    crear_indice(
+        conn, "movimientos_libros", "ix_movimientos_libros_tipo_fecha", ["tipo", "fecha_movimiento"]
+    )
@@ -0,0 +1,10 @@
+"""
+Índice `movimientos_pv(fecha_movimiento)`: el resumen del panel de
+administración (`resumen_panel.py`) cuenta los movimientos de las últimas
+horas sin recorrer toda la tabla.
+"""
+from migraciones import crear_indice
+
+
+def subir(conn) -> None:
+    crear_indice(conn, "movimientos_pv", "ix_movimientos_pv_fecha", ["fecha_movimiento"])
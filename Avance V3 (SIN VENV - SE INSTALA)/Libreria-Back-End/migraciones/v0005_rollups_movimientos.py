@@ -0,0 +1,21 @@
+"""
+Tablas de la analítica de movimientos (`analitica.py`): `rollup_movimientos`
+y `rollup_marcas`, con una marca en 0 por cada tabla de movimientos.
+
+Sobre una base con historia, el compactador en segundo plano la pone al día
+de a poco; `python -m analitica compactar` lo hace de una vez.
+"""
+from sqlalchemy import insert, select
+
+from analitica import FUENTES
+from models import RollupMarca, RollupMovimiento
+
+
+def subir(conn) -> None:
+    RollupMovimiento.__table__.create(bind=conn, checkfirst=True)
+    RollupMarca.__table__.create(bind=conn, checkfirst=True)
+
+    existentes = set(conn.scalars(select(RollupMarca.fuente)))
+    faltantes = [{"fuente": f.nombre, "ultimo_id": 0} for f in FUENTES if f.nombre not in existentes]
+    if faltantes:
+        conn.execute(insert(RollupMarca), faltantes)
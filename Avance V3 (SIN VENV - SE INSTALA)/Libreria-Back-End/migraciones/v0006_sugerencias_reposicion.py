@@ -0,0 +1,8 @@
+"""
+Tabla `sugerencias_reposicion`, que reescribe el cálculo de `reposicion.py`.
+"""
+from models import SugerenciaReposicion
+
+
+def subir(conn) -> None:
+    SugerenciaReposicion.__table__.create(bind=conn, checkfirst=True)
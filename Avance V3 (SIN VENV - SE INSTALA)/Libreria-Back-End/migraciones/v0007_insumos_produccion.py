@@ -0,0 +1,9 @@
+"""
+Tabla `insumos_produccion`: consumo de materias primas de las tiradas de
+impresión (`produccion.py`).
+"""
+from models import InsumoProduccion
+
+
+def subir(conn) -> None:
+    InsumoProduccion.__table__.create(bind=conn, checkfirst=True)
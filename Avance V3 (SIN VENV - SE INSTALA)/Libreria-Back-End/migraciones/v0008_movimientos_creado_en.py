@@ -0,0 +1,19 @@
+"""
+Columna `creado_en` (hora de inserción asignada por la BD) en las tablas de
+movimientos: la compactación de rollups (`analitica.py`) decide qué filas ya
+son compactables por ella y no por `fecha_movimiento`, que envía el cliente.
+
+Las filas existentes quedan con la hora de la migración en MySQL. SQLite no
+admite agregar una columna con default no constante: ahí la columna queda sin
+default y las filas con NULL se compactan sin esperar ROLLUP_RETRASO (las bases
+SQLite creadas desde cero la tienen con default, por el esquema base).
+"""
+from migraciones import agregar_columna
+
+TABLAS = ("movimientos_libros", "movimientos_pv", "movimientos_mp")
+
+
+def subir(conn) -> None:
+    definicion = "DATETIME NULL" if conn.dialect.name == "sqlite" else "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"
+    for tabla in TABLAS:
+        agregar_columna(conn, tabla, "creado_en", definicion)
@@ -0,0 +1,23 @@
+"""
+Puebla el resumen de stock si está vacío. Pasa en las bases creadas con
+`db/Base cristobal.sql`: el script crea las tablas de resumen después de
+cargar los datos y v0001 las encuentra ya creadas, así que no las puebla.
+
+Con alguna fila en el resumen no se toca nada (lo mantiene la API; para
+recalcularlo está `python -m resumen_stock reconstruir`).
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import ResumenStockLibro, ResumenStockPV
+from resumen_stock import poblar
+
+
+def subir(conn) -> None:
+    with Session(bind=conn) as db:
+        if db.scalar(select(ResumenStockLibro.libro_id).limit(1)) is not None:
+            return
+        if db.scalar(select(ResumenStockPV.punto_venta_id).limit(1)) is not None:
+            return
+        poblar(db)
+        db.flush()
@@ -2,10 +2,10 @@
 Modelos ORM de SQLAlchemy para la aplicación de librería.
 """
 
-from sqlalchemy import Column, Integer, String, Enum, Text, ForeignKey, DateTime, DECIMAL
+from sqlalchemy import Column, Integer, String, Enum, Text, ForeignKey, DateTime, DECIMAL, Float, Boolean, Computed, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from database import Base
+from soporte_sqlite import ahora
 import datetime
 import enum
 
@@ -75,12 +75,12 @@ class Libro(Base):
     __tablename__ = "libros"
 
     id_libro = Column(Integer, primary_key=True, autoincrement=True)
-    nombre = Column(String(150), nullable=False)
+    nombre = Column(String(150), nullable=False, index=True)
     categoria = Column(String(100))
     descripcion = Column(Text)
     precio = Column(Integer)
     paginas_por_libro = Column(Integer, ForeignKey("papel.paginas"), nullable=False)
-    fecha_creacion = Column(DateTime, server_default=func.now(), nullable=False)
+    fecha_creacion = Column(DateTime, server_default=ahora(), nullable=False)
 
     papel = relationship("Papel")
 
@@ -94,10 +94,18 @@ class InventarioLibro(Base):
     id_inventario = Column(Integer, primary_key=True, autoincrement=True)
     libro_id = Column(Integer, ForeignKey("libros.id_libro"), nullable=False)
     stock = Column(Integer, nullable=False, default=0)
+    stock_minimo = Column(Integer, nullable=True)
+    # Columna generada e indexada para las alertas de stock bajo
+    bajo_minimo = Column(Boolean, Computed("stock_minimo IS NOT NULL AND stock < stock_minimo", persisted=True))
 
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=ahora(), onupdate=ahora(), nullable=False)
     libro = relationship("Libro")
 
+    __table_args__ = (
+        UniqueConstraint("libro_id", name="uk_inventario_libros_libro"),
+        Index("ix_inventario_libros_bajo_minimo", "bajo_minimo"),
+    )
+
 
 # ---------------------------------------------------------
 # TABLA: movimientos_libros
@@ -110,12 +118,20 @@ class MovimientoLibro(Base):
     tipo = Column(Enum(TipoMovimiento), nullable=False)
     cantidad = Column(Integer, nullable=False)
     usuario_id = Column(Integer, ForeignKey("usuarios.id_usuario"))
-    fecha_movimiento = Column(DateTime, server_default=func.now(), nullable=False)
+    fecha_movimiento = Column(DateTime, server_default=ahora(), nullable=False)
     observaciones = Column(Text)
+    # Hora de inserción (la asigna la BD, ver analitica.py)
+    creado_en = Column(DateTime, server_default=ahora(), nullable=False)
 
     inventario = relationship("InventarioLibro")
     usuario = relationship("Usuario")
 
+    # Listado paginado por (fecha_movimiento, id), con y sin filtro de tipo
+    __table_args__ = (
+        Index("ix_movimientos_libros_fecha", "fecha_movimiento"),
+        Index("ix_movimientos_libros_tipo_fecha", "tipo", "fecha_movimiento"),
+    )
+
 
 # ---------------------------------------------------------
 # TABLA: inventario_pv
@@ -128,10 +144,65 @@ class InventarioPV(Base):
     id_punto_venta = Column(Integer, ForeignKey("puntos_venta.id_punto_venta"), nullable=False)
     stock = Column(Integer, default=0)
     stock_minimo = Column(Integer, nullable=True)
+    # Columna generada e indexada para las alertas de stock bajo
+    bajo_minimo = Column(
+        Boolean, Computed("stock_minimo IS NOT NULL AND COALESCE(stock, 0) < stock_minimo", persisted=True)
+    )
     
     libro = relationship("Libro")
     punto_venta = relationship("PuntoVenta")
 
+    __table_args__ = (
+        UniqueConstraint("id_libro", "id_punto_venta", name="uk_libro_pv"),
+        Index("ix_inventario_pv_bajo_minimo", "bajo_minimo", "id_punto_venta"),
+    )
+
+# ---------------------------------------------------------
+# TABLA: movimientos_pv
+# ---------------------------------------------------------
+class MovimientoPV(Base):
+    __tablename__ = "movimientos_pv"
+
+    id_mov_pv = Column(Integer, primary_key=True, autoincrement=True)
+    inventario_pv_id = Column(Integer, ForeignKey("inventario_pv.id_inventario"), nullable=False)
+    tipo = Column(Enum(TipoMovimiento), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id_usuario"))
+    fecha_movimiento = Column(DateTime, server_default=ahora(), nullable=False)
+    observaciones = Column(Text)
+    # Hora de inserción (la asigna la BD, ver analitica.py)
+    creado_en = Column(DateTime, server_default=ahora(), nullable=False)
+
+    inventario = relationship("InventarioPV")
+    usuario = relationship("Usuario")
+
+    # Conteo de movimientos recientes del panel de administración
+    __table_args__ = (Index("ix_movimientos_pv_fecha", "fecha_movimiento"),)
+
+# ---------------------------------------------------------
+# TABLA: resumen_stock_libros  (mantenida por resumen_stock.py)
+# ---------------------------------------------------------
+class ResumenStockLibro(Base):
+    __tablename__ = "resumen_stock_libros"
+
+    libro_id = Column(Integer, ForeignKey("libros.id_libro"), primary_key=True)
+    stock_global = Column(Integer, nullable=False, default=0)
+    stock_pv = Column(Integer, nullable=False, default=0)
+    # Filas de inventario_pv del libro con stock < stock_minimo
+    filas_bajo_minimo = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=ahora(), onupdate=ahora(), nullable=False)
+
+# ---------------------------------------------------------
+# TABLA: resumen_stock_pv  (mantenida por resumen_stock.py)
+# ---------------------------------------------------------
+class ResumenStockPV(Base):
+    __tablename__ = "resumen_stock_pv"
+
+    punto_venta_id = Column(Integer, ForeignKey("puntos_venta.id_punto_venta"), primary_key=True)
+    stock = Column(Integer, nullable=False, default=0)
+    filas_bajo_minimo = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=ahora(), onupdate=ahora(), nullable=False)
+
 # ---------------------------------------------------------
 # TABLA: materias_primas
 # ---------------------------------------------------------
@@ -145,8 +216,12 @@ class MateriaPrima(Base):
     unidad = Column(String(50), nullable=False)
     stock_actual = Column(Integer, default=0, nullable=False)
     stock_minimo = Column(Integer, default=0, nullable=False)
+    # Columna generada e indexada para las alertas de stock bajo
+    bajo_minimo = Column(Boolean, Computed("stock_actual < stock_minimo", persisted=True))
     movimientos = relationship("MovimientoMP", back_populates="materia_prima")
 
+    __table_args__ = (Index("ix_materias_primas_bajo_minimo", "bajo_minimo"),)
+
 # ---------------------------------------------------------
 # TABLA: movimientos_mp
 # ---------------------------------------------------------
@@ -159,9 +234,85 @@ class MovimientoMP(Base):
     tipo = Column(Enum("entrada", "salida", "ajuste", name="tipo_mov_mp"), nullable=False)
     cantidad = Column(Integer, nullable=False)
     usuario_id = Column(Integer, ForeignKey("usuarios.id_usuario"), nullable=True)
-    fecha_movimiento = Column(DateTime, server_default=func.now(), nullable=False)
+    fecha_movimiento = Column(DateTime, server_default=ahora(), nullable=False)
     observaciones = Column(Text)
+    # Hora de inserción (la asigna la BD, ver analitica.py)
+    creado_en = Column(DateTime, server_default=ahora(), nullable=False)
 
     materia_prima = relationship("MateriaPrima", back_populates="movimientos")
     usuario = relationship("Usuario")
-    
+
+# ---------------------------------------------------------
+# TABLA: insumos_produccion  (materias primas que consume cada tirada)
+# ---------------------------------------------------------
+class InsumoProduccion(Base):
+    """Consumo de una materia prima por ejemplar impreso y por página impresa."""
+    __tablename__ = "insumos_produccion"
+
+    mp_id = Column(Integer, ForeignKey("materias_primas.id_mp"), primary_key=True)
+    por_ejemplar = Column(Float, nullable=False, default=0)
+    por_pagina = Column(Float, nullable=False, default=0)
+
+# ---------------------------------------------------------
+# TABLA: rollup_movimientos  (mantenida por analitica.py)
+# ---------------------------------------------------------
+class RollupMovimiento(Base):
+    """Movimientos agregados por hora o día y por dimensión (0 = no aplica)."""
+    __tablename__ = "rollup_movimientos"
+
+    id_rollup = Column(Integer, primary_key=True, autoincrement=True)
+    granularidad = Column(String(4), nullable=False)  # hora, dia
+    inicio = Column(DateTime, nullable=False)
+    origen = Column(String(15), nullable=False)  # almacen, punto_venta, materia_prima
+    tipo = Column(String(10), nullable=False)
+    libro_id = Column(Integer, nullable=False, default=0)
+    mp_id = Column(Integer, nullable=False, default=0)
+    punto_venta_id = Column(Integer, nullable=False, default=0)
+    usuario_id = Column(Integer, nullable=False, default=0)
+    movimientos = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularidad", "inicio", "origen", "tipo", "libro_id", "mp_id", "punto_venta_id", "usuario_id",
+            name="uk_rollup_movimientos",
+        ),
+        # Series y top-N por rango de fechas
+        Index("ix_rollup_movimientos_serie", "granularidad", "origen", "tipo", "inicio"),
+    )
+
+# ---------------------------------------------------------
+# TABLA: rollup_marcas  (hasta dónde se compactó cada tabla de movimientos)
+# ---------------------------------------------------------
+class RollupMarca(Base):
+    __tablename__ = "rollup_marcas"
+
+    fuente = Column(String(30), primary_key=True)
+    ultimo_id = Column(Integer, nullable=False, default=0)
+    # Todo lo anterior a esta fecha ya está en el rollup
+    al_dia_en = Column(DateTime, nullable=True)
+
+# ---------------------------------------------------------
+# TABLA: sugerencias_reposicion  (la reescribe reposicion.py en cada cálculo)
+# ---------------------------------------------------------
+class SugerenciaReposicion(Base):
+    """Mínimo y cantidad a reponer sugeridos a partir de la demanda reciente."""
+    __tablename__ = "sugerencias_reposicion"
+
+    id_sugerencia = Column(Integer, primary_key=True, autoincrement=True)
+    origen = Column(String(15), nullable=False)  # punto_venta, materia_prima, papel
+    # id_inventario de inventario_pv, id_mp o paginas del papel, según el origen
+    referencia_id = Column(Integer, nullable=False)
+    libro_id = Column(Integer, nullable=True)
+    punto_venta_id = Column(Integer, nullable=True)
+    stock_actual = Column(Integer, nullable=False)
+    stock_minimo_actual = Column(Integer, nullable=True)
+    demanda_diaria = Column(Float, nullable=False)
+    stock_seguridad = Column(Integer, nullable=False)
+    stock_minimo_sugerido = Column(Integer, nullable=False)
+    dias_cobertura = Column(Float, nullable=True)  # NULL = sin demanda
+    cantidad_sugerida = Column(Integer, nullable=False)
+    calculado_en = Column(DateTime, nullable=False)
+
+    # Listado por origen y punto de venta, en orden de urgencia (= orden de id)
+    __table_args__ = (Index("ix_sugerencias_reposicion_origen_pv", "origen", "punto_venta_id"),)
@@ -0,0 +1,161 @@
+"""
+Paginación por cursor (keyset) compartida por los endpoints de listado.
+
+En vez de OFFSET, cada página se pide con `after=<cursor>` y `limit=<n>`.
+El cursor es la clave de orden de la última fila entregada (codificada en
+base64), de modo que la siguiente página arranca con un WHERE sobre esa clave
+y puede usar el índice de la columna de orden sin recorrer las filas previas.
+
+La respuesta sigue siendo una lista (compatible con el frontend actual); el
+cursor de la página siguiente viaja en la cabecera `X-Next-Cursor` y no se
+envía cuando ya no quedan filas.
+
+Uso típico desde un router:
+    filas = paginar(db, consulta, [Modelo.id], pagina, response,
+                    clave_de=lambda r: (r.id,))
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as ConsultaORM, Session
+
+# Tamaño de página cuando el cliente no envía `limit`, y máximo que acepta cualquier endpoint
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+# Cabecera con el cursor de la página siguiente
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+class ParametrosPagina:
+    """Parámetros `after`, `limit` y `orden` ya validados."""
+
+    def __init__(self, after: Optional[str], limit: int, orden: str):
+        self.after = after
+        self.limit = limit
+        self.descendente = orden == "desc"
+
+
+def parametros_pagina(limite_por_defecto: int = LIMITE_POR_DEFECTO, orden_por_defecto: str = "asc"):
+    """
+    Crea la dependencia de FastAPI con los parámetros de paginación.
+
+    Toda respuesta está acotada: sin `limit` se devuelven `limite_por_defecto`
+    filas y el resto se pide con el cursor de X-Next-Cursor.
+    """
+    def dependencia(
+        after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+        limit: int = Query(limite_por_defecto, ge=1, le=LIMITE_MAXIMO, description="Cantidad máxima de filas"),
+        orden: str = Query(orden_por_defecto, pattern="^(asc|desc)$"),
+    ) -> ParametrosPagina:
+        return ParametrosPagina(after, limit, orden)
+
+    return dependencia
+
+
+# ============================================================
+# CODIFICACIÓN DEL CURSOR
+# ============================================================
+def _a_json(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    crudo = json.dumps([_a_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, columnas: Sequence) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(columnas):
+            raise ValueError
+        resultado = []
+        for columna, valor in zip(columnas, valores):
+            tipo = columna.type.python_type
+            if valor is not None and tipo is datetime:
+                valor = datetime.fromisoformat(valor)
+            resultado.append(valor)
+        return resultado
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+# ============================================================
+# APLICAR LA PAGINACIÓN
+# ============================================================
+def condicion_keyset(columnas: Sequence, valores: Sequence, descendente: bool):
+    """
+    (a, b) > (x, y) expandido como a > x OR (a = x AND b > y), que MySQL
+    resuelve como rango sobre el índice.
+    """
+    condiciones = []
+    for i, columna in enumerate(columnas):
+        iguales = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        siguiente = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def paginar(
+    db: Session,
+    consulta,
+    columnas: Sequence,
+    pagina: ParametrosPagina,
+    response: Response,
+    clave_de: Callable[[Any], Sequence[Any]],
+) -> list:
+    """
+    Ordena `consulta` por `columnas` (la última debe ser única, normalmente la
+    PK), aplica el cursor y el límite, ejecuta y devuelve las filas.
+
+    `consulta` puede ser un `Query` del ORM o un `select()`. `clave_de` extrae
+    de cada fila los valores de `columnas`, en el mismo orden.
+    """
+    consulta = _preparar(consulta, columnas, pagina)
+    if isinstance(consulta, ConsultaORM):
+        filas = consulta.all()
+    else:
+        filas = db.execute(consulta).all()
+    return _cerrar(filas, pagina, response, clave_de)
+
+
+async def paginar_async(
+    db: AsyncSession,
+    consulta,
+    columnas: Sequence,
+    pagina: ParametrosPagina,
+    response: Response,
+    clave_de: Callable[[Any], Sequence[Any]],
+) -> list:
+    """Igual que `paginar`, para routers asíncronos (solo `select()`)."""
+    consulta = _preparar(consulta, columnas, pagina)
+    filas = (await db.execute(consulta)).all()
+    return _cerrar(filas, pagina, response, clave_de)
+
+
+def _preparar(consulta, columnas: Sequence, pagina: ParametrosPagina):
+    if pagina.after:
+        valores = decodificar_cursor(pagina.after, columnas)
+        consulta = consulta.filter(condicion_keyset(columnas, valores, pagina.descendente))
+
+    consulta = consulta.order_by(*[c.desc() if pagina.descendente else c.asc() for c in columnas])
+
+    # Se pide una fila extra para saber si existe una página siguiente
+    return consulta.limit(pagina.limit + 1)
+
+
+def _cerrar(filas: list, pagina: ParametrosPagina, response: Response, clave_de) -> list:
+    if len(filas) > pagina.limit:
+        filas = filas[:pagina.limit]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(clave_de(filas[-1]))
+    return filas
@@ -0,0 +1,273 @@
+"""
+Producción: tiradas de impresión que consumen papel y materias primas.
+
+Una tirada imprime `cantidad` ejemplares de uno o más libros. Cada ejemplar
+usa `paginas_por_libro` páginas del papel de ese mismo número de páginas
+(`Papel.stock_paginas`), y cada materia prima de `insumos_produccion` se
+consume por ejemplar y por página impresa (redondeado hacia arriba sobre el
+total de la tirada).
+
+`producir` lo hace en una sola transacción:
+- Bloquea con SELECT ... FOR UPDATE, siempre en el orden inventario_libros →
+  papel → materias_primas y por clave dentro de cada tabla, así dos tiradas
+  (o una tirada y un ajuste en lote) no se bloquean en cruz.
+- Valida todo antes de escribir: si falta papel o alguna materia prima no se
+  modifica nada.
+- Descuenta papel y materias primas, suma el stock del almacén (con su
+  resumen y alertas) y registra los movimientos con INSERT masivos.
+
+`Planificador` evalúa en memoria muchas tiradas candidatas contra una foto
+del stock actual, sin bloquear nada.
+"""
+import math
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from alertas_stock import bajo_minimo, registrar_cruce
+from models import (
+    InsumoProduccion, InventarioLibro, Libro, MateriaPrima, MovimientoLibro, MovimientoMP, Papel, TipoMovimiento,
+)
+from resumen_stock import CambiosResumen
+
+# Cantidad máxima de libros distintos por tirada y de candidatas por planificación
+MAX_ITEMS_TIRADA = 5000
+MAX_CANDIDATAS = 1000
+
+OBSERVACION_TIRADA = "Tirada de producción"
+
+
+# ============================================================
+# REQUERIMIENTOS
+# ============================================================
+def agrupar(items: Iterable) -> dict[int, int]:
+    """libro_id -> ejemplares, sumando los ítems repetidos."""
+    cantidades: dict[int, int] = defaultdict(int)
+    for item in items:
+        cantidades[item.libro_id] += item.cantidad
+    return dict(cantidades)
+
+
+def requerimientos(
+    cantidades: dict[int, int], paginas_de: dict[int, int], insumos: list[tuple[int, float, float]]
+) -> tuple[dict[int, int], dict[int, int]]:
+    """
+    (páginas por papel, unidades por materia prima) que consume la tirada.
+    `paginas_de`: libro_id -> paginas_por_libro; `insumos`: (mp_id, por_ejemplar, por_pagina).
+    """
+    papel: dict[int, int] = defaultdict(int)
+    ejemplares = paginas = 0
+    for libro_id, cantidad in cantidades.items():
+        paginas_libro = paginas_de[libro_id]
+        papel[paginas_libro] += cantidad * paginas_libro
+        ejemplares += cantidad
+        paginas += cantidad * paginas_libro
+    materias = {}
+    for mp_id, por_ejemplar, por_pagina in insumos:
+        necesario = math.ceil(por_ejemplar * ejemplares + por_pagina * paginas)
+        if necesario > 0:
+            materias[mp_id] = necesario
+    return dict(papel), materias
+
+
+def faltantes(
+    papel: dict[int, int], materias: dict[int, int], stock_papel: dict[int, int], stock_mp: dict[int, int]
+) -> list[dict]:
+    resultado = [
+        {"origen": "papel", "id": paginas, "necesario": necesario, "disponible": stock_papel.get(paginas, 0)}
+        for paginas, necesario in sorted(papel.items()) if necesario > stock_papel.get(paginas, 0)
+    ]
+    resultado += [
+        {"origen": "materia_prima", "id": mp_id, "necesario": necesario, "disponible": stock_mp.get(mp_id, 0)}
+        for mp_id, necesario in sorted(materias.items()) if necesario > stock_mp.get(mp_id, 0)
+    ]
+    return resultado
+
+
+def _insumos(db: Session) -> list[tuple[int, float, float]]:
+    return [
+        (f.mp_id, f.por_ejemplar or 0, f.por_pagina or 0)
+        for f in db.execute(select(InsumoProduccion.mp_id, InsumoProduccion.por_ejemplar, InsumoProduccion.por_pagina))
+    ]
+
+
+def _validar_items(cantidades: dict[int, int]) -> None:
+    if not cantidades:
+        raise HTTPException(status_code=400, detail="La tirada está vacía")
+    if len(cantidades) > MAX_ITEMS_TIRADA:
+        raise HTTPException(status_code=400, detail=f"La tirada supera {MAX_ITEMS_TIRADA} libros")
+
+
+# ============================================================
+# TIRADA
+# ============================================================
+def producir(db: Session, items: list, usuario_id: Optional[int] = None, observaciones: Optional[str] = None) -> dict:
+    """
+    Ejecuta la tirada sin hacer commit (el llamador confirma e invalida la
+    caché). Ante un error hace rollback y lanza HTTPException.
+    """
+    cantidades = agrupar(items)
+    _validar_items(cantidades)
+    ids = sorted(cantidades)
+
+    # 1. Inventario del almacén de los libros impresos
+    inventarios = {
+        inv.libro_id: inv
+        for inv in db.scalars(
+            select(InventarioLibro).where(InventarioLibro.libro_id.in_(ids))
+            .order_by(InventarioLibro.libro_id).with_for_update()
+        )
+    }
+    paginas_de = dict(db.execute(select(Libro.id_libro, Libro.paginas_por_libro).where(Libro.id_libro.in_(ids))).all())
+    no_existen = [i for i in ids if i not in paginas_de]
+    if no_existen:
+        db.rollback()
+        raise HTTPException(status_code=404, detail={"mensaje": "Libro no encontrado", "ids": no_existen})
+
+    papel, materias = requerimientos(cantidades, paginas_de, _insumos(db))
+
+    # 2. Papel y 3. materias primas
+    papeles = {
+        p.paginas: p
+        for p in db.scalars(
+            select(Papel).where(Papel.paginas.in_(sorted(papel))).order_by(Papel.paginas).with_for_update()
+        )
+    }
+    mps = {
+        mp.id_mp: mp
+        for mp in db.scalars(
+            select(MateriaPrima).where(MateriaPrima.id_mp.in_(sorted(materias)))
+            .order_by(MateriaPrima.id_mp).with_for_update()
+        )
+    }
+    insuficientes = faltantes(
+        papel, materias,
+        {k: p.stock_paginas for k, p in papeles.items()},
+        {k: mp.stock_actual for k, mp in mps.items()},
+    )
+    if insuficientes:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"mensaje": "Stock insuficiente para la tirada", "faltantes": insuficientes})
+
+    # Escritura: todo validado
+    for paginas, necesario in papel.items():
+        papeles[paginas].stock_paginas -= necesario
+    for mp_id, necesario in materias.items():
+        mp = mps[mp_id]
+        bajo_antes = bajo_minimo(mp.stock_actual, mp.stock_minimo)
+        mp.stock_actual -= necesario
+        registrar_cruce(db, "materia_prima", bajo_antes, bajo_minimo(mp.stock_actual, mp.stock_minimo),
+                        mp.stock_actual, mp.stock_minimo, id_mp=mp_id)
+
+    cambios = CambiosResumen()
+    for libro_id in ids:
+        inv = inventarios.get(libro_id)
+        if inv is None:
+            inv = inventarios[libro_id] = InventarioLibro(libro_id=libro_id, stock=0)
+            db.add(inv)
+        cambios.global_(libro_id, inv.stock or 0, (inv.stock or 0) + cantidades[libro_id], inv.stock_minimo)
+        inv.stock = (inv.stock or 0) + cantidades[libro_id]
+    cambios.aplicar(db)
+
+    observacion = observaciones or OBSERVACION_TIRADA
+    db.execute(insert(MovimientoLibro), [
+        {
+            "inventario_id": inventarios[libro_id].id_inventario,
+            "tipo": TipoMovimiento.entrada,
+            "cantidad": cantidades[libro_id],
+            "usuario_id": usuario_id,
+            "observaciones": observacion,
+        }
+        for libro_id in ids
+    ])
+    if materias:
+        db.execute(insert(MovimientoMP), [
+            {"mp_id": mp_id, "tipo": "salida", "cantidad": necesario, "usuario_id": usuario_id,
+             "observaciones": observacion}
+            for mp_id, necesario in sorted(materias.items())
+        ])
+
+    return {
+        "ejemplares": sum(cantidades.values()),
+        "libros": [
+            {"libro_id": i, "cantidad": cantidades[i], "stock": inventarios[i].stock} for i in ids
+        ],
+        "papel": [
+            {"id": k, "consumido": v, "stock": papeles[k].stock_paginas} for k, v in sorted(papel.items())
+        ],
+        "materias_primas": [
+            {"id": k, "consumido": v, "stock": mps[k].stock_actual} for k, v in sorted(materias.items())
+        ],
+    }
+
+
+# ============================================================
+# PLANIFICACIÓN EN MEMORIA
+# ============================================================
+class Planificador:
+    """Foto del stock de papel y materias primas para evaluar tiradas candidatas."""
+
+    def __init__(self, paginas_de: dict[int, int], insumos: list, stock_papel: dict[int, int], stock_mp: dict[int, int]):
+        self.paginas_de = paginas_de
+        self.insumos = insumos
+        self.stock_papel = stock_papel
+        self.stock_mp = stock_mp
+
+    @classmethod
+    def desde_bd(cls, db: Session, libro_ids: Iterable[int]) -> "Planificador":
+        """Una consulta por tabla, cualquiera sea la cantidad de candidatas."""
+        paginas_de = dict(db.execute(
+            select(Libro.id_libro, Libro.paginas_por_libro).where(Libro.id_libro.in_(sorted(set(libro_ids))))
+        ).all())
+        return cls(
+            paginas_de,
+            _insumos(db),
+            dict(db.execute(select(Papel.paginas, Papel.stock_paginas)).all()),
+            dict(db.execute(select(MateriaPrima.id_mp, MateriaPrima.stock_actual)).all()),
+        )
+
+    def evaluar(self, candidatas: list[dict[int, int]]) -> list[dict]:
+        """
+        Cada candidata contra el stock actual (`factible`) y, tomadas en orden,
+        si todavía entra con lo que dejaron las anteriores que entraron
+        (`entra_en_secuencia`).
+        """
+        papel_restante = dict(self.stock_papel)
+        mp_restante = dict(self.stock_mp)
+        resultados = []
+        for cantidades in candidatas:
+            no_existen = sorted(i for i in cantidades if i not in self.paginas_de)
+            if no_existen:
+                resultados.append({"factible": False, "entra_en_secuencia": False, "libros_inexistentes": no_existen,
+                                   "papel": {}, "materias_primas": {}, "faltantes": []})
+                continue
+            papel, materias = requerimientos(cantidades, self.paginas_de, self.insumos)
+            faltan = faltantes(papel, materias, self.stock_papel, self.stock_mp)
+            entra = not faltantes(papel, materias, papel_restante, mp_restante)
+            if entra:
+                for k, v in papel.items():
+                    papel_restante[k] -= v
+                for k, v in materias.items():
+                    mp_restante[k] -= v
+            resultados.append({
+                "factible": not faltan,
+                "entra_en_secuencia": entra,
+                "libros_inexistentes": [],
+                "papel": papel,
+                "materias_primas": materias,
+                "faltantes": faltan,
+            })
+        return resultados
+
+
+def planificar(db: Session, candidatas: list[list]) -> list[dict]:
+    if len(candidatas) > MAX_CANDIDATAS:
+        raise HTTPException(status_code=400, detail=f"Se aceptan hasta {MAX_CANDIDATAS} candidatas")
+    agrupadas = [agrupar(items) for items in candidatas]
+    for cantidades in agrupadas:
+        _validar_items(cantidades)
+    planificador = Planificador.desde_bd(db, (i for c in agrupadas for i in c))
+    return planificador.evaluar(agrupadas)
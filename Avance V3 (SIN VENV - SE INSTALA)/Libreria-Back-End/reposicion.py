@@ -0,0 +1,279 @@
+"""
+Sugerencias de reposición: pronóstico de demanda y stock mínimo sugerido.
+
+Reemplaza los `stock_minimo` tipeados a mano por valores calculados con la
+demanda de los últimos REPOSICION_HISTORIA_DIAS días completos:
+
+- demanda diaria media (d) y su desvío (σ) por libro × punto de venta (ventas)
+  y por materia prima (salidas);
+- stock de seguridad = Z · σ · √plazo;
+- mínimo sugerido (punto de pedido) = d · plazo + stock de seguridad;
+- días de cobertura = stock / d;
+- cantidad sugerida: si el stock está en el mínimo o debajo, lo que falta
+  para llegar a mínimo + d · REPOSICION_COBERTURA_DIAS.
+
+Lo que los puntos de venta necesitan y el almacén no tiene hay que
+imprimirlo: esas unidades × `paginas_por_libro` se suman por papel y se
+comparan con `Papel.stock_paginas` (origen "papel", en páginas).
+
+La historia se lee de los rollups diarios de `analitica.py`: la base devuelve
+por serie la suma y la suma de cuadrados de la demanda diaria, y el resto se
+calcula con NumPy sobre arreglos de todas las series a la vez. El resultado
+reemplaza entero `sugerencias_reposicion`, ordenado de lo más urgente (menos
+días de cobertura) a lo menos urgente.
+
+Uso: POST /reposicion/calcular o `python -m reposicion`.
+"""
+import math
+import os
+import threading
+import time
+from itertools import chain
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from models import (
+    InventarioLibro, InventarioPV, Libro, MateriaPrima, Papel, RollupMovimiento, SugerenciaReposicion,
+)
+
+REPOSICION_HISTORIA_DIAS = int(os.getenv("REPOSICION_HISTORIA_DIAS", "56"))
+REPOSICION_PLAZO_DIAS = float(os.getenv("REPOSICION_PLAZO_DIAS", "7"))
+REPOSICION_COBERTURA_DIAS = float(os.getenv("REPOSICION_COBERTURA_DIAS", "14"))
+# Factor del nivel de servicio (1.65 ≈ 95 % de los ciclos sin quiebre)
+REPOSICION_Z = float(os.getenv("REPOSICION_Z", "1.65"))
+
+# Filas por INSERT masivo al guardar
+FILAS_POR_LOTE = 10_000
+
+# Dos cálculos simultáneos en el mismo proceso se pisarían al reescribir la tabla
+_calculando = threading.Lock()
+
+
+# ============================================================
+# CARGA EN ARREGLOS
+# ============================================================
+def _arreglo(db: Session, stmt, columnas: int) -> np.ndarray:
+    # fromiter sobre los valores aplanados: np.array() recorre cada Row como secuencia y es ~50 veces más lento
+    filas = db.execute(stmt).all()
+    valores = chain.from_iterable(filas)
+    return np.fromiter(valores, dtype=np.float64, count=len(filas) * columnas).reshape(len(filas), columnas)
+
+
+def _demanda(db: Session, origen: str, tipo: str, dimensiones: list, desde: datetime, hasta: datetime):
+    """Por serie (`dimensiones`): suma y suma de cuadrados de las unidades diarias."""
+    por_dia = (
+        select(*dimensiones, func.sum(RollupMovimiento.unidades).label("unidades"))
+        .where(
+            RollupMovimiento.granularidad == "dia",
+            RollupMovimiento.origen == origen,
+            RollupMovimiento.tipo == tipo,
+            RollupMovimiento.inicio >= desde,
+            RollupMovimiento.inicio < hasta,
+        )
+        .group_by(*dimensiones, RollupMovimiento.inicio)
+        .subquery()
+    )
+    claves = [por_dia.c[d.key] for d in dimensiones]
+    stmt = select(
+        *claves, func.sum(por_dia.c.unidades), func.sum(por_dia.c.unidades * por_dia.c.unidades)
+    ).group_by(*claves)
+    return _arreglo(db, stmt, len(dimensiones) + 2)
+
+
+def _ubicar(destino: np.ndarray, buscadas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(posición en `destino` de cada clave encontrada, máscara de las encontradas)."""
+    if len(destino) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(len(buscadas), dtype=bool)
+    orden = np.argsort(destino, kind="stable")
+    ordenado = destino[orden]
+    posiciones = np.minimum(np.searchsorted(ordenado, buscadas), len(ordenado) - 1)
+    encontradas = ordenado[posiciones] == buscadas
+    return orden[posiciones[encontradas]], encontradas
+
+
+# ============================================================
+# POLÍTICA DE REPOSICIÓN (vectorizada)
+# ============================================================
+def politica(suma: np.ndarray, cuadrados: np.ndarray, stock: np.ndarray, dias: int) -> dict:
+    """Demanda, stock de seguridad, mínimo, cobertura y cantidad para todas las series."""
+    media = suma / dias
+    desvio = np.sqrt(np.maximum(cuadrados / dias - media * media, 0))
+    seguridad = np.ceil(REPOSICION_Z * desvio * math.sqrt(REPOSICION_PLAZO_DIAS))
+    minimo = np.ceil(media * REPOSICION_PLAZO_DIAS + seguridad)
+    maximo = minimo + np.ceil(media * REPOSICION_COBERTURA_DIAS)
+    cantidad = np.where(stock <= minimo, np.maximum(maximo - stock, 0), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cobertura = np.where(media > 0, stock / media, np.nan)
+    return {
+        "media": media, "desvio": desvio, "seguridad": seguridad,
+        "minimo": minimo, "cobertura": cobertura, "cantidad": cantidad,
+    }
+
+
+def _filas(origen: str, referencias, stock, minimo_actual, calculo: dict, calculado_en: datetime,
+           libros=None, puntos_venta=None) -> list[dict]:
+    """Filas para `sugerencias_reposicion`, de la más urgente a la menos urgente."""
+    cobertura = calculo["cobertura"]
+    orden = np.lexsort((-calculo["cantidad"], np.where(np.isnan(cobertura), np.inf, cobertura)))
+    n = len(orden)
+    columnas = {
+        "referencia_id": referencias[orden].astype(np.int64).tolist(),
+        "libro_id": libros[orden].astype(np.int64).tolist() if libros is not None else [None] * n,
+        "punto_venta_id": puntos_venta[orden].astype(np.int64).tolist() if puntos_venta is not None else [None] * n,
+        "stock_actual": stock[orden].astype(np.int64).tolist(),
+        "stock_minimo_actual": minimo_actual[orden].astype(np.int64).tolist() if minimo_actual is not None else [None] * n,
+        "demanda_diaria": np.round(calculo["media"][orden], 3).tolist(),
+        "stock_seguridad": calculo["seguridad"][orden].astype(np.int64).tolist(),
+        "stock_minimo_sugerido": calculo["minimo"][orden].astype(np.int64).tolist(),
+        "dias_cobertura": [None if math.isnan(c) else c for c in np.round(cobertura[orden], 1).tolist()],
+        "cantidad_sugerida": calculo["cantidad"][orden].astype(np.int64).tolist(),
+    }
+    return [
+        dict(zip(columnas, valores), origen=origen, calculado_en=calculado_en)
+        for valores in zip(*columnas.values())
+    ]
+
+
+# ============================================================
+# CÁLCULO
+# ============================================================
+def _puntos_venta(db: Session, desde: datetime, hasta: datetime, dias: int):
+    # id_inventario, id_libro, id_punto_venta, stock, stock_minimo, paginas_por_libro
+    inventario = _arreglo(db, select(
+        InventarioPV.id_inventario, InventarioPV.id_libro, InventarioPV.id_punto_venta,
+        func.coalesce(InventarioPV.stock, 0), func.coalesce(InventarioPV.stock_minimo, 0), Libro.paginas_por_libro,
+    ).join(Libro, Libro.id_libro == InventarioPV.id_libro), 6)
+    demanda = _demanda(
+        db, "punto_venta", "venta", [RollupMovimiento.libro_id, RollupMovimiento.punto_venta_id], desde, hasta
+    )
+
+    # Clave única libro × punto de venta para cruzar la demanda con el inventario
+    base = max(inventario[:, 2].max(initial=0), demanda[:, 1].max(initial=0)) + 1
+    posiciones, encontradas = _ubicar(
+        inventario[:, 1] * base + inventario[:, 2], demanda[:, 0] * base + demanda[:, 1]
+    )
+    suma = np.zeros(len(inventario))
+    cuadrados = np.zeros(len(inventario))
+    suma[posiciones] = demanda[encontradas, 2]
+    cuadrados[posiciones] = demanda[encontradas, 3]
+    return inventario, politica(suma, cuadrados, inventario[:, 3], dias)
+
+
+def _materias_primas(db: Session, desde: datetime, hasta: datetime, dias: int):
+    materias = _arreglo(db, select(MateriaPrima.id_mp, MateriaPrima.stock_actual, MateriaPrima.stock_minimo), 3)
+    demanda = _demanda(db, "materia_prima", "salida", [RollupMovimiento.mp_id], desde, hasta)
+    posiciones, encontradas = _ubicar(materias[:, 0], demanda[:, 0])
+    suma = np.zeros(len(materias))
+    cuadrados = np.zeros(len(materias))
+    suma[posiciones] = demanda[encontradas, 1]
+    cuadrados[posiciones] = demanda[encontradas, 2]
+    return materias, politica(suma, cuadrados, materias[:, 1], dias)
+
+
+def _papel(db: Session, inventario: np.ndarray, calculo: dict) -> tuple[np.ndarray, dict]:
+    """Páginas a imprimir por papel para cubrir lo que el almacén no alcanza a reponer."""
+    papeles = _arreglo(db, select(Papel.paginas, Papel.stock_paginas), 2)
+    almacen = _arreglo(db, select(InventarioLibro.libro_id, func.coalesce(InventarioLibro.stock, 0)), 2)
+
+    # Por libro: unidades pedidas por los puntos de venta, demanda y varianza diarias
+    libros, por_libro = np.unique(inventario[:, 1], return_inverse=True)
+    pedido = np.bincount(por_libro, weights=calculo["cantidad"], minlength=len(libros))
+    media = np.bincount(por_libro, weights=calculo["media"], minlength=len(libros))
+    varianza = np.bincount(por_libro, weights=calculo["desvio"] ** 2, minlength=len(libros))
+    paginas_libro = np.zeros(len(libros))
+    paginas_libro[por_libro] = inventario[:, 5]
+
+    en_almacen = np.zeros(len(libros))
+    posiciones, encontradas = _ubicar(libros, almacen[:, 0])
+    en_almacen[posiciones] = almacen[encontradas, 1]
+    a_imprimir = np.maximum(pedido - en_almacen, 0) * paginas_libro
+
+    # Por papel (cada libro usa el papel de sus paginas_por_libro), en páginas
+    posiciones, encontradas = _ubicar(papeles[:, 0], paginas_libro)
+    n = len(papeles)
+    necesarias = np.bincount(posiciones, weights=a_imprimir[encontradas], minlength=n)
+    media_paginas = np.bincount(posiciones, weights=(media * paginas_libro)[encontradas], minlength=n)
+    # Demandas de libros independientes: las varianzas se suman
+    desvio_paginas = np.sqrt(
+        np.bincount(posiciones, weights=(varianza * paginas_libro ** 2)[encontradas], minlength=n)
+    )
+
+    stock = papeles[:, 1]
+    seguridad = np.ceil(REPOSICION_Z * desvio_paginas * math.sqrt(REPOSICION_PLAZO_DIAS))
+    minimo = np.ceil(media_paginas * REPOSICION_PLAZO_DIAS + seguridad)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cobertura = np.where(media_paginas > 0, stock / media_paginas, np.nan)
+    return papeles, {
+        "media": media_paginas, "desvio": desvio_paginas, "seguridad": seguridad, "minimo": minimo,
+        "cobertura": cobertura,
+        # Lo que hay que imprimir ya, y que después quede el mínimo
+        "cantidad": np.maximum(np.ceil(necesarias) + minimo - stock, 0),
+    }
+
+
+def calcular(db: Session) -> dict:
+    """Recalcula y reemplaza todas las sugerencias. Devuelve un resumen del cálculo."""
+    with _calculando:
+        inicio = time.perf_counter()
+        calculado_en = datetime.now().replace(microsecond=0)
+        # Solo días completos
+        hasta = calculado_en.replace(hour=0, minute=0, second=0)
+        desde = hasta - timedelta(days=REPOSICION_HISTORIA_DIAS)
+        dias = REPOSICION_HISTORIA_DIAS
+
+        inventario, calculo_pv = _puntos_venta(db, desde, hasta, dias)
+        materias, calculo_mp = _materias_primas(db, desde, hasta, dias)
+        papeles, calculo_papel = _papel(db, inventario, calculo_pv)
+
+        filas = {
+            "punto_venta": _filas(
+                "punto_venta", inventario[:, 0], inventario[:, 3], inventario[:, 4], calculo_pv, calculado_en,
+                libros=inventario[:, 1], puntos_venta=inventario[:, 2],
+            ),
+            "materia_prima": _filas("materia_prima", materias[:, 0], materias[:, 1], materias[:, 2], calculo_mp,
+                                    calculado_en),
+            "papel": _filas("papel", papeles[:, 0], papeles[:, 1], None, calculo_papel, calculado_en),
+        }
+
+        # INSERT de Core sobre la tabla: sin el paso por el ORM de los INSERT masivos
+        tabla = SugerenciaReposicion.__table__
+        db.execute(delete(tabla))
+        for lista in filas.values():
+            for i in range(0, len(lista), FILAS_POR_LOTE):
+                db.execute(insert(tabla), lista[i:i + FILAS_POR_LOTE])
+        db.commit()
+
+        return {
+            "calculado_en": calculado_en,
+            "historia_dias": dias,
+            "filas": {origen: len(lista) for origen, lista in filas.items()},
+            "a_reponer": {
+                "punto_venta": int(np.count_nonzero(calculo_pv["cantidad"])),
+                "materia_prima": int(np.count_nonzero(calculo_mp["cantidad"])),
+                "papel": int(np.count_nonzero(calculo_papel["cantidad"])),
+            },
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+
+
+def main() -> None:
+    from analitica import compactar
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        # La demanda sale de los rollups: que estén al día antes de calcular
+        compactar(db)
+        resumen = calcular(db)
+    finally:
+        db.close()
+    print(f"Sugerencias calculadas en {resumen['segundos']} s con {resumen['historia_dias']} días de historia")
+    for origen, filas in resumen["filas"].items():
+        print(f"  {origen:<14} {filas:>8} filas, {resumen['a_reponer'][origen]:>8} a reponer")
+
+
+if __name__ == "__main__":
+    main()
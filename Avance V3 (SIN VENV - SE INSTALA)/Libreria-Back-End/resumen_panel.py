@@ -0,0 +1,113 @@
+"""
+Resumen del panel de administración (GET /panel/resumen).
+
+Junta en una respuesta lo que la portada del admin antes calculaba en el
+navegador bajando listados completos: cantidad de puntos de venta, usuarios
+y libros, stock total y su valor (precio × stock) por punto de venta, filas
+bajo mínimo por origen y movimientos de las últimas horas.
+
+Se calcula con dos consultas agregadas: una fila de contadores (subconsultas
+escalares, casi todas sobre índices o sobre el resumen materializado de
+stock) y un GROUP BY por punto de venta. El resultado se cachea: se
+invalida con los espacios de los que depende y, como los contadores de
+movimientos recientes cambian con el paso del tiempo, vence a los
+PANEL_TTL segundos.
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from cache import cache
+from models import (
+    InventarioLibro, InventarioPV, Libro, MateriaPrima, MovimientoLibro, MovimientoPV, PuntoVenta, ResumenStockLibro,
+    ResumenStockPV, Usuario,
+)
+
+PANEL_TTL = float(os.getenv("PANEL_TTL", "30"))
+DEPENDE_DE = ("stock", "libros", "puntos_venta", "usuarios", "materias_primas")
+
+
+def _contar(modelo, *condiciones):
+    return select(func.count()).select_from(modelo).where(*condiciones).scalar_subquery()
+
+
+def _sumar(columna):
+    return select(func.coalesce(func.sum(columna), 0)).scalar_subquery()
+
+
+def calcular(db: Session, horas: int) -> dict:
+    desde = datetime.now() - timedelta(hours=horas)
+    totales = db.execute(select(
+        _contar(PuntoVenta).label("puntos_venta"),
+        _contar(Usuario).label("usuarios"),
+        _contar(Libro).label("libros"),
+        _sumar(ResumenStockLibro.stock_global).label("stock_almacen"),
+        _sumar(ResumenStockPV.stock).label("stock_puntos_venta"),
+        _contar(InventarioLibro, InventarioLibro.bajo_minimo == True).label("bajo_minimo_almacen"),
+        _contar(InventarioPV, InventarioPV.bajo_minimo == True).label("bajo_minimo_puntos_venta"),
+        _contar(MateriaPrima, MateriaPrima.bajo_minimo == True).label("bajo_minimo_materias_primas"),
+        _contar(MovimientoLibro, MovimientoLibro.fecha_movimiento >= desde).label("movimientos_almacen"),
+        _contar(MovimientoPV, MovimientoPV.fecha_movimiento >= desde).label("movimientos_puntos_venta"),
+    )).one()
+
+    # Valor del stock por punto de venta (el precio no está en el resumen materializado)
+    valores = (
+        select(
+            InventarioPV.id_punto_venta,
+            func.coalesce(func.sum(func.coalesce(Libro.precio, 0) * func.coalesce(InventarioPV.stock, 0)), 0)
+            .label("valor"),
+        )
+        .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+        .group_by(InventarioPV.id_punto_venta)
+        .subquery()
+    )
+    puntos = db.execute(
+        select(
+            PuntoVenta.id_punto_venta.label("punto_venta_id"),
+            PuntoVenta.nombre,
+            func.coalesce(ResumenStockPV.stock, 0).label("stock"),
+            func.coalesce(valores.c.valor, 0).label("valor"),
+            func.coalesce(ResumenStockPV.filas_bajo_minimo, 0).label("filas_bajo_minimo"),
+        )
+        .outerjoin(ResumenStockPV, ResumenStockPV.punto_venta_id == PuntoVenta.id_punto_venta)
+        .outerjoin(valores, valores.c.id_punto_venta == PuntoVenta.id_punto_venta)
+        .order_by(PuntoVenta.nombre)
+    ).all()
+
+    return {
+        "generado_en": datetime.now().replace(microsecond=0),
+        "puntos_venta": totales.puntos_venta,
+        "usuarios": totales.usuarios,
+        "libros": totales.libros,
+        "stock_almacen": int(totales.stock_almacen),
+        "stock_puntos_venta": int(totales.stock_puntos_venta),
+        "valor_puntos_venta": sum(int(p.valor) for p in puntos),
+        "bajo_minimo": {
+            "almacen": totales.bajo_minimo_almacen,
+            "punto_venta": totales.bajo_minimo_puntos_venta,
+            "materia_prima": totales.bajo_minimo_materias_primas,
+        },
+        "movimientos_recientes": {
+            "horas": horas,
+            "almacen": totales.movimientos_almacen,
+            "punto_venta": totales.movimientos_puntos_venta,
+        },
+        "por_punto_venta": [
+            {
+                "punto_venta_id": p.punto_venta_id,
+                "nombre": p.nombre,
+                "stock": int(p.stock),
+                "valor": int(p.valor),
+                "filas_bajo_minimo": int(p.filas_bajo_minimo),
+            }
+            for p in puntos
+        ],
+    }
+
+
+def resumen(db: Session, horas: int = 24) -> dict:
+    return cache.obtener_o_cargar(
+        "panel", ("resumen", horas), lambda: calcular(db, horas), depende_de=DEPENDE_DE, ttl=PANEL_TTL
+    )
@@ -0,0 +1,314 @@
+"""
+Resumen materializado de stock.
+
+Mantiene dos tablas con totales precalculados:
+- `resumen_stock_libros`: stock global, stock en puntos de venta y cantidad de
+  filas bajo mínimo de cada libro.
+- `resumen_stock_pv`: stock total y filas bajo mínimo de cada punto de venta.
+
+Cada endpoint que modifica stock registra sus cambios con `CambiosResumen` (o
+los atajos `registrar_global` / `registrar_pv`) antes del commit, así el
+resumen se actualiza en la misma transacción. Los cambios se aplican como
+UPDATE incrementales (`x = x + delta`), uno por libro / punto de venta y en
+orden de clave, sin leer el valor anterior. Las filas que cruzan su stock
+mínimo se anotan además en el feed de alertas (`alertas_stock`).
+
+Si una fila del resumen no existe (datos previos a la tabla) se recalcula
+desde el inventario. Para detectar o corregir desvíos:
+
+    python -m resumen_stock verificar      # código 1 si hay diferencias
+    python -m resumen_stock reconstruir
+"""
+import argparse
+import sys
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from alertas_stock import bajo_minimo, registrar_cruce
+from models import InventarioLibro, InventarioPV, Libro, PuntoVenta, ResumenStockLibro, ResumenStockPV
+
+
+# ============================================================
+# REGISTRO DE CAMBIOS
+# ============================================================
+class CambiosResumen:
+    """Acumula deltas por libro y por punto de venta y los aplica juntos."""
+
+    def __init__(self):
+        # libro_id -> [stock_global, stock_pv, filas_bajo_minimo]
+        self.libros = defaultdict(lambda: [0, 0, 0])
+        # punto_venta_id -> [stock, filas_bajo_minimo]
+        self.puntos = defaultdict(lambda: [0, 0])
+        # Argumentos de registrar_cruce para las filas que cruzan su mínimo
+        self.cruces: list[tuple] = []
+
+    def global_(self, libro_id: int, stock_antes: int, stock_despues: int, stock_minimo: Optional[int] = None) -> None:
+        """Cambio de la fila de inventario central del libro."""
+        self.libros[libro_id][0] += stock_despues - stock_antes
+        self.cruces.append((
+            "almacen", bajo_minimo(stock_antes, stock_minimo), bajo_minimo(stock_despues, stock_minimo),
+            stock_despues, stock_minimo, {"libro_id": libro_id},
+        ))
+
+    def pv(
+        self,
+        libro_id: int,
+        punto_venta_id: int,
+        stock_antes: Optional[int],
+        stock_despues: Optional[int],
+        stock_minimo: Optional[int],
+    ) -> None:
+        """
+        Cambio de una fila de inventario_pv. `stock_antes=None` indica una
+        fila nueva y `stock_despues=None` una fila eliminada.
+        """
+        existia, existe = stock_antes is not None, stock_despues is not None
+        delta = (stock_despues or 0) - (stock_antes or 0)
+        bajo_antes = existia and bajo_minimo(stock_antes, stock_minimo)
+        bajo_despues = existe and bajo_minimo(stock_despues, stock_minimo)
+        delta_bajo = int(bajo_despues) - int(bajo_antes)
+        self.libros[libro_id][1] += delta
+        self.libros[libro_id][2] += delta_bajo
+        self.puntos[punto_venta_id][0] += delta
+        self.puntos[punto_venta_id][1] += delta_bajo
+        self.cruces.append((
+            "punto_venta", bajo_antes, bajo_despues, stock_despues, stock_minimo,
+            {"libro_id": libro_id, "punto_venta_id": punto_venta_id},
+        ))
+
+    def aplicar(self, db: Session) -> None:
+        # Las sesiones no hacen autoflush: el inventario modificado por ORM debe
+        # estar escrito antes de un eventual recálculo de la fila faltante
+        db.flush()
+        # Orden fijo de claves: dos transacciones bloquean las filas en el mismo orden
+        for libro_id in sorted(self.libros):
+            stock_global, stock_pv, filas = self.libros[libro_id]
+            if not (stock_global or stock_pv or filas):
+                continue
+            _actualizar_o_crear(
+                db,
+                update(ResumenStockLibro)
+                .where(ResumenStockLibro.libro_id == libro_id)
+                .values(
+                    stock_global=ResumenStockLibro.stock_global + stock_global,
+                    stock_pv=ResumenStockLibro.stock_pv + stock_pv,
+                    filas_bajo_minimo=ResumenStockLibro.filas_bajo_minimo + filas,
+                ),
+                consulta_libros().where(Libro.id_libro == libro_id),
+                ResumenStockLibro,
+            )
+
+        for pv_id in sorted(self.puntos):
+            stock, filas = self.puntos[pv_id]
+            if not (stock or filas):
+                continue
+            _actualizar_o_crear(
+                db,
+                update(ResumenStockPV)
+                .where(ResumenStockPV.punto_venta_id == pv_id)
+                .values(
+                    stock=ResumenStockPV.stock + stock,
+                    filas_bajo_minimo=ResumenStockPV.filas_bajo_minimo + filas,
+                ),
+                consulta_puntos_venta().where(PuntoVenta.id_punto_venta == pv_id),
+                ResumenStockPV,
+            )
+
+        for origen, antes, despues, stock, minimo, ids in self.cruces:
+            registrar_cruce(db, origen, antes, despues, stock, minimo, **ids)
+
+        self.libros.clear()
+        self.puntos.clear()
+        self.cruces.clear()
+
+
+def _actualizar_o_crear(db: Session, sentencia, consulta, modelo) -> None:
+    sentencia = sentencia.execution_options(synchronize_session=False)
+    if db.execute(sentencia).rowcount:
+        return
+    # Fila faltante: se crea recalculada (ya incluye el cambio, que está flusheado)
+    try:
+        with db.begin_nested():
+            _insertar_recalculado(db, consulta, modelo)
+    except IntegrityError:
+        # Otra transacción la creó primero sin ver este cambio: se suma encima
+        db.execute(sentencia)
+
+
+def registrar_global(db: Session, libro_id: int, stock_antes: int, stock_despues: int, stock_minimo=None) -> None:
+    cambios = CambiosResumen()
+    cambios.global_(libro_id, stock_antes, stock_despues, stock_minimo)
+    cambios.aplicar(db)
+
+
+def registrar_pv(db: Session, libro_id: int, punto_venta_id: int, stock_antes, stock_despues, stock_minimo) -> None:
+    cambios = CambiosResumen()
+    cambios.pv(libro_id, punto_venta_id, stock_antes, stock_despues, stock_minimo)
+    cambios.aplicar(db)
+
+
+def crear_resumen_libro(db: Session, libro_id: int, stock_global: int = 0) -> None:
+    db.add(ResumenStockLibro(libro_id=libro_id, stock_global=stock_global, stock_pv=0, filas_bajo_minimo=0))
+
+
+def crear_resumen_pv(db: Session, punto_venta_id: int) -> None:
+    db.add(ResumenStockPV(punto_venta_id=punto_venta_id, stock=0, filas_bajo_minimo=0))
+
+
+def _quitar_filas_pv(db: Session, condicion) -> None:
+    cambios = CambiosResumen()
+    filas = db.execute(
+        select(InventarioPV.id_libro, InventarioPV.id_punto_venta, InventarioPV.stock, InventarioPV.stock_minimo)
+        .where(condicion)
+    ).all()
+    for f in filas:
+        cambios.pv(f.id_libro, f.id_punto_venta, f.stock or 0, None, f.stock_minimo)
+    cambios.aplicar(db)
+
+
+def quitar_libro(db: Session, libro_id: int) -> None:
+    """Descuenta el stock del libro de cada punto de venta y borra su resumen."""
+    _quitar_filas_pv(db, InventarioPV.id_libro == libro_id)
+    db.execute(delete(ResumenStockLibro).where(ResumenStockLibro.libro_id == libro_id))
+
+
+def quitar_punto_venta(db: Session, punto_venta_id: int) -> None:
+    """Descuenta el stock del punto de venta de cada libro y borra su resumen."""
+    _quitar_filas_pv(db, InventarioPV.id_punto_venta == punto_venta_id)
+    db.execute(delete(ResumenStockPV).where(ResumenStockPV.punto_venta_id == punto_venta_id))
+
+
+# ============================================================
+# RECÁLCULO DESDE EL INVENTARIO
+# ============================================================
+_FILA_BAJO_MINIMO = case(
+    (and_(InventarioPV.stock_minimo.isnot(None), func.coalesce(InventarioPV.stock, 0) < InventarioPV.stock_minimo), 1),
+    else_=0,
+)
+
+
+def consulta_libros():
+    """Valores esperados de `resumen_stock_libros`, calculados desde el inventario."""
+    stock_global = (
+        select(InventarioLibro.libro_id.label("libro_id"), func.sum(InventarioLibro.stock).label("stock"))
+        .group_by(InventarioLibro.libro_id)
+        .subquery()
+    )
+    stock_pv = (
+        select(
+            InventarioPV.id_libro.label("libro_id"),
+            func.sum(func.coalesce(InventarioPV.stock, 0)).label("stock"),
+            func.sum(_FILA_BAJO_MINIMO).label("filas"),
+        )
+        .group_by(InventarioPV.id_libro)
+        .subquery()
+    )
+    return (
+        select(
+            Libro.id_libro.label("libro_id"),
+            func.coalesce(stock_global.c.stock, 0).label("stock_global"),
+            func.coalesce(stock_pv.c.stock, 0).label("stock_pv"),
+            func.coalesce(stock_pv.c.filas, 0).label("filas_bajo_minimo"),
+        )
+        .outerjoin(stock_global, stock_global.c.libro_id == Libro.id_libro)
+        .outerjoin(stock_pv, stock_pv.c.libro_id == Libro.id_libro)
+    )
+
+
+def consulta_puntos_venta():
+    """Valores esperados de `resumen_stock_pv`, calculados desde el inventario."""
+    stock_pv = (
+        select(
+            InventarioPV.id_punto_venta.label("punto_venta_id"),
+            func.sum(func.coalesce(InventarioPV.stock, 0)).label("stock"),
+            func.sum(_FILA_BAJO_MINIMO).label("filas"),
+        )
+        .group_by(InventarioPV.id_punto_venta)
+        .subquery()
+    )
+    return (
+        select(
+            PuntoVenta.id_punto_venta.label("punto_venta_id"),
+            func.coalesce(stock_pv.c.stock, 0).label("stock"),
+            func.coalesce(stock_pv.c.filas, 0).label("filas_bajo_minimo"),
+        )
+        .outerjoin(stock_pv, stock_pv.c.punto_venta_id == PuntoVenta.id_punto_venta)
+    )
+
+
+def _insertar_recalculado(db: Session, consulta, modelo) -> None:
+    filas = [dict(f._mapping) for f in db.execute(consulta)]
+    if filas:
+        db.execute(insert(modelo), filas)
+
+
+# ============================================================
+# VERIFICAR / RECONSTRUIR
+# ============================================================
+_TABLAS = (
+    (ResumenStockLibro, "libro_id", consulta_libros, ("stock_global", "stock_pv", "filas_bajo_minimo")),
+    (ResumenStockPV, "punto_venta_id", consulta_puntos_venta, ("stock", "filas_bajo_minimo")),
+)
+
+
+def verificar(db: Session) -> list[dict]:
+    """Compara el resumen con el inventario y devuelve las diferencias."""
+    diferencias = []
+    for modelo, clave, consulta, columnas in _TABLAS:
+        esperado = {getattr(f, clave): f for f in db.execute(consulta())}
+        actual = {getattr(f, clave): f for f in db.scalars(select(modelo))}
+        for id_ in sorted(esperado.keys() | actual.keys()):
+            e, a = esperado.get(id_), actual.get(id_)
+            valores_e = {c: int(getattr(e, c)) for c in columnas} if e is not None else None
+            valores_a = {c: getattr(a, c) for c in columnas} if a is not None else None
+            if valores_e != valores_a:
+                diferencias.append({
+                    "tabla": modelo.__tablename__, "id": id_, "esperado": valores_e, "actual": valores_a
+                })
+    return diferencias
+
+
+def poblar(db: Session) -> None:
+    """Recalcula ambas tablas de resumen desde el inventario, sin hacer commit."""
+    for modelo, _, consulta, _ in _TABLAS:
+        db.execute(delete(modelo))
+        _insertar_recalculado(db, consulta(), modelo)
+
+
+def reconstruir(db: Session) -> None:
+    """Reemplaza el contenido de ambas tablas de resumen (en una transacción)."""
+    poblar(db)
+    db.commit()
+
+
+def main() -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accion", choices=["verificar", "reconstruir"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.accion == "reconstruir":
+            reconstruir(db)
+            print("Resumen de stock reconstruido")
+            return
+        diferencias = verificar(db)
+    finally:
+        db.close()
+
+    for d in diferencias:
+        print(f"{d['tabla']} id={d['id']}: esperado={d['esperado']} actual={d['actual']}")
+    if diferencias:
+        print(f"{len(diferencias)} diferencia(s) encontradas; corregir con: python -m resumen_stock reconstruir")
+        sys.exit(1)
+    print("Resumen de stock consistente")
+
+
+if __name__ == "__main__":
+    main()
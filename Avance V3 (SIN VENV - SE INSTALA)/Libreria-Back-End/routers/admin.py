@@ -0,0 +1,29 @@
+"""
+Router de administración / operación.
+
+Expone:
+- El estado del pool de conexiones para dimensionar los workers contra
+  `max_connections` de MySQL (conexiones prestadas, disponibles y en
+  overflow, checkouts, timeouts e histograma del tiempo de espera).
+- Los contadores de aciertos/fallos del caché de lectura.
+"""
+from fastapi import APIRouter
+
+import database
+from cache import cache
+from metricas_pool import estado_pool
+
+router = APIRouter(prefix="/admin", tags=["Administración"])
+
+
+@router.get("/pool")
+def estadisticas_pool():
+    resultado = {"sync": estado_pool(database.engine.pool)}
+    if database.async_engine is not None:
+        resultado["async"] = estado_pool(database.async_engine.sync_engine.pool)
+    return resultado
+
+
+@router.get("/cache")
+def estadisticas_cache():
+    return cache.estadisticas()
@@ -0,0 +1,52 @@
+"""
+Router de alertas de stock bajo.
+
+Expone:
+- GET /alertas/stock-bajo: filas bajo su stock mínimo en almacén central,
+  puntos de venta y materias primas (filtrable por origen y punto de venta).
+- GET /alertas/eventos: feed long-poll de cruces de umbral. El cliente envía
+  el último `seq` recibido y la petición queda abierta hasta que llega un
+  evento o vence `espera`. Si `reiniciar` es true el cliente perdió eventos
+  (o el servidor se reinició) y debe recargar las alertas completas.
+
+La lógica vive en `alertas_stock.py`.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from alertas_stock import ORIGENES, alertas, bus
+from condicional import condicional
+from database import get_db
+from schemas import AlertaStockOut, EventosAlertaOut
+
+router = APIRouter(prefix="/alertas", tags=["Alertas"])
+
+# Tope de la espera del long-poll (segundos)
+ESPERA_MAXIMA = 60
+
+
+@router.get("/stock-bajo", response_model=List[AlertaStockOut],
+            dependencies=[Depends(condicional("stock", "libros", "puntos_venta", "materias_primas"))])
+def listar_alertas(
+    origen: Optional[List[str]] = Query(None, description="almacen, punto_venta y/o materia_prima"),
+    punto_venta_id: Optional[int] = Query(None, description="Solo alertas de ese punto de venta"),
+    db: Session = Depends(get_db)
+):
+    return alertas(db, [o for o in origen if o in ORIGENES] if origen else ORIGENES, punto_venta_id)
+
+
+@router.get("/eventos", response_model=EventosAlertaOut)
+async def eventos_alertas(
+    desde: Optional[int] = Query(None, ge=0, description="Último seq recibido; sin él solo devuelve el actual"),
+    espera: float = Query(25, ge=0, le=ESPERA_MAXIMA, description="Segundos a esperar si no hay eventos"),
+    punto_venta_id: Optional[int] = Query(None),
+):
+    if desde is None:
+        return {"ultimo": bus.ultimo, "reiniciar": False, "eventos": []}
+
+    # Con punto de venta, los eventos de otros no cortan la espera
+    filtro = None if punto_venta_id is None else (lambda e: e.get("punto_venta_id") == punto_venta_id)
+    eventos, reiniciar, ultimo = await bus.esperar(desde, espera, filtro)
+    return {"ultimo": ultimo, "reiniciar": reiniciar, "eventos": eventos}
@@ -0,0 +1,83 @@
+"""
+Router de analítica de movimientos.
+
+Expone series de tiempo (GET /analitica/serie) y rankings
+(GET /analitica/top) calculados sobre los rollups por hora y por día de
+`analitica.py`, nunca sobre las tablas de movimientos: el costo depende del
+rango pedido, no del tamaño de la historia. Las respuestas indican en
+`datos_hasta` hasta cuándo está compactado el rollup.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+import analitica
+from database import get_db
+from schemas import SerieOut, TopOut
+from sesiones import Sesion, sesion_actual, solo_admin
+
+router = APIRouter(prefix="/analitica", tags=["Analítica"])
+
+ORIGENES = "^(almacen|punto_venta|materia_prima)$"
+TIPOS = "^(venta|entrada|salida|ajuste)$"
+RANGO_POR_DEFECTO = {"hora": timedelta(days=2), "dia": timedelta(days=30)}
+PERIODO = {"hora": timedelta(hours=1), "dia": timedelta(days=1)}
+
+
+def _rango(granularidad: str, desde: Optional[datetime], hasta: Optional[datetime]) -> tuple[datetime, datetime]:
+    hasta = hasta or datetime.now()
+    desde = desde or hasta - RANGO_POR_DEFECTO[granularidad]
+    if desde >= hasta:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior a 'hasta'")
+    if (hasta - desde) / PERIODO[granularidad] > analitica.MAX_PUNTOS[granularidad]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rango demasiado largo: máximo {analitica.MAX_PUNTOS[granularidad]} períodos por {granularidad}",
+        )
+    return desde, hasta
+
+
+@router.get("/serie", response_model=SerieOut)
+def serie(
+    granularidad: str = Query("dia", pattern="^(hora|dia)$"),
+    desde: Optional[datetime] = Query(None, description="Fecha inicial (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha final (exclusiva); por defecto ahora"),
+    origen: Optional[str] = Query(None, pattern=ORIGENES),
+    tipo: Optional[str] = Query(None, pattern=TIPOS),
+    libro_id: Optional[int] = Query(None),
+    mp_id: Optional[int] = Query(None),
+    punto_venta_id: Optional[int] = Query(None),
+    usuario_id: Optional[int] = Query(None),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    solo_admin(sesion)
+    desde, hasta = _rango(granularidad, desde, hasta)
+    puntos = analitica.serie(
+        db, granularidad, desde, hasta,
+        origen=origen, tipo=tipo, libro_id=libro_id, mp_id=mp_id,
+        punto_venta_id=punto_venta_id, usuario_id=usuario_id,
+    )
+    return {"granularidad": granularidad, "datos_hasta": analitica.datos_hasta(db), "puntos": puntos}
+
+
+@router.get("/top", response_model=TopOut)
+def top(
+    dimension: str = Query("libro", pattern="^(libro|punto_venta|usuario|materia_prima)$"),
+    desde: Optional[datetime] = Query(None, description="Fecha inicial (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha final (exclusiva); por defecto ahora"),
+    limite: int = Query(10, ge=1, le=100),
+    origen: Optional[str] = Query(None, pattern=ORIGENES),
+    tipo: Optional[str] = Query("venta", pattern=TIPOS),
+    punto_venta_id: Optional[int] = Query(None),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    solo_admin(sesion)
+    desde, hasta = _rango("dia", desde, hasta)
+    items = analitica.top(
+        db, dimension, desde, hasta, limite=limite, origen=origen, tipo=tipo, punto_venta_id=punto_venta_id
+    )
+    return {"dimension": dimension, "datos_hasta": analitica.datos_hasta(db), "items": items}
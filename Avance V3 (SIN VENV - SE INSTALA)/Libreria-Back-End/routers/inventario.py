@@ -3,25 +3,77 @@ Router de inventario de libros.
 
 Expone endpoints para:
 - Crear inventario para un libro específico.
-- Listar inventario de todos los libros (con filtro opcional por nombre).
+- Listar inventario de todos los libros (con búsqueda opcional, ver busqueda.py).
 - Obtener el stock de un libro concreto.
 - Ajustar el stock (sumar/restar).
 - Fijar el stock a un valor absoluto.
+- Ajustar el stock de muchos libros en una sola transacción.
+- Fijar el stock mínimo del inventario central (umbral de alerta).
+- Consultar las filas bajo stock mínimo (ver alertas_stock.py) y los totales
+  por punto de venta (desde el resumen materializado, ver resumen_stock.py).
 
 Este router se monta con el prefijo `/inventario` y la etiqueta "Inventario".
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List, Optional
 from database import get_db
-from models import InventarioLibro, Libro
-from schemas import InventarioOut, AjusteStock, FijarStock
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from models import InventarioLibro, Libro, ResumenStockPV
+from schemas import (
+    InventarioOut, AjusteStock, FijarStock, FijarMinimo, AjusteLoteItem, AjusteLoteResultado, StockBajoOut,
+    ResumenPVOut
+)
+from resumen_stock import registrar_global
+from busqueda import ids_de_pagina, indice_libros
+from alertas_stock import bajo_minimo, consulta_puntos_venta, registrar_cruce
+from ajustes_lote import ajustar_en_lote
+from cache import cache
+from condicional import condicional
+from sesiones import Sesion, alcance_punto_venta, permitir_punto_venta, sesion_actual
 
 # Router de inventario
 router = APIRouter(prefix="/inventario", tags=["Inventario"])
 
+# Ajustar el stock de varios libros en lote (¡antes de las rutas /{libro_id}!)
+@router.post("/ajustar-lote", response_model=List[AjusteLoteResultado])
+def ajustar_stock_lote(payload: List[AjusteLoteItem], db: Session = Depends(get_db)):
+    """
+    Ajusta el inventario global de varios libros (`id` = libro_id) en una sola
+    transacción. Si algún ajuste falla no se aplica ninguno.
+    """
+    return ajustar_en_lote(db, InventarioLibro.libro_id, payload)
+
+# Filas de inventario PV bajo su mínimo (¡antes de las rutas /{libro_id}!)
+@router.get("/stock-bajo", response_model=List[StockBajoOut],
+            dependencies=[Depends(condicional("stock", "libros", "puntos_venta", por_sesion=True))])
+def inventario_stock_bajo(
+    punto_venta_id: Optional[int] = Query(None, description="Solo ese punto de venta"),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    """
+    Devuelve las filas de inventario por punto de venta cuyo stock es menor
+    al stock mínimo configurado (índice sobre la columna `bajo_minimo`); un
+    vendedor solo ve las de su punto de venta.
+    Para todos los orígenes (almacén, materias primas) ver /alertas/stock-bajo.
+    """
+    if punto_venta_id is not None:
+        permitir_punto_venta(sesion, punto_venta_id)
+    alcance = alcance_punto_venta(sesion)
+    filas = db.execute(consulta_puntos_venta(punto_venta_id if alcance is None else alcance)).all()
+    return [
+        {"libro": f.nombre, "punto_venta": f.punto_venta, "stock": f.stock, "stock_minimo": f.stock_minimo}
+        for f in filas
+    ]
+
+# Totales de stock por punto de venta (lectura directa del resumen)
+@router.get("/resumen-pv", response_model=List[ResumenPVOut], dependencies=[Depends(condicional("stock"))])
+def resumen_por_punto_venta(db: Session = Depends(get_db)):
+    return db.scalars(select(ResumenStockPV).order_by(ResumenStockPV.punto_venta_id)).all()
+
 # Crear inventario para un libro específico
 @router.post("/{libro_id}", response_model=InventarioOut, status_code=status.HTTP_201_CREATED)
 def crear_inventario_para_libro(libro_id: int, db: Session = Depends(get_db)):
@@ -35,21 +87,38 @@ def crear_inventario_para_libro(libro_id: int, db: Session = Depends(get_db)):
     db.add(inv)
     db.commit()
     db.refresh(inv)
+    cache.invalidar("stock")
     return inv
 
 # Listar inventario de todos los libros
-@router.get("/", response_model=List[InventarioOut])
+@router.get("/", response_model=List[InventarioOut], dependencies=[Depends(condicional("stock", "libros"))])
 def listar_inventario(
-    q: Optional[str] = Query(None, description="Filtra por nombre de libro"),
+    response: Response,
+    q: Optional[str] = Query(None, description="Filtra por nombre, categoría o descripción del libro"),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
     db: Session = Depends(get_db)
 ):
-    query = db.query(InventarioLibro).join(Libro, InventarioLibro.libro_id == Libro.id_libro)
+    query = (
+        db.query(InventarioLibro, Libro.nombre)
+        .join(Libro, InventarioLibro.libro_id == Libro.id_libro)
+    )
     if q:
-        query = query.filter(Libro.nombre.ilike(f"%{q}%"))
-    return query.order_by(Libro.nombre.asc()).all()
+        # Con búsqueda el orden es por libro (una fila de inventario por
+        # libro), así el IN (...) lleva solo los ids de la página
+        indice_libros.asegurar(db)
+        ids = ids_de_pagina(indice_libros.coincidencias(q), InventarioLibro.libro_id, pagina)
+        query = query.filter(InventarioLibro.libro_id.in_(ids))
+        orden, clave_de = [InventarioLibro.libro_id], lambda f: (f.InventarioLibro.libro_id,)
+    else:
+        # Orden por nombre, desempatando por id para que el cursor sea estable
+        orden = [Libro.nombre, InventarioLibro.id_inventario]
+        clave_de = lambda f: (f.nombre, f.InventarioLibro.id_inventario)
+
+    filas = paginar(db, query, orden, pagina, response, clave_de=clave_de)
+    return [f.InventarioLibro for f in filas]
 
 # Obtener el stock de un libro concreto
-@router.get("/{libro_id}", response_model=InventarioOut)
+@router.get("/{libro_id}", response_model=InventarioOut, dependencies=[Depends(condicional("stock"))])
 def obtener_stock(libro_id: int, db: Session = Depends(get_db)):
     inv = db.query(InventarioLibro).filter_by(libro_id=libro_id).first()
     if not inv:
@@ -66,9 +135,13 @@ def ajustar_stock(libro_id: int, payload: AjusteStock, db: Session = Depends(get
     nuevo = inv.stock + payload.delta
     if nuevo < 0:
         raise HTTPException(status_code=400, detail="El ajuste dejaría stock negativo")
+    # Primero el inventario: si falta la fila del resumen se recalcula desde él
+    antes = inv.stock
     inv.stock = nuevo
+    registrar_global(db, libro_id, antes, nuevo, inv.stock_minimo)
     db.commit()
     db.refresh(inv)
+    cache.invalidar("stock")
     return inv
 
 # Fijar el stock a un valor absoluto
@@ -77,34 +150,27 @@ def fijar_stock(libro_id: int, payload: FijarStock, db: Session = Depends(get_db
     inv = db.query(InventarioLibro).with_for_update().filter_by(libro_id=libro_id).first()
     if not inv:
         raise HTTPException(status_code=404, detail="Inventario no encontrado")
+    antes = inv.stock
     inv.stock = payload.stock
+    registrar_global(db, libro_id, antes, payload.stock, inv.stock_minimo)
     db.commit()
     db.refresh(inv)
+    cache.invalidar("stock")
     return inv
 
-@router.get("/stock-bajo")
-def inventario_stock_bajo(db: Session = Depends(get_db)):
-    """
-    Devuelve libros cuyo stock actual es menor al stock mínimo configurado.
-    """
-    resultados = (
-        db.query(
-            Libro.nombre.label("libro"),
-            InventarioLibro.stock,
-            Libro.stock_minimo
-        )
-        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
-        .filter(InventarioLibro.stock < Libro.stock_minimo)
-        .all()
+# Fijar el stock mínimo (umbral de alerta) del inventario central
+@router.put("/{libro_id}/minimo", response_model=InventarioOut)
+def fijar_stock_minimo(libro_id: int, payload: FijarMinimo, db: Session = Depends(get_db)):
+    inv = db.query(InventarioLibro).with_for_update().filter_by(libro_id=libro_id).first()
+    if not inv:
+        raise HTTPException(status_code=404, detail="Inventario no encontrado")
+    registrar_cruce(
+        db, "almacen", bajo_minimo(inv.stock, inv.stock_minimo), bajo_minimo(inv.stock, payload.stock_minimo),
+        inv.stock, payload.stock_minimo, libro_id=libro_id
     )
-
-    resp = []
-    for row in resultados:
-        resp.append({
-            "libro": row.libro,
-            "stock": row.stock,
-            "stock_minimo": row.stock_minimo
-        })
-
-    return resp
+    inv.stock_minimo = payload.stock_minimo
+    db.commit()
+    db.refresh(inv)
+    cache.invalidar("stock")
+    return inv
 
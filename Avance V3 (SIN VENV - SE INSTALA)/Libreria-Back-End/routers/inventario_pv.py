@@ -1,63 +1,194 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from database import get_db
-from models import InventarioPV, Libro, PuntoVenta
-from schemas import InventarioPVCreate, InventarioPVAjuste, InventarioPVOut
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from models import InventarioPV, Libro, PuntoVenta, MovimientoPV, TipoMovimiento
+from schemas import (
+    InventarioPVCreate, InventarioPVAjuste, InventarioPVOut, AjusteLoteItem, AjusteLoteResultado, VentaPV
+)
+from ajustes_lote import ajustar_en_lote
+from busqueda import ids_de_pagina, indice_libros
+from cache import cache
+from condicional import condicional
+from resumen_stock import registrar_pv
+from sesiones import Sesion, alcance_punto_venta, permitir_punto_venta, sesion_actual, solo_admin
+from transferencias import es_contencion
 
 router = APIRouter(prefix="/inventario-pv", tags=["Inventario por Punto de Venta"])
 
 
-@router.get("/", response_model=list[InventarioPVOut])
-def listar(db: Session = Depends(get_db)):
-    registros = db.query(InventarioPV).all()
-
-    return [
-        InventarioPVOut(
-            id_inventario=r.id_inventario,
-            id_libro=r.id_libro,
-            id_punto_venta=r.id_punto_venta,
-            stock=r.stock,
-            stock_minimo=r.stock_minimo,
-            libro=r.libro.nombre,
-            precio=float(r.libro.precio),   # 👈 añadido
-            punto_venta=r.punto_venta.nombre
+# ----------- CONSULTA Y MAPEO COMPARTIDOS -----------
+
+def consulta_inventario_pv():
+    """
+    SELECT de solo columnas con el inventario, el nombre/precio del libro y el
+    nombre del punto de venta ya unidos: una sentencia por petición, cualquiera
+    sea el tamaño de la página, sin cargar entidades ORM ni catálogos enteros.
+    """
+    return (
+        select(
+            InventarioPV.id_inventario,
+            InventarioPV.id_libro,
+            InventarioPV.id_punto_venta,
+            InventarioPV.stock,
+            InventarioPV.stock_minimo,
+            Libro.nombre.label("libro"),
+            Libro.precio,
+            PuntoVenta.nombre.label("punto_venta"),
         )
-        for r in registros
-    ]
+        .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+        .join(PuntoVenta, PuntoVenta.id_punto_venta == InventarioPV.id_punto_venta)
+    )
+
+
+def consulta_con_alcance(sesion: Optional[Sesion]):
+    """`consulta_inventario_pv` limitada al punto de venta de un vendedor."""
+    stmt = consulta_inventario_pv()
+    punto_venta_id = alcance_punto_venta(sesion)
+    if punto_venta_id is not None:
+        stmt = stmt.where(InventarioPV.id_punto_venta == punto_venta_id)
+    return stmt
+
+
+def a_salida(fila) -> dict:
+    # Dict plano: FastAPI lo valida una sola vez contra InventarioPVOut
+    return {
+        "id_inventario": fila.id_inventario,
+        "id_libro": fila.id_libro,
+        "id_punto_venta": fila.id_punto_venta,
+        "stock": fila.stock,
+        "stock_minimo": fila.stock_minimo,
+        "libro": fila.libro,
+        "precio": float(fila.precio) if fila.precio is not None else None,
+        "punto_venta": fila.punto_venta,
+    }
+
+
+def filtrar_por_busqueda(db: Session, stmt, pv_id: int, q: str, pagina: ParametrosPagina):
+    """
+    Cruza las coincidencias del índice de libros con los inventarios del punto
+    de venta (solo ids) y recorta el `IN (...)` a la página pedida.
+    """
+    indice_libros.asegurar(db)
+    coincidencias = indice_libros.coincidencias(q)
+    inventarios = db.execute(
+        select(InventarioPV.id_inventario, InventarioPV.id_libro).where(InventarioPV.id_punto_venta == pv_id)
+    )
+    ids = ids_de_pagina(
+        {id_inventario for id_inventario, id_libro in inventarios if id_libro in coincidencias},
+        InventarioPV.id_inventario, pagina
+    )
+    return stmt.where(InventarioPV.id_inventario.in_(ids))
+
+
+def obtener_salida(db: Session, inv_id: int) -> dict:
+    fila = db.execute(consulta_inventario_pv().where(InventarioPV.id_inventario == inv_id)).one()
+    return a_salida(fila)
+
+
+def sentencia_venta(inv_id: int, cantidad: int, punto_venta_id: Optional[int] = None):
+    # UPDATE condicional: descuenta solo si alcanza el stock (y, para un
+    # vendedor, si la fila es de su punto de venta, sin una lectura previa)
+    stmt = (
+        update(InventarioPV)
+        .where(InventarioPV.id_inventario == inv_id, InventarioPV.stock >= cantidad)
+        .values(stock=InventarioPV.stock - cantidad)
+        .execution_options(synchronize_session=False)
+    )
+    if punto_venta_id is not None:
+        stmt = stmt.where(InventarioPV.id_punto_venta == punto_venta_id)
+    return stmt
+
+
+def error_venta(inv: Optional[InventarioPV], punto_venta_id: Optional[int]) -> HTTPException:
+    """Motivo por el que el UPDATE de venta no afectó ninguna fila."""
+    if not inv:
+        return HTTPException(404, "Inventario PV no existe")
+    if punto_venta_id is not None and inv.id_punto_venta != punto_venta_id:
+        return HTTPException(403, "Sin permiso sobre este punto de venta")
+    return HTTPException(400, "Stock insuficiente")
+
+
+def registrar_venta(db: Session, fila, cantidad: int) -> None:
+    """Registra en el resumen una venta ya descontada (`fila` = estado posterior)."""
+    registrar_pv(db, fila.id_libro, fila.id_punto_venta, fila.stock + cantidad, fila.stock, fila.stock_minimo)
+
+
+def movimiento_venta(inv_id: int, payload: VentaPV, sesion: Optional[Sesion] = None) -> MovimientoPV:
+    return MovimientoPV(
+        inventario_pv_id=inv_id,
+        tipo=TipoMovimiento.venta,
+        cantidad=payload.cantidad,
+        # Con sesión, el vendedor es el del token y no el que diga el cuerpo
+        usuario_id=sesion.usuario_id if sesion else payload.usuario_id,
+        observaciones=payload.observaciones
+    )
+
+
+# ----------- ENDPOINTS -----------
+
+@router.get("/", response_model=list[InventarioPVOut], dependencies=[Depends(condicional("stock", "libros", "puntos_venta", por_sesion=True))])
+def listar(
+    response: Response,
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    filas = paginar(db, consulta_con_alcance(sesion), [InventarioPV.id_inventario], pagina, response,
+                    clave_de=lambda f: (f.id_inventario,))
+    return [a_salida(f) for f in filas]
 
 
 
 @router.post("/", response_model=InventarioPVOut)
-def crear(payload: InventarioPVCreate, db: Session = Depends(get_db)):
+def crear(payload: InventarioPVCreate, sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)):
+    permitir_punto_venta(sesion, payload.id_punto_venta)
 
-    libro = db.query(Libro).get(payload.id_libro)
-    if not libro:
-        raise HTTPException(404, "Libro no existe")
+    # Dos POST concurrentes de un (libro, pv) nuevo no encuentran la fila y el
+    # segundo INSERT choca con uk_libro_pv (en MySQL, o con el deadlock de los
+    # gap locks): se repite una vez y ya encuentra la fila para sumarle
+    try:
+        return _crear(db, payload)
+    except DBAPIError as exc:
+        db.rollback()
+        if not isinstance(exc, IntegrityError) and not es_contencion(exc):
+            raise
+    return _crear(db, payload)
 
-    pv = db.query(PuntoVenta).get(payload.id_punto_venta)
-    if not pv:
-        raise HTTPException(404, "Punto de venta no existe")
 
-    existe = (
+def _fila_bloqueada(db: Session, id_libro: int, id_punto_venta: int) -> Optional[InventarioPV]:
+    # Primera sentencia y bloqueada hasta el commit: otro POST o ajuste
+    # concurrente espera y lee el stock ya sumado, así el resumen no se desfasa
+    return (
         db.query(InventarioPV)
-        .filter_by(id_libro=payload.id_libro, id_punto_venta=payload.id_punto_venta)
+        .with_for_update()
+        .filter_by(id_libro=id_libro, id_punto_venta=id_punto_venta)
         .first()
     )
 
+
+def _crear(db: Session, payload: InventarioPVCreate) -> dict:
+    existe = _fila_bloqueada(db, payload.id_libro, payload.id_punto_venta)
+
     if existe:
+        antes = existe.stock
         existe.stock += payload.stock
+        registrar_pv(db, existe.id_libro, existe.id_punto_venta, antes, existe.stock, existe.stock_minimo)
         db.commit()
-        db.refresh(existe)
-        return InventarioPVOut(
-            id_inventario=existe.id_inventario,
-            id_libro=existe.id_libro,
-            id_punto_venta=existe.id_punto_venta,
-            stock=existe.stock,
-            stock_minimo=existe.stock_minimo,
-            libro=existe.libro.nombre,
-            precio=float(existe.libro.precio),
-            punto_venta=existe.punto_venta.nombre
-        )
+        cache.invalidar("stock")
+        return obtener_salida(db, existe.id_inventario)
+
+    libro = db.query(Libro).get(payload.id_libro)
+    if not libro:
+        raise HTTPException(404, "Libro no existe")
+
+    pv = db.query(PuntoVenta).get(payload.id_punto_venta)
+    if not pv:
+        raise HTTPException(404, "Punto de venta no existe")
 
     nuevo = InventarioPV(
         id_libro=payload.id_libro,
@@ -67,65 +198,97 @@ def crear(payload: InventarioPVCreate, db: Session = Depends(get_db)):
     )
 
     db.add(nuevo)
+    registrar_pv(db, nuevo.id_libro, nuevo.id_punto_venta, None, nuevo.stock, nuevo.stock_minimo)
     db.commit()
-    db.refresh(nuevo)
-
-    return InventarioPVOut(
-        id_inventario=nuevo.id_inventario,
-        id_libro=nuevo.id_libro,
-        id_punto_venta=nuevo.id_punto_venta,
-        stock=nuevo.stock,
-        stock_minimo=nuevo.stock_minimo,
-        libro=libro.nombre,
-        precio=float(libro.precio),
-        punto_venta=pv.nombre
-    )
+    cache.invalidar("stock")
+
+    return obtener_salida(db, nuevo.id_inventario)
 
 
 
 @router.post("/{inv_id}/ajustar", response_model=InventarioPVOut)
-def ajustar(inv_id: int, payload: InventarioPVAjuste, db: Session = Depends(get_db)):
-    inv = db.query(InventarioPV).get(inv_id)
+def ajustar(
+    inv_id: int, payload: InventarioPVAjuste,
+    sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)
+):
+    inv = db.query(InventarioPV).with_for_update().get(inv_id)
     if not inv:
         raise HTTPException(404, "Inventario PV no existe")
+    permitir_punto_venta(sesion, inv.id_punto_venta)
 
+    antes = inv.stock
     inv.stock += payload.delta
     if inv.stock < 0:
         raise HTTPException(400, "El stock no puede ser negativo")
 
+    registrar_pv(db, inv.id_libro, inv.id_punto_venta, antes, inv.stock, inv.stock_minimo)
     db.commit()
-    db.refresh(inv)
-
-    return InventarioPVOut(
-        id_inventario=inv.id_inventario,
-        id_libro=inv.id_libro,
-        id_punto_venta=inv.id_punto_venta,
-        stock=inv.stock,
-        stock_minimo=inv.stock_minimo,
-        libro=inv.libro.nombre,
-        precio=float(inv.libro.precio),   # 👈 añadido
-        punto_venta=inv.punto_venta.nombre
-    )
+    cache.invalidar("stock")
 
+    return obtener_salida(db, inv_id)
 
-@router.get("/por-pv/{pv_id}", response_model=list[InventarioPVOut])
-def listar_por_punto_venta(pv_id: int, db: Session = Depends(get_db)):
-    registros = (
-        db.query(InventarioPV)
-        .filter(InventarioPV.id_punto_venta == pv_id)
-        .all()
-    )
 
-    return [
-        InventarioPVOut(
-            id_inventario=r.id_inventario,
-            id_libro=r.id_libro,
-            id_punto_venta=r.id_punto_venta,
-            stock=r.stock,
-            stock_minimo=r.stock_minimo,
-            libro=r.libro.nombre,
-            precio=float(r.libro.precio),   # 👈 añadido
-            punto_venta=r.punto_venta.nombre
-        )
-        for r in registros
-    ]
+@router.post("/{inv_id}/vender", response_model=InventarioPVOut)
+def vender(
+    inv_id: int, payload: VentaPV,
+    sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)
+):
+    """
+    Registra una venta descontando stock con un UPDATE condicional
+    (`stock = stock - n WHERE stock >= n`): la verificación y el descuento
+    son una sola operación atómica en la BD, así dos cajas no pueden vender
+    la misma unidad. El movimiento se guarda en la misma transacción.
+    """
+    punto_venta_id = alcance_punto_venta(sesion)
+    resultado = db.execute(sentencia_venta(inv_id, payload.cantidad, punto_venta_id))
+
+    if resultado.rowcount == 0:
+        db.rollback()
+        raise error_venta(db.get(InventarioPV, inv_id), punto_venta_id)
+
+    # La fila ya quedó bloqueada por el UPDATE: se lee para el resumen y la respuesta
+    fila = db.execute(consulta_inventario_pv().where(InventarioPV.id_inventario == inv_id)).one()
+    registrar_venta(db, fila, payload.cantidad)
+    db.add(movimiento_venta(inv_id, payload, sesion))
+    try:
+        db.commit()
+    except IntegrityError:
+        # El único FK que puede fallar aquí es el del usuario
+        db.rollback()
+        raise HTTPException(400, "Usuario no existe")
+    cache.invalidar("stock")
+
+    return a_salida(fila)
+
+
+@router.post("/ajustar-lote", response_model=list[AjusteLoteResultado])
+def ajustar_lote(
+    payload: list[AjusteLoteItem],
+    sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)
+):
+    """
+    Ajusta varias filas de inventario PV (`id` = id_inventario) en una sola
+    transacción. Si algún ajuste falla no se aplica ninguno.
+    """
+    solo_admin(sesion)
+    return ajustar_en_lote(db, InventarioPV.id_inventario, payload)
+
+
+@router.get("/por-pv/{pv_id}", response_model=list[InventarioPVOut], dependencies=[Depends(condicional("stock", "libros", "puntos_venta", por_sesion=True))])
+def listar_por_punto_venta(
+    pv_id: int,
+    response: Response,
+    q: Optional[str] = Query(None, description="Filtra por nombre, categoría o descripción del libro"),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    permitir_punto_venta(sesion, pv_id)
+    stmt = consulta_inventario_pv().where(InventarioPV.id_punto_venta == pv_id)
+    if q:
+        stmt = filtrar_por_busqueda(db, stmt, pv_id, q, pagina)
+    filas = paginar(
+        db, stmt, [InventarioPV.id_inventario], pagina, response,
+        clave_de=lambda f: (f.id_inventario,)
+    )
+    return [a_salida(f) for f in filas]
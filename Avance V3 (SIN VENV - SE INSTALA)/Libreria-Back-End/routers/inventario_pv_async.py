@@ -0,0 +1,83 @@
+"""
+Versión asíncrona de las rutas calientes de inventario por punto de venta
+(modo DB_ASYNC): listados y venta.
+
+Usa las mismas sentencias que `routers.inventario_pv`; se registra antes que
+el router síncrono, que sigue atendiendo crear, ajustar y ajustar en lote.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from database import get_async_db
+from paginacion import ParametrosPagina, paginar_async, parametros_pagina
+from models import InventarioPV
+from schemas import InventarioPVOut, VentaPV
+from routers.inventario_pv import (
+    a_salida, consulta_con_alcance, consulta_inventario_pv, error_venta, filtrar_por_busqueda, movimiento_venta,
+    registrar_venta, sentencia_venta
+)
+from sesiones import Sesion, alcance_punto_venta, permitir_punto_venta, sesion_actual
+from cache import cache
+from condicional import condicional
+
+router = APIRouter(prefix="/inventario-pv", tags=["Inventario por Punto de Venta"])
+
+
+@router.get("/", response_model=list[InventarioPVOut], dependencies=[Depends(condicional("stock", "libros", "puntos_venta", por_sesion=True))])
+async def listar(
+    response: Response,
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: AsyncSession = Depends(get_async_db)
+):
+    filas = await paginar_async(db, consulta_con_alcance(sesion), [InventarioPV.id_inventario], pagina, response,
+                                clave_de=lambda f: (f.id_inventario,))
+    return [a_salida(f) for f in filas]
+
+
+@router.post("/{inv_id}/vender", response_model=InventarioPVOut)
+async def vender(
+    inv_id: int, payload: VentaPV,
+    sesion: Optional[Sesion] = Depends(sesion_actual), db: AsyncSession = Depends(get_async_db)
+):
+    punto_venta_id = alcance_punto_venta(sesion)
+    resultado = await db.execute(sentencia_venta(inv_id, payload.cantidad, punto_venta_id))
+
+    if resultado.rowcount == 0:
+        await db.rollback()
+        raise error_venta(await db.get(InventarioPV, inv_id), punto_venta_id)
+
+    fila = (await db.execute(consulta_inventario_pv().where(InventarioPV.id_inventario == inv_id))).one()
+    await db.run_sync(registrar_venta, fila, payload.cantidad)
+    db.add(movimiento_venta(inv_id, payload, sesion))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(400, "Usuario no existe")
+    cache.invalidar("stock")
+
+    return a_salida(fila)
+
+
+@router.get("/por-pv/{pv_id}", response_model=list[InventarioPVOut], dependencies=[Depends(condicional("stock", "libros", "puntos_venta", por_sesion=True))])
+async def listar_por_punto_venta(
+    pv_id: int,
+    response: Response,
+    q: Optional[str] = Query(None, description="Filtra por nombre, categoría o descripción del libro"),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: AsyncSession = Depends(get_async_db)
+):
+    permitir_punto_venta(sesion, pv_id)
+    stmt = consulta_inventario_pv().where(InventarioPV.id_punto_venta == pv_id)
+    if q:
+        stmt = await db.run_sync(filtrar_por_busqueda, stmt, pv_id, q, pagina)
+    filas = await paginar_async(
+        db, stmt, [InventarioPV.id_inventario], pagina, response,
+        clave_de=lambda f: (f.id_inventario,)
+    )
+    return [a_salida(f) for f in filas]
@@ -3,7 +3,9 @@ Router para la gestión de libros.
 
 Incluye funcionalidades para:
 - Crear libros
+- Importar libros en lote desde CSV / NDJSON (ver importacion.py)
 - Listar todos los libros (con búsqueda opcional)
+- Buscar libros por relevancia (índice en memoria, ver busqueda.py)
 - Obtener un libro por ID
 - Actualizar parcialmente un libro
 - Eliminar un libro
@@ -12,13 +14,22 @@ Cada endpoint usa modelos Pydantic para validación y modelos SQLAlchemy para
 interactuar con la base de datos.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import SessionLocal
-from schemas import LibroCreate, LibroUpdate, LibroOut
-from sqlalchemy import func
-from models import Libro, InventarioPV, InventarioLibro  # Asegúrate de tener InventarioPV en models
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from cache import cache, pagina_cacheada
+from busqueda import ids_de_pagina, indice_libros
+from catalogos import papel_existe
+from importacion import importar, iterar_desde_hilo, lineas_de_bytes
+from resumen_stock import crear_resumen_libro, quitar_libro
+from produccion import producir
+from condicional import condicional
+from schemas import ItemTirada, LibroCreate, LibroUpdate, LibroOut
+from sqlalchemy import func, select
+from models import Libro, InventarioPV, InventarioLibro, ResumenStockLibro  # Asegúrate de tener InventarioPV en models
 
 # Router de libros
 router = APIRouter(prefix="/libros", tags=["Libros"])
@@ -30,27 +41,95 @@ def get_db():
         yield db
     finally:
         db.close()
-        
+
+
+
+# ============================================================
+# STOCK TOTAL (consulta compartida por los endpoints)
+# ============================================================
+def consulta_libros_con_stock():
+    """
+    SELECT de los libros con su stock total (inventario global + puntos de venta).
+
+    El total se lee del resumen materializado (`resumen_stock_libros`), que se
+    mantiene en cada mutación de stock: una fila por libro, sin SUM sobre el
+    inventario en cada lectura.
+    """
+    stock_total = (
+        func.coalesce(ResumenStockLibro.stock_global, 0) + func.coalesce(ResumenStockLibro.stock_pv, 0)
+    ).label("stock_total")
+
+    return (
+        select(Libro.id_libro, Libro.nombre, Libro.precio, stock_total)
+        .outerjoin(ResumenStockLibro, ResumenStockLibro.libro_id == Libro.id_libro)
+    )
+
+
+def obtener_libro_con_stock(db: Session, libro_id: int):
+    return db.execute(consulta_libros_con_stock().where(Libro.id_libro == libro_id)).first()
+
+
+# Formatea una fila de la consulta PARA EL SCHEMA LibroOut
+def libro_out(fila) -> dict:
+    return {
+        "id_libro": fila.id_libro,
+        "nombre": fila.nombre,
+        "precio": fila.precio,
+        "stock_total": int(fila.stock_total or 0)
+    }
+
+
+# Libros que coinciden con `q`, del más relevante al menos relevante
+def libros_por_relevancia(db: Session, q: str, limite: int) -> list[dict]:
+    indice_libros.asegurar(db)
+    ids = [id_ for id_, _ in indice_libros.buscar(q, limite)]
+    if not ids:
+        return []
+    filas = {f.id_libro: f for f in db.execute(consulta_libros_con_stock().where(Libro.id_libro.in_(ids)))}
+    return [libro_out(filas[i]) for i in ids if i in filas]
+
+
+# Filtra la consulta por las coincidencias de `q` en el índice, ya recortadas a la página
+def filtrar_por_busqueda(db: Session, stmt, q: str, pagina: ParametrosPagina):
+    indice_libros.asegurar(db)
+    ids = ids_de_pagina(indice_libros.coincidencias(q), Libro.id_libro, pagina)
+    return stmt.where(Libro.id_libro.in_(ids))
+
+
 # Crear libros
 @router.post("/", response_model=LibroOut, status_code=201)
 def crear_libro(payload: LibroCreate, db: Session = Depends(get_db)):
 
-    # 1. Filtrar campos del libro (evitar cantidad_libros)
-    data_libro = payload.model_dump(exclude={"cantidad_libros"})
+    # 0. Validar el papel contra el catálogo en caché
+    if not papel_existe(db, payload.paginas_por_libro):
+        raise HTTPException(status_code=400, detail="Papel no existe")
+
+    # 1. Filtrar campos del libro (evitar cantidad_libros e imprimir)
+    data_libro = payload.model_dump(exclude={"cantidad_libros", "imprimir"})
 
-    # 2. Crear el libro
+    # 2. Crear el libro (flush para obtener el id sin cerrar la transacción)
     libro = Libro(**data_libro)
     db.add(libro)
-    db.commit()
-    db.refresh(libro)
+    db.flush()
 
-    # 3. Crear inventario con la cantidad solicitada
+    # 3. Crear inventario con la cantidad solicitada; libro, inventario y
+    # resumen se confirman juntos. Con `imprimir` la cantidad sale de una
+    # tirada, que descuenta papel y materias primas en la misma transacción
+    imprimir = payload.imprimir and payload.cantidad_libros > 0
+    inicial = 0 if imprimir else payload.cantidad_libros
     inventario = InventarioLibro(
         libro_id=libro.id_libro,
-        stock=payload.cantidad_libros
+        stock=inicial
     )
     db.add(inventario)
+    crear_resumen_libro(db, libro.id_libro, inicial)
+    if imprimir:
+        db.flush()
+        producir(db, [ItemTirada(libro_id=libro.id_libro, cantidad=payload.cantidad_libros)])
     db.commit()
+    cache.invalidar("libros", "stock")
+    if imprimir:
+        cache.invalidar("materias_primas", "papel")
 
     # 4. Respuesta
     return {
@@ -61,74 +140,62 @@ def crear_libro(payload: LibroCreate, db: Session = Depends(get_db)):
     }
 
 
+# Importar libros en lote
+@router.post("/importar")
+async def importar_libros(request: Request, formato: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """
+    Importa el cuerpo del request (CSV con cabecera o NDJSON) a medida que
+    llega. Las filas inválidas no detienen la carga: se informan en `errores`
+    con su número de línea.
+    """
+    lineas = lineas_de_bytes(iterar_desde_hilo(request.stream()))
+    return await run_in_threadpool(importar, lineas, formato)
+
+
 
 # Listar todos los libros
-@router.get("/", response_model=List[LibroOut])
-def listar_libros(q: Optional[str] = Query(None), db: Session = Depends(get_db)):
-    query = db.query(Libro)
-    if q:
-        query = query.filter(Libro.nombre.ilike(f"%{q}%"))
-
-    libros = query.all()
-
-    resultado = []
-    for libro in libros:
-        # stock global
-        stock_global = (
-            db.query(func.sum(InventarioLibro.stock))
-            .filter(InventarioLibro.libro_id == libro.id_libro)
-            .scalar()
-        ) or 0
-
-        # stock en puntos de venta
-        stock_pv = (
-            db.query(func.sum(InventarioPV.stock))
-            .filter(InventarioPV.id_libro == libro.id_libro)
-            .scalar()
-        ) or 0
-
-        stock_total = stock_global + stock_pv
-
-        resultado.append({
-            "id_libro": libro.id_libro,
-            "nombre": libro.nombre,
-            "precio": libro.precio,
-            "stock_total": stock_total
-        })
-
-    return resultado
+@router.get("/", response_model=List[LibroOut], dependencies=[Depends(condicional("libros", "stock"))])
+def listar_libros(
+    response: Response,
+    q: Optional[str] = Query(None),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    db: Session = Depends(get_db)
+):
+    def cargar(respuesta: Response) -> list:
+        stmt = consulta_libros_con_stock()
+        if q:
+            stmt = filtrar_por_busqueda(db, stmt, q, pagina)
+        filas = paginar(db, stmt, [Libro.id_libro], pagina, respuesta,
+                        clave_de=lambda f: (f.id_libro,))
+        return [libro_out(fila) for fila in filas]
+
+    # El stock total cambia con cada movimiento: depende también de "stock"
+    return pagina_cacheada("libros", ("listar", q), pagina, response, cargar, depende_de=("stock",))
+
+
+# Buscar libros por nombre, categoría o descripción (sin tildes, ordenados por relevancia)
+@router.get("/buscar", response_model=List[LibroOut], dependencies=[Depends(condicional("libros", "stock"))])
+def buscar_libros(
+    q: str = Query(..., min_length=1),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return cache.obtener_o_cargar(
+        "libros", ("buscar", q, limite), lambda: libros_por_relevancia(db, q, limite), depende_de=("stock",)
+    )
 
 # Obtener un libro por ID
-@router.get("/{libro_id}", response_model=LibroOut)
+@router.get("/{libro_id}", response_model=LibroOut, dependencies=[Depends(condicional("libros", "stock"))])
 def obtener_libro(libro_id: int, db: Session = Depends(get_db)):
 
-    libro = db.query(Libro).get(libro_id)
+    def cargar():
+        fila = obtener_libro_con_stock(db, libro_id)
+        return libro_out(fila) if fila else None
+
+    libro = cache.obtener_o_cargar("libros", ("detalle", libro_id), cargar, depende_de=("stock",))
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
-
-    # stock en inventario global
-    stock_global = (
-        db.query(func.sum(InventarioLibro.stock))
-        .filter(InventarioLibro.libro_id == libro.id_libro)
-        .scalar()
-    ) or 0
-
-    # stock en puntos de venta
-    stock_pv = (
-        db.query(func.sum(InventarioPV.stock))
-        .filter(InventarioPV.id_libro == libro.id_libro)
-        .scalar()
-    ) or 0
-
-    stock_total = stock_global + stock_pv
-
-    # respuesta formateada PARA EL SCHEMA LibroOut
-    return {
-        "id_libro": libro.id_libro,
-        "nombre": libro.nombre,
-        "precio": libro.precio,
-        "stock_total": stock_total
-    }
+    return libro
 
 # Actualizar parcialmente un libro
 @router.patch("/{libro_id}", response_model=LibroOut)
@@ -144,30 +211,10 @@ def actualizar_libro(libro_id: int, payload: LibroUpdate, db: Session = Depends(
         setattr(libro, campo, valor)
 
     db.commit()
-    db.refresh(libro)
-
-    # Calcular stock_total
-    stock_global = (
-        db.query(func.sum(InventarioLibro.stock))
-        .filter(InventarioLibro.libro_id == libro.id_libro)
-        .scalar()
-    ) or 0
-
-    stock_pv = (
-        db.query(func.sum(InventarioPV.stock))
-        .filter(InventarioPV.id_libro == libro.id_libro)
-        .scalar()
-    ) or 0
+    cache.invalidar("libros")
 
-    stock_total = stock_global + stock_pv
-
-    # DEVOLVER FORMATO CORRECTO
-    return {
-        "id_libro": libro.id_libro,
-        "nombre": libro.nombre,
-        "precio": libro.precio,
-        "stock_total": stock_total
-    }
+    # Recalcular stock_total con la consulta compartida
+    return libro_out(obtener_libro_con_stock(db, libro.id_libro))
     
     
 # Eliminar un libro
@@ -177,6 +224,9 @@ def eliminar_libro(libro_id: int, db: Session = Depends(get_db)):
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
 
+    # 0. Descontar su stock del resumen de cada punto de venta
+    quitar_libro(db, libro_id)
+
     # 1️⃣ Eliminar inventario global (inventario_libros)
     db.query(InventarioLibro).filter_by(libro_id=libro_id).delete()
 
@@ -186,4 +236,5 @@ def eliminar_libro(libro_id: int, db: Session = Depends(get_db)):
     # 4️⃣ Finalmente elimina el libro
     db.delete(libro)
     db.commit()
+    cache.invalidar("libros", "stock")
     return
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Versión asíncrona de las rutas de lectura de libros (modo DB_ASYNC).
+
+Comparte la consulta y el formato de respuesta con `routers.libros`; solo
+cambia la ejecución, que espera a MySQL sin ocupar un hilo del threadpool.
+`main.py` registra este router antes que el síncrono, así que estas rutas
+tienen prioridad y el resto (crear, actualizar, eliminar) sigue en el router
+síncrono.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_async_db
+from paginacion import ParametrosPagina, paginar_async, parametros_pagina
+from cache import cache, pagina_cacheada_async
+from condicional import condicional
+from schemas import LibroOut
+from models import Libro
+from routers.libros import consulta_libros_con_stock, filtrar_por_busqueda, libro_out, libros_por_relevancia
+
+router = APIRouter(prefix="/libros", tags=["Libros"])
+
+
+# Listar todos los libros
+@router.get("/", response_model=List[LibroOut], dependencies=[Depends(condicional("libros", "stock"))])
+async def listar_libros(
+    response: Response,
+    q: Optional[str] = Query(None),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def cargar(respuesta: Response) -> list:
+        stmt = consulta_libros_con_stock()
+        if q:
+            stmt = await db.run_sync(filtrar_por_busqueda, stmt, q, pagina)
+        filas = await paginar_async(db, stmt, [Libro.id_libro], pagina, respuesta,
+                                    clave_de=lambda f: (f.id_libro,))
+        return [libro_out(fila) for fila in filas]
+
+    return await pagina_cacheada_async("libros", ("listar", q), pagina, response, cargar,
+                                       depende_de=("stock",))
+
+
+# Buscar libros por relevancia (el índice se carga y consulta en run_sync)
+@router.get("/buscar", response_model=List[LibroOut], dependencies=[Depends(condicional("libros", "stock"))])
+async def buscar_libros(
+    q: str = Query(..., min_length=1),
+    limite: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def cargar():
+        return await db.run_sync(libros_por_relevancia, q, limite)
+
+    return await cache.obtener_o_cargar_async("libros", ("buscar", q, limite), cargar, depende_de=("stock",))
+
+
+# Obtener un libro por ID
+@router.get("/{libro_id}", response_model=LibroOut, dependencies=[Depends(condicional("libros", "stock"))])
+async def obtener_libro(libro_id: int, db: AsyncSession = Depends(get_async_db)):
+    async def cargar():
+        fila = (await db.execute(consulta_libros_con_stock().where(Libro.id_libro == libro_id))).first()
+        return libro_out(fila) if fila else None
+
+    libro = await cache.obtener_o_cargar_async("libros", ("detalle", libro_id), cargar, depende_de=("stock",))
+    if not libro:
+        raise HTTPException(status_code=404, detail="Libro no encontrado")
+    return libro
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from typing import List, Optional
+from datetime import datetime
 from pydantic import BaseModel
 
 from database import get_db
-from models import MateriaPrima, MovimientoMP, Usuario
+from exportacion import respuesta_exportacion
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from cache import cache
+from alertas_stock import bajo_minimo, registrar_cruce
+from condicional import condicional
+from models import InsumoProduccion, MateriaPrima, MovimientoMP, Usuario
 
 router = APIRouter(prefix="/materias_primas", tags=["Materias Primas"])
 
@@ -41,9 +48,47 @@ class MPOut(MPBase):
 # Listar materias primas
 # ============================
 
-@router.get("/", response_model=List[MPOut])
-def listar_materias_primas(db: Session = Depends(get_db)):
-    return db.query(MateriaPrima).order_by(MateriaPrima.id_mp.asc()).all()
+@router.get("/", response_model=List[MPOut], dependencies=[Depends(condicional("materias_primas"))])
+def listar_materias_primas(
+    response: Response,
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    db: Session = Depends(get_db)
+):
+    return paginar(db, db.query(MateriaPrima), [MateriaPrima.id_mp], pagina, response,
+                   clave_de=lambda mp: (mp.id_mp,))
+
+# ============================
+# Exportar movimientos de materias primas (streaming)
+# ============================
+
+@router.get("/movimientos/exportar")
+def exportar_movimientos_mp(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    desde: Optional[datetime] = Query(None, description="Fecha inicial (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha final (exclusiva)"),
+    tipo: Optional[str] = Query(None, pattern="^(entrada|salida|ajuste)$"),
+    usuario_id: Optional[int] = Query(None),
+):
+    stmt = select(
+        MovimientoMP.id_mov_mp,
+        MovimientoMP.mp_id,
+        MovimientoMP.tipo,
+        MovimientoMP.cantidad,
+        MovimientoMP.usuario_id,
+        MovimientoMP.fecha_movimiento,
+        MovimientoMP.observaciones,
+    )
+    if desde:
+        stmt = stmt.where(MovimientoMP.fecha_movimiento >= desde)
+    if hasta:
+        stmt = stmt.where(MovimientoMP.fecha_movimiento < hasta)
+    if tipo:
+        stmt = stmt.where(MovimientoMP.tipo == tipo)
+    if usuario_id is not None:
+        stmt = stmt.where(MovimientoMP.usuario_id == usuario_id)
+
+    orden = [MovimientoMP.fecha_movimiento, MovimientoMP.id_mov_mp]
+    return respuesta_exportacion(stmt, orden, formato, "movimientos_mp")
 
 # ============================
 # Crear materia prima
@@ -53,8 +98,12 @@ def listar_materias_primas(db: Session = Depends(get_db)):
 def crear_materia_prima(payload: MPCrear, db: Session = Depends(get_db)):
     mp = MateriaPrima(**payload.dict())
     db.add(mp)
+    db.flush()
+    registrar_cruce(db, "materia_prima", False, bajo_minimo(mp.stock_actual, mp.stock_minimo),
+                    mp.stock_actual, mp.stock_minimo, id_mp=mp.id_mp)
     db.commit()
     db.refresh(mp)
+    cache.invalidar("materias_primas")
     return mp
 
 # ============================
@@ -67,12 +116,16 @@ def ajustar_materia_prima(mp_id: int, payload: MPActualizar, db: Session = Depen
     if not mp:
         raise HTTPException(status_code=404, detail="Materia prima no encontrada")
 
+    bajo_antes = bajo_minimo(mp.stock_actual, mp.stock_minimo)
     data = payload.dict(exclude_unset=True)
     for k, v in data.items():
         setattr(mp, k, v)
 
+    registrar_cruce(db, "materia_prima", bajo_antes, bajo_minimo(mp.stock_actual, mp.stock_minimo),
+                    mp.stock_actual, mp.stock_minimo, id_mp=mp_id)
     db.commit()
     db.refresh(mp)
+    cache.invalidar("materias_primas")
     return mp
 
 # ============================
@@ -89,7 +142,10 @@ def registrar_entrada(mp_id: int, payload: MPEntrada, db: Session = Depends(get_
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no válido")
 
+    bajo_antes = bajo_minimo(mp.stock_actual, mp.stock_minimo)
     mp.stock_actual += payload.cantidad
+    registrar_cruce(db, "materia_prima", bajo_antes, bajo_minimo(mp.stock_actual, mp.stock_minimo),
+                    mp.stock_actual, mp.stock_minimo, id_mp=mp_id)
 
     movimiento = MovimientoMP(
         mp_id=mp_id,
@@ -102,6 +158,7 @@ def registrar_entrada(mp_id: int, payload: MPEntrada, db: Session = Depends(get_
     db.add(movimiento)
     db.commit()
     db.refresh(mp)
+    cache.invalidar("materias_primas")
     return mp
 
 
@@ -111,15 +168,19 @@ def eliminar_materia_prima(mp_id: int, db: Session = Depends(get_db)):
     if not mp:
         raise HTTPException(status_code=404, detail="Materia prima no encontrada")
 
+    registrar_cruce(db, "materia_prima", bajo_minimo(mp.stock_actual, mp.stock_minimo), False,
+                    None, mp.stock_minimo, id_mp=mp_id)
+    db.query(InsumoProduccion).filter_by(mp_id=mp_id).delete()
     db.delete(mp)
     db.commit()
+    cache.invalidar("materias_primas")
 
 
 # ============================
 # Obtener materia prima por ID
 # ============================
 
-@router.get("/{mp_id}", response_model=MPOut)
+@router.get("/{mp_id}", response_model=MPOut, dependencies=[Depends(condicional("materias_primas"))])
 def obtener_materia_prima(mp_id: int, db: Session = Depends(get_db)):
     mp = db.query(MateriaPrima).get(mp_id)
     if not mp:
@@ -4,22 +4,33 @@ Router para la gestión de movimientos de inventario.
 Permite:
 - Registrar movimientos (entrada, salida, venta, ajuste)
 - Listar movimientos con filtro opcional por tipo
+- Exportar el historial completo en streaming (NDJSON o CSV)
 
 Reglas importantes:
 - Se valida que exista el inventario y el usuario (si se envía).
 - No se permiten operaciones que dejen stock negativo.
+- La fecha del movimiento puede ser pasada pero no futura (con un margen
+  de MARGEN_RELOJ por la diferencia de reloj con el cliente).
 - Se usa SELECT ... FOR UPDATE para bloquear filas y evitar condiciones de carrera.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from database import get_db
+from exportacion import respuesta_exportacion
+from cache import cache
+from resumen_stock import registrar_global
+from paginacion import ParametrosPagina, paginar, parametros_pagina
 from models import MovimientoLibro, InventarioLibro, Usuario
 from schemas import MovimientoCreate, MovimientoOut
 
 # Router de movimientos
 router = APIRouter(prefix="/movimientos", tags=["Movimientos"])
 
+MARGEN_RELOJ = timedelta(minutes=1)
+
 # Crear un movimiento de inventario
 @router.post("/", response_model=MovimientoOut, status_code=status.HTTP_201_CREATED)
 def crear_movimiento(payload: MovimientoCreate, db: Session = Depends(get_db)):
@@ -32,18 +43,38 @@ def crear_movimiento(payload: MovimientoCreate, db: Session = Depends(get_db)):
         if not db.query(Usuario).get(payload.usuario_id):
             raise HTTPException(status_code=400, detail="Usuario no existe")
 
+    antes = inv.stock
+    mov = aplicar_movimiento(inv, payload)
+    registrar_global(db, inv.libro_id, antes, inv.stock, inv.stock_minimo)
+    db.add(mov)
+    db.commit()
+    db.refresh(mov)
+    cache.invalidar("stock")
+    return mov
+
+
+def aplicar_movimiento(inv: InventarioLibro, payload: MovimientoCreate) -> MovimientoLibro:
+    """
+    Valida y aplica el movimiento sobre el inventario (ya bloqueado) y devuelve
+    el `MovimientoLibro` a insertar. Compartido con el router asíncrono.
+    """
+    fecha = payload.fecha_movimiento
+    if fecha is not None:
+        # Hora local del servidor, como now() en la BD
+        local = fecha.astimezone().replace(tzinfo=None) if fecha.tzinfo else fecha
+        if local > datetime.now() + MARGEN_RELOJ:
+            raise HTTPException(status_code=400, detail="La fecha del movimiento no puede ser futura")
 
     if payload.tipo in ("salida", "venta"):
         if inv.stock < payload.cantidad:
             raise HTTPException(status_code=400, detail="Stock insuficiente")
 
-    
     if payload.tipo in ("entrada", "ajuste"):
         inv.stock += payload.cantidad
     else: 
         inv.stock -= payload.cantidad
 
-    mov = MovimientoLibro(
+    return MovimientoLibro(
         inventario_id=payload.inventario_id,
         tipo=payload.tipo,
         cantidad=payload.cantidad,
@@ -51,18 +82,51 @@ def crear_movimiento(payload: MovimientoCreate, db: Session = Depends(get_db)):
         fecha_movimiento=payload.fecha_movimiento,
         observaciones=payload.observaciones
     )
-    db.add(mov)
-    db.commit()
-    db.refresh(mov)
-    return mov
 
 # Listar movimientos de inventario
 @router.get("/", response_model=List[MovimientoOut])
 def listar_movimientos(
+    response: Response,
     tipo: Optional[str] = Query(None, pattern="^(entrada|salida|venta|ajuste)$"),
+    # La tabla crece sin límite: siempre se pagina, los más recientes primero
+    pagina: ParametrosPagina = Depends(parametros_pagina(orden_por_defecto="desc")),
     db: Session = Depends(get_db)
 ):
-    q = db.query(MovimientoLibro).order_by(MovimientoLibro.fecha_movimiento.desc())
+    q = db.query(MovimientoLibro)
     if tipo:
         q = q.filter(MovimientoLibro.tipo == tipo)
-    return q.all()
\ No newline at end of file
+    return paginar(
+        db, q, [MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro], pagina, response,
+        clave_de=lambda m: (m.fecha_movimiento, m.id_mov_libro)
+    )
+
+
+# Exportar movimientos en streaming (auditoría mensual)
+@router.get("/exportar")
+def exportar_movimientos(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    desde: Optional[datetime] = Query(None, description="Fecha inicial (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha final (exclusiva)"),
+    tipo: Optional[str] = Query(None, pattern="^(entrada|salida|venta|ajuste)$"),
+    usuario_id: Optional[int] = Query(None),
+):
+    stmt = select(
+        MovimientoLibro.id_mov_libro,
+        MovimientoLibro.inventario_id,
+        MovimientoLibro.tipo,
+        MovimientoLibro.cantidad,
+        MovimientoLibro.usuario_id,
+        MovimientoLibro.fecha_movimiento,
+        MovimientoLibro.observaciones,
+    )
+    if desde:
+        stmt = stmt.where(MovimientoLibro.fecha_movimiento >= desde)
+    if hasta:
+        stmt = stmt.where(MovimientoLibro.fecha_movimiento < hasta)
+    if tipo:
+        stmt = stmt.where(MovimientoLibro.tipo == tipo)
+    if usuario_id is not None:
+        stmt = stmt.where(MovimientoLibro.usuario_id == usuario_id)
+
+    orden = [MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro]
+    return respuesta_exportacion(stmt, orden, formato, "movimientos_libros")
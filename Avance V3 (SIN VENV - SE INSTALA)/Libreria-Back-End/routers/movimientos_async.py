@@ -0,0 +1,60 @@
+"""
+Versión asíncrona del registro y listado de movimientos (modo DB_ASYNC).
+
+Mantiene las mismas reglas que `routers.movimientos` (SELECT ... FOR UPDATE,
+sin stock negativo) reutilizando `aplicar_movimiento`. La exportación en
+streaming sigue en el router síncrono.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional
+from database import get_async_db
+from paginacion import ParametrosPagina, paginar_async, parametros_pagina
+from models import MovimientoLibro, InventarioLibro, Usuario
+from schemas import MovimientoCreate, MovimientoOut
+from routers.movimientos import aplicar_movimiento
+from cache import cache
+from resumen_stock import registrar_global
+
+router = APIRouter(prefix="/movimientos", tags=["Movimientos"])
+
+
+# Crear un movimiento de inventario
+@router.post("/", response_model=MovimientoOut, status_code=status.HTTP_201_CREATED)
+async def crear_movimiento(payload: MovimientoCreate, db: AsyncSession = Depends(get_async_db)):
+
+    inv = await db.get(InventarioLibro, payload.inventario_id, with_for_update=True)
+    if not inv:
+        raise HTTPException(status_code=404, detail="Inventario no existe")
+
+    if payload.usuario_id:
+        if not await db.get(Usuario, payload.usuario_id):
+            raise HTTPException(status_code=400, detail="Usuario no existe")
+
+    antes = inv.stock
+    mov = aplicar_movimiento(inv, payload)
+    await db.run_sync(registrar_global, inv.libro_id, antes, inv.stock, inv.stock_minimo)
+    db.add(mov)
+    await db.commit()
+    await db.refresh(mov)
+    cache.invalidar("stock")
+    return mov
+
+
+# Listar movimientos de inventario
+@router.get("/", response_model=List[MovimientoOut])
+async def listar_movimientos(
+    response: Response,
+    tipo: Optional[str] = Query(None, pattern="^(entrada|salida|venta|ajuste)$"),
+    pagina: ParametrosPagina = Depends(parametros_pagina(orden_por_defecto="desc")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = select(MovimientoLibro)
+    if tipo:
+        stmt = stmt.where(MovimientoLibro.tipo == tipo)
+    filas = await paginar_async(
+        db, stmt, [MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro], pagina, response,
+        clave_de=lambda f: (f.MovimientoLibro.fecha_movimiento, f.MovimientoLibro.id_mov_libro)
+    )
+    return [f.MovimientoLibro for f in filas]
@@ -0,0 +1,28 @@
+"""
+Router del panel de administración.
+
+Expone GET /panel/resumen: los totales de la portada del admin en una sola
+respuesta (ver resumen_panel.py), en lugar de bajar los listados completos de
+puntos de venta, usuarios e inventario para contarlos en el navegador.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from resumen_panel import resumen
+from schemas import PanelResumenOut
+from sesiones import Sesion, sesion_actual, solo_admin
+
+router = APIRouter(prefix="/panel", tags=["Panel"])
+
+
+@router.get("/resumen", response_model=PanelResumenOut)
+def resumen_panel(
+    horas: int = Query(24, ge=1, le=24 * 31, description="Ventana de los movimientos recientes"),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    solo_admin(sesion)
+    return resumen(db, horas)
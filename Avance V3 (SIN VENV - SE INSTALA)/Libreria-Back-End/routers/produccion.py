@@ -0,0 +1,73 @@
+"""
+Router de producción (tiradas de impresión).
+
+- POST /produccion/tiradas: imprime una tirada; descuenta papel y materias
+  primas y suma los ejemplares al almacén (ver produccion.py).
+- POST /produccion/planificar: evalúa tiradas candidatas contra el stock
+  actual, sin modificar nada.
+- /produccion/insumos: consumo de cada materia prima por ejemplar y por página.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from cache import cache
+from database import get_db
+from models import InsumoProduccion, MateriaPrima
+from produccion import planificar, producir
+from schemas import (
+    CandidataOut, InsumoProduccionIn, InsumoProduccionOut, PlanificacionIn, TiradaCreate, TiradaOut,
+)
+from sesiones import Sesion, sesion_actual, solo_admin
+
+router = APIRouter(prefix="/produccion", tags=["Producción"])
+
+
+@router.post("/tiradas", response_model=TiradaOut, status_code=201)
+def crear_tirada(payload: TiradaCreate, sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)):
+    solo_admin(sesion)
+    usuario_id = sesion.usuario_id if sesion else payload.usuario_id
+    resultado = producir(db, payload.items, usuario_id=usuario_id, observaciones=payload.observaciones)
+    db.commit()
+    cache.invalidar("stock", "materias_primas", "papel")
+    return resultado
+
+
+@router.post("/planificar", response_model=List[CandidataOut])
+def planificar_tiradas(payload: PlanificacionIn, db: Session = Depends(get_db)):
+    return planificar(db, payload.candidatas)
+
+
+@router.get("/insumos", response_model=List[InsumoProduccionOut])
+def listar_insumos(db: Session = Depends(get_db)):
+    return db.query(InsumoProduccion).order_by(InsumoProduccion.mp_id).all()
+
+
+@router.put("/insumos/{mp_id}", response_model=InsumoProduccionOut)
+def fijar_insumo(
+    mp_id: int,
+    payload: InsumoProduccionIn,
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    solo_admin(sesion)
+    if db.get(MateriaPrima, mp_id) is None:
+        raise HTTPException(status_code=404, detail="Materia prima no encontrada")
+    insumo = db.get(InsumoProduccion, mp_id) or InsumoProduccion(mp_id=mp_id)
+    insumo.por_ejemplar = payload.por_ejemplar
+    insumo.por_pagina = payload.por_pagina
+    db.add(insumo)
+    db.commit()
+    db.refresh(insumo)
+    return insumo
+
+
+@router.delete("/insumos/{mp_id}", status_code=status.HTTP_204_NO_CONTENT)
+def eliminar_insumo(mp_id: int, sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)):
+    solo_admin(sesion)
+    insumo = db.get(InsumoProduccion, mp_id)
+    if insumo is None:
+        raise HTTPException(status_code=404, detail="Insumo no encontrado")
+    db.delete(insumo)
+    db.commit()
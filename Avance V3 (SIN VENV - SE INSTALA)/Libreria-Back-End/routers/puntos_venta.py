@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from cache import cache, pagina_cacheada
+from condicional import condicional
 from models import PuntoVenta
+from resumen_stock import crear_resumen_pv, quitar_punto_venta
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/puntos-venta", tags=["Puntos de Venta"])
@@ -31,11 +35,29 @@ class PuntoVentaOut(BaseModel):
         from_attributes = True
 
 
+def _a_dict(pv: PuntoVenta) -> dict:
+    return {
+        "id_punto_venta": pv.id_punto_venta,
+        "nombre": pv.nombre,
+        "ubicacion": pv.ubicacion,
+        "tipo": pv.tipo,
+    }
+
+
 # ----------- ENDPOINTS -----------
 
-@router.get("/", response_model=List[PuntoVentaOut])
-def listar_puntos_venta(db: Session = Depends(get_db)):
-    return db.query(PuntoVenta).order_by(PuntoVenta.id_punto_venta).all()
+@router.get("/", response_model=List[PuntoVentaOut], dependencies=[Depends(condicional("puntos_venta"))])
+def listar_puntos_venta(
+    response: Response,
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    db: Session = Depends(get_db)
+):
+    def cargar(respuesta: Response) -> list:
+        filas = paginar(db, db.query(PuntoVenta), [PuntoVenta.id_punto_venta], pagina, respuesta,
+                        clave_de=lambda pv: (pv.id_punto_venta,))
+        return [_a_dict(pv) for pv in filas]
+
+    return pagina_cacheada("puntos_venta", "listar", pagina, response, cargar)
 
 
 @router.post("/", response_model=PuntoVentaOut, status_code=status.HTTP_201_CREATED)
@@ -46,8 +68,11 @@ def crear_punto_venta(payload: PuntoVentaCreate, db: Session = Depends(get_db)):
         tipo=payload.tipo
     )
     db.add(nuevo)
+    db.flush()
+    crear_resumen_pv(db, nuevo.id_punto_venta)
     db.commit()
     db.refresh(nuevo)
+    cache.invalidar("puntos_venta")
     return nuevo
 
 
@@ -65,11 +90,16 @@ def actualizar_punto_venta(pv_id: int, payload: PuntoVentaUpdate, db: Session =
 
     db.commit()
     db.refresh(pv)
+    cache.invalidar("puntos_venta")
     return pv
 
-@router.get("/{pv_id}")
+@router.get("/{pv_id}", dependencies=[Depends(condicional("puntos_venta"))])
 def obtener_punto_venta(pv_id: int, db: Session = Depends(get_db)):
-    pv = db.query(PuntoVenta).get(pv_id)
+    def cargar():
+        pv = db.query(PuntoVenta).get(pv_id)
+        return _a_dict(pv) if pv else None
+
+    pv = cache.obtener_o_cargar("puntos_venta", ("detalle", pv_id), cargar)
     if not pv:
         raise HTTPException(status_code=404, detail="Not Found")
     return pv
@@ -82,6 +112,9 @@ def eliminar_punto_venta(pv_id: int, db: Session = Depends(get_db)):
     if not pv:
         raise HTTPException(status_code=404, detail="Punto de venta no encontrado")
 
+    # inventario_pv se borra en cascada: descontarlo antes del resumen de cada libro
+    quitar_punto_venta(db, pv_id)
     db.delete(pv)
     db.commit()
+    cache.invalidar("puntos_venta", "stock")
     return
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Router de sugerencias de reposición.
+
+POST /reposicion/calcular recalcula todas las sugerencias (ver reposicion.py)
+y GET /reposicion/sugerencias las lista de la más urgente a la menos urgente,
+paginadas por cursor. Un vendedor solo ve las de su punto de venta.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import SugerenciaReposicion
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from reposicion import calcular
+from schemas import CalculoReposicionOut, SugerenciaReposicionOut
+from sesiones import Sesion, alcance_punto_venta, sesion_actual, solo_admin
+
+router = APIRouter(prefix="/reposicion", tags=["Reposición"])
+
+
+@router.post("/calcular", response_model=CalculoReposicionOut)
+def calcular_sugerencias(sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)):
+    solo_admin(sesion)
+    return calcular(db)
+
+
+@router.get("/sugerencias", response_model=list[SugerenciaReposicionOut])
+def listar_sugerencias(
+    response: Response,
+    origen: str = Query("punto_venta", pattern="^(punto_venta|materia_prima|papel)$"),
+    punto_venta_id: Optional[int] = Query(None, description="Solo ese punto de venta"),
+    solo_reponer: bool = Query(True, description="Solo filas con cantidad sugerida mayor a 0"),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
+    sesion: Optional[Sesion] = Depends(sesion_actual),
+    db: Session = Depends(get_db)
+):
+    alcance = alcance_punto_venta(sesion)
+    if alcance is not None:
+        if origen != "punto_venta" or punto_venta_id not in (None, alcance):
+            raise HTTPException(status_code=403, detail="Sin permiso sobre este punto de venta")
+        punto_venta_id = alcance
+
+    q = db.query(SugerenciaReposicion).filter(SugerenciaReposicion.origen == origen)
+    if punto_venta_id is not None:
+        q = q.filter(SugerenciaReposicion.punto_venta_id == punto_venta_id)
+    if solo_reponer:
+        q = q.filter(SugerenciaReposicion.cantidad_sugerida > 0)
+    return paginar(db, q, [SugerenciaReposicion.id_sugerencia], pagina, response,
+                   clave_de=lambda s: (s.id_sugerencia,))
@@ -0,0 +1,52 @@
+"""
+Router de transferencias de stock entre puntos de venta y el almacén.
+
+- POST /transferencias: una transferencia.
+- POST /transferencias/lote: varias, todas o ninguna.
+
+Reemplaza el par de llamadas a /inventario-pv/{id}/ajustar (no atómico): ver
+transferencias.py. Un vendedor solo puede enviar desde su punto de venta; el
+almacén solo lo mueve un administrador.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from cache import cache
+from database import get_db
+from schemas import TransferenciaCreate, TransferenciaItem, TransferenciaLote, TransferenciaOut
+from sesiones import Sesion, alcance_punto_venta, sesion_actual
+from transferencias import transferir
+
+router = APIRouter(prefix="/transferencias", tags=["Transferencias"])
+
+
+def _permitir(sesion: Optional[Sesion], items: list) -> None:
+    alcance = alcance_punto_venta(sesion)
+    if alcance is None:
+        return
+    ajenos = [i for i, item in enumerate(items) if item.desde_punto_venta_id != alcance]
+    if ajenos:
+        raise HTTPException(status_code=403, detail={"mensaje": "Sin permiso sobre el origen", "items": ajenos})
+
+
+def _transferir(db: Session, sesion: Optional[Sesion], items: list, usuario_id, observaciones) -> dict:
+    _permitir(sesion, items)
+    # Con sesión, el usuario es el del token y no el que diga el cuerpo
+    resultado = transferir(db, items, sesion.usuario_id if sesion else usuario_id, observaciones)
+    cache.invalidar("stock")
+    return resultado
+
+
+@router.post("", response_model=TransferenciaOut, status_code=201)
+def crear_transferencia(
+    payload: TransferenciaCreate, sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)
+):
+    item = TransferenciaItem(**payload.model_dump(exclude={"usuario_id", "observaciones"}))
+    return _transferir(db, sesion, [item], payload.usuario_id, payload.observaciones)
+
+
+@router.post("/lote", response_model=TransferenciaOut, status_code=201)
+def crear_lote(payload: TransferenciaLote, sesion: Optional[Sesion] = Depends(sesion_actual), db: Session = Depends(get_db)):
+    return _transferir(db, sesion, payload.items, payload.usuario_id, payload.observaciones)
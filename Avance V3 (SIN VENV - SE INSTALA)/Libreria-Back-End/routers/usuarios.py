@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import math
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import or_
 
-from database import get_db
+from database import SessionLocal, get_db
+from contrasenas import en_pool, en_pool_y_esperar, hashear, necesita_rehash, verificar, verificar_sin_usuario
+from limitador import LimitadorTokens
+from sesiones import Sesion, emitir, requerir_sesion, revocar
+from paginacion import ParametrosPagina, paginar, parametros_pagina
+from cache import cache
+from busqueda import ids_de_pagina, indice_usuarios
+from condicional import condicional
 from models import Usuario, PuntoVenta
 from schemas import UsuarioCreate, UsuarioUpdate, UsuarioOut
 
@@ -15,6 +26,15 @@ router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 # LOGIN  (¡DEBE IR ARRIBA SIEMPRE!)
 # ==================================================
 
+# Intentos de login: ráfaga permitida y recarga por minuto, por email y por IP.
+# Por IP es más alto: en un local todas las cajas salen por la misma IP.
+limite_email = LimitadorTokens(
+    int(os.getenv("LOGIN_INTENTOS_EMAIL", "5")), int(os.getenv("LOGIN_EMAIL_POR_MINUTO", "5")) / 60
+)
+limite_ip = LimitadorTokens(
+    int(os.getenv("LOGIN_INTENTOS_IP", "60")), int(os.getenv("LOGIN_IP_POR_MINUTO", "120")) / 60
+)
+
 class LoginRequest(BaseModel):
     email: EmailStr
     contrasena: str
@@ -23,30 +43,75 @@ class LoginResponse(BaseModel):
     message: str
     role: str
     punto_venta_id: int | None
+    usuario_id: int
+    # Token firmado para `Authorization: Bearer ...` (ver sesiones.py)
+    token: str
+    expira: int
+
+
+def _usuario_por_email(email: str):
+    # Sesión corta: no retener una conexión del pool mientras se calcula el hash
+    with SessionLocal() as db:
+        return (
+            db.query(Usuario.id_usuario, Usuario.contrasena, Usuario.rol, Usuario.punto_venta_id)
+            .filter(Usuario.email == email)
+            .first()
+        )
 
 
-@router.post("/login", response_model=LoginResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+def _reemplazar_contrasena(id_usuario: int, anterior: str, nueva: str) -> None:
+    # Solo si nadie la cambió mientras tanto
+    with SessionLocal() as db:
+        db.execute(
+            update(Usuario)
+            .where(Usuario.id_usuario == id_usuario, Usuario.contrasena == anterior)
+            .values(contrasena=nueva)
+        )
+        db.commit()
 
-    usuario = (
-        db.query(Usuario)
-        .filter(
-            Usuario.email == payload.email,
-            Usuario.contrasena == payload.contrasena
+
+@router.post("/login", response_model=LoginResponse)
+async def login(payload: LoginRequest, request: Request):
+
+    ip = request.client.host if request.client else "desconocida"
+    espera = limite_ip.consumir(ip) or limite_email.consumir(payload.email.lower())
+    if espera:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos de inicio de sesión, esperá unos segundos",
+            headers={"Retry-After": str(math.ceil(espera))},
         )
-        .first()
-    )
 
-    if not usuario:
+    # La BD va al threadpool y el hash a su pool propio (contrasenas.py)
+    usuario = await run_in_threadpool(_usuario_por_email, payload.email)
+    if usuario is None:
+        await en_pool(verificar_sin_usuario, payload.contrasena)
+        raise HTTPException(status_code=400, detail="Credenciales inválidas")
+
+    if not await en_pool(verificar, payload.contrasena, usuario.contrasena):
         raise HTTPException(status_code=400, detail="Credenciales inválidas")
 
+    # Migración transparente: texto plano o parámetros viejos -> hash actual
+    if necesita_rehash(usuario.contrasena):
+        nueva = await en_pool(hashear, payload.contrasena)
+        await run_in_threadpool(_reemplazar_contrasena, usuario.id_usuario, usuario.contrasena, nueva)
+
+    token, expira = emitir(usuario.id_usuario, usuario.rol, usuario.punto_venta_id)
     return {
         "message": "Inicio de sesión exitoso",
         "role": usuario.rol,
-        "punto_venta_id": usuario.punto_venta_id
+        "punto_venta_id": usuario.punto_venta_id,
+        "usuario_id": usuario.id_usuario,
+        "token": token,
+        "expira": expira,
     }
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(sesion: Sesion = Depends(requerir_sesion)):
+    revocar(sesion)
+
+
 
 # ==================================================
 # CREAR USUARIO
@@ -68,7 +133,7 @@ def crear_usuario(payload: UsuarioCreate, db: Session = Depends(get_db)):
     usuario = Usuario(
         nombre=payload.nombre,
         email=payload.email,
-        contrasena=payload.contrasena,
+        contrasena=en_pool_y_esperar(hashear, payload.contrasena),
         rol=payload.rol,
         punto_venta_id=payload.punto_venta_id
     )
@@ -76,30 +141,50 @@ def crear_usuario(payload: UsuarioCreate, db: Session = Depends(get_db)):
     db.add(usuario)
     db.commit()
     db.refresh(usuario)
+    cache.invalidar("usuarios")
     return usuario
 
 
 # ==================================================
 # LISTAR USUARIOS
 # ==================================================
-@router.get("/", response_model=List[UsuarioOut])
+@router.get("/", response_model=List[UsuarioOut], dependencies=[Depends(condicional("usuarios"))])
 def listar_usuarios(
+    response: Response,
     q: Optional[str] = Query(None, description="Filtrar por nombre o email"),
+    pagina: ParametrosPagina = Depends(parametros_pagina()),
     db: Session = Depends(get_db)
 ):
     query = db.query(Usuario)
 
     if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Usuario.nombre.ilike(like), Usuario.email.ilike(like)))
+        indice_usuarios.asegurar(db)
+        ids = ids_de_pagina(indice_usuarios.coincidencias(q), Usuario.id_usuario, pagina)
+        query = query.filter(Usuario.id_usuario.in_(ids))
 
-    return query.order_by(Usuario.id_usuario.asc()).all()
+    return paginar(db, query, [Usuario.id_usuario], pagina, response,
+                   clave_de=lambda u: (u.id_usuario,))
+
+
+# ==================================================
+# BUSCAR USUARIOS (por relevancia, ver busqueda.py)
+# ==================================================
+@router.get("/buscar", response_model=List[UsuarioOut], dependencies=[Depends(condicional("usuarios"))])
+def buscar_usuarios(
+    q: str = Query(..., min_length=1, description="Nombre o email, sin importar tildes"),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    indice_usuarios.asegurar(db)
+    ids = [id_ for id_, _ in indice_usuarios.buscar(q, limite)]
+    usuarios = {u.id_usuario: u for u in db.query(Usuario).filter(Usuario.id_usuario.in_(ids))}
+    return [usuarios[i] for i in ids if i in usuarios]
 
 
 # ==================================================
 # OBTENER USUARIO POR ID
 # ==================================================
-@router.get("/{usuario_id}", response_model=UsuarioOut)
+@router.get("/{usuario_id}", response_model=UsuarioOut, dependencies=[Depends(condicional("usuarios"))])
 def obtener_usuario(usuario_id: int, db: Session = Depends(get_db)):
     usuario = db.query(Usuario).get(usuario_id)
     if not usuario:
@@ -135,11 +220,15 @@ def actualizar_usuario(usuario_id: int, payload: UsuarioUpdate, db: Session = De
         if not pv:
             raise HTTPException(status_code=400, detail="Punto de venta no existe")
 
+    if data.get("contrasena"):
+        data["contrasena"] = en_pool_y_esperar(hashear, data["contrasena"])
+
     for k, v in data.items():
         setattr(usuario, k, v)
 
     db.commit()
     db.refresh(usuario)
+    cache.invalidar("usuarios")
     return usuario
 
 
@@ -155,4 +244,5 @@ def eliminar_usuario(usuario_id: int, db: Session = Depends(get_db)):
 
     db.delete(usuario)
     db.commit()
+    cache.invalidar("usuarios")
     return
@@ -14,7 +14,7 @@ Los esquemas permiten:
 """
 
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -29,6 +29,8 @@ class LibroBase(BaseModel):
 # Esquema para crear nuevo libro
 class LibroCreate(LibroBase):
     cantidad_libros: int = 0
+    # Con imprimir=True la cantidad inicial sale de una tirada (consume papel y materias primas)
+    imprimir: bool = False
 
 # Esquema para actualizar libro
 class LibroUpdate(BaseModel):
@@ -46,6 +48,7 @@ class InventarioOut(BaseModel):
     id_inventario: int
     libro_id: int
     stock: int
+    stock_minimo: Optional[int] = None
     updated_at: datetime
     class Config:
         from_attributes = True
@@ -58,6 +61,21 @@ class AjusteStock(BaseModel):
 class FijarStock(BaseModel):
     stock: int = Field(..., ge=0, description="Stock absoluto a dejar")
 
+# Esquema para fijar (o quitar, con null) el stock mínimo del inventario central
+class FijarMinimo(BaseModel):
+    stock_minimo: Optional[int] = Field(..., ge=0, description="Umbral de alerta; null lo desactiva")
+
+# Esquemas para ajustar stock en lote (un ítem por fila de inventario)
+class AjusteLoteItem(BaseModel):
+    id: int = Field(..., description="ID de la fila a ajustar")
+    delta: int = Field(..., description="Cantidad a sumar (puede ser negativa)")
+
+# Resultado por ítem de un ajuste en lote
+class AjusteLoteResultado(BaseModel):
+    id: int
+    stock_anterior: int
+    stock: int
+
 # Esquemas para movimientos de inventario
 class MovimientoCreate(BaseModel):
     inventario_id: int
@@ -98,6 +116,217 @@ class InventarioPVAjuste(BaseModel):
     delta: int   # para sumar/restar stock
 
 
+# Fila de inventario por punto de venta bajo su stock mínimo
+class StockBajoOut(BaseModel):
+    libro: str
+    punto_venta: str
+    stock: int
+    stock_minimo: int
+
+
+# Fila en alerta del motor de stock bajo (ver alertas_stock.py)
+class AlertaStockOut(BaseModel):
+    origen: str  # almacen, punto_venta, materia_prima
+    id: int
+    nombre: str
+    libro_id: Optional[int] = None
+    punto_venta_id: Optional[int] = None
+    punto_venta: Optional[str] = None
+    stock: int
+    stock_minimo: int
+
+
+# Respuesta del long-poll de cruces de umbral
+class EventosAlertaOut(BaseModel):
+    ultimo: int
+    reiniciar: bool
+    eventos: List[dict]
+
+
+# Totales precalculados de un punto de venta (resumen_stock_pv)
+class ResumenPVOut(BaseModel):
+    punto_venta_id: int
+    stock: int
+    filas_bajo_minimo: int
+    class Config:
+        from_attributes = True
+
+
+# Resumen del panel de administración (ver resumen_panel.py)
+class PanelPuntoVentaOut(BaseModel):
+    punto_venta_id: int
+    nombre: str
+    stock: int
+    valor: int  # precio × stock
+    filas_bajo_minimo: int
+
+
+class PanelResumenOut(BaseModel):
+    generado_en: datetime
+    puntos_venta: int
+    usuarios: int
+    libros: int
+    stock_almacen: int
+    stock_puntos_venta: int
+    valor_puntos_venta: int
+    bajo_minimo: Dict[str, int]  # por origen: almacen, punto_venta, materia_prima
+    movimientos_recientes: Dict[str, int]  # horas, almacen, punto_venta
+    por_punto_venta: List[PanelPuntoVentaOut]
+
+
+# Analítica de movimientos (ver analitica.py)
+class PuntoSerieOut(BaseModel):
+    inicio: datetime  # inicio de la hora o del día
+    movimientos: int
+    unidades: int
+
+
+class SerieOut(BaseModel):
+    granularidad: str
+    datos_hasta: Optional[datetime]  # movimientos posteriores todavía no compactados
+    puntos: List[PuntoSerieOut]
+
+
+class TopItemOut(BaseModel):
+    id: int
+    nombre: Optional[str]
+    movimientos: int
+    unidades: int
+
+
+class TopOut(BaseModel):
+    dimension: str
+    datos_hasta: Optional[datetime]
+    items: List[TopItemOut]
+
+
+# Sugerencias de reposición (ver reposicion.py)
+class SugerenciaReposicionOut(BaseModel):
+    id_sugerencia: int
+    origen: str
+    referencia_id: int  # id_inventario, id_mp o paginas del papel
+    libro_id: Optional[int]
+    punto_venta_id: Optional[int]
+    stock_actual: int
+    stock_minimo_actual: Optional[int]
+    demanda_diaria: float
+    stock_seguridad: int
+    stock_minimo_sugerido: int
+    dias_cobertura: Optional[float]
+    cantidad_sugerida: int
+    calculado_en: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CalculoReposicionOut(BaseModel):
+    calculado_en: datetime
+    historia_dias: int
+    filas: Dict[str, int]  # por origen: punto_venta, materia_prima, papel
+    a_reponer: Dict[str, int]
+    segundos: float
+
+
+# Producción: tiradas de impresión (ver produccion.py)
+class ItemTirada(BaseModel):
+    libro_id: int
+    cantidad: int = Field(..., gt=0, description="Ejemplares a imprimir")
+
+
+class TiradaCreate(BaseModel):
+    items: List[ItemTirada]
+    usuario_id: Optional[int] = None
+    observaciones: Optional[str] = None
+
+
+class ConsumoTiradaOut(BaseModel):
+    id: int  # paginas del papel o id_mp
+    consumido: int
+    stock: int
+
+
+class LibroTiradaOut(BaseModel):
+    libro_id: int
+    cantidad: int
+    stock: int
+
+
+class TiradaOut(BaseModel):
+    ejemplares: int
+    libros: List[LibroTiradaOut]
+    papel: List[ConsumoTiradaOut]
+    materias_primas: List[ConsumoTiradaOut]
+
+
+class PlanificacionIn(BaseModel):
+    candidatas: List[List[ItemTirada]]
+
+
+class FaltanteOut(BaseModel):
+    origen: str  # papel, materia_prima
+    id: int
+    necesario: int
+    disponible: int
+
+
+class CandidataOut(BaseModel):
+    factible: bool  # alcanza el stock actual
+    entra_en_secuencia: bool  # alcanza después de las candidatas anteriores que entraron
+    libros_inexistentes: List[int]
+    papel: Dict[int, int]  # paginas -> páginas necesarias
+    materias_primas: Dict[int, int]  # id_mp -> unidades necesarias
+    faltantes: List[FaltanteOut]
+
+
+class InsumoProduccionIn(BaseModel):
+    por_ejemplar: float = Field(0, ge=0)
+    por_pagina: float = Field(0, ge=0)
+
+
+class InsumoProduccionOut(InsumoProduccionIn):
+    mp_id: int
+
+    class Config:
+        from_attributes = True
+
+
+# Transferencias de stock: punto de venta None = almacén central
+class TransferenciaItem(BaseModel):
+    libro_id: int
+    cantidad: int = Field(..., gt=0, description="Ejemplares a mover")
+    desde_punto_venta_id: Optional[int] = None
+    hacia_punto_venta_id: Optional[int] = None
+
+
+class TransferenciaCreate(TransferenciaItem):
+    usuario_id: Optional[int] = None
+    observaciones: Optional[str] = None
+
+
+class TransferenciaLote(BaseModel):
+    items: List[TransferenciaItem]
+    usuario_id: Optional[int] = None
+    observaciones: Optional[str] = None
+
+
+class TransferenciaResultadoOut(TransferenciaItem):
+    stock_origen: int
+    stock_destino: int
+
+
+class TransferenciaOut(BaseModel):
+    referencia: str
+    items: List[TransferenciaResultadoOut]
+
+
+# Esquema para registrar una venta en un punto de venta
+class VentaPV(BaseModel):
+    cantidad: int = Field(1, gt=0, description="Unidades vendidas")
+    usuario_id: Optional[int] = None
+    observaciones: Optional[str] = None
+
+
 class InventarioPVOut(BaseModel):
     id_inventario: int
     id_libro: int
@@ -133,7 +362,7 @@ class UsuarioCreate(UsuarioBase):
     contrasena: str = Field(
         ...,
         min_length=6,
-        description="Contraseña del usuario (idealmente almacenada hasheada)"
+        description="Contraseña del usuario (se guarda hasheada, ver contrasenas.py)"
     )
 
 # Esquema para actualizar usuario
@@ -0,0 +1,161 @@
+"""
+Tokens de sesión firmados (JWT HS256, solo con la biblioteca estándar).
+
+El login entrega un token con el id del usuario, su rol y su punto de venta.
+La dependencia `sesion_actual` lo valida en memoria (firma y vencimiento), sin
+consultar la BD: autorizar una petición no agrega round-trips.
+
+- SESION_SECRETO: clave del HMAC; debe ser la misma en todos los workers. Si
+  falta se genera una al azar y los tokens dejan de valer al reiniciar.
+- SESION_DURACION: vigencia del token en segundos (12 h por defecto).
+- AUTH_OBLIGATORIA: con false (por defecto, mientras las pantallas de admin no
+  envían el token) una petición sin token se atiende sin restricciones. Una
+  petición con token siempre se valida y un vendedor queda limitado a su
+  punto de venta.
+
+El logout revoca el token: su `jti` queda en una lista en memoria hasta que
+vence. La lista es por proceso, como el limitador de login.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Optional
+
+from fastapi import Header, HTTPException, Response
+
+SESION_SECRETO = os.getenv("SESION_SECRETO") or secrets.token_hex(32)
+SESION_DURACION = int(os.getenv("SESION_DURACION", str(12 * 3600)))
+AUTH_OBLIGATORIA = os.getenv("AUTH_OBLIGATORIA", "false").strip().lower() in ("1", "true", "si", "sí", "yes")
+
+_CABECERA = {"alg": "HS256", "typ": "JWT"}
+
+
+class Sesion:
+    """Datos del token ya validado."""
+
+    def __init__(self, usuario_id: int, rol: str, punto_venta_id: Optional[int], jti: str, expira: int):
+        self.usuario_id = usuario_id
+        self.rol = rol
+        self.punto_venta_id = punto_venta_id
+        self.jti = jti
+        self.expira = expira
+
+
+# ============================================================
+# TOKENS
+# ============================================================
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode()
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _firma(contenido: str) -> str:
+    return _b64(hmac.new(SESION_SECRETO.encode(), contenido.encode(), hashlib.sha256).digest())
+
+
+def emitir(usuario_id: int, rol: str, punto_venta_id: Optional[int]) -> tuple[str, int]:
+    """Devuelve (token, vencimiento en segundos epoch)."""
+    expira = int(time.time()) + SESION_DURACION
+    datos = {"sub": usuario_id, "rol": rol, "pv": punto_venta_id, "jti": secrets.token_hex(8), "exp": expira}
+    contenido = (
+        _b64(json.dumps(_CABECERA, separators=(",", ":")).encode()) + "."
+        + _b64(json.dumps(datos, separators=(",", ":")).encode())
+    )
+    return f"{contenido}.{_firma(contenido)}", expira
+
+
+def validar(token: str) -> Sesion:
+    """Verifica firma, vencimiento y revocación; si algo falla, 401."""
+    try:
+        cabecera, datos, firma = token.split(".")
+        if not hmac.compare_digest(firma, _firma(f"{cabecera}.{datos}")):
+            raise ValueError("firma")
+        contenido = json.loads(_desde_b64(datos))
+        sesion = Sesion(contenido["sub"], contenido["rol"], contenido["pv"], contenido["jti"], contenido["exp"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=401, detail="Token inválido", headers={"WWW-Authenticate": "Bearer"})
+
+    if sesion.expira <= time.time():
+        raise HTTPException(status_code=401, detail="La sesión expiró", headers={"WWW-Authenticate": "Bearer"})
+    if revocado(sesion.jti):
+        raise HTTPException(status_code=401, detail="La sesión fue cerrada", headers={"WWW-Authenticate": "Bearer"})
+    return sesion
+
+
+# ============================================================
+# REVOCACIÓN
+# ============================================================
+_lock = threading.Lock()
+# jti -> vencimiento del token; pasado el vencimiento el token ya no vale solo
+_revocados: dict[str, int] = {}
+
+
+def revocar(sesion: Sesion) -> None:
+    ahora = time.time()
+    with _lock:
+        for jti in [j for j, expira in _revocados.items() if expira <= ahora]:
+            del _revocados[jti]
+        _revocados[sesion.jti] = sesion.expira
+
+
+def revocado(jti: str) -> bool:
+    with _lock:
+        return jti in _revocados
+
+
+# ============================================================
+# DEPENDENCIAS
+# ============================================================
+def sesion_actual(response: Response, authorization: Optional[str] = Header(None)) -> Optional[Sesion]:
+    """
+    Sesión del token `Authorization: Bearer ...`, o None si no se envió y la
+    autenticación no es obligatoria.
+    """
+    # La respuesta depende del token (p. ej. listados filtrados por punto de venta)
+    response.headers["Vary"] = "Authorization"
+    if not authorization:
+        if AUTH_OBLIGATORIA:
+            raise HTTPException(status_code=401, detail="Falta el token de sesión", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    esquema, _, token = authorization.partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Token inválido", headers={"WWW-Authenticate": "Bearer"})
+    return validar(token.strip())
+
+
+def requerir_sesion(response: Response, authorization: Optional[str] = Header(None)) -> Sesion:
+    sesion = sesion_actual(response, authorization)
+    if sesion is None:
+        raise HTTPException(status_code=401, detail="Falta el token de sesión", headers={"WWW-Authenticate": "Bearer"})
+    return sesion
+
+
+# ============================================================
+# ALCANCE POR PUNTO DE VENTA
+# ============================================================
+def alcance_punto_venta(sesion: Optional[Sesion]) -> Optional[int]:
+    """Punto de venta al que se limita la sesión, o None si no tiene límite."""
+    if sesion is None or sesion.rol == "admin":
+        return None
+    if sesion.punto_venta_id is None:
+        raise HTTPException(status_code=403, detail="El usuario no tiene punto de venta asignado")
+    return sesion.punto_venta_id
+
+
+def permitir_punto_venta(sesion: Optional[Sesion], punto_venta_id: int) -> None:
+    alcance = alcance_punto_venta(sesion)
+    if alcance is not None and alcance != punto_venta_id:
+        raise HTTPException(status_code=403, detail="Sin permiso sobre este punto de venta")
+
+
+def solo_admin(sesion: Optional[Sesion]) -> None:
+    if sesion is not None and sesion.rol != "admin":
+        raise HTTPException(status_code=403, detail="Solo un administrador puede hacer esta operación")
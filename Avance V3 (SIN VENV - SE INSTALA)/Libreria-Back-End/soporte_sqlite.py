@@ -0,0 +1,129 @@
+"""
+Soporte del backend SQLite (DB_BACKEND=sqlite), para tests, benchmarks y
+puntos de venta chicos que corren una instancia local.
+
+- Archivo en modo WAL: los lectores no bloquean al escritor ni al revés.
+- Transacciones: SQLite ignora `with_for_update()`. Para que los
+  leer-modificar-escribir sigan siendo atómicos, la transacción se abre con
+  `BEGIN IMMEDIATE` (toma el lock de escritura) si su primera sentencia
+  escribe o es un SELECT ... FOR UPDATE; si no, con un `BEGIN` diferido que
+  no bloquea a nadie. El resto de los escritores espera hasta el timeout.
+- `ahora()`: reemplazo de `func.now()` para defaults de columnas. En SQLite
+  `CURRENT_TIMESTAMP` está en UTC; MySQL usa la hora local del servidor.
+- `inicio_de(columna, "hora" | "dia")`: trunca una fecha al inicio de su hora
+  o día (DATE_FORMAT en MySQL, strftime en SQLite). Devuelve texto ISO.
+- En memoria (":memory:") la base vive en una única conexión, así que el pool
+  tiene una sola y las peticiones se atienden de a una.
+"""
+from sqlalchemy import DateTime, String, event, func, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+MEMORIA = ":memory:"
+
+
+# ============================================================
+# HORA ACTUAL PORTABLE
+# ============================================================
+class ahora(FunctionElement):
+    """Hora local actual, como `now()` de MySQL."""
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(ahora)
+def _ahora_por_defecto(elemento, compilador, **kw):
+    return "now()"
+
+
+@compiles(ahora, "sqlite")
+def _ahora_sqlite(elemento, compilador, **kw):
+    return "(datetime('now', 'localtime'))"
+
+
+FORMATOS_INICIO = {"hora": "%Y-%m-%d %H:00:00", "dia": "%Y-%m-%d 00:00:00"}
+
+
+class inicio_de(FunctionElement):
+    """Inicio de la hora o del día de una fecha, como texto 'AAAA-MM-DD HH:MM:SS'."""
+
+    type = String()
+    inherit_cache = True
+
+    def __init__(self, columna, granularidad: str):
+        self.granularidad = granularidad
+        # El formato va en el texto de la sentencia, no como parámetro: MySQL
+        # (ONLY_FULL_GROUP_BY) solo reconoce la expresión del SELECT en el
+        # GROUP BY si ambas son idénticas
+        super().__init__(columna, literal(FORMATOS_INICIO[granularidad], literal_execute=True))
+
+
+@compiles(inicio_de)
+def _inicio_de_por_defecto(elemento, compilador, **kw):
+    columna, formato = elemento.clauses
+    return compilador.process(func.date_format(columna, formato), **kw)
+
+
+@compiles(inicio_de, "sqlite")
+def _inicio_de_sqlite(elemento, compilador, **kw):
+    columna, formato = elemento.clauses
+    return compilador.process(func.strftime(formato, columna), **kw)
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+def url(ruta: str, driver: str = "") -> str:
+    base = f"sqlite+{driver}://" if driver else "sqlite://"
+    return base if ruta == MEMORIA else f"{base}/{ruta}"
+
+
+def opciones_engine(ruta: str, timeout_s: int, opciones_pool: dict) -> dict:
+    opciones = dict(opciones_pool, connect_args={"check_same_thread": False, "timeout": timeout_s})
+    if ruta == MEMORIA:
+        # Cada conexión nueva sería otra base vacía: una sola y sin reciclar
+        opciones.update(pool_size=1, max_overflow=0, pool_recycle=-1)
+    return opciones
+
+
+def _abre_escritura(sentencia: str, contexto) -> bool:
+    if contexto is not None and (contexto.isinsert or contexto.isupdate or contexto.isdelete):
+        return True
+    compilado = getattr(contexto, "compiled", None)
+    if compilado is not None and getattr(compilado.statement, "_for_update_arg", None) is not None:
+        return True
+    # Texto plano: DDL, SAVEPOINT, INSERT/UPDATE/DELETE escritos a mano
+    return not sentencia.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA", "EXPLAIN"))
+
+
+def preparar(engine: Engine, ruta: str) -> None:
+    """Registra en `engine` (síncrono) los ajustes de conexión y de transacción."""
+
+    @event.listens_for(engine, "connect")
+    def _al_conectar(conexion_dbapi, registro):
+        # El driver no abre transacciones por su cuenta: las abre _antes_de_ejecutar
+        conexion_dbapi.isolation_level = None
+        cursor = conexion_dbapi.cursor()
+        if ruta != MEMORIA:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _al_empezar(conn):
+        # El BEGIN real se difiere hasta saber si la primera sentencia escribe
+        conn.info["sqlite_begin_pendiente"] = True
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def _al_terminar(conn):
+        # Transacción sin sentencias: no llegó a abrirse en SQLite
+        conn.info.pop("sqlite_begin_pendiente", None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes_de_ejecutar(conn, cursor, sentencia, parametros, contexto, executemany):
+        if conn.info.pop("sqlite_begin_pendiente", False):
+            cursor.execute("BEGIN IMMEDIATE" if _abre_escritura(sentencia, contexto) else "BEGIN")
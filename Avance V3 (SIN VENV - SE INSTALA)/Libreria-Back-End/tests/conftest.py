@@ -0,0 +1,109 @@
+"""
+Configuración común de los tests (pytest, desde Libreria-Back-End).
+
+La app corre sobre el backend SQLite (ver soporte_sqlite.py) en un archivo
+temporal, el mismo para toda la sesión de pytest y con las migraciones
+aplicadas al iniciar. Se usa un archivo en modo WAL y no ":memory:" porque
+la base en memoria atiende de a una conexión y hay tests con peticiones en
+paralelo. Cada test siembra sus propios datos y solo mira esas filas.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+DIRECTORIO_BD = tempfile.mkdtemp(prefix="libreria-tests-")
+
+# Antes de importar la app: database.py lee el entorno al importarse
+os.environ.update(
+    DB_BACKEND="sqlite",
+    DB_SQLITE_RUTA=os.path.join(DIRECTORIO_BD, "tests.db"),
+    DB_MIGRAR_AL_INICIAR="true",
+    DB_ASYNC="false",
+    AUTH_OBLIGATORIA="false",
+    ROLLUP_INTERVALO="0",
+    LENTA_MS="60000",
+    LOGIN_INTENTOS_IP="1000000",
+    LOGIN_INTENTOS_EMAIL="1000000",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+import database  # noqa: E402
+from main import app  # noqa: E402
+from models import Libro, Papel, PuntoVenta  # noqa: E402
+
+PAGINAS_TEST = 100
+
+
+@pytest.fixture(scope="session")
+def client():
+    # El `with` corre el startup: migraciones y usuario admin/admin
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    sesion = database.SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+class ContadorSQL:
+    """Sentencias que pasaron por el engine dentro del bloque `with contador.medir()`."""
+
+    def __init__(self):
+        self.total = 0
+
+    def _contar(self, *args, **kwargs):
+        self.total += 1
+
+    @contextmanager
+    def medir(self):
+        self.total = 0
+        event.listen(database.engine, "before_cursor_execute", self._contar)
+        try:
+            yield self
+        finally:
+            event.remove(database.engine, "before_cursor_execute", self._contar)
+
+
+@pytest.fixture
+def contador_sql():
+    return ContadorSQL()
+
+
+# ============================================================
+# DATOS
+# ============================================================
+def crear_punto_venta(db, nombre: str = "pv test") -> int:
+    pv = PuntoVenta(nombre=nombre, ubicacion="test", tipo="tienda")
+    db.add(pv)
+    db.commit()
+    return pv.id_punto_venta
+
+
+def crear_papel(db) -> None:
+    """Papel de PAGINAS_TEST páginas (sin stock), si todavía no existe."""
+    if db.get(Papel, PAGINAS_TEST) is None:
+        db.add(Papel(paginas=PAGINAS_TEST, nombre="papel test", stock_paginas=0))
+        db.flush()
+
+
+def crear_libros(db, cantidad: int, prefijo: str = "libro test") -> list[int]:
+    """Inserta `cantidad` libros (sin inventario) y devuelve sus ids."""
+    crear_papel(db)
+    ids = db.scalars(
+        insert(Libro).returning(Libro.id_libro),
+        [{"nombre": f"{prefijo} {i}", "precio": 1000 + i, "paginas_por_libro": PAGINAS_TEST} for i in range(cantidad)],
+    ).all()
+    db.commit()
+    return list(ids)
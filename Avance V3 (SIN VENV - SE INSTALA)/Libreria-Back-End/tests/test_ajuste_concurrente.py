@@ -0,0 +1,64 @@
+"""
+POST /inventario-pv/{id}/ajustar y POST /inventario-pv/ (fila existente) en
+paralelo sobre la misma fila: no se pierde ningún delta y el resumen de stock
+queda igual al inventario. Y el POST que pierde la carrera por crear la fila.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioPV, ResumenStockLibro, ResumenStockPV
+from routers import inventario_pv
+
+HILOS = 8
+POR_HILO = 10
+
+
+def _sumar(client, inv_id: int, libro: int, pv: int, hilo: int) -> None:
+    for _ in range(POR_HILO):
+        if hilo % 2:
+            r = client.post(f"/inventario-pv/{inv_id}/ajustar", json={"delta": 1})
+        else:
+            r = client.post("/inventario-pv/", json={"id_libro": libro, "id_punto_venta": pv, "stock": 1, "stock_minimo": 0})
+        assert r.status_code == 200, r.text
+
+
+def test_ajustes_en_paralelo_no_desfasan_el_resumen(client, db):
+    pv = crear_punto_venta(db, "pv ajuste concurrente")
+    (libro,) = crear_libros(db, 1, "ajuste concurrente")
+    r = client.post("/inventario-pv/", json={"id_libro": libro, "id_punto_venta": pv, "stock": 5, "stock_minimo": 0})
+    assert r.status_code == 200, r.text
+    inv_id = r.json()["id_inventario"]
+
+    with ThreadPoolExecutor(max_workers=HILOS) as pool:
+        list(pool.map(lambda hilo: _sumar(client, inv_id, libro, pv, hilo), range(HILOS)))
+
+    esperado = 5 + HILOS * POR_HILO
+    assert db.get(InventarioPV, inv_id).stock == esperado
+    assert db.get(ResumenStockPV, pv).stock == esperado
+    assert db.get(ResumenStockLibro, libro).stock_pv == esperado
+
+
+def test_crear_repite_si_otro_post_creo_la_fila(client, db, monkeypatch):
+    pv = crear_punto_venta(db, "pv crear concurrente")
+    (libro,) = crear_libros(db, 1, "crear concurrente")
+    r = client.post("/inventario-pv/", json={"id_libro": libro, "id_punto_venta": pv, "stock": 5, "stock_minimo": 0})
+    assert r.status_code == 200, r.text
+
+    # La carrera: el primer intento no ve la fila que el otro POST ya insertó
+    # y su INSERT choca con uk_libro_pv
+    buscar = inventario_pv._fila_bloqueada
+    intentos = []
+
+    def sin_ver_la_fila(db_, *args):
+        intentos.append(args)
+        return None if len(intentos) == 1 else buscar(db_, *args)
+
+    monkeypatch.setattr(inventario_pv, "_fila_bloqueada", sin_ver_la_fila)
+    r = client.post("/inventario-pv/", json={"id_libro": libro, "id_punto_venta": pv, "stock": 3, "stock_minimo": 0})
+
+    assert r.status_code == 200, r.text
+    assert len(intentos) == 2
+    assert r.json()["stock"] == 8
+    db.rollback()
+    assert db.get(ResumenStockPV, pv).stock == 8
+    assert db.get(ResumenStockLibro, libro).stock_pv == 8
@@ -0,0 +1,40 @@
+"""
+Long-poll de eventos de alertas filtrado por punto de venta: los eventos de
+otros puntos de venta no cortan la espera.
+"""
+import asyncio
+
+from alertas_stock import BusEventos
+
+
+def _evento(punto_venta_id: int) -> dict:
+    return {"origen": "punto_venta", "punto_venta_id": punto_venta_id}
+
+
+async def _esperar_con_publicaciones(bus: BusEventos, publicaciones: list, timeout: float):
+    loop = asyncio.get_running_loop()
+    for retraso, evento in publicaciones:
+        loop.call_later(retraso, bus.publicar, [evento])
+    inicio = loop.time()
+    resultado = await bus.esperar(0, timeout, lambda e: e["punto_venta_id"] == 1)
+    return resultado, loop.time() - inicio
+
+
+def test_espera_hasta_un_evento_propio():
+    bus = BusEventos()
+    (eventos, reiniciar, ultimo), _ = asyncio.run(
+        _esperar_con_publicaciones(bus, [(0.05, _evento(2)), (0.1, _evento(1))], timeout=5)
+    )
+
+    assert [(e["seq"], e["punto_venta_id"]) for e in eventos] == [(2, 1)]
+    assert (reiniciar, ultimo) == (False, 2)
+
+
+def test_solo_eventos_ajenos_espera_el_timeout():
+    bus = BusEventos()
+    (eventos, reiniciar, ultimo), duracion = asyncio.run(
+        _esperar_con_publicaciones(bus, [(0.05, _evento(2)), (0.1, _evento(3))], timeout=0.4)
+    )
+
+    assert (eventos, reiniciar, ultimo) == ([], False, 2)
+    assert duracion >= 0.4
@@ -0,0 +1,96 @@
+"""
+Compactación de rollups (analitica.py) con fechas de movimiento enviadas por
+el cliente: el corte es por hora de inserción, así una fecha futura no frena
+la compactación y un movimiento con fecha pasada llega a su período aunque
+ese período ya esté compactado.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import analitica
+from conftest import crear_libros
+from models import InventarioLibro, MovimientoLibro
+
+FUENTE = analitica.FUENTES[0]  # movimientos_libros
+
+
+@pytest.fixture
+def inventario(db):
+    (libro,) = crear_libros(db, 1, "analitica")
+    inv = InventarioLibro(libro_id=libro, stock=100)
+    db.add(inv)
+    db.commit()
+    return libro, inv.id_inventario
+
+
+def _mover(client, inventario_id: int, fecha: datetime):
+    return client.post("/movimientos/", json={
+        "inventario_id": inventario_id, "tipo": "entrada", "cantidad": 1, "fecha_movimiento": fecha.isoformat(),
+    })
+
+
+def _compactar(db) -> None:
+    # Sin una transacción de lectura vieja abierta (SQLite no la puede pasar a escritura)
+    db.rollback()
+    analitica.compactar(db)
+
+
+def _por_dia(db, libro: int, dia: datetime) -> int:
+    db.rollback()
+    puntos = analitica.serie(db, "dia", dia, dia + timedelta(days=1), libro_id=libro)
+    return sum(p["movimientos"] for p in puntos)
+
+
+def test_fecha_futura_se_rechaza(client, inventario):
+    _, inv_id = inventario
+    assert _mover(client, inv_id, datetime.now() + timedelta(days=1)).status_code == 400
+    assert _mover(client, inv_id, datetime.now(timezone.utc) + timedelta(hours=1)).status_code == 400
+    assert _mover(client, inv_id, datetime.now(timezone.utc) - timedelta(hours=1)).status_code == 201
+
+
+def test_fecha_pasada_llega_a_su_periodo_ya_compactado(client, db, inventario, monkeypatch):
+    monkeypatch.setattr(analitica, "ROLLUP_RETRASO", 0)
+    libro, inv_id = inventario
+    dia = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+
+    assert _mover(client, inv_id, dia + timedelta(hours=10)).status_code == 201
+    _compactar(db)
+    assert _por_dia(db, libro, dia) == 1
+
+    # Cargado después, con fecha de ese mismo día
+    assert _mover(client, inv_id, dia + timedelta(hours=8)).status_code == 201
+    _compactar(db)
+    assert _por_dia(db, libro, dia) == 2
+
+
+def test_fecha_futura_no_frena_la_compactacion(client, db, inventario, monkeypatch):
+    monkeypatch.setattr(analitica, "ROLLUP_RETRASO", 0)
+    libro, inv_id = inventario
+    futuro = datetime.now() + timedelta(days=400)
+    hoy = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    # Una fila con fecha futura de antes de la validación, y otra normal detrás
+    db.add(MovimientoLibro(inventario_id=inv_id, tipo="entrada", cantidad=1, fecha_movimiento=futuro))
+    db.commit()
+    assert _mover(client, inv_id, datetime.now() - timedelta(minutes=1)).status_code == 201
+
+    _compactar(db)
+    assert _por_dia(db, libro, futuro.replace(hour=0, minute=0, second=0, microsecond=0)) == 1
+    assert _por_dia(db, libro, hoy) == 1
+
+
+def test_filas_recien_insertadas_esperan_el_retraso(client, db, inventario, monkeypatch):
+    monkeypatch.setattr(analitica, "ROLLUP_RETRASO", 0)
+    _compactar(db)
+    libro, inv_id = inventario
+    hace_un_rato = datetime.now() - timedelta(days=1)
+    assert _mover(client, inv_id, hace_un_rato).status_code == 201
+
+    # Con 30 s de retraso, una fila recién insertada no se compacta aunque su fecha sea de ayer
+    monkeypatch.setattr(analitica, "ROLLUP_RETRASO", 30)
+    db.rollback()
+    assert analitica.compactar_lote(db, FUENTE) == (0, True)
+    dia = hace_un_rato.replace(hour=0, minute=0, second=0, microsecond=0)
+    assert _por_dia(db, libro, dia) == 0
+    assert analitica.compactar_lote(db, FUENTE, ahora=datetime.now() + timedelta(seconds=31))[0] == 1
+    assert _por_dia(db, libro, dia) == 1
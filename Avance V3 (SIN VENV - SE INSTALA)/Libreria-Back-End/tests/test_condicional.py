@@ -0,0 +1,56 @@
+"""
+GET condicionales de inventario por punto de venta: el ETag depende de la
+sesión (un admin y un vendedor no comparten copia) y el token se valida antes
+de responder 304.
+"""
+import pytest
+
+import sesiones
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioPV
+
+RUTAS = ["/inventario-pv/", "/inventario-pv/por-pv/{pv}", "/inventario/stock-bajo"]
+
+
+@pytest.fixture
+def punto_venta(db):
+    pv = crear_punto_venta(db, "pv condicional")
+    (libro,) = crear_libros(db, 1, "condicional")
+    db.add(InventarioPV(id_libro=libro, id_punto_venta=pv, stock=1, stock_minimo=5))
+    db.commit()
+    return pv
+
+
+def _cabecera(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("ruta", RUTAS)
+def test_etag_distinto_por_sesion(client, punto_venta, ruta):
+    ruta = ruta.format(pv=punto_venta)
+    admin = _cabecera(sesiones.emitir(1, "admin", None)[0])
+    vendedor = _cabecera(sesiones.emitir(1, "vendedor", punto_venta)[0])
+
+    r_admin = client.get(ruta, headers=admin)
+    r_vendedor = client.get(ruta, headers=vendedor)
+    assert r_admin.status_code == r_vendedor.status_code == 200
+    assert r_admin.headers["ETag"] != r_vendedor.headers["ETag"]
+    assert r_admin.headers["Vary"] == "Authorization"
+
+    # La copia del vendedor no vale para el admin, la propia sí
+    assert client.get(ruta, headers={**admin, "If-None-Match": r_vendedor.headers["ETag"]}).status_code == 200
+    r = client.get(ruta, headers={**admin, "If-None-Match": r_admin.headers["ETag"]})
+    assert r.status_code == 304
+    assert r.headers["Vary"] == "Authorization"
+
+
+@pytest.mark.parametrize("ruta", RUTAS)
+def test_sin_token_o_vencido_da_401_y_no_304(client, punto_venta, monkeypatch, ruta):
+    ruta = ruta.format(pv=punto_venta)
+    etag_anonimo = client.get(ruta).headers["ETag"]
+    monkeypatch.setattr(sesiones, "SESION_DURACION", -1)
+    vencido = _cabecera(sesiones.emitir(1, "admin", None)[0])
+
+    monkeypatch.setattr(sesiones, "AUTH_OBLIGATORIA", True)
+    assert client.get(ruta, headers={"If-None-Match": etag_anonimo}).status_code == 401
+    assert client.get(ruta, headers={**vencido, "If-None-Match": etag_anonimo}).status_code == 401
@@ -0,0 +1,67 @@
+"""
+Importación de libros en lote (importacion.py): las filas llegan a `libros`
+con sus columnas, el inventario y el resumen quedan en el libro correcto y las
+filas inválidas se informan sin cortar la carga.
+"""
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import mysql
+
+import database
+from conftest import PAGINAS_TEST, crear_papel
+import importacion
+from importacion import fila_libro
+from models import InventarioLibro, Libro, ResumenStockLibro
+from schemas import LibroCreate
+
+
+def _stock_por_nombre(db, prefijo: str) -> dict:
+    db.rollback()
+    filas = db.execute(
+        select(Libro.nombre, InventarioLibro.stock, ResumenStockLibro.stock_global)
+        .join(InventarioLibro, InventarioLibro.libro_id == Libro.id_libro)
+        .join(ResumenStockLibro, ResumenStockLibro.libro_id == Libro.id_libro)
+        .where(Libro.nombre.like(f"{prefijo}%"))
+    ).all()
+    return {nombre: (stock, resumen) for nombre, stock, resumen in filas}
+
+
+def test_insert_de_libros_compila_en_mysql():
+    # MySQL (sin RETURNING) arma el INSERT con .values(): una clave que no es
+    # columna de `libros` rompe el lote entero
+    libro = LibroCreate(nombre="x", paginas_por_libro=PAGINAS_TEST, cantidad_libros=3, imprimir=False)
+    insert(Libro).values([fila_libro(libro)]).compile(dialect=mysql.dialect())
+
+
+def test_importar_csv(client, db):
+    crear_papel(db)
+    db.commit()
+    cuerpo = (
+        "nombre,precio,paginas_por_libro,cantidad_libros,imprimir\n"
+        f"importado a,1000,{PAGINAS_TEST},3,false\n"
+        f"importado b,1000,{PAGINAS_TEST},5,\n"
+        f"importado c,1000,{PAGINAS_TEST},5,true\n"
+        "importado d,1000,999999,5,\n"
+    )
+    r = client.post("/libros/importar?formato=csv", content=cuerpo.encode())
+    assert r.status_code == 200, r.text
+    resumen = r.json()
+    assert (resumen["filas"], resumen["importadas"], resumen["con_error"]) == (4, 2, 2)
+    assert [e["linea"] for e in resumen["errores"]] == [4, 5]
+    assert _stock_por_nombre(db, "importado ") == {"importado a": (3, 3), "importado b": (5, 5)}
+
+
+def test_importar_sin_returning(client, db, monkeypatch):
+    # Como en MySQL: los ids se leen sin RETURNING y cada inventario y
+    # resumen queda en su libro, en lotes de a dos
+    for atributo in ("insert_returning", "insert_executemany_returning",
+                     "insert_executemany_returning_sort_by_parameter_order"):
+        monkeypatch.setattr(database.engine.dialect, atributo, False)
+    monkeypatch.setattr(importacion, "FILAS_POR_LOTE", 2)
+    crear_papel(db)
+    db.commit()
+    lineas = ["nombre,paginas_por_libro,cantidad_libros\n"]
+    lineas += [f"sin returning {i},{PAGINAS_TEST},{i}\n" for i in range(1, 6)]
+
+    resumen = importacion.importar(lineas, "csv")
+    assert (resumen["importadas"], resumen["con_error"]) == (5, 0), resumen
+    assert _stock_por_nombre(db, "sin returning ") == {f"sin returning {i}": (i, i) for i in range(1, 6)}
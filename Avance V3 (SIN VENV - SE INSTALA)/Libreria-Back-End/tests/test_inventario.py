@@ -0,0 +1,60 @@
+"""
+Listado del inventario central con búsqueda: las coincidencias del índice se
+recortan a la página, así el `IN (...)` no crece con el catálogo. Y las filas
+bajo mínimo por punto de venta, limitadas al del vendedor.
+"""
+from sqlalchemy import event
+
+import database
+import sesiones
+from busqueda import indice_libros
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioLibro, InventarioPV
+
+
+def test_busqueda_paginada_por_libro(client, db):
+    libros = crear_libros(db, 40, "cardo")
+    db.add_all(InventarioLibro(libro_id=libro, stock=i) for i, libro in enumerate(libros))
+    db.commit()
+    indice_libros.invalidar()
+
+    parametros = []
+
+    def capturar(conn, cursor, sentencia, params, context, executemany):
+        if "inventario_libros" in sentencia:
+            parametros.append(len(params))
+
+    event.listen(database.engine, "before_cursor_execute", capturar)
+    try:
+        filas, cursor = [], None
+        while True:
+            ruta = "/inventario/?q=cardo&limit=15" + (f"&after={cursor}" if cursor else "")
+            r = client.get(ruta)
+            assert r.status_code == 200, r.text
+            filas += r.json()
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    finally:
+        event.remove(database.engine, "before_cursor_execute", capturar)
+
+    assert [f["libro_id"] for f in filas] == libros
+    # Los ids de la página (limit + 1) más cursor, límite y offset
+    assert max(parametros) <= 15 + 1 + 3
+
+
+def test_stock_bajo_del_vendedor(client, db):
+    propio = crear_punto_venta(db, "pv bajo propio")
+    ajeno = crear_punto_venta(db, "pv bajo ajeno")
+    (libro,) = crear_libros(db, 1, "bajo minimo")
+    db.add_all(InventarioPV(id_libro=libro, id_punto_venta=pv, stock=1, stock_minimo=5) for pv in (propio, ajeno))
+    db.commit()
+    cabecera = {"Authorization": f"Bearer {sesiones.emitir(1, 'vendedor', propio)[0]}"}
+
+    filas = client.get("/inventario/stock-bajo", headers=cabecera).json()
+    assert {f["punto_venta"] for f in filas} == {"pv bajo propio"}
+    assert client.get(f"/inventario/stock-bajo?punto_venta_id={ajeno}", headers=cabecera).status_code == 403
+
+    # Sin sesión (o como admin) se ven todos
+    filas = client.get("/inventario/stock-bajo").json()
+    assert {"pv bajo propio", "pv bajo ajeno"} <= {f["punto_venta"] for f in filas}
@@ -0,0 +1,84 @@
+"""
+Listados de inventario por punto de venta: una sola consulta de columnas por
+petición, sin lazy loads por fila, cualquiera sea la cantidad de filas.
+"""
+from sqlalchemy import insert
+
+from busqueda import indice_libros
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioPV
+from paginacion import LIMITE_MAXIMO
+
+
+def _sembrar_inventario(db, punto_venta_id: int, libros: list[int], stock: int = 5) -> None:
+    db.execute(insert(InventarioPV), [
+        {"id_libro": i, "id_punto_venta": punto_venta_id, "stock": stock, "stock_minimo": 1} for i in libros
+    ])
+    db.commit()
+
+
+def _sentencias(client, contador_sql, ruta: str) -> tuple[int, list]:
+    with contador_sql.medir():
+        r = client.get(ruta)
+    assert r.status_code == 200
+    return contador_sql.total, r.json()
+
+
+def test_por_punto_venta_sentencias_constantes(client, db, contador_sql):
+    chico = crear_punto_venta(db, "pv chico")
+    grande = crear_punto_venta(db, "pv grande")
+    _sembrar_inventario(db, chico, crear_libros(db, 3, "chico"))
+    _sembrar_inventario(db, grande, crear_libros(db, 400, "grande"))
+
+    sentencias_chico, filas_chico = _sentencias(client, contador_sql, f"/inventario-pv/por-pv/{chico}?limit={LIMITE_MAXIMO}")
+    sentencias_grande, filas_grande = _sentencias(client, contador_sql, f"/inventario-pv/por-pv/{grande}?limit={LIMITE_MAXIMO}")
+
+    assert (len(filas_chico), len(filas_grande)) == (3, 400)
+    assert sentencias_chico == sentencias_grande == 1
+
+
+def test_listar_sentencias_constantes(client, db, contador_sql):
+    pv = crear_punto_venta(db, "pv listar")
+    _sembrar_inventario(db, pv, crear_libros(db, 5, "listar a"))
+    antes, filas_antes = _sentencias(client, contador_sql, f"/inventario-pv/?limit={LIMITE_MAXIMO}")
+
+    _sembrar_inventario(db, pv, crear_libros(db, 300, "listar b"))
+    despues, filas_despues = _sentencias(client, contador_sql, f"/inventario-pv/?limit={LIMITE_MAXIMO}")
+
+    assert len(filas_despues) == min(len(filas_antes) + 300, LIMITE_MAXIMO)
+    assert antes == despues == 1
+
+
+def test_salida_con_nombres_y_precio(client, db):
+    pv = crear_punto_venta(db, "pv salida")
+    (libro,) = crear_libros(db, 1, "salida")
+    _sembrar_inventario(db, pv, [libro], stock=7)
+
+    (fila,) = client.get(f"/inventario-pv/por-pv/{pv}").json()
+    assert fila["id_libro"] == libro
+    assert fila["libro"] == "salida 0"
+    assert fila["punto_venta"] == "pv salida"
+    assert fila["precio"] == 1000.0
+    assert fila["stock"] == 7
+
+
+def test_por_punto_venta_busca_en_el_servidor(client, db):
+    pv = crear_punto_venta(db, "pv busqueda")
+    otro = crear_punto_venta(db, "pv busqueda otro")
+    _sembrar_inventario(db, pv, crear_libros(db, 150, "relleno"))
+    buscados = crear_libros(db, 3, "aguja")
+    _sembrar_inventario(db, pv, buscados)
+    _sembrar_inventario(db, otro, crear_libros(db, 2, "aguja ajena"))
+    # Los libros se insertaron sin pasar por el ORM: el índice se recarga
+    indice_libros.invalidar()
+
+    # Las coincidencias quedan más allá de la primera página del punto de
+    # venta; el filtro es del servidor y el cursor recorre el resto
+    primera = client.get(f"/inventario-pv/por-pv/{pv}?q=aguja&limit=2")
+    cursor = primera.headers["X-Next-Cursor"]
+    segunda = client.get(f"/inventario-pv/por-pv/{pv}?q=aguja&limit=2&after={cursor}")
+
+    filas = primera.json() + segunda.json()
+    assert "X-Next-Cursor" not in segunda.headers
+    assert [f["id_libro"] for f in filas] == buscados
+    assert {f["id_punto_venta"] for f in filas} == {pv}
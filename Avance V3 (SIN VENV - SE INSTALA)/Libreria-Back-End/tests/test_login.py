@@ -0,0 +1,47 @@
+"""
+POST /usuarios/login con la contraseña guardada en cada formato: hash actual,
+texto plano anterior al hash (se migra) y hash mal formado (credenciales
+inválidas, no un 500).
+"""
+import pytest
+
+from contrasenas import ESQUEMA, hashear
+from models import Usuario
+
+
+def _crear_usuario(db, email: str, contrasena: str) -> int:
+    usuario = Usuario(nombre=email, email=email, contrasena=contrasena, rol="admin")
+    db.add(usuario)
+    db.commit()
+    return usuario.id_usuario
+
+
+def _login(client, email: str, contrasena: str):
+    return client.post("/usuarios/login", json={"email": email, "contrasena": contrasena})
+
+
+def test_login_con_hash(client, db):
+    _crear_usuario(db, "hash@test.cl", hashear("clave"))
+    assert _login(client, "hash@test.cl", "clave").status_code == 200
+    assert _login(client, "hash@test.cl", "otra").status_code == 400
+
+
+def test_login_texto_plano_se_migra(client, db):
+    id_usuario = _crear_usuario(db, "plano@test.cl", "clave")
+    assert _login(client, "plano@test.cl", "clave").status_code == 200
+    db.rollback()
+    assert db.get(Usuario, id_usuario).contrasena.startswith(f"{ESQUEMA}$")
+
+
+@pytest.mark.parametrize("guardada", [
+    f"{ESQUEMA}$x$8$1$AAAA$AAAA",                        # parámetro no numérico
+    f"{ESQUEMA}$3$8$1$AAAA$AAAA",                        # n que scrypt rechaza
+    f"{ESQUEMA}$16384$8$1$%%%$AAAA",                     # sal que no es base64
+    f"{ESQUEMA}$16384$8$1$AAAA$A",                       # hash con padding roto
+    f"{ESQUEMA}$99999999999999999999$8$1$AAAA$AAAA",     # fuera de rango
+])
+def test_login_hash_mal_formado(client, db, caplog, guardada):
+    email = f"roto{abs(hash(guardada))}@test.cl"
+    _crear_usuario(db, email, guardada)
+    assert _login(client, email, "clave").status_code == 400
+    assert "mal formado" in caplog.text
@@ -0,0 +1,124 @@
+"""
+Tiradas de producción (produccion.py): descuentan papel y materias primas y
+suman al almacén en una transacción; si algo no alcanza no se toca nada. El
+planificador evalúa candidatas sin escribir, y POST /libros/ con `imprimir`
+usa la misma tirada.
+"""
+import pytest
+from sqlalchemy import delete
+
+from cache import cache
+from models import InsumoProduccion, InventarioLibro, Libro, MateriaPrima, Papel, ResumenStockLibro
+
+# Papel propio de estos tests, para no depender del stock de PAGINAS_TEST
+PAGINAS = 10
+STOCK_PAPEL = 1000
+STOCK_TINTA = 200
+
+
+@pytest.fixture
+def taller(db):
+    """Papel de PAGINAS páginas, tinta (1 por ejemplar) y dos libros con inventario en 0."""
+    papel = db.get(Papel, PAGINAS) or Papel(paginas=PAGINAS, nombre="papel produccion")
+    papel.stock_paginas = STOCK_PAPEL
+    db.add(papel)
+    tinta = MateriaPrima(nombre="tinta produccion", unidad="ml", stock_actual=STOCK_TINTA, stock_minimo=0)
+    db.add(tinta)
+    db.flush()
+    db.add(InsumoProduccion(mp_id=tinta.id_mp, por_ejemplar=1, por_pagina=0))
+    libros = [Libro(nombre=f"tirada {i}", precio=1000, paginas_por_libro=PAGINAS) for i in range(2)]
+    db.add_all(libros)
+    db.flush()
+    db.add_all(InventarioLibro(libro_id=libro.id_libro, stock=0) for libro in libros)
+    db.commit()
+    cache.invalidar("papel")
+
+    yield {"tinta": tinta.id_mp, "libros": [libro.id_libro for libro in libros]}
+
+    # Los insumos valen para toda tirada: no dejarlo para los demás tests
+    db.rollback()
+    db.execute(delete(InsumoProduccion).where(InsumoProduccion.mp_id == tinta.id_mp))
+    db.commit()
+
+
+def _stock(db, taller) -> tuple:
+    db.rollback()
+    almacen = [db.query(InventarioLibro).filter_by(libro_id=i).one().stock for i in taller["libros"]]
+    return db.get(Papel, PAGINAS).stock_paginas, db.get(MateriaPrima, taller["tinta"]).stock_actual, almacen
+
+
+def test_tirada_descuenta_papel_y_materias_primas(client, db, taller):
+    a, b = taller["libros"]
+    r = client.post("/produccion/tiradas", json={"items": [
+        {"libro_id": a, "cantidad": 3}, {"libro_id": b, "cantidad": 2}, {"libro_id": a, "cantidad": 1},
+    ]})
+
+    assert r.status_code == 201, r.text
+    assert r.json()["ejemplares"] == 6
+    assert _stock(db, taller) == (STOCK_PAPEL - 6 * PAGINAS, STOCK_TINTA - 6, [4, 2])
+    assert db.get(ResumenStockLibro, a).stock_global == 4
+
+
+def _tirada_rechazada(client, taller, cantidad: int) -> list[str]:
+    a, b = taller["libros"]
+    r = client.post("/produccion/tiradas", json={"items": [
+        {"libro_id": b, "cantidad": 1}, {"libro_id": a, "cantidad": cantidad},
+    ]})
+    assert r.status_code == 400, r.text
+    return [f["origen"] for f in r.json()["detail"]["faltantes"]]
+
+
+def test_sin_papel_no_toca_nada(client, db, taller):
+    assert _tirada_rechazada(client, taller, STOCK_PAPEL // PAGINAS) == ["papel"]
+    assert _stock(db, taller) == (STOCK_PAPEL, STOCK_TINTA, [0, 0])
+
+
+def test_sin_materia_prima_no_toca_nada(client, db, taller):
+    db.get(MateriaPrima, taller["tinta"]).stock_actual = 5
+    db.commit()
+
+    assert _tirada_rechazada(client, taller, 5) == ["materia_prima"]
+    assert _stock(db, taller) == (STOCK_PAPEL, 5, [0, 0])
+
+
+def test_planificar_en_secuencia_sin_escribir(client, db, taller):
+    a, b = taller["libros"]
+    r = client.post("/produccion/planificar", json={"candidatas": [
+        [{"libro_id": a, "cantidad": 60}],
+        [{"libro_id": b, "cantidad": 60}],  # factible sola, pero no después de la primera
+        [{"libro_id": b, "cantidad": 5}],
+        [{"libro_id": a, "cantidad": STOCK_PAPEL // PAGINAS + 1}],
+    ]})
+
+    assert r.status_code == 200, r.text
+    assert [(c["factible"], c["entra_en_secuencia"]) for c in r.json()] == [
+        (True, True), (True, False), (True, True), (False, False),
+    ]
+    assert _stock(db, taller) == (STOCK_PAPEL, STOCK_TINTA, [0, 0])
+
+
+def test_crear_libro_con_imprimir(client, db, taller):
+    r = client.post("/libros/", json={
+        "nombre": "impreso al crear", "precio": 1000, "paginas_por_libro": PAGINAS,
+        "cantidad_libros": 5, "imprimir": True,
+    })
+    assert r.status_code in (200, 201), r.text
+    libro = r.json()["id_libro"]
+
+    db.rollback()
+    assert db.query(InventarioLibro).filter_by(libro_id=libro).one().stock == 5
+    assert db.get(ResumenStockLibro, libro).stock_global == 5
+    assert db.get(Papel, PAGINAS).stock_paginas == STOCK_PAPEL - 5 * PAGINAS
+    assert db.get(MateriaPrima, taller["tinta"]).stock_actual == STOCK_TINTA - 5
+
+
+def test_crear_libro_sin_papel_para_imprimir(client, db, taller):
+    r = client.post("/libros/", json={
+        "nombre": "sin papel al crear", "precio": 1000, "paginas_por_libro": PAGINAS,
+        "cantidad_libros": STOCK_PAPEL // PAGINAS + 1, "imprimir": True,
+    })
+
+    assert r.status_code == 400, r.text
+    db.rollback()
+    assert db.query(Libro).filter_by(nombre="sin papel al crear").count() == 0
+    assert _stock(db, taller)[:2] == (STOCK_PAPEL, STOCK_TINTA)
@@ -0,0 +1,54 @@
+"""
+Resumen de stock (resumen_stock.py) cuando falta la fila del libro: se crea
+recalculada desde el inventario, que ya debe tener el cambio aplicado. Y la
+migración que lo puebla cuando la base llega con el resumen vacío.
+"""
+import pytest
+from sqlalchemy import delete
+
+import database
+from conftest import crear_libros
+from migraciones import v0009_poblar_resumen_stock
+from models import InventarioLibro, ResumenStockLibro, ResumenStockPV
+from resumen_stock import verificar
+
+
+@pytest.fixture
+def libro_sin_resumen(db):
+    (libro,) = crear_libros(db, 1, "sin resumen")
+    db.add(InventarioLibro(libro_id=libro, stock=10))
+    db.commit()
+    assert db.get(ResumenStockLibro, libro) is None
+    return libro
+
+
+def _stock_global(db, libro: int) -> int:
+    db.rollback()
+    return db.get(ResumenStockLibro, libro).stock_global
+
+
+def test_ajustar_sin_fila_de_resumen(client, db, libro_sin_resumen):
+    r = client.post(f"/inventario/{libro_sin_resumen}/ajustar", json={"delta": 5})
+    assert r.status_code == 200, r.text
+    assert _stock_global(db, libro_sin_resumen) == 15
+
+
+def test_fijar_sin_fila_de_resumen(client, db, libro_sin_resumen):
+    r = client.put(f"/inventario/{libro_sin_resumen}/fijar", json={"stock": 3})
+    assert r.status_code == 200, r.text
+    assert _stock_global(db, libro_sin_resumen) == 3
+
+
+def test_migracion_puebla_resumen_vacio(db):
+    # Como una base creada con db/Base cristobal.sql: datos y resumen vacío
+    (libro,) = crear_libros(db, 1, "resumen vacio")
+    db.add(InventarioLibro(libro_id=libro, stock=8))
+    db.execute(delete(ResumenStockLibro))
+    db.execute(delete(ResumenStockPV))
+    db.commit()
+
+    with database.engine.begin() as conn:
+        v0009_poblar_resumen_stock.subir(conn)
+
+    assert _stock_global(db, libro) == 8
+    assert verificar(db) == []
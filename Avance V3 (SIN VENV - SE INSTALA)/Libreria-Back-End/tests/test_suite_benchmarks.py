@@ -0,0 +1,48 @@
+"""
+Suite de benchmarks (benchmarks/suite.py) en miniatura: la siembra produce lo
+pedido y `limpiar` la deja en cero, y cada escenario corre contra los routers reales sin
+errores y con las sentencias SQL por petición medidas.
+"""
+import asyncio
+import json
+
+import pytest
+
+from benchmarks import datos_sinteticos, suite
+
+TAMANO = {"libros": 40, "puntos_venta": 2, "inventario_pv": 30, "movimientos": 300, "usuarios": 3}
+
+
+@pytest.fixture(scope="module")
+def sembrado(client):
+    datos_sinteticos.sembrar(
+        libros=TAMANO["libros"], puntos_venta=TAMANO["puntos_venta"], por_punto_venta=15,
+        movimientos=TAMANO["movimientos"], usuarios=TAMANO["usuarios"], progreso=lambda texto: None,
+    )
+    yield datos_sinteticos.conjunto()
+    datos_sinteticos.limpiar()
+    assert datos_sinteticos.tamano() == dict.fromkeys(TAMANO, 0)
+
+
+def test_siembra_del_tamano_pedido(sembrado):
+    assert datos_sinteticos.tamano() == TAMANO
+    assert len(sembrado["vendedores"]) == TAMANO["usuarios"]
+    assert sembrado["palabras"]
+
+
+def test_escenarios_sin_errores(sembrado, tmp_path, capsys):
+    config = {"modo": "asgi", "concurrencia": 2, "calentamiento": 0, "duracion": 0.3, "semilla": 7}
+    escenarios = asyncio.run(suite.correr_en_proceso(list(suite.ESCENARIOS), sembrado, config))
+
+    assert set(escenarios) == set(suite.ESCENARIOS)
+    for nombre, r in escenarios.items():
+        assert r["peticiones"] > 0, nombre
+        assert r["errores"] == 0, (nombre, r["codigos"])
+        assert r["sql_por_peticion"] is not None, nombre
+
+    resultado = {"fecha": "-", "commit": "", "sucio": False, "config": config,
+                 "datos": datos_sinteticos.tamano(), "escenarios": escenarios}
+    ruta = suite.guardar(resultado, str(tmp_path / "a.json"))
+    assert json.loads(ruta.read_text(encoding="utf-8"))["escenarios"] == escenarios
+    suite.comparar(str(ruta), str(ruta))
+    assert "libros_listar" in capsys.readouterr().out
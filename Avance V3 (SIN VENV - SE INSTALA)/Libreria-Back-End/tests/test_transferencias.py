@@ -0,0 +1,98 @@
+"""
+Transferencias de stock (transferencias.py): el lote se aplica entero o no se
+aplica, la fila de destino se crea si falta y un vendedor solo envía desde su
+punto de venta.
+"""
+import pytest
+from sqlalchemy import func, select
+
+import sesiones
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioLibro, InventarioPV, MovimientoPV, ResumenStockLibro, ResumenStockPV
+
+
+@pytest.fixture
+def tiendas(db):
+    """Un libro con 20 en el almacén y 10 en la tienda `a`; la tienda `b` sin fila."""
+    a = crear_punto_venta(db, "pv transferencia a")
+    b = crear_punto_venta(db, "pv transferencia b")
+    (libro,) = crear_libros(db, 1, "transferencia")
+    db.add(InventarioLibro(libro_id=libro, stock=20))
+    db.add(InventarioPV(id_libro=libro, id_punto_venta=a, stock=10, stock_minimo=0))
+    db.commit()
+    return {"libro": libro, "a": a, "b": b}
+
+
+def _stock(db, tiendas) -> tuple:
+    """(almacén, tienda a, tienda b o None si no tiene fila)."""
+    db.rollback()
+    libro = tiendas["libro"]
+    por_pv = dict(db.execute(
+        select(InventarioPV.id_punto_venta, InventarioPV.stock).where(InventarioPV.id_libro == libro)
+    ).all())
+    almacen = db.query(InventarioLibro).filter_by(libro_id=libro).one().stock
+    return almacen, por_pv.get(tiendas["a"]), por_pv.get(tiendas["b"])
+
+
+def test_lote_crea_el_destino_y_mantiene_el_resumen(client, db, tiendas):
+    libro, a, b = tiendas["libro"], tiendas["a"], tiendas["b"]
+    r = client.post("/transferencias/lote", json={"items": [
+        {"libro_id": libro, "cantidad": 5, "desde_punto_venta_id": a, "hacia_punto_venta_id": b},
+        {"libro_id": libro, "cantidad": 8, "hacia_punto_venta_id": b},
+    ]})
+
+    assert r.status_code == 201, r.text
+    assert [(i["stock_origen"], i["stock_destino"]) for i in r.json()["items"]] == [(5, 5), (12, 13)]
+    assert _stock(db, tiendas) == (12, 5, 13)
+    resumen = db.get(ResumenStockLibro, libro)
+    assert (resumen.stock_global, resumen.stock_pv) == (12, 18)
+    assert db.get(ResumenStockPV, b).stock == 13
+    # Salida en el origen y entrada en el destino por cada ítem entre tiendas
+    referencia = r.json()["referencia"]
+    movimientos = db.scalar(
+        select(func.count()).select_from(MovimientoPV).where(MovimientoPV.observaciones.contains(referencia))
+    )
+    assert movimientos == 3
+
+
+def test_item_sin_stock_revierte_todo_el_lote(client, db, tiendas):
+    libro, a, b = tiendas["libro"], tiendas["a"], tiendas["b"]
+    r = client.post("/transferencias/lote", json={"items": [
+        {"libro_id": libro, "cantidad": 8, "hacia_punto_venta_id": b},
+        {"libro_id": libro, "cantidad": 6, "desde_punto_venta_id": a, "hacia_punto_venta_id": b},
+        {"libro_id": libro, "cantidad": 6, "desde_punto_venta_id": a},
+    ]})
+
+    assert r.status_code == 400, r.text
+    assert [i["item"] for i in r.json()["detail"]["items"]] == [2]
+    # Ni el destino nuevo se creó
+    assert _stock(db, tiendas) == (20, 10, None)
+
+
+def test_transferencia_sin_stock(client, db, tiendas):
+    r = client.post("/transferencias", json={
+        "libro_id": tiendas["libro"], "cantidad": 11, "desde_punto_venta_id": tiendas["a"],
+    })
+
+    assert r.status_code == 400, r.text
+    assert _stock(db, tiendas) == (20, 10, None)
+
+
+def test_vendedor_solo_envia_desde_su_punto_de_venta(client, db, tiendas):
+    libro, a, b = tiendas["libro"], tiendas["a"], tiendas["b"]
+    token, _ = sesiones.emitir(1, "vendedor", a)
+    cabecera = {"Authorization": f"Bearer {token}"}
+
+    ajena = client.post("/transferencias/lote", headers=cabecera, json={"items": [
+        {"libro_id": libro, "cantidad": 1, "desde_punto_venta_id": a, "hacia_punto_venta_id": b},
+        {"libro_id": libro, "cantidad": 1, "hacia_punto_venta_id": a},
+    ]})
+    assert ajena.status_code == 403, ajena.text
+    assert ajena.json()["detail"]["items"] == [1]
+    assert _stock(db, tiendas) == (20, 10, None)
+
+    propia = client.post("/transferencias", headers=cabecera, json={
+        "libro_id": libro, "cantidad": 4, "desde_punto_venta_id": a, "hacia_punto_venta_id": b,
+    })
+    assert propia.status_code == 201, propia.text
+    assert _stock(db, tiendas) == (20, 6, 4)
@@ -0,0 +1,58 @@
+"""
+POST /inventario-pv/{id}/vender con muchos vendedores en paralelo sobre la
+misma fila: nadie vende de más ni de menos y cada venta deja su movimiento.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from conftest import crear_libros, crear_punto_venta
+from models import InventarioPV, MovimientoPV, TipoMovimiento
+
+STOCK = 60
+VENDEDORES = 12
+
+
+def _vender_hasta_agotar(client, inv_id: int) -> int:
+    ventas = 0
+    while True:
+        r = client.post(f"/inventario-pv/{inv_id}/vender", json={"cantidad": 1})
+        if r.status_code == 400:
+            return ventas
+        assert r.status_code == 200, r.text
+        ventas += 1
+
+
+def test_sin_sobreventa_con_vendedores_en_paralelo(client, db):
+    pv = crear_punto_venta(db, "pv venta concurrente")
+    (libro,) = crear_libros(db, 1, "venta concurrente")
+    inv = InventarioPV(id_libro=libro, id_punto_venta=pv, stock=STOCK, stock_minimo=0)
+    db.add(inv)
+    db.commit()
+    inv_id = inv.id_inventario
+    # Los hilos no tocan la sesión del test (no es segura entre hilos)
+    db.rollback()
+
+    with ThreadPoolExecutor(max_workers=VENDEDORES) as pool:
+        ventas = sum(pool.map(lambda _: _vender_hasta_agotar(client, inv_id), range(VENDEDORES)))
+
+    movimientos = db.scalar(
+        select(func.count()).select_from(MovimientoPV)
+        .where(MovimientoPV.inventario_pv_id == inv_id, MovimientoPV.tipo == TipoMovimiento.venta)
+    )
+    assert ventas == STOCK
+    assert db.get(InventarioPV, inv_id).stock == 0
+    assert movimientos == STOCK
+
+
+def test_venta_mayor_al_stock_no_descuenta(client, db):
+    pv = crear_punto_venta(db, "pv venta grande")
+    (libro,) = crear_libros(db, 1, "venta grande")
+    inv = InventarioPV(id_libro=libro, id_punto_venta=pv, stock=3, stock_minimo=0)
+    db.add(inv)
+    db.commit()
+
+    r = client.post(f"/inventario-pv/{inv.id_inventario}/vender", json={"cantidad": 4})
+    assert r.status_code == 400
+    db.expire_all()
+    assert db.get(InventarioPV, inv.id_inventario).stock == 3
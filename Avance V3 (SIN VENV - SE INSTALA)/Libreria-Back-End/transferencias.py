@@ -0,0 +1,234 @@
+"""
+Transferencias de stock entre puntos de venta y el almacén central.
+
+Cada ítem mueve `cantidad` ejemplares de un libro desde un punto de venta (o
+el almacén, `desde_punto_venta_id=None`) hacia otro punto de venta (o el
+almacén). Un lote se aplica entero o no se aplica:
+
+- Las filas se bloquean con SELECT ... FOR UPDATE por clave primaria en orden
+  ascendente, siempre primero `inventario_libros` (por libro_id) y después
+  `inventario_pv` (por id_inventario). Dos transferencias cruzadas (A → B y
+  B → A) toman los locks en el mismo orden y no se bloquean mutuamente.
+- Los ids de inventario_pv se resuelven antes, con una lectura sin locks: el
+  índice único (libro, punto de venta) se recorre en otro orden que la PK.
+- Se valida todo antes de escribir (stock suficiente aplicando los ítems en
+  orden). La fila de destino que no existe se crea con stock 0 y sin
+  mínimo.
+- Cada ítem deja dos movimientos, salida en el origen y entrada en el
+  destino, con la misma referencia en las observaciones.
+
+Si la BD aborta la transacción por espera de lock (MySQL 1205), deadlock
+(1213) o base ocupada (SQLite), o si otra transacción creó la misma fila de
+destino, se reintenta entera hasta TRANSFERENCIA_REINTENTOS veces con espera
+exponencial; agotados los intentos la API responde 503.
+"""
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from models import (
+    InventarioLibro, InventarioPV, Libro, MovimientoLibro, MovimientoPV, PuntoVenta, TipoMovimiento, Usuario,
+)
+from resumen_stock import CambiosResumen
+
+TRANSFERENCIA_REINTENTOS = int(os.getenv("TRANSFERENCIA_REINTENTOS", "5"))
+# Espera antes del primer reintento (se duplica en cada uno, con ruido)
+TRANSFERENCIA_ESPERA_S = float(os.getenv("TRANSFERENCIA_ESPERA_S", "0.02"))
+
+# Cantidad máxima de ítems por lote
+MAX_ITEMS_LOTE = 1000
+
+# Errores de MySQL que abortan la transacción por contención de locks
+LOCK_WAIT_TIMEOUT = 1205
+DEADLOCK = 1213
+
+# Intentos que terminaron en reintento desde el arranque (lo informa el benchmark)
+reintentos = 0
+
+
+class _Reintentar(Exception):
+    """La transacción debe repetirse (p. ej. otra creó la fila de destino)."""
+
+
+def es_contencion(exc: DBAPIError) -> bool:
+    """True si la BD abortó la sentencia por locks y conviene repetir la transacción."""
+    orig = getattr(exc, "orig", None)
+    codigo = orig.args[0] if orig is not None and orig.args else None
+    return codigo in (LOCK_WAIT_TIMEOUT, DEADLOCK) or "database is locked" in str(orig)
+
+
+def _lugar(punto_venta_id: Optional[int]) -> str:
+    return "almacén" if punto_venta_id is None else f"punto de venta {punto_venta_id}"
+
+
+# ============================================================
+# VALIDACIÓN PREVIA (sin locks)
+# ============================================================
+def _validar(db: Session, items: list, usuario_id: Optional[int]) -> None:
+    if not items:
+        raise HTTPException(status_code=400, detail="El lote está vacío")
+    if len(items) > MAX_ITEMS_LOTE:
+        raise HTTPException(status_code=400, detail=f"El lote supera {MAX_ITEMS_LOTE} ítems")
+    iguales = [i for i, item in enumerate(items) if item.desde_punto_venta_id == item.hacia_punto_venta_id]
+    if iguales:
+        raise HTTPException(status_code=400, detail={"mensaje": "Origen y destino son el mismo", "items": iguales})
+
+    libros = {item.libro_id for item in items}
+    existentes = set(db.scalars(select(Libro.id_libro).where(Libro.id_libro.in_(libros))))
+    if libros - existentes:
+        raise HTTPException(status_code=404, detail={"mensaje": "Libro no encontrado", "ids": sorted(libros - existentes)})
+
+    puntos = {p for item in items for p in (item.desde_punto_venta_id, item.hacia_punto_venta_id) if p is not None}
+    existentes = set(db.scalars(select(PuntoVenta.id_punto_venta).where(PuntoVenta.id_punto_venta.in_(puntos))))
+    if puntos - existentes:
+        raise HTTPException(
+            status_code=404, detail={"mensaje": "Punto de venta no encontrado", "ids": sorted(puntos - existentes)}
+        )
+    if usuario_id is not None and db.get(Usuario, usuario_id) is None:
+        raise HTTPException(status_code=400, detail="Usuario no existe")
+
+
+# ============================================================
+# UN INTENTO
+# ============================================================
+def _intento(db: Session, items: list, usuario_id: Optional[int], observaciones: Optional[str]) -> dict:
+    pares = sorted({
+        (item.libro_id, p) for item in items
+        for p in (item.desde_punto_venta_id, item.hacia_punto_venta_id) if p is not None
+    })
+    libros_almacen = sorted({
+        item.libro_id for item in items if None in (item.desde_punto_venta_id, item.hacia_punto_venta_id)
+    })
+
+    # Ids de inventario_pv, leídos sin bloquear; la transacción que escribe empieza con los locks
+    ids_pv = dict(((f.id_libro, f.id_punto_venta), f.id_inventario) for f in db.execute(
+        select(InventarioPV.id_libro, InventarioPV.id_punto_venta, InventarioPV.id_inventario)
+        .where(tuple_(InventarioPV.id_libro, InventarioPV.id_punto_venta).in_(pares))
+    )) if pares else {}
+    db.rollback()
+
+    almacen = {
+        inv.libro_id: inv
+        for inv in db.scalars(
+            select(InventarioLibro).where(InventarioLibro.libro_id.in_(libros_almacen))
+            .order_by(InventarioLibro.libro_id).with_for_update()
+        )
+    } if libros_almacen else {}
+    bloqueadas = {
+        (inv.id_libro, inv.id_punto_venta): inv
+        for inv in db.scalars(
+            select(InventarioPV).where(InventarioPV.id_inventario.in_(sorted(ids_pv.values())))
+            .order_by(InventarioPV.id_inventario).with_for_update()
+        )
+    } if ids_pv else {}
+    if len(bloqueadas) != len(ids_pv):
+        # Una fila se borró entre la lectura y el lock
+        raise _Reintentar()
+
+    sin_almacen = [i for i in libros_almacen if i not in almacen]
+    if sin_almacen:
+        db.rollback()
+        raise HTTPException(status_code=404, detail={"mensaje": "Inventario no encontrado", "ids": sin_almacen})
+
+    # Simular los ítems en orden antes de tocar las filas
+    def stock_de(libro_id, punto_venta_id):
+        if punto_venta_id is None:
+            return almacen[libro_id].stock or 0
+        fila = bloqueadas.get((libro_id, punto_venta_id))
+        return fila.stock or 0 if fila is not None else 0
+
+    stock = {}
+    resultados, insuficientes = [], []
+    for i, item in enumerate(items):
+        origen = (item.libro_id, item.desde_punto_venta_id)
+        destino = (item.libro_id, item.hacia_punto_venta_id)
+        for clave in (origen, destino):
+            stock.setdefault(clave, stock_de(*clave))
+        if stock[origen] < item.cantidad:
+            insuficientes.append({"item": i, "libro_id": item.libro_id, "desde_punto_venta_id": item.desde_punto_venta_id,
+                                  "stock": stock[origen], "cantidad": item.cantidad})
+            continue
+        stock[origen] -= item.cantidad
+        stock[destino] += item.cantidad
+        resultados.append({**item.model_dump(), "stock_origen": stock[origen], "stock_destino": stock[destino]})
+
+    if insuficientes:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"mensaje": "Stock insuficiente", "items": insuficientes})
+
+    # Filas de destino nuevas: si otra transacción crea la misma, el INSERT falla y se reintenta
+    faltantes = sorted(clave for clave in stock if clave[1] is not None and clave not in bloqueadas)
+    if faltantes:
+        for libro_id, punto_venta_id in faltantes:
+            fila = InventarioPV(id_libro=libro_id, id_punto_venta=punto_venta_id, stock=0)
+            db.add(fila)
+            bloqueadas[(libro_id, punto_venta_id)] = fila
+        try:
+            db.flush()
+        except IntegrityError:
+            raise _Reintentar()
+
+    cambios = CambiosResumen()
+    for (libro_id, punto_venta_id), nuevo in stock.items():
+        if punto_venta_id is None:
+            fila = almacen[libro_id]
+            cambios.global_(libro_id, fila.stock or 0, nuevo, fila.stock_minimo)
+        else:
+            fila = bloqueadas[(libro_id, punto_venta_id)]
+            nueva = (libro_id, punto_venta_id) in faltantes
+            cambios.pv(libro_id, punto_venta_id, None if nueva else fila.stock or 0, nuevo, fila.stock_minimo)
+        fila.stock = nuevo
+    cambios.aplicar(db)
+
+    # Movimientos apareados: salida en el origen y entrada en el destino
+    referencia = uuid.uuid4().hex[:12]
+    movimientos_pv, movimientos_almacen = [], []
+    for item in items:
+        nota = (f"Transferencia {referencia}: {_lugar(item.desde_punto_venta_id)} → "
+                f"{_lugar(item.hacia_punto_venta_id)}" + (f". {observaciones}" if observaciones else ""))
+        for punto_venta_id, tipo in ((item.desde_punto_venta_id, TipoMovimiento.salida),
+                                     (item.hacia_punto_venta_id, TipoMovimiento.entrada)):
+            movimiento = {"tipo": tipo, "cantidad": item.cantidad, "usuario_id": usuario_id, "observaciones": nota}
+            if punto_venta_id is None:
+                movimiento["inventario_id"] = almacen[item.libro_id].id_inventario
+                movimientos_almacen.append(movimiento)
+            else:
+                movimiento["inventario_pv_id"] = bloqueadas[(item.libro_id, punto_venta_id)].id_inventario
+                movimientos_pv.append(movimiento)
+    if movimientos_pv:
+        db.execute(insert(MovimientoPV), movimientos_pv)
+    if movimientos_almacen:
+        db.execute(insert(MovimientoLibro), movimientos_almacen)
+
+    db.commit()
+    return {"referencia": referencia, "items": resultados}
+
+
+# ============================================================
+# TRANSFERIR (con reintentos)
+# ============================================================
+def transferir(db: Session, items: list, usuario_id: Optional[int] = None, observaciones: Optional[str] = None) -> dict:
+    """Aplica el lote (commit incluido) y devuelve la referencia y el stock resultante por ítem."""
+    global reintentos
+
+    _validar(db, items, usuario_id)
+    for intento in range(TRANSFERENCIA_REINTENTOS + 1):
+        try:
+            return _intento(db, items, usuario_id, observaciones)
+        except (_Reintentar, DBAPIError) as exc:
+            db.rollback()
+            if isinstance(exc, DBAPIError) and not es_contencion(exc):
+                raise
+            if intento == TRANSFERENCIA_REINTENTOS:
+                break
+            reintentos += 1
+            time.sleep(TRANSFERENCIA_ESPERA_S * 2 ** intento * (0.5 + random.random()))
+    raise HTTPException(status_code=503, detail="Demasiada contención sobre el inventario, reintentá en unos segundos")
@@ -1,27 +1,53 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
+// Cabecera con el token de sesión (si el login lo entregó)
+function authHeaders(extra = {}) {
+  const token = localStorage.getItem("token");
+  return token ? { ...extra, Authorization: `Bearer ${token}` } : extra;
+}
+
 // ===============================
 // CARGAR RESUMEN GLOBAL
 // ===============================
+// Los totales llegan ya calculados por el servidor en una sola respuesta
 async function cargarResumen() {
   try {
-    const resPV = await fetch(`${API_BASE}/puntos-venta/`);
-    const puntos = await resPV.json();
-
-    const resUsers = await fetch(`${API_BASE}/usuarios/`);
-    const users = await resUsers.json();
-
-    const resInv = await fetch(`${API_BASE}/inventario-pv/`);
-    const inventarioPV = await resInv.json();
-
-    // Calcular la suma total del stock
-    const stockTotal = inventarioPV.reduce((sum, item) => sum + item.stock, 0);
-
-    document.getElementById("resumen-locales").textContent = puntos.length;
-    document.getElementById("resumen-usuarios").textContent = users.length;
-    
-    // Usar el stock total calculado
-    document.getElementById("resumen-stock").textContent = stockTotal; 
+    const res = await fetch(`${API_BASE}/panel/resumen`, { headers: authHeaders() });
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const resumen = await res.json();
+
+    const bajoMinimo = resumen.bajo_minimo;
+    const movimientos = resumen.movimientos_recientes;
+
+    document.getElementById("resumen-locales").textContent = resumen.puntos_venta;
+    document.getElementById("resumen-usuarios").textContent = resumen.usuarios;
+    document.getElementById("resumen-stock").textContent = resumen.stock_puntos_venta;
+    document.getElementById("resumen-valor").textContent =
+      "$" + resumen.valor_puntos_venta.toLocaleString("es-CL");
+    document.getElementById("resumen-bajo-minimo").textContent =
+      bajoMinimo.almacen + bajoMinimo.punto_venta + bajoMinimo.materia_prima;
+    document.getElementById("resumen-movimientos").textContent =
+      movimientos.almacen + movimientos.punto_venta;
 
   } catch (e) {
     console.error("Error cargando resumen:", e);
@@ -33,7 +59,7 @@ async function cargarResumen() {
 // ===============================
 async function cargarAlertasLibros() { // ➡️ FUNCIÓN RENOMBRADA PARA CLARIDAD
   try {
-    const res = await fetch(`${API_BASE}/inventario/stock-bajo`);
+    const res = await fetch(`${API_BASE}/alertas/stock-bajo?origen=almacen&origen=punto_venta`);
     const alertas = await res.json();
 
     const ul = document.getElementById("alerta-libros");
@@ -47,7 +73,7 @@ async function cargarAlertasLibros() { // ➡️ FUNCIÓN RENOMBRADA PARA CLARID
     alertas.forEach(a => {
       // El enlace lleva a la gestión de inventario
       ul.innerHTML += `
-        <li>${a.libro} — Stock: ${a.stock} (Min: ${a.stock_minimo})</li>
+        <li>${a.nombre} (${a.punto_venta ?? "Almacén"}) — Stock: ${a.stock} (Min: ${a.stock_minimo})</li>
       `;
     });
 
@@ -61,14 +87,13 @@ async function cargarAlertasLibros() { // ➡️ FUNCIÓN RENOMBRADA PARA CLARID
 // ===============================
 async function cargarAlertasMP() { 
   try {
-    const res = await fetch(`${API_BASE}/materias_primas/`);
-    const materiasPrimas = await res.json();
+    // El servidor devuelve solo las materias primas bajo su mínimo
+    const res = await fetch(`${API_BASE}/alertas/stock-bajo?origen=materia_prima`);
+    const alertasMP = await res.json();
 
     const ul = document.getElementById("alerta-materias-primas");
     ul.innerHTML = "";
 
-    const alertasMP = materiasPrimas.filter(mp => mp.stock_actual < mp.stock_minimo);
-
     if (!alertasMP.length) {
       ul.innerHTML = "<li>No hay alertas de stock.</li>";
       return;
@@ -77,7 +102,7 @@ async function cargarAlertasMP() {
     alertasMP.forEach(mp => {
       // El enlace lleva a la gestión de materias primas
       ul.innerHTML += `
-        <li>${mp.nombre} — Stock: ${mp.stock_actual} (Min: ${mp.stock_minimo})</li>
+        <li>${mp.nombre} — Stock: ${mp.stock} (Min: ${mp.stock_minimo})</li>
       `;
     });
 
@@ -86,13 +111,42 @@ async function cargarAlertasMP() {
   }
 }
 
+// ===============================
+// ESCUCHAR CRUCES DE UMBRAL (LONG-POLL)
+// ===============================
+// Cada petición queda abierta hasta que algún stock cruza su mínimo (o vence
+// la espera); recién ahí se recargan las alertas, sin sondear tablas completas.
+async function escucharAlertas() {
+  let ultimo = null;
+
+  while (true) {
+    try {
+      const url = ultimo === null
+        ? `${API_BASE}/alertas/eventos`
+        : `${API_BASE}/alertas/eventos?desde=${ultimo}&espera=25`;
+      const res = await fetch(url);
+      const data = await res.json();
+
+      if (ultimo !== null && (data.eventos.length || data.reiniciar)) {
+        cargarResumen();
+        cargarAlertasLibros();
+        cargarAlertasMP();
+      }
+      ultimo = data.ultimo;
+
+    } catch (e) {
+      console.error("Error escuchando alertas:", e);
+      await new Promise(r => setTimeout(r, 5000));
+    }
+  }
+}
+
 // ===============================
 // CARGAR TABLA DE PUNTOS DE VENTA
 // ===============================
 async function cargarPuntosVentaAdmin() {
   try {
-    const res = await fetch(`${API_BASE}/puntos-venta/`);
-    const data = await res.json();
+    const data = await traerTodo(`${API_BASE}/puntos-venta/`);
 
     const tbody = document.getElementById("tabla-admin-pv");
     if (!tbody) return;
@@ -135,4 +189,5 @@ document.addEventListener("DOMContentLoaded", () => {
   cargarAlertasLibros(); 
   cargarAlertasMP();
   cargarPuntosVentaAdmin();
+  escucharAlertas();
 });
@@ -1,5 +1,25 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 // ================================
 // CARGAR PUNTOS DE VENTA (CREAR)
 // ================================
@@ -8,8 +28,7 @@ async function cargarPuntosVentaEnSelect() {
   sel.innerHTML = `<option value="">Seleccionar...</option>`;
 
   try {
-    const res = await fetch(`${API_BASE}/puntos-venta/`);  // FIX ✔
-    const tiendas = await res.json();
+    const tiendas = await traerTodo(`${API_BASE}/puntos-venta/`);
     tiendas.forEach(t => {
       sel.innerHTML += `<option value="${t.id_punto_venta}">${t.nombre}</option>`;
     });
@@ -26,8 +45,7 @@ async function cargarPuntosVentaEnSelectEditar() {
   sel.innerHTML = `<option value="">Seleccionar...</option>`;
 
   try {
-    const res = await fetch(`${API_BASE}/puntos-venta/`); // FIX ✔
-    const tiendas = await res.json();
+    const tiendas = await traerTodo(`${API_BASE}/puntos-venta/`);
     tiendas.forEach(t => {
       sel.innerHTML += `<option value="${t.id_punto_venta}">${t.nombre}</option>`;
     });
@@ -43,12 +61,13 @@ async function cargarUsuarios(q = "") {
   const tbody = document.getElementById("tabla-usuarios");
   tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>";
 
-  let url = `${API_BASE}/usuarios/`;
-  if (q) url += `?q=${encodeURIComponent(q)}`;
+  // Con búsqueda: resultados por relevancia (sin importar tildes)
+  const url = q
+    ? `${API_BASE}/usuarios/buscar?q=${encodeURIComponent(q)}&limite=100`
+    : `${API_BASE}/usuarios/`;
 
   try {
-    const res = await fetch(url);
-    const data = await res.json();
+    const data = await traerTodo(url);
 
     tbody.innerHTML = "";
 
@@ -1,4 +1,24 @@
 const API_BASE = "http://127.0.0.1:8000";
+
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
 const selectPV = document.getElementById("selectPV");
 
 // PANEL Y MODAL
@@ -10,8 +30,7 @@ const libroSelect = document.getElementById("libroSelect");
 // CARGAR PUNTOS DE VENTA
 // ===================================================
 async function cargarPuntosVenta() {
-  const res = await fetch(`${API_BASE}/puntos-venta/`);
-  const pvs = await res.json();
+  const pvs = await traerTodo(`${API_BASE}/puntos-venta/`);
 
   pvs.forEach((pv) => {
     selectPV.innerHTML += `<option value="${pv.id_punto_venta}">${pv.nombre}</option>`;
@@ -39,8 +58,7 @@ async function cargarInventario(q = "") {
     panelAgregarPV.style.display = "none";
   }
 
-  const res = await fetch(url);
-  const items = await res.json();
+  const items = await traerTodo(url);
 
   tbody.innerHTML = "";
 
@@ -70,8 +88,7 @@ async function cargarInventario(q = "") {
 // MODAL — ABRIR
 // ===================================================
 async function abrirModalAgregar() {
-  const res = await fetch(`${API_BASE}/libros/`);
-  const libros = await res.json();
+  const libros = await traerTodo(`${API_BASE}/libros/`);
 
   libroSelect.innerHTML = "";
   libros.forEach((l) => {
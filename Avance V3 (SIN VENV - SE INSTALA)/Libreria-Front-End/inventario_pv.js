@@ -1,5 +1,25 @@
 const API = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 const tablaPV = document.getElementById("tabla-pv");
 
 // ============================
@@ -9,8 +29,7 @@ async function cargarInventarioPV() {
   tablaPV.innerHTML = "<tr><td colspan='5'>Cargando...</td></tr>";
 
   try {
-    const res = await fetch(`${API}/inventario-pv/`);
-    const data = await res.json();
+    const data = await traerTodo(`${API}/inventario-pv/`);
 
     if (!data.length) {
       tablaPV.innerHTML = "<tr><td colspan='5'>Sin resultados</td></tr>";
@@ -65,8 +84,7 @@ function cerrarModal() {
 async function cargarLibros() {
   selLibro.innerHTML = "";
 
-  const res = await fetch(`${API}/libros/`);
-  const datos = await res.json();
+  const datos = await traerTodo(`${API}/libros/`);
 
   datos.forEach(l => {
     selLibro.innerHTML += `<option value="${l.id_libro}">${l.nombre}</option>`;
@@ -77,8 +95,7 @@ async function cargarLibros() {
 async function cargarPuntosVenta() {
   selPV.innerHTML = "";
 
-  const res = await fetch(`${API}/puntos-venta/`);
-  const datos = await res.json();
+  const datos = await traerTodo(`${API}/puntos-venta/`);
 
   datos.forEach(p => {
     selPV.innerHTML += `<option value="${p.id_punto_venta}">${p.nombre}</option>`;
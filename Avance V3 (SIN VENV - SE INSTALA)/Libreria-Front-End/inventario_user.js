@@ -2,6 +2,41 @@ console.log("Inventario User JS cargado ✔");
 
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
+// Token de sesión guardado en el login: el backend limita al vendedor a su punto de venta
+function authHeaders(extra = {}) {
+  const token = localStorage.getItem("token");
+  return token ? { ...extra, Authorization: `Bearer ${token}` } : extra;
+}
+
+// Token vencido o revocado: volver al login
+function sesionExpirada(resp) {
+  if (resp.status !== 401) return false;
+  alert("Tu sesión expiró. Ingresá nuevamente.");
+  localStorage.removeItem("token");
+  window.location.href = "index.html";
+  return true;
+}
+
 // Obtener el punto de venta asignado al usuario
 const puntoVentaID = localStorage.getItem("punto_venta_id");
 
@@ -17,16 +52,9 @@ async function cargarInventarioUser(q = "") {
   tbody.innerHTML = "<tr><td colspan='4'>Cargando...</td></tr>";
 
   try {
-    let url = `${API_BASE}/inventario?punto_venta=${puntoVentaID}`;
-    if (q) url += `&q=${encodeURIComponent(q)}`;
-
-    const resp = await fetch(url);
-    if (!resp.ok) {
-      tbody.innerHTML = "<tr><td colspan='4'>Error al cargar inventario</td></tr>";
-      return;
-    }
-
-    const data = await resp.json();
+    // La búsqueda la resuelve el backend sobre todo el inventario del punto de venta
+    const filtro = q ? `?q=${encodeURIComponent(q)}` : "";
+    const data = await traerTodo(`${API_BASE}/inventario-pv/por-pv/${puntoVentaID}${filtro}`, { headers: authHeaders() });
 
     if (!data.length) {
       tbody.innerHTML = "<tr><td colspan='4'>No hay stock registrado</td></tr>";
@@ -53,8 +81,11 @@ async function cargarInventarioUser(q = "") {
     });
 
   } catch (err) {
+    if (err.respuesta && sesionExpirada(err.respuesta)) return;
     console.error(err);
-    tbody.innerHTML = "<tr><td colspan='4'>Error de conexión</td></tr>";
+    tbody.innerHTML = err.respuesta
+      ? "<tr><td colspan='4'>Error al cargar inventario</td></tr>"
+      : "<tr><td colspan='4'>Error de conexión</td></tr>";
   }
 }
 
@@ -67,12 +98,16 @@ async function vender(idInventario, stockActual) {
   }
 
   try {
-    const resp = await fetch(`${API_BASE}/inventario/${idInventario}/vender`, {
-      method: "PATCH",
+    const resp = await fetch(`${API_BASE}/inventario-pv/${idInventario}/vender`, {
+      method: "POST",
+      headers: authHeaders({ "Content-Type": "application/json" }),
+      body: JSON.stringify({ cantidad: 1 })
     });
+    if (sesionExpirada(resp)) return;
 
     if (!resp.ok) {
-      alert("Error al registrar la venta.");
+      const err = await resp.json();
+      alert("Error al registrar la venta: " + (err.detail || "Error desconocido"));
       return;
     }
 
@@ -1,5 +1,25 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 /* ============================================================
    ELIMINAR LIBRO (IGUAL QUE TU VERSIÓN)
 ============================================================ */
@@ -109,14 +129,13 @@ async function cargarLibros(q = "") {
 
     tbody.innerHTML = "<tr><td colspan='5'>Cargando libros...</td></tr>";
 
-    let url = `${API_BASE}/libros/`;
-    if (q) url += `?q=${encodeURIComponent(q)}`;
+    // Con búsqueda: resultados por relevancia (sin importar tildes)
+    const url = q
+        ? `${API_BASE}/libros/buscar?q=${encodeURIComponent(q)}&limite=100`
+        : `${API_BASE}/libros/`;
 
     try {
-        const res = await fetch(url);
-        if (!res.ok) throw new Error("Error al obtener los libros");
-
-        const libros = await res.json();
+        const libros = await traerTodo(url);
         tbody.innerHTML = "";
 
         if (!libros.length) {
@@ -16,8 +16,10 @@ document.getElementById("loginForm").addEventListener("submit", async function (
     if (response.ok) {
       alert("✅ " + data.message);
 
-      // Guardar rol
+      // Guardar rol, usuario y token de sesión (se envía como Authorization: Bearer)
       localStorage.setItem("userRole", data.role);
+      localStorage.setItem("userId", data.usuario_id);
+      localStorage.setItem("token", data.token);
 
       // Guardar PV con nombre estandarizado
       if (data.role === "vendedor") {
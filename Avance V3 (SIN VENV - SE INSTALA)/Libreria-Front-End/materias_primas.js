@@ -1,5 +1,25 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 // ================================
 // CARGAR MATERIAS PRIMAS
 // ================================
@@ -11,8 +31,7 @@ async function cargarMateriasPrimas(q = "") {
   if (q) url += `?q=${encodeURIComponent(q)}`;
 
   try {
-    const res = await fetch(url);
-    const items = await res.json();
+    const items = await traerTodo(url);
     mostrarMateriasPrimas(items, tbody);
   } catch (err) {
     console.error("Error al cargar materias primas", err);
@@ -61,8 +80,7 @@ function abrirModalEntrada() {
   const modal = document.getElementById("modal-entrada");
   modal.classList.remove("hidden");
 
-  fetch(`${API_BASE}/materias_primas/`)
-    .then(res => res.json())
+  traerTodo(`${API_BASE}/materias_primas/`)
     .then(items => {
       const sel = document.getElementById("entrada-mp");
       sel.innerHTML = "";
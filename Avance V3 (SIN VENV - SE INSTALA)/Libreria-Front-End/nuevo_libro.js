@@ -1,15 +1,32 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 // Cargar materias primas
 async function cargarMateriasPrimas() {
   const cont = document.getElementById("materias-primas-list");
   cont.innerHTML = "<p class='muted small'>Cargando materias primas...</p>";
 
   try {
-    const res = await fetch("http://127.0.0.1:8000/materias_primas/");
-    if (!res.ok) throw new Error("Error al obtener materias primas");
-
-    const materias = await res.json();
+    const materias = await traerTodo(`${API_BASE}/materias_primas/`);
 
     if (!Array.isArray(materias)) {
       throw new Error("Respuesta inválida del servidor");
@@ -1,12 +1,31 @@
 const API = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 // Cargar puntos de venta
 async function cargarPuntosVenta() {
   const sel = document.getElementById("selectPV");
   sel.innerHTML = `<option value="">Seleccionar...</option>`;
 
-  const res = await fetch(`${API}/puntos-venta/`);
-  const data = await res.json();
+  const data = await traerTodo(`${API}/puntos-venta/`);
 
   data.forEach(pv => {
     sel.innerHTML += `<option value="${pv.id_punto_venta}">${pv.nombre}</option>`;
@@ -1,5 +1,25 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
 // ==================================================
 // CARGAR Y MOSTRAR PUNTOS DE VENTA
 // ==================================================
@@ -16,13 +36,8 @@ async function cargarPuntosVenta(q = "") {
   }
 
   try {
-    const res = await fetch(url);
-    if (!res.ok) {
-      // Manejo de error si la API no está disponible o falla, sin usar datos de ejemplo.
-      throw new Error(`Error al obtener datos: ${res.status}`);
-    }
-
-    const puntosVenta = await res.json();
+    // Sin datos de ejemplo: si la API falla, traerTodo lanza el error
+    const puntosVenta = await traerTodo(url);
     mostrarPuntosVenta(puntosVenta, tbody);
 
   } catch (e) {
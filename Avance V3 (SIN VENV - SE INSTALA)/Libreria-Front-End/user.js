@@ -1,12 +1,46 @@
 const API_BASE = "http://127.0.0.1:8000";
 
+// Listados paginados: el backend entrega de a `limit` filas y el cursor de la
+// página siguiente en la cabecera X-Next-Cursor; se recorren todas las páginas
+async function traerTodo(url, opciones = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  const filas = [];
+  let cursor = null;
+  do {
+    const pagina = `${url}${separador}limit=1000` + (cursor ? `&after=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(pagina, opciones);
+    if (!res.ok) {
+      const error = new Error(`Error al obtener ${url}: ${res.status}`);
+      error.respuesta = res;
+      throw error;
+    }
+    filas.push(...await res.json());
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return filas;
+}
+
+// Token de sesión guardado en el login: el backend limita al vendedor a su punto de venta
+function authHeaders(extra = {}) {
+  const token = localStorage.getItem("token");
+  return token ? { ...extra, Authorization: `Bearer ${token}` } : extra;
+}
+
+// Token vencido o revocado: volver al login
+function sesionExpirada(resp) {
+  if (resp.status !== 401) return false;
+  alert("Tu sesión expiró. Ingresá nuevamente.");
+  localStorage.removeItem("token");
+  window.location.href = "index.html";
+  return true;
+}
+
 let tiendasCache = {};
 
 // Cargar tiendas
 async function cargarTiendas() {
   try {
-    const res = await fetch(`${API_BASE}/puntos-venta/`);
-    const tiendas = await res.json();
+    const tiendas = await traerTodo(`${API_BASE}/puntos-venta/`);
     tiendasCache = {};
     tiendas.forEach(t => tiendasCache[t.id_punto_venta] = t.nombre);
   } catch (e) {
@@ -24,8 +58,7 @@ async function cargarInventarioUsuario() {
   }
 
   try {
-    const res = await fetch(`${API_BASE}/inventario-pv/por-pv/${pvId}`);
-    const data = await res.json();
+    const data = await traerTodo(`${API_BASE}/inventario-pv/por-pv/${pvId}`, { headers: authHeaders() });
 
     const tbody = document.getElementById("tabla-inv-user");
     tbody.innerHTML = "";
@@ -59,6 +92,7 @@ async function cargarInventarioUsuario() {
     });
 
   } catch (error) {
+    if (error.respuesta && sesionExpirada(error.respuesta)) return;
     console.error(error);
     alert("Error cargando inventario");
   }
@@ -75,12 +109,13 @@ async function vender(idInv, stockActual) {
   }
 
   try {
-    // El delta es -1, resta una unidad de stock en el inventario PV
-    const res = await fetch(`${API_BASE}/inventario-pv/${idInv}/ajustar`, { 
+    // Venta atómica de 1 unidad en el inventario PV (registra el movimiento)
+    const res = await fetch(`${API_BASE}/inventario-pv/${idInv}/vender`, { 
       method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ delta: -1 })
+      headers: authHeaders({ "Content-Type": "application/json" }),
+      body: JSON.stringify({ cantidad: 1 })
     });
+    if (sesionExpirada(res)) return;
     
     if (!res.ok) {
          // Si el backend devuelve un error (por ejemplo, stock negativo)
@@ -312,3 +312,70 @@ CREATE TABLE movimientos_mp (
   FOREIGN KEY (mp_id) REFERENCES materias_primas(id_mp),
   FOREIGN KEY (usuario_id) REFERENCES usuarios(id_usuario)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+
+CREATE TABLE movimientos_pv (
+  id_mov_pv INT NOT NULL AUTO_INCREMENT,
+  inventario_pv_id INT NOT NULL,
+  tipo ENUM('entrada','salida','venta','ajuste') NOT NULL,
+  cantidad INT NOT NULL,
+  usuario_id INT DEFAULT NULL,
+  fecha_movimiento DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  observaciones TEXT,
+  PRIMARY KEY (id_mov_pv),
+  FOREIGN KEY (inventario_pv_id) REFERENCES inventario_pv(id_inventario),
+  FOREIGN KEY (usuario_id) REFERENCES usuarios(id_usuario)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+
+-- Resumen materializado de stock (lo mantiene la API; ver resumen_stock.py).
+-- Quedan vacías: `python -m migraciones aplicar` (o el arranque de la API) las
+-- puebla desde el inventario (migración v0009)
+CREATE TABLE resumen_stock_libros (
+  libro_id INT NOT NULL,
+  stock_global INT NOT NULL DEFAULT 0,
+  stock_pv INT NOT NULL DEFAULT 0,
+  filas_bajo_minimo INT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (libro_id),
+  FOREIGN KEY (libro_id) REFERENCES libros(id_libro) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+
+CREATE TABLE resumen_stock_pv (
+  punto_venta_id INT NOT NULL,
+  stock INT NOT NULL DEFAULT 0,
+  filas_bajo_minimo INT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (punto_venta_id),
+  FOREIGN KEY (punto_venta_id) REFERENCES puntos_venta(id_punto_venta) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+
+-- Alertas de stock bajo: columnas generadas e indexadas (ver alertas_stock.py)
+ALTER TABLE inventario_libros
+  ADD COLUMN stock_minimo INT DEFAULT NULL,
+  ADD COLUMN bajo_minimo TINYINT(1) AS (stock_minimo IS NOT NULL AND stock < stock_minimo) STORED,
+  ADD INDEX ix_inventario_libros_bajo_minimo (bajo_minimo);
+
+ALTER TABLE inventario_pv
+  ADD COLUMN bajo_minimo TINYINT(1) AS (stock_minimo IS NOT NULL AND COALESCE(stock, 0) < stock_minimo) STORED,
+  ADD INDEX ix_inventario_pv_bajo_minimo (bajo_minimo, id_punto_venta);
+
+ALTER TABLE materias_primas
+  ADD COLUMN bajo_minimo TINYINT(1) AS (stock_actual < stock_minimo) STORED,
+  ADD INDEX ix_materias_primas_bajo_minimo (bajo_minimo);
+
+
+-- Índices de las consultas más frecuentes (migración v0003 de la API; sobre
+-- una base creada con este script `python -m migraciones aplicar` los detecta
+-- y no los repite)
+ALTER TABLE libros
+  ADD INDEX ix_libros_nombre (nombre);
+
+ALTER TABLE inventario_libros
+  ADD UNIQUE KEY uk_inventario_libros_libro (libro_id);
+
+ALTER TABLE movimientos_libros
+  ADD INDEX ix_movimientos_libros_fecha (fecha_movimiento),
+  ADD INDEX ix_movimientos_libros_tipo_fecha (tipo, fecha_movimiento);